@@ -5,7 +5,6 @@ Initializes Flask, CORS, Flask-SQLAlchemy, and registers blueprints.
 import os
 import ipaddress
 import socket
-import mimetypes
 from urllib import request as urllib_request
 from urllib.error import URLError, HTTPError
 from urllib.parse import urlparse
@@ -44,6 +43,7 @@ def _is_transient_db_disconnect(error):
         "server closed the connection unexpectedly",
         "could not receive data from server",
         "connection reset by peer",
+        "no database connection available",
     )
     return any(marker in message for marker in markers)
 
@@ -134,6 +134,10 @@ def create_app(config_name=None):
     db.init_app(app)
     limiter.init_app(app)
 
+    # Hand the request-scoped psycopg connection (backend.db.get_db) back to the pool.
+    from .db import release_request_db
+    app.teardown_appcontext(release_request_db)
+
     @app.after_request
     def set_security_headers(response):
         response.headers["X-Content-Type-Options"] = "nosniff"
@@ -263,199 +267,59 @@ def create_app(config_name=None):
     @app.route("/uploads/templates/<path:filename>")
     def send_template_image(filename):
         from pathlib import Path
-        from flask import send_from_directory, make_response
-        import os
+        from .services.image_variant_service import serve_upload
         templates_dir = Path(app.root_path) / "uploads" / "templates"
-        file_path = templates_dir / filename
-        if file_path.is_file():
-            return send_from_directory(str(templates_dir), filename)
-        # File missing (ephemeral FS) — serve from DB
-        from .models import Template as TemplateModel
-        url_path = f"/uploads/templates/{filename}"
-        tmpl = TemplateModel.query.filter(
-            (TemplateModel.image_url == url_path) | (TemplateModel.thumbnail_url == url_path)
-        ).first()
-        if tmpl and tmpl.image_data:
-            resp = make_response(tmpl.image_data)
-            resp.headers['Content-Type'] = tmpl.image_mime or 'image/png'
-            resp.headers['Cache-Control'] = 'public, max-age=86400'
-            # Re-cache to disk so subsequent requests are fast
-            try:
-                os.makedirs(str(templates_dir), exist_ok=True)
-                with open(str(file_path), 'wb') as fp:
-                    fp.write(tmpl.image_data)
-            except Exception:
-                pass
-            return resp
-        return jsonify({'error': 'Image not found'}), 404
+        resp = serve_upload("templates", filename, [templates_dir], default_mimetype="image/png")
+        if resp is None:
+            return jsonify({'error': 'Image not found'}), 404
+        return resp
 
     # Serve uploaded gallery images at /uploads/gallery/<filename>
     # Falls back to database image_data when file is missing (ephemeral FS)
     @app.route("/uploads/gallery/<path:filename>")
     def send_gallery_image(filename):
         from pathlib import Path
-        from flask import send_from_directory, make_response
-        import os
+        from .services.image_variant_service import serve_upload
         gallery_dir = Path(app.root_path) / "uploads" / "gallery"
-        file_path = gallery_dir / filename
-        if file_path.is_file():
-            return send_from_directory(str(gallery_dir), filename)
-        from .models import GalleryPhoto
-        url_path = f"/uploads/gallery/{filename}"
-        photo = GalleryPhoto.query.filter(GalleryPhoto.image_url == url_path).first()
-        if photo and photo.image_data:
-            resp = make_response(photo.image_data)
-            resp.headers['Content-Type'] = photo.image_mime or 'image/png'
-            resp.headers['Cache-Control'] = 'public, max-age=86400'
-            try:
-                os.makedirs(str(gallery_dir), exist_ok=True)
-                with open(str(file_path), 'wb') as fp:
-                    fp.write(photo.image_data)
-            except Exception:
-                pass
-            return resp
-        return jsonify({'error': 'Image not found'}), 404
-
-    # Serve uploaded product images at /uploads/products/<filename>
-    # First tries database blob storage (image_data), falls back to filesystem
+        resp = serve_upload("gallery", filename, [gallery_dir], default_mimetype="image/png")
+        if resp is None:
+            return jsonify({'error': 'Image not found'}), 404
+        return resp
+
+    # Serve uploaded product images and videos at /uploads/products/<filename>
+    # Local files (configured uploads root, then legacy backend/uploads) win over the
+    # database blob, which is restored to disk on first use. Videos rely on Range support.
     @app.route("/uploads/products/<path:filename>")
     def send_product_image(filename):
         from pathlib import Path
-        from flask import send_from_directory, send_file
-        import io
-        from backend.db import get_db, _use_mysql
-        
-        # Try to find image_data in database by filename/URL variants first.
-        try:
-            conn = get_db()
-            cursor = conn.cursor()
-            is_mysql = _use_mysql()
-            placeholder = "%s" if is_mysql else "?"
-
-            url_variants = [
-                f"/uploads/products/{filename}",
-                f"uploads/products/{filename}",
-                filename,
-            ]
-
-            cursor.execute(
-                f"SELECT image_data, media_type FROM product_images WHERE image_url = {placeholder} OR image_url = {placeholder} OR image_url = {placeholder} LIMIT 1",
-                tuple(url_variants),
-            )
-            row = cursor.fetchone()
-            conn.close()
-            if row:
-                row_dict = dict(row)
-                image_data = row_dict.get("image_data")
-                media_type = str(row_dict.get("media_type") or "").strip().lower()
-                if media_type in {"image", "video", ""}:
-                    inferred_mime, _ = mimetypes.guess_type(filename)
-                    media_type = inferred_mime or "image/jpeg"
-                if image_data:
-                    return send_file(
-                        io.BytesIO(image_data),
-                        mimetype=media_type,
-                        as_attachment=False,
-                        download_name=filename
-                    )
-        except Exception as e:
-            # Log and continue to filesystem fallback
-            app.logger.debug(f"Error fetching product image from DB: {e}")
-        
-        # Fallback to filesystem (configured uploads root first, then legacy backend/uploads).
+        from .services.image_variant_service import serve_upload
         configured_upload_root = app.config.get("UPLOAD_FOLDER") or str(Path(app.root_path) / "uploads")
         candidate_dirs = [
             Path(str(configured_upload_root)) / "products",
             Path(app.root_path) / "uploads" / "products",
         ]
-        seen_dirs = set()
-        for products_dir in candidate_dirs:
-            normalized_dir = str(products_dir.resolve())
-            if normalized_dir in seen_dirs:
-                continue
-            seen_dirs.add(normalized_dir)
-            if (products_dir / filename).is_file():
-                return send_from_directory(str(products_dir), filename)
-
-        return jsonify({'error': 'Image not found'}), 404
+        resp = serve_upload("products", filename, candidate_dirs, default_mimetype="image/jpeg")
+        if resp is None:
+            return jsonify({'error': 'Image not found'}), 404
+        return resp
 
     # Serve uploaded review images at /uploads/reviews/<filename>
     # Falls back to database image_data when file is missing (Render ephemeral FS)
     @app.route("/uploads/reviews/<path:filename>")
     def send_review_image(filename):
         from pathlib import Path
-        from flask import send_from_directory, make_response
+        from flask import make_response
         import base64
-        import os
+        from .services.media_service import serve_media
 
         configured_upload_root = app.config.get("UPLOAD_FOLDER") or str(Path(app.root_path) / "uploads")
-        configured_reviews_dir = Path(str(configured_upload_root)) / "reviews"
-        legacy_reviews_dir = Path(app.root_path) / "uploads" / "reviews"
-
-        candidate_dirs = []
-        for directory in (configured_reviews_dir, legacy_reviews_dir):
-            resolved = directory.resolve()
-            if resolved not in candidate_dirs:
-                candidate_dirs.append(resolved)
-
-        for directory in candidate_dirs:
-            file_path = directory / filename
-            if file_path.is_file():
-                return send_from_directory(str(directory), filename)
-
-        # File missing (ephemeral FS) — look up blob in DB
-        from .db import get_db
-        url_path = f"/uploads/reviews/{filename}"
-        try:
-            conn = get_db()
-            cursor = conn.cursor()
-            normalized_candidates = [
-                url_path,
-                f"uploads/reviews/{filename}",
-                filename,
-            ]
-            cursor.execute(
-                "SELECT review_image_data, review_image_mime FROM customer_reviews WHERE review_image_url = %s LIMIT 1",
-                (url_path,),
-            )
-            row = cursor.fetchone()
-
-            if not row:
-                like_value = f"%/uploads/reviews/{filename}"
-                cursor.execute(
-                    "SELECT review_image_data, review_image_mime FROM customer_reviews WHERE review_image_url LIKE %s LIMIT 1",
-                    (like_value,),
-                )
-                row = cursor.fetchone()
-
-            if not row:
-                for candidate in normalized_candidates:
-                    cursor.execute(
-                        "SELECT review_image_data, review_image_mime FROM customer_reviews WHERE review_image_url = %s LIMIT 1",
-                        (candidate,),
-                    )
-                    row = cursor.fetchone()
-                    if row:
-                        break
-
-            conn.close()
-            if row and row["review_image_data"]:
-                data = bytes(row["review_image_data"])
-                mime = row["review_image_mime"] or "image/jpeg"
-                # Re-cache to disk for subsequent requests
-                try:
-                    cache_dir = candidate_dirs[0] if candidate_dirs else configured_reviews_dir
-                    os.makedirs(str(cache_dir), exist_ok=True)
-                    with open(str(cache_dir / filename), "wb") as fp:
-                        fp.write(data)
-                except Exception:
-                    pass
-                resp = make_response(data)
-                resp.headers["Content-Type"] = mime
-                resp.headers["Cache-Control"] = "public, max-age=86400"
-                return resp
-        except Exception as exc:
-            app.logger.warning("Review image DB fallback failed for %s: %s", filename, exc)
+        candidate_dirs = [
+            Path(str(configured_upload_root)) / "reviews",
+            Path(app.root_path) / "uploads" / "reviews",
+        ]
+        resp = serve_media("reviews", filename, candidate_dirs, default_mimetype="image/jpeg")
+        if resp is not None:
+            return resp
 
         # Return a transparent PNG placeholder to avoid ORB blocks on image requests.
         transparent_png = base64.b64decode(
@@ -558,6 +422,24 @@ def create_app(config_name=None):
                         db.session.commit()
                         app.logger.info(f"Added column: templates.{col}")
 
+            if "user_projects" in inspector.get_table_names():
+                project_existing = {c["name"] for c in inspector.get_columns("user_projects")}
+                project_additions = {
+                    "preview_hash": "VARCHAR(64)",
+                    "preview_mime": "VARCHAR(50)",
+                    "preview_data": "BYTEA",
+                    "thumbnail_data": "BYTEA",
+                    "version": "INTEGER NOT NULL DEFAULT 1",
+                    "filled_region_count": "INTEGER",
+                }
+                for col, col_type in project_additions.items():
+                    if col not in project_existing:
+                        db.session.execute(
+                            text(f"ALTER TABLE user_projects ADD COLUMN {col} {col_type}")
+                        )
+                        db.session.commit()
+                        app.logger.info(f"Added column: user_projects.{col}")
+
             if "gallery_photos" in inspector.get_table_names():
                 gallery_existing = {c["name"] for c in inspector.get_columns("gallery_photos")}
                 gallery_additions = {
@@ -566,6 +448,8 @@ def create_app(config_name=None):
                     "is_cover": "BOOLEAN DEFAULT FALSE",
                     "display_name": "VARCHAR(120)",
                     "hide_submitter_name": "BOOLEAN DEFAULT FALSE",
+                    "medium_url": "VARCHAR(500)",
+                    "thumbnail_url": "VARCHAR(500)",
                 }
                 for col, col_type in gallery_additions.items():
                     if col not in gallery_existing:
@@ -639,13 +523,85 @@ def create_app(config_name=None):
             db.session.rollback()
             app.logger.warning(f"Column type migration warning: {e}")
 
+    # Apply the raw-SQL schema (backend/db.py) once per worker at boot instead of
+    # on the first request. Set DB_MIGRATE_ON_BOOT=0 when `flask migrate-db` runs at deploy.
+    from .db import ensure_schema, run_migrations
+    if str(os.environ.get("DB_MIGRATE_ON_BOOT", "1")).strip().lower() not in {"0", "false", "no"}:
+        try:
+            run_migrations()
+        except Exception as e:
+            app.logger.warning(f"Schema migration warning: {e}")
+
+    @app.before_request
+    def _retry_schema_migration():
+        # Only does work if the database was unreachable when this worker booted.
+        try:
+            ensure_schema()
+        except Exception as e:
+            app.logger.warning(f"Schema migration retry failed: {e}")
+
+    @app.cli.command("migrate-db")
+    def migrate_db_command():
+        """Apply pending schema migrations for the raw-SQL tables."""
+        applied = run_migrations()
+        print("Schema migrated." if applied else "Schema already up to date.")
+
+    try:
+        from .routes.shop import handle_stripe_event
+    except ImportError:
+        handle_stripe_event = None
+    if handle_stripe_event is not None:
+        from .services.webhook_inbox_service import drain_stripe_webhook_inbox
+
+        @app.cli.command("drain-stripe-webhooks")
+        def drain_stripe_webhooks_command():
+            """Process every due event in the Stripe webhook inbox, then exit."""
+            total = 0
+            while True:
+                leased = drain_stripe_webhook_inbox(handle_stripe_event)
+                total += leased
+                if not leased:
+                    break
+            print(f"Processed {total} webhook event(s).")
+
     return app
 
 
+def _env_flag(name, default="1"):
+    return str(os.environ.get(name, default)).strip().lower() not in {"0", "false", "no"}
+
+
+def start_background_workers(app):
+    """Start the email outbox and Stripe webhook inbox threads for a serving process.
+
+    Called from backend/wsgi.py and `python -m backend.app`, never from
+    create_app, so importing the app (tests, CLI commands) does not drain the
+    outbox or process webhook events. Each thread first sends or processes
+    whatever a previous process left behind.
+    """
+    if app.config.get("TESTING"):
+        return
+    if _env_flag("EMAIL_OUTBOX"):
+        from .services.email_outbox_service import start_email_outbox_worker
+
+        start_email_outbox_worker(app)
+    if _env_flag("STRIPE_WEBHOOK_WORKER"):
+        try:
+            from .routes.shop import handle_stripe_event
+        except ImportError:
+            return
+        from .services.webhook_inbox_service import start_stripe_webhook_worker
+
+        start_stripe_webhook_worker(app, handle_stripe_event)
+
+
 app = create_app()
 
 
 if __name__ == "__main__":
+    # With the debug reloader, only the child process that serves requests runs the workers.
+    if not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_workers(app)
     app.run(
         host="0.0.0.0",
         port=int(app.config.get("PORT", os.environ.get("PORT", "5000"))),
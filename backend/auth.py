@@ -1,10 +1,23 @@
+import base64
+import hashlib
+import hmac
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from functools import wraps
 
 import jwt
 from flask import g, jsonify, request
 
+from .config import _env_int
+
+
+DEFAULT_TOKEN_CACHE_ENTRIES = 4096
+DEFAULT_CUSTOMER_CACHE_TTL_SECONDS = 15
+DEFAULT_CUSTOMER_CACHE_ENTRIES = 1024
+
 
 def _jwt_secret():
     configured = (os.environ.get("JWT_SECRET") or "").strip()
@@ -43,30 +56,154 @@ def create_token(subject, role=None, customer_id=None):
     return jwt.encode(payload, secret, algorithm="HS256")
 
 
+_token_cache_lock = threading.Lock()
+_token_cache = OrderedDict()
+
+
+def _token_cache_key(token, secret, issuer):
+    # Keyed by the secret and issuer too, so rotating either stops old entries from matching.
+    return hashlib.sha256(f"{secret}\0{issuer}\0{token}".encode("utf-8")).hexdigest()
+
+
 def decode_token(token):
+    """Verify an HS256 token and return its payload.
+
+    Verified payloads are kept in a bounded LRU keyed by a hash of the token
+    until the token's exp, so repeat requests with the same token skip the
+    signature check. Set AUTH_TOKEN_CACHE_ENTRIES=0 to disable.
+    """
     secret = _jwt_secret()
     issuer = os.environ.get("JWT_ISSUER", "sgcgartglass")
-    return jwt.decode(token, secret, algorithms=["HS256"], issuer=issuer)
+    max_entries = _env_int("AUTH_TOKEN_CACHE_ENTRIES", DEFAULT_TOKEN_CACHE_ENTRIES)
+    if max_entries <= 0:
+        return jwt.decode(token, secret, algorithms=["HS256"], issuer=issuer)
+
+    key = _token_cache_key(token, secret, issuer)
+    now = time.time()
+    with _token_cache_lock:
+        entry = _token_cache.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _token_cache.move_to_end(key)
+                return dict(entry[1])
+            del _token_cache[key]
+
+    payload = jwt.decode(token, secret, algorithms=["HS256"], issuer=issuer)
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        with _token_cache_lock:
+            _token_cache[key] = (expires_at, dict(payload))
+            _token_cache.move_to_end(key)
+            while len(_token_cache) > max_entries:
+                _token_cache.popitem(last=False)
+    return payload
+
+
+def clear_token_cache():
+    with _token_cache_lock:
+        _token_cache.clear()
+
+
+def _token_error_code(exc):
+    if isinstance(exc, jwt.ExpiredSignatureError):
+        return "token_expired"
+    if isinstance(exc, jwt.InvalidIssuerError):
+        return "invalid_issuer"
+    if isinstance(exc, jwt.DecodeError):
+        return "malformed_token"
+    return f"invalid_token: {type(exc).__name__}"
+
+
+def authenticate_request():
+    """Return (payload, error) for the current request's bearer token.
+
+    error is None on success, "missing_token", or the reason verification
+    failed. The result is kept on g so every decorator and helper in one
+    request shares a single verification.
+    """
+    cached = getattr(g, "_auth_result", None)
+    if cached is not None:
+        return cached
+
+    auth_header = (request.headers.get("Authorization") or "").strip()
+    token = auth_header.split(" ", 1)[1].strip() if auth_header.startswith("Bearer ") else ""
+    if not token:
+        result = (None, "missing_token")
+    else:
+        try:
+            result = (decode_token(token), None)
+        except jwt.PyJWTError as exc:
+            result = (None, _token_error_code(exc))
+    g._auth_result = result
+    if result[0] is not None:
+        g.auth_payload = result[0]
+    return result
+
+
+def optional_auth_payload():
+    """The verified payload for this request, or None when absent or invalid."""
+    return authenticate_request()[0]
+
+
+_customer_cache_lock = threading.Lock()
+_customer_cache = OrderedDict()
+
+
+def cached_customer(customer_id):
+    """fetch_customer_by_id with a short in-process TTL (AUTH_CUSTOMER_CACHE_TTL_SECONDS).
+
+    For read paths only. Anything that checks a password hash or must see a
+    just-written profile should call fetch_customer_by_id directly, and writes
+    call invalidate_cached_customer.
+    """
+    from .db import fetch_customer_by_id
+
+    ttl = _env_int("AUTH_CUSTOMER_CACHE_TTL_SECONDS", DEFAULT_CUSTOMER_CACHE_TTL_SECONDS)
+    if ttl <= 0 or customer_id is None:
+        return fetch_customer_by_id(customer_id)
+
+    key = str(customer_id)
+    now = time.monotonic()
+    with _customer_cache_lock:
+        entry = _customer_cache.get(key)
+        if entry is not None and entry[0] > now:
+            _customer_cache.move_to_end(key)
+            return dict(entry[1]) if entry[1] is not None else None
+
+    customer = fetch_customer_by_id(customer_id)
+    with _customer_cache_lock:
+        _customer_cache[key] = (now + ttl, dict(customer) if customer else None)
+        _customer_cache.move_to_end(key)
+        while len(_customer_cache) > max(1, _env_int("AUTH_CUSTOMER_CACHE_ENTRIES", DEFAULT_CUSTOMER_CACHE_ENTRIES)):
+            _customer_cache.popitem(last=False)
+    return customer
+
+
+def invalidate_cached_customer(customer_id=None):
+    """Drop one customer's cached record, or every record when none is given."""
+    with _customer_cache_lock:
+        if customer_id is None:
+            _customer_cache.clear()
+        else:
+            _customer_cache.pop(str(customer_id), None)
+
+
+def sign_value(value):
+    """Short HMAC for links that must work without an Authorization header, such as <img> sources."""
+    digest = hmac.new(_jwt_secret().encode("utf-8"), str(value).encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode("ascii")
+
+
+def verify_signed_value(value, signature):
+    return hmac.compare_digest(sign_value(value), str(signature or ""))
 
 
 def require_auth(handler):
     @wraps(handler)
     def wrapper(*args, **kwargs):
-        auth_header = request.headers.get("Authorization", "")
-        if not auth_header.startswith("Bearer "):
-            return jsonify({"error": "missing_token"}), 401
-        token = auth_header.split(" ", 1)[1].strip()
-        try:
-            payload = decode_token(token)
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "token_expired"}), 401
-        except jwt.InvalidIssuerError:
-            return jsonify({"error": "invalid_issuer"}), 401
-        except jwt.DecodeError:
-            return jsonify({"error": "malformed_token"}), 401
-        except jwt.PyJWTError as e:
-            return jsonify({"error": f"invalid_token: {type(e).__name__}"}), 401
-        g.auth_payload = payload
+        payload, error = authenticate_request()
+        if error:
+            return jsonify({"error": error}), 401
         return handler(*args, **kwargs)
 
     return wrapper
@@ -75,25 +212,24 @@ def require_auth(handler):
 def require_customer(handler):
     @wraps(handler)
     def wrapper(*args, **kwargs):
-        auth_header = request.headers.get("Authorization", "")
-        if not auth_header.startswith("Bearer "):
-            return jsonify({"error": "missing_token"}), 401
-        token = auth_header.split(" ", 1)[1].strip()
-        try:
-            payload = decode_token(token)
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "token_expired"}), 401
-        except jwt.InvalidIssuerError:
-            return jsonify({"error": "invalid_issuer"}), 401
-        except jwt.DecodeError:
-            return jsonify({"error": "malformed_token"}), 401
-        except jwt.PyJWTError as e:
-            return jsonify({"error": f"invalid_token: {type(e).__name__}"}), 401
-
+        payload, error = authenticate_request()
+        if error:
+            return jsonify({"error": error}), 401
         if payload.get("role") != "customer":
             return jsonify({"error": "forbidden"}), 403
+        return handler(*args, **kwargs)
+
+    return wrapper
 
-        g.auth_payload = payload
+
+def require_admin(handler):
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        payload, error = authenticate_request()
+        if error:
+            return jsonify({"error": error}), 401
+        if payload.get("role") == "customer":
+            return jsonify({"error": "forbidden"}), 403
         return handler(*args, **kwargs)
 
     return wrapper
@@ -1,12 +1,18 @@
 import os
 import threading
+import weakref
 import json
 import re
 import secrets
 import time
+from collections import deque
 from datetime import datetime, timedelta
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
+from flask import g, has_app_context
+
+from .utils.hyperloglog import HyperLogLog
+
 try:
     from .models import db as db
 except Exception:  # pragma: no cover
@@ -14,7 +20,14 @@ except Exception:  # pragma: no cover
 
 
 _schema_initialized = False
-_schema_init_lock = threading.Lock()
+# Re-entrant: run_migrations holds it while calling init_db(force=True).
+_schema_init_lock = threading.RLock()
+_schema_last_attempt = 0.0
+
+# Bump whenever init_db's DDL changes so run_migrations re-applies it once.
+SCHEMA_VERSION = 8
+_SCHEMA_MIGRATION_LOCK_ID = 73010001
+_PATTERN_DOWNLOAD_LOCK_ID = 73010002
 _BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
@@ -47,7 +60,7 @@ def _normalize_review_image_fields(rows):
     for row in rows:
         payload = dict(row)
         # Check whether a DB blob exists for this review before removing it.
-        has_db_image = bool(payload.get("review_image_data"))
+        has_db_image = bool(payload.pop("has_review_image_data", False) or payload.get("review_image_data"))
         # Never expose raw review image bytes in JSON API responses.
         payload.pop("review_image_data", None)
         primary_image = payload.get("product_image_url")
@@ -352,46 +365,371 @@ def _apply_linked_template_preview(product, cursor, preview_cache=None):
     return product
 
 
-def list_all_customers():
+ADMIN_CUSTOMER_COLUMNS = (
+    "id", "email", "first_name", "last_name", "phone", "admin_notes",
+    "created_at", "updated_at", "last_login_at",
+)
+ADMIN_CUSTOMER_CATEGORIES = ("admin-testimonial", "review-customer", "signed-up")
+# Placeholder accounts created for admin testimonials and guest reviews share the sgcg.local domain.
+_ADMIN_CUSTOMER_CATEGORY_SQL = """
+    CASE
+        WHEN LOWER(email) LIKE 'admin-testimonial-%%' AND LOWER(email) LIKE '%%@sgcg.local' THEN 'admin-testimonial'
+        WHEN LOWER(email) LIKE 'guest-review-%%' AND LOWER(email) LIKE '%%@sgcg.local' THEN 'review-customer'
+        ELSE 'signed-up'
+    END
+"""
+
+
+def list_admin_customers(limit=None, after=None, search=None, category=None):
+    """Customers newest first for the admin list, without password hashes.
+
+    after is the (created_at, id) of the previous page's last row. search
+    matches email, first, last or full name case-insensitively; category is one
+    of ADMIN_CUSTOMER_CATEGORIES.
+    """
+    placeholder = _placeholder()
+    conditions = []
+    params = []
+    if search:
+        pattern = "%" + str(search).strip().lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        conditions.append(
+            f"""(
+                LOWER(email) LIKE {placeholder}
+                OR LOWER(COALESCE(first_name, '')) LIKE {placeholder}
+                OR LOWER(COALESCE(last_name, '')) LIKE {placeholder}
+                OR LOWER(TRIM(COALESCE(first_name, '') || ' ' || COALESCE(last_name, ''))) LIKE {placeholder}
+            )"""
+        )
+        params.extend([pattern] * 4)
+    if category:
+        conditions.append(f"{_ADMIN_CUSTOMER_CATEGORY_SQL} = {placeholder}")
+        params.append(category)
+    if after:
+        conditions.append(f"(COALESCE(created_at, ''), id) < ({placeholder}, {placeholder})")
+        params.extend([after[0] or "", int(after[1])])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    limit_clause = ""
+    if limit:
+        limit_clause = f"LIMIT {placeholder}"
+        params.append(int(limit))
+
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM customers ORDER BY created_at DESC")
+    cursor.execute(
+        f"""
+        SELECT {", ".join(ADMIN_CUSTOMER_COLUMNS)}, {_ADMIN_CUSTOMER_CATEGORY_SQL} AS customer_category
+        FROM customers
+        {where}
+        ORDER BY COALESCE(created_at, '') DESC, id DESC
+        {limit_clause}
+        """,
+        tuple(params),
+    )
     rows = cursor.fetchall()
     conn.close()
     return [dict(row) for row in rows]
 
 
-def get_db():
-    if _is_postgres_backend():
-        import psycopg
-        from psycopg.rows import dict_row
-
-        raw_url = _preferred_database_url()
-        if not raw_url:
-            raise RuntimeError("DATABASE_URL or POSTGRES_URL is required for PostgreSQL connections.")
-
-        conninfo = raw_url.replace("postgresql+psycopg://", "postgresql://", 1)
-        if conninfo.startswith("postgres://"):
-            conninfo = conninfo.replace("postgres://", "postgresql://", 1)
-        conninfo = _normalize_conninfo(conninfo)
-
-        last_error = None
-        max_attempts = max(1, _env_int("DB_CONNECT_RETRIES", 4))
-        for attempt in range(max_attempts):
-            try:
-                conn = psycopg.connect(conninfo, row_factory=dict_row)
-                conn.autocommit = False
+def _connect_raw():
+    import psycopg
+    from psycopg.rows import dict_row
+
+    raw_url = _preferred_database_url()
+    if not raw_url:
+        raise RuntimeError("DATABASE_URL or POSTGRES_URL is required for PostgreSQL connections.")
+
+    conninfo = raw_url.replace("postgresql+psycopg://", "postgresql://", 1)
+    if conninfo.startswith("postgres://"):
+        conninfo = conninfo.replace("postgres://", "postgresql://", 1)
+    conninfo = _normalize_conninfo(conninfo)
+
+    last_error = None
+    max_attempts = max(1, _env_int("DB_CONNECT_RETRIES", 4))
+    for attempt in range(max_attempts):
+        try:
+            conn = psycopg.connect(conninfo, row_factory=dict_row)
+            conn.autocommit = False
+            return conn
+        except psycopg.OperationalError as exc:
+            last_error = exc
+            if attempt < (max_attempts - 1) and _is_transient_connection_error(exc):
+                time.sleep(0.5 * (attempt + 1))
+                continue
+            raise
+
+    if last_error is not None:
+        raise last_error
+    raise RuntimeError("Unable to open a PostgreSQL connection.")
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no pooled connection frees up within DB_POOL_TIMEOUT seconds."""
+
+
+class ConnectionPool:
+    """Process-wide pool of psycopg connections.
+
+    Connections are health-checked when they have been idle for longer than
+    ``check_after`` seconds and recycled once they exceed ``max_idle`` (idle
+    time, above ``min_size``) or ``max_lifetime`` (age).
+    """
+
+    def __init__(self, connect, min_size=1, max_size=5, timeout=30, max_idle=300, max_lifetime=1800, check_after=10):
+        self._connect = connect
+        self.min_size = max(0, int(min_size))
+        self.max_size = max(1, int(max_size), self.min_size)
+        self.timeout = max(0.0, float(timeout))
+        self.max_idle = max(0.0, float(max_idle))
+        self.max_lifetime = max(0.0, float(max_lifetime))
+        self.check_after = max(0.0, float(check_after))
+        self.pid = os.getpid()
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._born = {}
+        self._size = 0
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def idle_count(self):
+        return len(self._idle)
+
+    def _discard(self, conn):
+        self._born.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _too_old(self, conn, now):
+        born = self._born.get(id(conn), now)
+        return self.max_lifetime > 0 and (now - born) >= self.max_lifetime
+
+    def _passes_check(self, conn):
+        try:
+            conn.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn = None
+            idle_since = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        conn, idle_since = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        raise PoolTimeout(
+                            f"No database connection available after {self.timeout:g}s "
+                            f"(DB_POOL_MAX_SIZE={self.max_size})."
+                        )
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                self._born[id(conn)] = time.monotonic()
                 return conn
-            except psycopg.OperationalError as exc:
-                last_error = exc
-                if attempt < (max_attempts - 1) and _is_transient_connection_error(exc):
-                    time.sleep(0.5 * (attempt + 1))
-                    continue
-                raise
-
-        if last_error is not None:
-            raise last_error
-    raise RuntimeError("DATABASE_URL (or POSTGRES_URL) must point to PostgreSQL.")
+
+            now = time.monotonic()
+            stale = conn.closed or self._too_old(conn, now)
+            if not stale and (now - idle_since) >= self.check_after:
+                stale = not self._passes_check(conn)
+            if not stale:
+                return conn
+
+            self._discard(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+
+    def putconn(self, conn):
+        keep = not conn.closed
+        if keep:
+            try:
+                from psycopg.pq import TransactionStatus
+
+                status = conn.info.transaction_status
+                if status != TransactionStatus.IDLE:
+                    # Never hand out a connection with a half-finished transaction.
+                    conn.rollback()
+                    keep = conn.info.transaction_status == TransactionStatus.IDLE
+            except Exception:
+                keep = False
+
+        now = time.monotonic()
+        if keep and self._too_old(conn, now):
+            keep = False
+
+        expired = []
+        with self._cond:
+            if keep:
+                self._idle.append((conn, now))
+            else:
+                self._size -= 1
+            # Recycle connections that sat idle too long, keeping min_size warm.
+            while self.max_idle > 0 and len(self._idle) > self.min_size and (now - self._idle[0][1]) >= self.max_idle:
+                expired.append(self._idle.popleft()[0])
+                self._size -= 1
+            self._cond.notify(1 + len(expired))
+
+        if not keep:
+            self._discard(conn)
+        for stale_conn in expired:
+            self._discard(stale_conn)
+
+    def close(self):
+        with self._cond:
+            idle = [conn for conn, _since in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn in idle:
+            self._discard(conn)
+
+
+class _PooledConnection:
+    """Proxy handed out by get_db(); close() returns the connection instead of closing it."""
+
+    __slots__ = ("_conn", "_finalizer", "__weakref__")
+
+    def __init__(self, conn, release):
+        object.__setattr__(self, "_conn", conn)
+        finalizer = weakref.finalize(self, release, conn)
+        finalizer.atexit = False
+        object.__setattr__(self, "_finalizer", finalizer)
+
+    @property
+    def closed(self):
+        return self._conn is None or self._conn.closed
+
+    def close(self):
+        if self._conn is None:
+            return
+        object.__setattr__(self, "_conn", None)
+        self._finalizer()
+
+    def __getattr__(self, name):
+        conn = object.__getattribute__(self, "_conn")
+        if conn is None:
+            raise RuntimeError("Database connection has already been returned to the pool.")
+        return getattr(conn, name)
+
+    def __setattr__(self, name, value):
+        if self._conn is None:
+            raise RuntimeError("Database connection has already been returned to the pool.")
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._conn is not None and not self._conn.closed:
+                if exc_type is None:
+                    self._conn.commit()
+                else:
+                    self._conn.rollback()
+        finally:
+            self.close()
+
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+_REQUEST_CONN_ATTR = "_sgcg_db_conn"
+
+
+def _get_pool():
+    global _pool, _pool_key
+    max_size = _env_int("DB_POOL_MAX_SIZE", 5)
+    if max_size <= 0:
+        return None
+
+    key = (os.getpid(), _preferred_database_url())
+    if _pool is not None and _pool_key == key:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None and _pool.pid == os.getpid():
+                _pool.close()
+            # A pool inherited across fork() is dropped without closing so the
+            # parent's sockets are left untouched.
+            _pool = ConnectionPool(
+                _connect_raw,
+                min_size=_env_int("DB_POOL_MIN_SIZE", 1),
+                max_size=max_size,
+                timeout=_env_int("DB_POOL_TIMEOUT", 30),
+                max_idle=_env_int("DB_POOL_MAX_IDLE_SECONDS", 300),
+                max_lifetime=_env_int("DB_POOL_MAX_LIFETIME_SECONDS", 1800),
+                check_after=_env_int("DB_POOL_CHECK_IDLE_SECONDS", 10),
+            )
+            _pool_key = key
+    return _pool
+
+
+def _release_pooled_connection(pool, conn):
+    if has_app_context() and not conn.closed and g.get(_REQUEST_CONN_ATTR) is None:
+        try:
+            from psycopg.pq import TransactionStatus
+
+            if conn.info.transaction_status != TransactionStatus.IDLE:
+                conn.rollback()
+            # Keep one connection on the request so later get_db() calls skip the pool.
+            setattr(g, _REQUEST_CONN_ATTR, (pool, conn))
+            return
+        except Exception:
+            pass
+    pool.putconn(conn)
+
+
+def release_request_db(_exc=None):
+    """Return the request-scoped connection to the pool (Flask teardown hook)."""
+    if not has_app_context():
+        return
+    parked = g.pop(_REQUEST_CONN_ATTR, None)
+    if parked is None:
+        return
+    pool, conn = parked
+    pool.putconn(conn)
+
+
+def get_db():
+    if not _is_postgres_backend():
+        raise RuntimeError("DATABASE_URL (or POSTGRES_URL) must point to PostgreSQL.")
+
+    pool = _get_pool()
+    if pool is None:
+        return _connect_raw()
+
+    conn = None
+    if has_app_context():
+        parked = g.pop(_REQUEST_CONN_ATTR, None)
+        if parked is not None:
+            parked_pool, parked_conn = parked
+            if parked_pool is pool and not parked_conn.closed:
+                conn = parked_conn
+            else:
+                parked_pool.putconn(parked_conn)
+
+    if conn is None:
+        conn = pool.getconn()
+    return _PooledConnection(conn, lambda raw: _release_pooled_connection(pool, raw))
 
 
 def _add_column_if_missing(cursor, is_postgres, is_mysql, table, column, col_type):
@@ -802,6 +1140,8 @@ def init_db(force=False):
             admin_comment TEXT,
             verified_purchase INTEGER DEFAULT 0,
             status VARCHAR(20) DEFAULT 'pending',
+            product_title TEXT,
+            fallback_product_image_url TEXT,
             created_at VARCHAR(50),
             updated_at VARCHAR(50),
             UNIQUE (customer_id, product_type, product_id),
@@ -828,6 +1168,91 @@ def init_db(force=False):
         )
         """
     )
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS pattern_render_cache (
+            cache_key VARCHAR(128) PRIMARY KEY,
+            renderer_version VARCHAR(20) NOT NULL,
+            image_data {blob_type} NOT NULL,
+            byte_size INTEGER,
+            created_at VARCHAR(50),
+            last_used_at VARCHAR(50)
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            applied_at VARCHAR(50)
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cache_generations (
+            namespace VARCHAR(64) PRIMARY KEY,
+            generation BIGINT NOT NULL DEFAULT 0,
+            updated_at VARCHAR(50)
+        )
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS homepage_visit_rollups (
+            period VARCHAR(10) PRIMARY KEY,
+            page_views BIGINT NOT NULL DEFAULT 0,
+            unique_visitors BIGINT NOT NULL DEFAULT 0,
+            visitor_sketch {blob_type},
+            updated_at VARCHAR(50)
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS homepage_visit_uniques (
+            period VARCHAR(10) NOT NULL,
+            ip_hash VARCHAR(128) NOT NULL,
+            PRIMARY KEY (period, ip_hash)
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stripe_webhook_events (
+            event_id VARCHAR(255) PRIMARY KEY,
+            event_type VARCHAR(100),
+            payload TEXT NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at VARCHAR(50),
+            locked_until VARCHAR(50),
+            last_error TEXT,
+            received_at VARCHAR(50) NOT NULL,
+            processed_at VARCHAR(50),
+            api_base_url VARCHAR(500)
+        )
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id {id_column},
+            recipient VARCHAR(255) NOT NULL,
+            subject VARCHAR(500) NOT NULL,
+            html_body TEXT NOT NULL,
+            sender VARCHAR(255),
+            reply_to VARCHAR(255),
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at VARCHAR(50),
+            locked_until VARCHAR(50),
+            last_error TEXT,
+            created_at VARCHAR(50) NOT NULL,
+            sent_at VARCHAR(50)
+        )
+        """
+    )
     conn.commit()
 
     if is_postgres:
@@ -864,6 +1289,8 @@ def init_db(force=False):
         cursor.execute("ALTER TABLE customer_reviews ADD COLUMN IF NOT EXISTS review_image_data BYTEA")
         cursor.execute("ALTER TABLE customer_reviews ADD COLUMN IF NOT EXISTS review_image_mime VARCHAR(100)")
         cursor.execute("ALTER TABLE customer_reviews ADD COLUMN IF NOT EXISTS admin_comment TEXT")
+        cursor.execute("ALTER TABLE customer_reviews ADD COLUMN IF NOT EXISTS product_title TEXT")
+        cursor.execute("ALTER TABLE customer_reviews ADD COLUMN IF NOT EXISTS fallback_product_image_url TEXT")
         cursor.execute("ALTER TABLE review_invite_codes ADD COLUMN IF NOT EXISTS product_name VARCHAR(255)")
         cursor.execute("ALTER TABLE customer_orders ADD COLUMN IF NOT EXISTS subtotal_amount REAL")
         cursor.execute("ALTER TABLE customer_orders ADD COLUMN IF NOT EXISTS shipping_amount REAL")
@@ -891,12 +1318,14 @@ def init_db(force=False):
         cursor.execute("ALTER TABLE customer_pattern_downloads ADD COLUMN IF NOT EXISTS last_emailed_at VARCHAR(50)")
         cursor.execute("ALTER TABLE customer_pattern_downloads ADD COLUMN IF NOT EXISTS created_at VARCHAR(50)")
         cursor.execute("ALTER TABLE customer_pattern_downloads ADD COLUMN IF NOT EXISTS updated_at VARCHAR(50)")
+        cursor.execute("ALTER TABLE stripe_webhook_events ADD COLUMN IF NOT EXISTS api_base_url VARCHAR(500)")
         # Legacy Postgres schema can still have NOT NULL on template_id/manual_product_id.
         # Manual digital unlock rows must allow template_id=NULL.
         cursor.execute("ALTER TABLE customer_pattern_downloads ALTER COLUMN template_id DROP NOT NULL")
         cursor.execute("ALTER TABLE customer_pattern_downloads ALTER COLUMN manual_product_id DROP NOT NULL")
         cursor.execute("UPDATE customer_pattern_downloads SET product_type = 'template' WHERE product_type IS NULL OR product_type = ''")
 
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_customers_created_id ON customers((COALESCE(created_at, '')) DESC, id DESC)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_customer_addresses_customer_default_created ON customer_addresses(customer_id, is_default DESC, created_at DESC)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_customer_favorites_customer_created ON customer_favorites(customer_id, created_at DESC)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_customer_cart_items_customer_updated ON customer_cart_items(customer_id, updated_at DESC)")
@@ -918,10 +1347,13 @@ def init_db(force=False):
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_customer_pattern_downloads_product_lookup ON customer_pattern_downloads(customer_id, product_type, template_id, manual_product_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_customer_reviews_product_status_created ON customer_reviews(product_type, product_id, status, created_at DESC)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_customer_reviews_customer_created ON customer_reviews(customer_id, created_at DESC)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_customer_reviews_status_created ON customer_reviews(status, created_at DESC)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_review_invite_codes_active_expires ON review_invite_codes(is_active, expires_at)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_review_invite_codes_product ON review_invite_codes(product_type, product_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_manual_products_created_at ON manual_products(created_at DESC)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_images_product_order ON product_images(product_id, display_order)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_stripe_webhook_events_status_next ON stripe_webhook_events(status, next_attempt_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_status_next ON email_outbox(status, next_attempt_at)")
         _add_column_if_missing(cursor, is_postgres, is_mysql, "product_images", "image_data", "BYTEA" if is_postgres else "LONGBLOB" if is_mysql else "BLOB")
         _add_column_if_missing(cursor, is_postgres, is_mysql, "product_images", "created_at", "VARCHAR(50)")
 
@@ -930,6 +1362,90 @@ def init_db(force=False):
     _schema_initialized = True
 
 
+def get_schema_version():
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute("SELECT to_regclass('schema_version') AS table_name")
+    row = cursor.fetchone()
+    version = 0
+    if row and row["table_name"]:
+        cursor.execute("SELECT MAX(version) AS version FROM schema_version")
+        row = cursor.fetchone()
+        version = int(row["version"] or 0) if row else 0
+    conn.close()
+    return version
+
+
+def _record_schema_version(version):
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    cursor.execute(
+        f"INSERT INTO schema_version (version, applied_at) VALUES ({placeholder}, {placeholder}) ON CONFLICT (version) DO NOTHING",
+        (version, datetime.utcnow().isoformat()),
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_migrations():
+    """Bring the schema up to SCHEMA_VERSION; returns True when DDL was applied.
+
+    Runs once per process at boot (or via `flask migrate-db`). When the recorded
+    version is current this is a single SELECT, so request handlers never pay for
+    the DDL. A Postgres advisory lock keeps concurrently booting workers from
+    running it twice.
+    """
+    global _schema_initialized
+    if _schema_initialized:
+        return False
+
+    with _schema_init_lock:
+        if _schema_initialized:
+            return False
+        if get_schema_version() >= SCHEMA_VERSION:
+            _schema_initialized = True
+            return False
+
+        lock_conn = get_db()
+        lock_cursor = lock_conn.cursor()
+        lock_cursor.execute("SELECT pg_advisory_lock(%s)", (_SCHEMA_MIGRATION_LOCK_ID,))
+        try:
+            # Another worker may have finished while this one waited for the lock.
+            applied_version = get_schema_version()
+            applied = applied_version < SCHEMA_VERSION
+            if applied:
+                init_db(force=True)
+                if applied_version < 2:
+                    # Version 2 added the homepage visit rollups; seed them from raw rows.
+                    backfill_homepage_visit_rollups()
+                if applied_version < 5:
+                    # Version 5 stores each review's product title and image on the review row.
+                    backfill_review_product_snapshots()
+                if applied_version < 8:
+                    # Version 8 stores designer previews outside user_projects.design_data.
+                    backfill_project_previews()
+                _record_schema_version(SCHEMA_VERSION)
+            _schema_initialized = True
+            return applied
+        finally:
+            lock_cursor.execute("SELECT pg_advisory_unlock(%s)", (_SCHEMA_MIGRATION_LOCK_ID,))
+            lock_conn.commit()
+            lock_conn.close()
+
+
+def ensure_schema(retry_seconds=30):
+    """Retry run_migrations if it failed at boot, at most once per retry_seconds."""
+    global _schema_last_attempt
+    if _schema_initialized:
+        return
+    now = time.monotonic()
+    if now - _schema_last_attempt < retry_seconds:
+        return
+    _schema_last_attempt = now
+    run_migrations()
+
+
 def upsert_item(payload):
     conn = get_db()
     cursor = conn.cursor()
@@ -1135,218 +1651,155 @@ def create_manual_product(payload):
     return product_id
 
 
-def fetch_manual_products():
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Query without image_data by default (fallback-safe approach)
-    # image_data will be fetched separately if needed
-    cursor.execute(
-        """
-        SELECT
-            p.*,
-            i.image_url AS product_image_url,
-            i.media_type AS product_image_media_type
-        FROM manual_products p
-        LEFT JOIN product_images i ON i.product_id = p.id
-        ORDER BY p.created_at DESC, i.display_order ASC
-        """
-    )
-    rows = cursor.fetchall()
+# Keys a caller may request through fetch_manual_products(fields=...). Everything
+# except "images" is a manual_products column.
+MANUAL_PRODUCT_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "category",
+    "materials",
+    "width",
+    "height",
+    "depth",
+    "price",
+    "old_price",
+    "discount_percent",
+    "quantity",
+    "is_featured",
+    "is_home_featured",
+    "is_active",
+    "is_digital_download",
+    "related_links",
+    "created_at",
+    "updated_at",
+    "images",
+)
+
+
+def _decode_manual_product_row(product):
+    for key in ("category", "materials"):
+        if product.get(key):
+            try:
+                product[key] = json.loads(product[key])
+            except (json.JSONDecodeError, TypeError):
+                pass
+    if "is_active" in product:
+        product["is_active"] = _coerce_bool(product.get("is_active", 1))
+    if "is_home_featured" in product:
+        product["is_home_featured"] = _coerce_bool(product.get("is_home_featured", 0))
+    if "is_digital_download" in product:
+        product["is_digital_download"] = _coerce_bool(product.get("is_digital_download"))
+    if "related_links" in product:
+        product["related_links"] = _deserialize_related_links(product.get("related_links"))
+    return product
 
-    products = []
-    by_id = {}
-    for row in rows:
-        payload = dict(row)
-        product_id = payload.get("id")
 
-        product = by_id.get(product_id)
-        if not product:
-            payload.pop("product_image_url", None)
-            payload.pop("product_image_media_type", None)
-            product = payload
+def fetch_manual_products(fields=None):
+    """Every manual product with its image metadata, newest first.
 
-            if product.get("category"):
-                try:
-                    product["category"] = json.loads(product["category"])
-                except (json.JSONDecodeError, TypeError):
-                    pass
+    Runs two queries however many products there are: one for the products and
+    one for all of their images. image_data is never read. Clients load image
+    bytes from the /uploads/products URLs, which are served with ETags. Pass
+    fields to return only those keys from MANUAL_PRODUCT_FIELDS; "id" is always
+    included.
+    """
+    if fields is None:
+        selected = list(MANUAL_PRODUCT_FIELDS)
+    else:
+        selected = list(dict.fromkeys(str(field).strip() for field in fields if str(field).strip()))
+        unknown = [field for field in selected if field not in MANUAL_PRODUCT_FIELDS]
+        if unknown:
+            raise ValueError(f"unknown manual product fields: {', '.join(unknown)}")
+        if "id" not in selected:
+            selected.insert(0, "id")
+    columns = ", ".join(f"p.{field}" for field in selected if field != "images")
 
-            if product.get("materials"):
-                try:
-                    product["materials"] = json.loads(product["materials"])
-                except (json.JSONDecodeError, TypeError):
-                    pass
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    cursor.execute(f"SELECT {columns} FROM manual_products p ORDER BY p.created_at DESC")
+    products = [_decode_manual_product_row(dict(row)) for row in cursor.fetchall()]
 
+    if "images" in selected and products:
+        by_id = {}
+        for product in products:
             product["images"] = []
-            product["is_active"] = _coerce_bool(product.get("is_active", 1))
-            product["is_home_featured"] = _coerce_bool(product.get("is_home_featured", 0))
-            product["is_digital_download"] = _coerce_bool(product.get("is_digital_download"))
-            product["related_links"] = _deserialize_related_links(product.get("related_links"))
-            by_id[product_id] = product
-            products.append(product)
-
-        image_url = payload.get("product_image_url")
-        if image_url:
-            img_dict = {
-                "image_url": image_url,
-                "media_type": payload.get("product_image_media_type") or "image",
-            }
-            product["images"].append(img_dict)
-    
-    # Try to fetch image_data separately if the column exists (production optimization)
-    try:
-        is_mysql = _use_mysql()
-        placeholder = "%s" if is_mysql else "?"
-        for product_id_val, product in by_id.items():
-            cursor.execute(
-                f"SELECT image_url, image_data, media_type FROM product_images WHERE product_id = {placeholder} ORDER BY display_order",
-                (product_id_val,)
-            )
-            image_rows = cursor.fetchall()
-            if image_rows:
-                product["images"] = []
-                for img_row in image_rows:
-                    img_row_dict = dict(img_row)
-                    img_data = img_row_dict.get("image_data")
-                    img_dict = {
-                        "image_url": img_row_dict.get("image_url", ""),
-                        "media_type": img_row_dict.get("media_type") or "image",
-                    }
-                    if img_data:
-                        try:
-                            if isinstance(img_data, bytes):
-                                img_dict["image_data"] = img_data.hex()
-                            elif isinstance(img_data, str):
-                                img_dict["image_data"] = img_data
-                        except (AttributeError, ValueError, TypeError):
-                            pass
-                    product["images"].append(img_dict)
-    except Exception:
-        # image_data column doesn't exist, that's fine - use the URLs from above
-        pass
-    
+            by_id[product["id"]] = product
+        cursor.execute(
+            f"""
+            SELECT product_id, image_url, media_type
+            FROM product_images
+            WHERE product_id = ANY({placeholder})
+            ORDER BY product_id, display_order
+            """,
+            (list(by_id),),
+        )
+        for row in cursor.fetchall():
+            product = by_id.get(row["product_id"])
+            if product is None or not row["image_url"]:
+                continue
+            product["images"].append({
+                "image_url": row["image_url"],
+                "media_type": row["media_type"] or "image",
+            })
+
     conn.close()
     return products
 
 
+# One lateral lookup per product walks idx_product_images_product_order for the
+# first image. Only URL and media type are read: image bytes are served by URL
+# and inline data: URLs are dropped in SQL so they never leave the database.
+MANUAL_PRODUCTS_CATALOG_SQL = """
+    SELECT
+        p.id,
+        p.name,
+        p.description,
+        p.category,
+        p.materials,
+        p.width,
+        p.height,
+        p.depth,
+        p.price,
+        p.old_price,
+        p.discount_percent,
+        p.quantity,
+        p.is_featured,
+        p.is_home_featured,
+        p.is_active,
+        p.is_digital_download,
+        p.related_links,
+        p.created_at,
+        p.updated_at,
+        first_image.image_url AS preview_image_url,
+        first_image.media_type AS preview_media_type
+    FROM manual_products p
+    LEFT JOIN LATERAL (
+        SELECT
+            CASE WHEN lower(left(pi.image_url, 5)) = 'data:' THEN NULL ELSE pi.image_url END AS image_url,
+            pi.media_type
+        FROM product_images pi
+        WHERE pi.product_id = p.id
+        ORDER BY pi.display_order
+        LIMIT 1
+    ) first_image ON TRUE
+    ORDER BY p.created_at DESC
+"""
+
+
 def fetch_manual_products_catalog():
     conn = get_db()
     cursor = conn.cursor()
     template_preview_cache = {}
 
-    # Try with image_data subquery, fall back without if column doesn't exist
-    try:
-        cursor.execute(
-        """
-        SELECT
-            p.id,
-            p.name,
-            p.description,
-            p.category,
-            p.materials,
-            p.width,
-            p.height,
-            p.depth,
-            p.price,
-            p.old_price,
-            p.discount_percent,
-            p.quantity,
-            p.is_featured,
-            p.is_home_featured,
-            p.is_active,
-            p.is_digital_download,
-            p.related_links,
-            p.created_at,
-            p.updated_at,
-            (
-                SELECT pi.image_url
-                FROM product_images pi
-                WHERE pi.product_id = p.id
-                ORDER BY pi.display_order
-                LIMIT 1
-            ) AS preview_image_url,
-            (
-                SELECT pi.image_data
-                FROM product_images pi
-                WHERE pi.product_id = p.id
-                ORDER BY pi.display_order
-                LIMIT 1
-            ) AS preview_image_data,
-            (
-                SELECT pi.media_type
-                FROM product_images pi
-                WHERE pi.product_id = p.id
-                ORDER BY pi.display_order
-                LIMIT 1
-            ) AS preview_media_type
-        FROM manual_products p
-        ORDER BY p.created_at DESC
-            """
-        )
-    except Exception:
-        # image_data column doesn't exist; query without it
-        cursor.execute(
-            """
-            SELECT
-                p.id,
-                p.name,
-                p.description,
-                p.category,
-                p.materials,
-                p.width,
-                p.height,
-                p.depth,
-                p.price,
-                p.old_price,
-                p.discount_percent,
-                p.quantity,
-                p.is_featured,
-                p.is_home_featured,
-                p.is_active,
-                p.is_digital_download,
-                p.related_links,
-                p.created_at,
-                p.updated_at,
-                (
-                    SELECT pi.image_url
-                    FROM product_images pi
-                    WHERE pi.product_id = p.id
-                    ORDER BY pi.display_order
-                    LIMIT 1
-                ) AS preview_image_url,
-                (
-                    SELECT pi.media_type
-                    FROM product_images pi
-                    WHERE pi.product_id = p.id
-                    ORDER BY pi.display_order
-                    LIMIT 1
-                ) AS preview_media_type
-            FROM manual_products p
-            ORDER BY p.created_at DESC
-            """
-        )
+    cursor.execute(MANUAL_PRODUCTS_CATALOG_SQL)
     rows = cursor.fetchall()
 
     products = []
     for row in rows:
         product = dict(row)
-
-        if product.get("category"):
-            try:
-                product["category"] = json.loads(product["category"])
-            except (json.JSONDecodeError, TypeError):
-                pass
-
-        if product.get("materials"):
-            try:
-                product["materials"] = json.loads(product["materials"])
-            except (json.JSONDecodeError, TypeError):
-                pass
-
         preview_image_url = _sanitize_catalog_image_url(product.pop("preview_image_url", None))
-        # Never expose raw preview binary data in JSON responses.
-        product.pop("preview_image_data", None)
         preview_media_type = product.pop("preview_media_type", None)
         
         if preview_image_url:
@@ -1356,11 +1809,8 @@ def fetch_manual_products_catalog():
             }]
         else:
             product["images"] = []
-            
-        product["is_active"] = _coerce_bool(product.get("is_active", 1))
-        product["is_home_featured"] = _coerce_bool(product.get("is_home_featured", 0))
-        product["is_digital_download"] = _coerce_bool(product.get("is_digital_download"))
-        product["related_links"] = _deserialize_related_links(product.get("related_links"))
+
+        _decode_manual_product_row(product)
         product = _apply_linked_template_preview(product, cursor, preview_cache=template_preview_cache)
         products.append(product)
 
@@ -1368,10 +1818,60 @@ def fetch_manual_products_catalog():
     return products
 
 
-def fetch_manual_product(product_id):
+def fetch_manual_products_by_ids(product_ids):
+    """{id: product} for the given ids in one query, each with at most its first image.
+
+    Reads only the columns cart pricing and download grants need; image bytes and
+    inline data: URLs are left in the database.
+    """
+    ids = sorted({int(product_id) for product_id in product_ids})
+    if not ids:
+        return {}
     conn = get_db()
     cursor = conn.cursor()
-    is_mysql = _use_mysql()
+    placeholder = _placeholder()
+    cursor.execute(
+        f"""
+        SELECT
+            p.id,
+            p.name,
+            p.price,
+            p.old_price,
+            p.discount_percent,
+            p.quantity,
+            p.is_active,
+            p.is_digital_download,
+            first_image.image_url AS preview_image_url,
+            first_image.media_type AS preview_media_type
+        FROM manual_products p
+        LEFT JOIN LATERAL (
+            SELECT
+                CASE WHEN lower(left(pi.image_url, 5)) = 'data:' THEN NULL ELSE pi.image_url END AS image_url,
+                pi.media_type
+            FROM product_images pi
+            WHERE pi.product_id = p.id
+            ORDER BY pi.display_order
+            LIMIT 1
+        ) first_image ON TRUE
+        WHERE p.id = ANY({placeholder})
+        """,
+        (ids,),
+    )
+    products = {}
+    for row in cursor.fetchall():
+        product = _decode_manual_product_row(dict(row))
+        image_url = product.pop("preview_image_url", None)
+        media_type = product.pop("preview_media_type", None)
+        product["images"] = [{"image_url": image_url, "media_type": media_type or "image"}] if image_url else []
+        products[product["id"]] = product
+    conn.close()
+    return products
+
+
+def fetch_manual_product(product_id):
+    conn = get_db()
+    cursor = conn.cursor()
+    is_mysql = _use_mysql()
     placeholder = "%s" if is_mysql else "?"
     
     cursor.execute(
@@ -2109,39 +2609,225 @@ def clear_login_failures(scope, email=None, request_ip=None):
     conn.close()
 
 
+HOMEPAGE_VISIT_ALL_TIME = "all"
+
+
+def homepage_visit_distinct_mode():
+    """'exact' keeps one row per visitor per open period; 'sketch' keeps a HyperLogLog per period."""
+    mode = str(os.environ.get("HOMEPAGE_VISIT_DISTINCT") or "exact").strip().lower()
+    return "sketch" if mode in ("sketch", "hll", "hyperloglog") else "exact"
+
+
+def _open_homepage_visit_periods(now=None):
+    """Rollup periods that can still receive visits; counts for every other period are final."""
+    now = now or datetime.utcnow()
+    month = now.strftime("%Y-%m")
+    return [
+        now.strftime("%Y-%m-%d"),
+        (now - timedelta(days=1)).strftime("%Y-%m-%d"),
+        month,
+        _previous_month_label(month),
+        HOMEPAGE_VISIT_ALL_TIME,
+    ]
+
+
+def _normalize_homepage_visit(visit):
+    ip_hash = str(visit.get("ip_hash") or "").strip()
+    if not ip_hash:
+        return None
+    visited_at = visit.get("visited_at") or datetime.utcnow()
+    return {
+        "ip_hash": ip_hash,
+        "visited_on": visited_at.strftime("%Y-%m-%d"),
+        "visited_month": visited_at.strftime("%Y-%m"),
+        "page_path": (str(visit.get("page_path") or "/").strip() or "/")[:120],
+        "user_agent": visit.get("user_agent"),
+        "created_at": visited_at.isoformat(),
+    }
+
+
+def _add_homepage_visits_to_sketch(cursor, period, views, ip_hashes, now_iso):
+    placeholder = _placeholder()
+    cursor.execute(
+        f"""
+        INSERT INTO homepage_visit_rollups (period, page_views, unique_visitors, updated_at)
+        VALUES ({placeholder}, 0, 0, {placeholder})
+        ON CONFLICT (period) DO NOTHING
+        """,
+        (period, now_iso),
+    )
+    cursor.execute(
+        f"SELECT visitor_sketch FROM homepage_visit_rollups WHERE period = {placeholder} FOR UPDATE",
+        (period,),
+    )
+    row = cursor.fetchone() or {}
+    sketch = HyperLogLog.from_bytes(row.get("visitor_sketch")).update(ip_hashes)
+    cursor.execute(
+        f"""
+        UPDATE homepage_visit_rollups
+        SET page_views = page_views + {placeholder},
+            unique_visitors = {placeholder},
+            visitor_sketch = {placeholder},
+            updated_at = {placeholder}
+        WHERE period = {placeholder}
+        """,
+        (views, sketch.estimate(), sketch.to_bytes(), now_iso, period),
+    )
+
+
+def record_homepage_visits(visits, distinct_mode=None):
+    """Insert a batch of visits and fold them into the rollups in one transaction.
+
+    Each visit counts toward its day, its month and the all-time rollup. Distinct
+    visitors are counted exactly through homepage_visit_uniques, or approximately
+    through a per-period HyperLogLog sketch when distinct_mode is 'sketch'.
+    """
+    rows = [row for row in (_normalize_homepage_visit(visit) for visit in visits) if row]
+    if not rows:
+        return 0
+
+    mode = distinct_mode or homepage_visit_distinct_mode()
+    views = {}
+    visitors = {}
+    for row in rows:
+        for period in (row["visited_on"], row["visited_month"], HOMEPAGE_VISIT_ALL_TIME):
+            views[period] = views.get(period, 0) + 1
+            visitors.setdefault(period, set()).add(row["ip_hash"])
+
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    now_iso = datetime.utcnow().isoformat()
+    try:
+        cursor.executemany(
+            f"""
+            INSERT INTO homepage_visits (ip_hash, visited_on, visited_month, page_path, user_agent, created_at)
+            VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
+            """,
+            [
+                (row["ip_hash"], row["visited_on"], row["visited_month"], row["page_path"], row["user_agent"], row["created_at"])
+                for row in rows
+            ],
+        )
+        # Periods and hashes are sorted so concurrent flushes take row locks in the same order.
+        for period in sorted(views):
+            ip_hashes = sorted(visitors[period])
+            if mode == "sketch":
+                _add_homepage_visits_to_sketch(cursor, period, views[period], ip_hashes, now_iso)
+                continue
+            cursor.execute(
+                f"""
+                INSERT INTO homepage_visit_uniques (period, ip_hash)
+                SELECT {placeholder}, UNNEST({placeholder}::text[])
+                ON CONFLICT DO NOTHING
+                """,
+                (period, ip_hashes),
+            )
+            new_visitors = max(cursor.rowcount or 0, 0)
+            cursor.execute(
+                f"""
+                INSERT INTO homepage_visit_rollups (period, page_views, unique_visitors, updated_at)
+                VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder})
+                ON CONFLICT (period) DO UPDATE SET
+                    page_views = homepage_visit_rollups.page_views + excluded.page_views,
+                    unique_visitors = homepage_visit_rollups.unique_visitors + excluded.unique_visitors,
+                    updated_at = excluded.updated_at
+                """,
+                (period, views[period], new_visitors, now_iso),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return len(rows)
+
+
 def record_homepage_visit(ip_hash, page_path="/", user_agent=None):
-    normalized_hash = str(ip_hash or "").strip()
-    if not normalized_hash:
-        return False
+    return record_homepage_visits([{"ip_hash": ip_hash, "page_path": page_path, "user_agent": user_agent}]) == 1
 
-    normalized_path = str(page_path or "/").strip() or "/"
-    now = datetime.utcnow()
-    now_iso = now.isoformat()
-    visited_on = now.strftime("%Y-%m-%d")
-    visited_month = now.strftime("%Y-%m")
 
+def prune_homepage_visits(retention_days):
+    """Delete raw visits older than retention_days and dedupe state for closed periods.
+
+    Rollup counts are kept forever; they are one row per day or month.
+    """
+    open_periods = _open_homepage_visit_periods()
     conn = get_db()
     cursor = conn.cursor()
     placeholder = _placeholder()
+    deleted = 0
+    if retention_days and retention_days > 0:
+        cutoff = (datetime.utcnow() - timedelta(days=retention_days)).isoformat()
+        cursor.execute(f"DELETE FROM homepage_visits WHERE created_at < {placeholder}", (cutoff,))
+        deleted = max(cursor.rowcount or 0, 0)
+    cursor.execute(
+        f"DELETE FROM homepage_visit_uniques WHERE period <> ALL({placeholder})",
+        (open_periods,),
+    )
     cursor.execute(
         f"""
-        INSERT INTO homepage_visits (ip_hash, visited_on, visited_month, page_path, user_agent, created_at)
-        VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
+        UPDATE homepage_visit_rollups
+        SET visitor_sketch = NULL
+        WHERE visitor_sketch IS NOT NULL AND period <> ALL({placeholder})
         """,
-        (normalized_hash, visited_on, visited_month, normalized_path, user_agent, now_iso),
+        (open_periods,),
     )
     conn.commit()
     conn.close()
-    return True
+    return deleted
+
 
+def backfill_homepage_visit_rollups(distinct_mode=None):
+    """Seed the rollups from raw homepage_visits rows.
 
-def _count_unique_homepage_ips(cursor, where_sql="", params=()):
+    Periods that already have a rollup row keep it, so this is safe to re-run.
+    Dedupe state (uniques or sketches) is only rebuilt for open periods.
+    """
+    mode = distinct_mode or homepage_visit_distinct_mode()
+    open_periods = _open_homepage_visit_periods()
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    periods_sql = f"CROSS JOIN LATERAL (VALUES (v.visited_on), (v.visited_month), ({placeholder}::varchar)) AS p(period)"
     cursor.execute(
-        f"SELECT COUNT(DISTINCT ip_hash) AS cnt FROM homepage_visits {where_sql}",
-        params,
+        f"""
+        INSERT INTO homepage_visit_rollups (period, page_views, unique_visitors, updated_at)
+        SELECT p.period, COUNT(*), COUNT(DISTINCT v.ip_hash), {placeholder}
+        FROM homepage_visits v
+        {periods_sql}
+        GROUP BY p.period
+        ON CONFLICT (period) DO NOTHING
+        """,
+        (HOMEPAGE_VISIT_ALL_TIME, datetime.utcnow().isoformat()),
     )
-    row = cursor.fetchone() or {}
-    return int(row.get("cnt") or 0)
+    distinct_sql = f"""
+        SELECT DISTINCT p.period, v.ip_hash
+        FROM homepage_visits v
+        {periods_sql}
+        WHERE p.period = ANY({placeholder})
+    """
+    if mode == "sketch":
+        cursor.execute(distinct_sql, (HOMEPAGE_VISIT_ALL_TIME, open_periods))
+        sketches = {}
+        for row in cursor.fetchall():
+            sketches.setdefault(row["period"], HyperLogLog()).add(row["ip_hash"])
+        for period, sketch in sketches.items():
+            cursor.execute(
+                f"""
+                UPDATE homepage_visit_rollups SET visitor_sketch = {placeholder}
+                WHERE period = {placeholder} AND visitor_sketch IS NULL
+                """,
+                (sketch.to_bytes(), period),
+            )
+    else:
+        cursor.execute(
+            f"INSERT INTO homepage_visit_uniques (period, ip_hash) {distinct_sql} ON CONFLICT DO NOTHING",
+            (HOMEPAGE_VISIT_ALL_TIME, open_periods),
+        )
+    conn.commit()
+    conn.close()
 
 
 def _previous_month_label(current_month_label):
@@ -2158,6 +2844,7 @@ def _previous_month_label(current_month_label):
 
 
 def get_homepage_visit_insights():
+    """Unique-visitor counts read from the rollups: one indexed lookup of five rows."""
     now = datetime.utcnow()
     today = now.strftime("%Y-%m-%d")
     yesterday = (now - timedelta(days=1)).strftime("%Y-%m-%d")
@@ -2167,31 +2854,19 @@ def get_homepage_visit_insights():
     conn = get_db()
     cursor = conn.cursor()
     placeholder = _placeholder()
-
-    total_unique = _count_unique_homepage_ips(cursor)
-    today_unique = _count_unique_homepage_ips(
-        cursor,
-        f"WHERE visited_on = {placeholder}",
-        (today,),
-    )
-    yesterday_unique = _count_unique_homepage_ips(
-        cursor,
-        f"WHERE visited_on = {placeholder}",
-        (yesterday,),
-    )
-    month_unique = _count_unique_homepage_ips(
-        cursor,
-        f"WHERE visited_month = {placeholder}",
-        (month,),
+    cursor.execute(
+        f"SELECT period, unique_visitors FROM homepage_visit_rollups WHERE period = ANY({placeholder})",
+        ([HOMEPAGE_VISIT_ALL_TIME, today, yesterday, month, previous_month],),
     )
-    previous_month_unique = _count_unique_homepage_ips(
-        cursor,
-        f"WHERE visited_month = {placeholder}",
-        (previous_month,),
-    ) if previous_month else 0
-
+    counts = {row["period"]: int(row["unique_visitors"] or 0) for row in cursor.fetchall()}
     conn.close()
 
+    total_unique = counts.get(HOMEPAGE_VISIT_ALL_TIME, 0)
+    today_unique = counts.get(today, 0)
+    yesterday_unique = counts.get(yesterday, 0)
+    month_unique = counts.get(month, 0)
+    previous_month_unique = counts.get(previous_month, 0) if previous_month else 0
+
     day_delta = today_unique - yesterday_unique
     month_delta = month_unique - previous_month_unique
 
@@ -3576,86 +4251,525 @@ def get_manual_product_download_metadata(manual_product_id):
     return metadata
 
 
-def upsert_customer_pattern_download(customer_id, product_type, product_id, order_id=None, customer_email=None):
+def fetch_pattern_render_cache(cache_key):
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    cursor.execute(
+        f"""
+        UPDATE pattern_render_cache
+        SET last_used_at = {placeholder}
+        WHERE cache_key = {placeholder}
+        RETURNING image_data
+        """,
+        (datetime.utcnow().isoformat(), cache_key),
+    )
+    row = cursor.fetchone()
+    conn.commit()
+    conn.close()
+    if not row or not row["image_data"]:
+        return None
+    return bytes(row["image_data"])
+
+
+def store_pattern_render_cache(cache_key, renderer_version, image_data):
     conn = get_db()
     cursor = conn.cursor()
     placeholder = _placeholder()
     now = datetime.utcnow().isoformat()
+    cursor.execute(
+        f"""
+        INSERT INTO pattern_render_cache (cache_key, renderer_version, image_data, byte_size, created_at, last_used_at)
+        VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
+        ON CONFLICT (cache_key) DO UPDATE SET last_used_at = excluded.last_used_at
+        """,
+        (cache_key, renderer_version, image_data, len(image_data), now, now),
+    )
+    # Renders from older renderer versions can never be hit again.
+    cursor.execute(
+        f"DELETE FROM pattern_render_cache WHERE renderer_version <> {placeholder}",
+        (renderer_version,),
+    )
+    conn.commit()
+    conn.close()
 
-    normalized_type = "manual" if str(product_type or "").strip().lower() == "manual" else "template"
-    target_id = int(product_id)
-    template_id = target_id if normalized_type == "template" else None
-    manual_product_id = target_id if normalized_type == "manual" else None
 
-    if normalized_type == "manual":
+def fetch_cache_generations(namespaces):
+    """Return {namespace: generation}; namespaces never bumped read as 0."""
+    namespaces = list(namespaces)
+    generations = {namespace: 0 for namespace in namespaces}
+    if not namespaces:
+        return generations
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    cursor.execute(
+        f"SELECT namespace, generation FROM cache_generations WHERE namespace = ANY({placeholder})",
+        (namespaces,),
+    )
+    for row in cursor.fetchall():
+        generations[row["namespace"]] = int(row["generation"] or 0)
+    conn.close()
+    return generations
+
+
+def bump_cache_generations(namespaces):
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    now = datetime.utcnow().isoformat()
+    for namespace in sorted(set(namespaces)):
         cursor.execute(
             f"""
-            SELECT id, download_token
-            FROM customer_pattern_downloads
-            WHERE customer_id = {placeholder} AND product_type = {placeholder} AND manual_product_id = {placeholder}
-            LIMIT 1
+            INSERT INTO cache_generations (namespace, generation, updated_at)
+            VALUES ({placeholder}, 1, {placeholder})
+            ON CONFLICT (namespace) DO UPDATE
+            SET generation = cache_generations.generation + 1, updated_at = excluded.updated_at
             """,
-            (customer_id, normalized_type, manual_product_id),
+            (namespace, now),
         )
-    else:
+    conn.commit()
+    conn.close()
+
+
+def enqueue_stripe_webhook_event(event_id, event_type, payload, api_base_url=None):
+    """Store a verified webhook event; returns False if event_id was already received.
+
+    api_base_url is the public API URL as seen by the webhook request, for links
+    built later by the inbox worker, which runs outside any request.
+    """
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    now = datetime.utcnow().isoformat()
+    cursor.execute(
+        f"""
+        INSERT INTO stripe_webhook_events
+            (event_id, event_type, payload, status, attempts, next_attempt_at, received_at, api_base_url)
+        VALUES ({placeholder}, {placeholder}, {placeholder}, 'pending', 0, {placeholder}, {placeholder}, {placeholder})
+        ON CONFLICT (event_id) DO NOTHING
+        RETURNING event_id
+        """,
+        (event_id, event_type, payload, now, now, api_base_url),
+    )
+    inserted = cursor.fetchone() is not None
+    conn.commit()
+    conn.close()
+    return inserted
+
+
+def claim_stripe_webhook_events(limit=10, lease_seconds=300):
+    """Lease up to limit due events to this worker.
+
+    Pending events whose retry time has passed are eligible, and so are events
+    whose lease expired because the worker holding them died. SKIP LOCKED lets
+    several workers drain the inbox without waiting on each other.
+    """
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    now = datetime.utcnow()
+    now_iso = now.isoformat()
+    cursor.execute(
+        f"""
+        UPDATE stripe_webhook_events
+        SET status = 'processing', attempts = attempts + 1, locked_until = {placeholder}
+        WHERE event_id IN (
+            SELECT event_id
+            FROM stripe_webhook_events
+            WHERE (status = 'pending' AND next_attempt_at <= {placeholder})
+               OR (status = 'processing' AND locked_until < {placeholder})
+            ORDER BY received_at
+            LIMIT {placeholder}
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING event_id, event_type, payload, attempts, received_at, api_base_url
+        """,
+        ((now + timedelta(seconds=lease_seconds)).isoformat(), now_iso, now_iso, max(1, int(limit))),
+    )
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.commit()
+    conn.close()
+    rows.sort(key=lambda row: row["received_at"])
+    return rows
+
+
+def complete_stripe_webhook_event(event_id):
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    cursor.execute(
+        f"""
+        UPDATE stripe_webhook_events
+        SET status = 'done', processed_at = {placeholder}, locked_until = NULL, last_error = NULL
+        WHERE event_id = {placeholder}
+        """,
+        (datetime.utcnow().isoformat(), event_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def fail_stripe_webhook_event(event_id, error, retry_at=None):
+    """Record a failed attempt; retry_at=None parks the event as 'failed' for manual replay."""
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    cursor.execute(
+        f"""
+        UPDATE stripe_webhook_events
+        SET status = {placeholder}, next_attempt_at = {placeholder}, locked_until = NULL, last_error = {placeholder}
+        WHERE event_id = {placeholder}
+        """,
+        (
+            "pending" if retry_at else "failed",
+            retry_at.isoformat() if retry_at else None,
+            str(error or "")[:2000],
+            event_id,
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def prune_stripe_webhook_events(retention_days):
+    """Drop processed events once Stripe can no longer redeliver them."""
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).isoformat()
+    cursor.execute(
+        f"DELETE FROM stripe_webhook_events WHERE status = 'done' AND processed_at < {placeholder}",
+        (cutoff,),
+    )
+    deleted = max(cursor.rowcount or 0, 0)
+    conn.commit()
+    conn.close()
+    return deleted
+
+
+def enqueue_outbound_email(recipient, subject, html_body, sender=None, reply_to=None):
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    now = datetime.utcnow().isoformat()
+    cursor.execute(
+        f"""
+        INSERT INTO email_outbox (recipient, subject, html_body, sender, reply_to, status, attempts, next_attempt_at, created_at)
+        VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, 'pending', 0, {placeholder}, {placeholder})
+        RETURNING id
+        """,
+        (recipient, str(subject or "")[:500], html_body, sender, reply_to, now, now),
+    )
+    email_id = cursor.fetchone()["id"]
+    conn.commit()
+    conn.close()
+    return email_id
+
+
+def claim_outbound_emails(limit=20, lease_seconds=300):
+    """Lease up to limit due emails, oldest first; see claim_stripe_webhook_events."""
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    now = datetime.utcnow()
+    now_iso = now.isoformat()
+    cursor.execute(
+        f"""
+        UPDATE email_outbox
+        SET status = 'sending', attempts = attempts + 1, locked_until = {placeholder}
+        WHERE id IN (
+            SELECT id
+            FROM email_outbox
+            WHERE (status = 'pending' AND next_attempt_at <= {placeholder})
+               OR (status = 'sending' AND locked_until < {placeholder})
+            ORDER BY id
+            LIMIT {placeholder}
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, recipient, subject, html_body, sender, reply_to, attempts
+        """,
+        ((now + timedelta(seconds=lease_seconds)).isoformat(), now_iso, now_iso, max(1, int(limit))),
+    )
+    rows = sorted((dict(row) for row in cursor.fetchall()), key=lambda row: row["id"])
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def mark_outbound_emails_sent(email_ids):
+    if not email_ids:
+        return
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    cursor.execute(
+        f"""
+        UPDATE email_outbox
+        SET status = 'sent', sent_at = {placeholder}, locked_until = NULL, last_error = NULL
+        WHERE id = ANY({placeholder})
+        """,
+        (datetime.utcnow().isoformat(), list(email_ids)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def fail_outbound_email(email_id, error, retry_at=None):
+    """Record a failed attempt; retry_at=None dead-letters the email."""
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    cursor.execute(
+        f"""
+        UPDATE email_outbox
+        SET status = {placeholder}, next_attempt_at = {placeholder}, locked_until = NULL, last_error = {placeholder}
+        WHERE id = {placeholder}
+        """,
+        (
+            "pending" if retry_at else "dead",
+            retry_at.isoformat() if retry_at else None,
+            str(error or "")[:2000],
+            email_id,
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def count_outbound_emails_by_status():
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute("SELECT status, COUNT(*) AS cnt FROM email_outbox GROUP BY status")
+    counts = {row["status"]: int(row["cnt"] or 0) for row in cursor.fetchall()}
+    conn.close()
+    return counts
+
+
+def prune_outbound_emails(retention_days):
+    """Delete sent emails older than retention_days; dead letters are kept for review."""
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).isoformat()
+    cursor.execute(
+        f"DELETE FROM email_outbox WHERE status = 'sent' AND sent_at < {placeholder}",
+        (cutoff,),
+    )
+    deleted = max(cursor.rowcount or 0, 0)
+    conn.commit()
+    conn.close()
+    return deleted
+
+
+# kind -> (table, blob column, mime column, URL columns, match URL suffixes)
+_MEDIA_BLOB_SOURCES = {
+    "templates": ("templates", "image_data", "image_mime", ("image_url", "thumbnail_url"), False),
+    "gallery": ("gallery_photos", "image_data", "image_mime", ("image_url",), False),
+    "products": ("product_images", "image_data", "media_type", ("image_url",), False),
+    "reviews": ("customer_reviews", "review_image_data", "review_image_mime", ("review_image_url",), True),
+}
+
+
+# kind -> {rendition: URL column} for smaller sizes that are not stored; they are
+# rendered from the row's full-size blob instead.
+_MEDIA_BLOB_RENDITIONS = {
+    "gallery": {"medium": "medium_url", "thumbnail": "thumbnail_url"},
+}
+
+
+def find_media_blob(kind, filename):
+    """Locate the stored blob behind /uploads/<kind>/<filename> without reading it.
+
+    When the file is a smaller rendition, the row of its full-size blob comes
+    back with "rendition" set to the size to render from it.
+    """
+    conn = get_db()
+    try:
+        cursor = conn.cursor()
+        row = _find_media_blob_in(cursor, kind, filename)
+        if row:
+            return row
+        for rendition, url_column in _MEDIA_BLOB_RENDITIONS.get(kind, {}).items():
+            row = _find_media_blob_in(cursor, kind, filename, url_columns=(url_column,))
+            if row:
+                row["rendition"] = rendition
+                return row
+        return None
+    finally:
+        conn.close()
+
+
+def _find_media_blob_in(cursor, kind, filename, url_columns=None):
+    table, blob_column, mime_column, kind_url_columns, match_suffix = _MEDIA_BLOB_SOURCES[kind]
+    url_columns = url_columns or kind_url_columns
+    placeholder = _placeholder()
+    candidates = [f"/uploads/{kind}/{filename}", f"uploads/{kind}/{filename}", filename]
+    select_sql = (
+        f"SELECT id, {mime_column} AS mime, octet_length({blob_column}) AS byte_size "
+        f"FROM {table} WHERE {blob_column} IS NOT NULL AND "
+    )
+
+    url_match = " OR ".join(f"{column} = ANY({placeholder})" for column in url_columns)
+    cursor.execute(
+        f"{select_sql}({url_match}) LIMIT 1",
+        tuple(candidates for _column in url_columns),
+    )
+    row = cursor.fetchone()
+    if not row and match_suffix:
+        cursor.execute(
+            f"{select_sql}{url_columns[0]} LIKE {placeholder} LIMIT 1",
+            (f"%/uploads/{kind}/{filename}",),
+        )
+        row = cursor.fetchone()
+    return dict(row) if row else None
+
+
+def iter_media_blob(kind, row_id, chunk_size=256 * 1024):
+    """Yield a stored media blob in chunks so large videos never sit whole in memory."""
+    table, blob_column, _mime_column, _url_columns, _match_suffix = _MEDIA_BLOB_SOURCES[kind]
+    placeholder = _placeholder()
+    conn = get_db()
+    try:
+        cursor = conn.cursor()
+        offset = 1
+        while True:
+            cursor.execute(
+                f"SELECT substring({blob_column} FROM {placeholder} FOR {placeholder}) AS chunk "
+                f"FROM {table} WHERE id = {placeholder}",
+                (offset, chunk_size, row_id),
+            )
+            row = cursor.fetchone()
+            chunk = bytes(row["chunk"]) if row and row["chunk"] is not None else b""
+            if not chunk:
+                break
+            yield chunk
+            if len(chunk) < chunk_size:
+                break
+            offset += len(chunk)
+    finally:
+        conn.close()
+
+
+def upsert_customer_pattern_downloads(customer_id, products, order_id=None, customer_email=None):
+    """Grant or refresh download access to many patterns in a fixed number of queries.
+
+    products is a list of (product_type, product_id) pairs. Existing grants keep
+    their token and are pointed at order_id. Missing grants are inserted in one
+    statement. Grants come back in input order, with "created" set on new ones. A
+    per-customer transaction lock stops overlapping webhook retries from
+    inserting the same grant twice.
+    """
+    targets = []
+    for product_type, product_id in products:
+        normalized_type = "manual" if str(product_type or "").strip().lower() == "manual" else "template"
+        target = (normalized_type, int(product_id))
+        if target not in targets:
+            targets.append(target)
+    if not targets:
+        return []
+
+    conn = get_db()
+    cursor = conn.cursor()
+    placeholder = _placeholder()
+    now = datetime.utcnow().isoformat()
+
+    cursor.execute(
+        f"SELECT pg_advisory_xact_lock({placeholder}, {placeholder})",
+        (_PATTERN_DOWNLOAD_LOCK_ID, int(customer_id)),
+    )
+    cursor.execute(
+        f"""
+        SELECT id, product_type, template_id, manual_product_id, download_token
+        FROM customer_pattern_downloads
+        WHERE customer_id = {placeholder}
+          AND (
+            (product_type = 'template' AND template_id = ANY({placeholder}))
+            OR (product_type = 'manual' AND manual_product_id = ANY({placeholder}))
+          )
+        ORDER BY id
+        """,
+        (
+            customer_id,
+            [target_id for target_type, target_id in targets if target_type == "template"],
+            [target_id for target_type, target_id in targets if target_type == "manual"],
+        ),
+    )
+    grants = {}
+    for row in cursor.fetchall():
+        if row["product_type"] == "manual":
+            target = ("manual", row["manual_product_id"])
+        else:
+            target = ("template", row["template_id"])
+        grants.setdefault(target, {"id": row["id"], "download_token": row["download_token"], "created": False})
+
+    if grants:
         cursor.execute(
             f"""
-            SELECT id, download_token
-            FROM customer_pattern_downloads
-            WHERE customer_id = {placeholder} AND product_type = {placeholder} AND template_id = {placeholder}
-            LIMIT 1
+            UPDATE customer_pattern_downloads
+            SET order_id = {placeholder}, customer_email = {placeholder}, unlocked_at = {placeholder}, updated_at = {placeholder}
+            WHERE id = ANY({placeholder})
             """,
-            (customer_id, normalized_type, template_id),
+            (order_id, customer_email, now, now, [grant["id"] for grant in grants.values()]),
         )
-    row = cursor.fetchone()
 
-    if row:
-        download_token = row.get("download_token") or secrets.token_urlsafe(32)
+    missing = [target for target in targets if target not in grants]
+    if missing:
+        row_sql = "(" + ", ".join([placeholder] * 10) + ")"
+        params = []
+        targets_by_token = {}
+        for target_type, target_id in missing:
+            download_token = secrets.token_urlsafe(32)
+            targets_by_token[download_token] = (target_type, target_id)
+            params.extend([
+                customer_id,
+                target_id if target_type == "template" else None,
+                target_id if target_type == "manual" else None,
+                target_type,
+                order_id,
+                customer_email,
+                download_token,
+                now,
+                now,
+                now,
+            ])
         cursor.execute(
             f"""
-            UPDATE customer_pattern_downloads
-            SET product_type = {placeholder}, template_id = {placeholder}, manual_product_id = {placeholder}, order_id = {placeholder}, customer_email = {placeholder}, download_token = {placeholder}, unlocked_at = {placeholder}, updated_at = {placeholder}
-            WHERE id = {placeholder}
+            INSERT INTO customer_pattern_downloads (customer_id, template_id, manual_product_id, product_type, order_id, customer_email, download_token, unlocked_at, created_at, updated_at)
+            VALUES {", ".join([row_sql] * len(missing))}
+            RETURNING id, download_token
             """,
-            (normalized_type, template_id, manual_product_id, order_id, customer_email, download_token, now, now, row["id"]),
+            params,
         )
-        download_id = row["id"]
-        created = False
-    else:
-        download_token = secrets.token_urlsafe(32)
-        if _is_postgres_backend():
-            cursor.execute(
-                f"""
-                INSERT INTO customer_pattern_downloads (customer_id, template_id, manual_product_id, product_type, order_id, customer_email, download_token, unlocked_at, created_at, updated_at)
-                VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
-                RETURNING id
-                """,
-                (customer_id, template_id, manual_product_id, normalized_type, order_id, customer_email, download_token, now, now, now),
-            )
-            download_id = cursor.fetchone()["id"]
-        else:
-            cursor.execute(
-                f"""
-                INSERT INTO customer_pattern_downloads (customer_id, template_id, manual_product_id, product_type, order_id, customer_email, download_token, unlocked_at, created_at, updated_at)
-                VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
-                """,
-                (customer_id, template_id, manual_product_id, normalized_type, order_id, customer_email, download_token, now, now, now),
-            )
-            download_id = cursor.lastrowid
-        created = True
+        for row in cursor.fetchall():
+            grants[targets_by_token[row["download_token"]]] = {
+                "id": row["id"],
+                "download_token": row["download_token"],
+                "created": True,
+            }
 
     conn.commit()
     conn.close()
-    return {
-        "id": download_id,
-        "download_token": download_token,
-        "created": created,
-        "customer_id": customer_id,
-        "product_type": normalized_type,
-        "template_id": template_id,
-        "manual_product_id": manual_product_id,
-        "order_id": order_id,
-    }
+    return [
+        {
+            **grants[(target_type, target_id)],
+            "customer_id": customer_id,
+            "product_type": target_type,
+            "template_id": target_id if target_type == "template" else None,
+            "manual_product_id": target_id if target_type == "manual" else None,
+            "order_id": order_id,
+        }
+        for target_type, target_id in targets
+    ]
+
+
+def upsert_customer_pattern_download(customer_id, product_type, product_id, order_id=None, customer_email=None):
+    return upsert_customer_pattern_downloads(
+        customer_id,
+        [(product_type, product_id)],
+        order_id=order_id,
+        customer_email=customer_email,
+    )[0]
 
 
 def list_customer_pattern_downloads(customer_id):
@@ -3769,45 +4883,183 @@ def list_customer_review_options(customer_id):
     return [dict(row) for row in rows]
 
 
+# Public listings skip review_image_data; has_review_image_data is enough for
+# _normalize_review_image_fields to decide whether an /uploads/reviews/ URL resolves.
+PUBLIC_REVIEW_COLUMNS = """
+    r.id, r.customer_id, r.product_type, r.product_id, r.rating, r.title, r.body,
+    r.review_image_url, r.review_image_mime, r.admin_comment, r.verified_purchase, r.status,
+    r.created_at, r.updated_at, r.product_title, r.fallback_product_image_url,
+    COALESCE(r.review_image_url, r.fallback_product_image_url) AS product_image_url,
+    (r.review_image_data IS NOT NULL) AS has_review_image_data,
+    c.first_name, c.last_name
+"""
+
+
+def _refresh_review_product_snapshots(cursor, review_ids=None):
+    """Copy the latest ordered title and image for each review's product onto the review.
+
+    With review_ids None every review is refreshed (used by the migration backfill).
+    """
+    placeholder = _placeholder()
+    where = "" if review_ids is None else f"WHERE r.id = ANY({placeholder})"
+    cursor.execute(
+        f"""
+        UPDATE customer_reviews r
+        SET product_title = (
+                SELECT oi.title
+                FROM customer_order_items oi
+                WHERE oi.product_type = r.product_type
+                  AND oi.product_id = r.product_id
+                  AND COALESCE(oi.title, '') <> ''
+                ORDER BY oi.id DESC
+                LIMIT 1
+            ),
+            fallback_product_image_url = (
+                SELECT oi.image_url
+                FROM customer_order_items oi
+                WHERE oi.product_type = r.product_type
+                  AND oi.product_id = r.product_id
+                  AND COALESCE(oi.image_url, '') <> ''
+                ORDER BY oi.id DESC
+                LIMIT 1
+            )
+        {where}
+        """,
+        () if review_ids is None else ([int(review_id) for review_id in review_ids],),
+    )
+
+
+def backfill_review_product_snapshots():
+    conn = get_db()
+    cursor = conn.cursor()
+    _refresh_review_product_snapshots(cursor)
+    conn.commit()
+    conn.close()
+
+
+def _project_preview_columns(image_bytes, mime):
+    from .services.project_preview_service import preview_hash, render_thumbnail
+
+    return {
+        "preview_hash": preview_hash(image_bytes),
+        "preview_mime": mime,
+        "preview_data": image_bytes,
+        "thumbnail_data": render_thumbnail(image_bytes),
+    }
+
+
+def _backfill_project_preview_row(row):
+    """Column updates for one user_projects row, or None when it is already current."""
+    from .services.project_preview_service import (
+        PREVIEW_MIME_TYPES, extract_design_preview, preview_data_url, read_preview_image
+    )
+
+    design_data = row["design_data"]
+    if isinstance(design_data, str):
+        design_data = json.loads(design_data)
+    if not isinstance(design_data, dict):
+        return None
+
+    if not row["preview_hash"]:
+        stored, image_bytes, mime = extract_design_preview(design_data)
+        if image_bytes is None:
+            return None
+        return {"design_data": stored, **_project_preview_columns(image_bytes, mime)}
+
+    updates = {}
+    data = dict(design_data)
+    original = preview_data_url(row["preview_data"], row["preview_mime"] or "application/octet-stream")
+    if data.get("floodFill") is True and data.get("dataUrl") is None:
+        # Earlier saves dropped dataUrl; the designer saves it as the same image as the preview.
+        data["dataUrl"] = original
+    if row["preview_mime"] not in PREVIEW_MIME_TYPES.values():
+        image_bytes, mime = read_preview_image(original)
+        if image_bytes is None:
+            data.setdefault("preview_url", original)
+            updates.update(preview_hash=None, preview_mime=None, preview_data=None, thumbnail_data=None)
+        else:
+            updates.update(_project_preview_columns(image_bytes, mime))
+    if data != design_data:
+        updates["design_data"] = data
+    return updates or None
+
+
+def backfill_project_previews(batch_size=100):
+    """Move inline designer previews out of user_projects.design_data.
+
+    Rows without a stored preview get their preview_url/dataUrl image copied into
+    preview_data with a thumbnail; dataUrl is left in place. Rows stored by earlier
+    versions get back a flood-fill dataUrl they lost, and previews saved with a
+    mime type other than PNG/JPEG/WebP are re-encoded or put back into design_data.
+    Writes design_data directly, so updated_at and version are unchanged.
+    """
+    from .services.project_preview_service import PREVIEW_MIME_TYPES
+
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute("SELECT to_regclass('user_projects') IS NOT NULL AS present")
+    row = cursor.fetchone()
+    if not row or not row["present"]:
+        conn.close()
+        return 0
+
+    placeholder = _placeholder()
+    allowed = tuple(PREVIEW_MIME_TYPES.values())
+    mime_placeholders = ", ".join([placeholder] * len(allowed))
+    last_id = 0
+    updated = 0
+    while True:
+        cursor.execute(
+            f"""
+            SELECT id, design_data, preview_hash, preview_mime, preview_data
+            FROM user_projects
+            WHERE id > {placeholder}
+              AND (
+                (preview_hash IS NULL
+                 AND (design_data->>'preview_url' LIKE 'data:%%' OR design_data->>'dataUrl' LIKE 'data:%%'))
+                OR (preview_data IS NOT NULL
+                    AND (COALESCE(preview_mime, '') NOT IN ({mime_placeholders})
+                         OR (design_data->>'floodFill' = 'true' AND design_data->>'dataUrl' IS NULL)))
+              )
+            ORDER BY id
+            LIMIT {placeholder}
+            """,
+            (last_id, *allowed, batch_size),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        for row in rows:
+            last_id = row["id"]
+            updates = _backfill_project_preview_row(row)
+            if not updates:
+                continue
+            assignments = []
+            params = []
+            for column, value in updates.items():
+                if column == "design_data":
+                    assignments.append(f"design_data = CAST({placeholder} AS json)")
+                    value = json.dumps(value)
+                else:
+                    assignments.append(f"{column} = {placeholder}")
+                params.append(value)
+            cursor.execute(
+                f"UPDATE user_projects SET {', '.join(assignments)} WHERE id = {placeholder}",
+                (*params, row["id"]),
+            )
+            updated += 1
+        conn.commit()
+    conn.close()
+    return updated
+
+
 def list_reviews_for_product(product_type, product_id):
     conn = get_db()
     cursor = conn.cursor()
-    is_mysql = _use_mysql()
-    placeholder = "%s" if is_mysql else "?"
+    placeholder = _placeholder()
     cursor.execute(
         f"""
-                SELECT
-                        r.*, c.first_name, c.last_name,
-                        (
-                                SELECT COALESCE(oi.image_url, '')
-                                FROM customer_order_items oi
-                                WHERE oi.product_type = r.product_type
-                                    AND oi.product_id = r.product_id
-                                    AND COALESCE(oi.image_url, '') <> ''
-                                ORDER BY oi.id DESC
-                                LIMIT 1
-                        ) AS fallback_product_image_url,
-                        COALESCE(
-                            r.review_image_url,
-                            (
-                                SELECT COALESCE(oi.image_url, '')
-                                FROM customer_order_items oi
-                                WHERE oi.product_type = r.product_type
-                                    AND oi.product_id = r.product_id
-                                    AND COALESCE(oi.image_url, '') <> ''
-                                ORDER BY oi.id DESC
-                                LIMIT 1
-                            )
-                        ) AS product_image_url,
-                        (
-                                SELECT COALESCE(oi.title, '')
-                                FROM customer_order_items oi
-                                WHERE oi.product_type = r.product_type
-                                    AND oi.product_id = r.product_id
-                                    AND COALESCE(oi.title, '') <> ''
-                                ORDER BY oi.id DESC
-                                LIMIT 1
-                        ) AS product_title
+        SELECT {PUBLIC_REVIEW_COLUMNS}
         FROM customer_reviews r
         JOIN customers c ON c.id = r.customer_id
         WHERE r.product_type = {placeholder}
@@ -3825,43 +5077,11 @@ def list_reviews_for_product(product_type, product_id):
 def list_recent_reviews(limit=10):
     conn = get_db()
     cursor = conn.cursor()
-    is_mysql = _use_mysql()
-    placeholder = "%s" if is_mysql else "?"
+    placeholder = _placeholder()
     safe_limit = max(1, min(int(limit or 10), 50))
     cursor.execute(
         f"""
-                SELECT
-                        r.*, c.first_name, c.last_name,
-                        (
-                                SELECT COALESCE(oi.image_url, '')
-                                FROM customer_order_items oi
-                                WHERE oi.product_type = r.product_type
-                                    AND oi.product_id = r.product_id
-                                    AND COALESCE(oi.image_url, '') <> ''
-                                ORDER BY oi.id DESC
-                                LIMIT 1
-                        ) AS fallback_product_image_url,
-                        COALESCE(
-                            r.review_image_url,
-                            (
-                                SELECT COALESCE(oi.image_url, '')
-                                FROM customer_order_items oi
-                                WHERE oi.product_type = r.product_type
-                                    AND oi.product_id = r.product_id
-                                    AND COALESCE(oi.image_url, '') <> ''
-                                ORDER BY oi.id DESC
-                                LIMIT 1
-                            )
-                        ) AS product_image_url,
-                        (
-                                SELECT COALESCE(oi.title, '')
-                                FROM customer_order_items oi
-                                WHERE oi.product_type = r.product_type
-                                    AND oi.product_id = r.product_id
-                                    AND COALESCE(oi.title, '') <> ''
-                                ORDER BY oi.id DESC
-                                LIMIT 1
-                        ) AS product_title
+        SELECT {PUBLIC_REVIEW_COLUMNS}
         FROM customer_reviews r
         JOIN customers c ON c.id = r.customer_id
         WHERE r.status = 'approved'
@@ -4270,6 +5490,8 @@ def update_admin_review(review_id, payload):
         tuple(values),
     )
     updated = cursor.rowcount > 0
+    if updated:
+        _refresh_review_product_snapshots(cursor, [review_id])
     conn.commit()
     conn.close()
     return updated
@@ -4343,6 +5565,7 @@ def create_customer_review(customer_id, payload, verified_purchase, status=None)
             values,
         )
         review_id = cursor.lastrowid
+    _refresh_review_product_snapshots(cursor, [review_id])
     conn.commit()
     conn.close()
     return review_id
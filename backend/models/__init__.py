@@ -10,7 +10,7 @@ db = SQLAlchemy()
 from .template import Template, TemplateRegion
 from .gallery_photo import GalleryPhoto
 from .glass_type import GlassType
-from .project import UserProject
+from .project import UserProject, UserProjectRegion
 from .work_order import WorkOrder, WorkOrderStatusHistory
 from .revision import WorkOrderRevision
 
@@ -21,6 +21,7 @@ __all__ = [
     "GalleryPhoto",
     "GlassType",
     "UserProject",
+    "UserProjectRegion",
     "WorkOrder",
     "WorkOrderStatusHistory",
     "WorkOrderRevision",
@@ -20,6 +20,10 @@ class GalleryPhoto(db.Model):
     image_url = db.Column(db.String(500), nullable=False)
     image_data = deferred(db.Column(db.LargeBinary, nullable=True))
     image_mime = db.Column(db.String(80), nullable=True)
+    # Smaller renditions written at upload; NULL on photos uploaded before they existed.
+    # They are not stored here: the media layer renders them again from image_data.
+    medium_url = db.Column(db.String(500), nullable=True)
+    thumbnail_url = db.Column(db.String(500), nullable=True)
     template_id = db.Column(db.Integer, db.ForeignKey("templates.id", ondelete="SET NULL"), nullable=True, index=True)
     show_description = db.Column(db.Boolean, nullable=False, default=True)
     is_hidden = db.Column(db.Boolean, nullable=False, default=False, index=True)
@@ -46,6 +50,8 @@ class GalleryPhoto(db.Model):
             "display_name": None if self.hide_submitter_name else self.display_name,
             "hide_submitter_name": self.hide_submitter_name,
             "image_url": self.image_url,
+            "medium_url": self.medium_url or self.image_url,
+            "thumbnail_url": self.thumbnail_url or self.medium_url or self.image_url,
             "template_id": self.template_id,
             "template_name": template_name,
             "show_description": self.show_description,
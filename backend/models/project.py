@@ -2,12 +2,15 @@
 UserProject model: saved designer projects with JSON design_data.
 """
 import json
+from sqlalchemy import inspect
+from sqlalchemy.orm import deferred, validates
 from . import db
 
 
 class UserProject(db.Model):
     """
-    Saved design. design_data is JSON: { "regionId": { "color": "#hex", "glassTypeId": n }, ... }.
+    Saved design. design_data is the designer's canvas JSON; its per-region "sections" fills are
+    stored as UserProjectRegion rows and merged back in by display_design_data().
     """
 
     __tablename__ = "user_projects"
@@ -23,15 +26,95 @@ class UserProject(db.Model):
     )
     name = db.Column(db.String(255), nullable=True)
     design_data = db.Column(db.JSON, nullable=False)
+    # Bumped whenever design_data is assigned or regions are patched; region PATCHes
+    # and versioned saves must name the version they were based on.
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    # Number of region_fills with a color. NULL until the project's design_data
+    # sections have been moved into user_project_regions.
+    filled_region_count = db.Column(db.Integer, nullable=True)
+    # Canvas snapshot copied out of design_data on save (see project_preview_service).
+    preview_hash = db.Column(db.String(64), nullable=True)
+    preview_mime = db.Column(db.String(50), nullable=True)
+    preview_data = deferred(db.Column(db.LargeBinary, nullable=True))
+    thumbnail_data = deferred(db.Column(db.LargeBinary, nullable=True))
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
     template = db.relationship("Template", backref=db.backref("user_projects", lazy="dynamic"))
+    region_fills = db.relationship(
+        "UserProjectRegion",
+        backref=db.backref("project", lazy="select"),
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
     # work_orders: see WorkOrder.project backref
 
     def __repr__(self):
         return f"<UserProject id={self.id} user_id={self.user_id} name={self.name!r}>"
 
+    @validates("design_data")
+    def _normalize_design_data(self, key, value):
+        if inspect(self).has_identity:
+            # Incremented in the UPDATE itself, so a concurrent region PATCH is never overwritten.
+            self.version = type(self).version + 1
+        value = self._extract_preview(value)
+        if not isinstance(value, dict):
+            return value
+        sections = value.get("sections")
+        if isinstance(sections, dict):
+            # Region fills live in user_project_regions so they can be patched one at a time.
+            self.replace_region_fills(sections)
+            return {k: v for k, v in value.items() if k != "sections"}
+        if self.filled_region_count is None:
+            self.filled_region_count = sum(1 for row in self.region_fills if row.filled)
+        return value
+
+    def _extract_preview(self, value):
+        from ..services.project_preview_service import (
+            extract_design_preview, preview_hash, render_thumbnail
+        )
+
+        stored, image_bytes, mime = extract_design_preview(value)
+        if image_bytes is None:
+            return value
+        digest = preview_hash(image_bytes)
+        if digest != self.preview_hash:
+            self.preview_hash = digest
+            self.preview_mime = mime
+            self.preview_data = image_bytes
+            self.thumbnail_data = render_thumbnail(image_bytes)
+        return stored
+
+    def replace_region_fills(self, sections):
+        existing = {row.region_id: row for row in self.region_fills}
+        rows = []
+        for region_id, fill in sections.items():
+            if not isinstance(fill, dict) or not str(region_id).strip():
+                continue
+            row = existing.get(str(region_id)) or UserProjectRegion(region_id=str(region_id))
+            row.set_fill(fill)
+            rows.append(row)
+        self.region_fills = rows
+        self.filled_region_count = sum(1 for row in rows if row.filled)
+
+    def preview_link(self, variant="full"):
+        """URL of the design preview: the extracted image, or one left in design_data."""
+        if self.preview_hash:
+            from ..services.project_preview_service import project_preview_url
+
+            return project_preview_url(self.id, self.preview_hash, variant)
+        data = self.design_data if isinstance(self.design_data, dict) else {}
+        return data.get("preview_url") or data.get("dataUrl")
+
+    def display_design_data(self):
+        """design_data as clients saved it: sections from region rows, preview_url as a link."""
+        data = dict(self.design_data) if isinstance(self.design_data, dict) else {}
+        if self.filled_region_count is not None:
+            data["sections"] = {row.region_id: dict(row.fill or {}) for row in self.region_fills}
+        if self.preview_hash and not data.get("preview_url"):
+            data["preview_url"] = self.preview_link()
+        return data
+
     @staticmethod
     def validate_design_data(data) -> tuple[bool, str]:
         """
@@ -67,11 +150,13 @@ class UserProject(db.Model):
             "user_id": self.user_id,
             "template_id": self.template_id,
             "name": self.name,
+            "version": self.version,
+            "filled_region_count": self.filled_region_count,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
         if include_design_data:
-            out["design_data"] = self.design_data if isinstance(self.design_data, dict) else {}
+            out["design_data"] = self.display_design_data()
         # Include the most recent work order ID if one exists
         try:
             latest_wo = self.work_orders.order_by(None).order_by(
@@ -85,6 +170,32 @@ class UserProject(db.Model):
         return out
 
 
+
+class UserProjectRegion(db.Model):
+    """
+    One region's fill in a saved design, e.g. { "color": "#hex", "glassTypeId": n, "sectionNum": n }.
+    """
+
+    __tablename__ = "user_project_regions"
+    __table_args__ = {"mysql_charset": "utf8mb4"}
+
+    project_id = db.Column(
+        db.Integer,
+        db.ForeignKey("user_projects.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    region_id = db.Column(db.String(100), primary_key=True)
+    fill = db.Column(db.JSON, nullable=False)
+    filled = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    def __repr__(self):
+        return f"<UserProjectRegion project_id={self.project_id} region_id={self.region_id!r}>"
+
+    def set_fill(self, fill):
+        self.fill = dict(fill)
+        self.filled = bool(str(fill.get("color") or "").strip())
+
 # Avoid circular import: WorkOrder is referenced in relationship above.
 # Define relationship using string "WorkOrder"; SQLAlchemy resolves it.
 # Already using "WorkOrder" in foreign_keys and backref, so we need to fix:
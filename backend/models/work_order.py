@@ -83,6 +83,7 @@ class WorkOrder(db.Model):
         include_template_data=True,
         include_revision_summary=True,
         project_preview_only=False,
+        project_preview_url=None,
     ):
         out = {
             "id": self.id,
@@ -101,14 +102,11 @@ class WorkOrder(db.Model):
             out["status_history"] = [h.to_dict() for h in self.status_history]
         # Include project design data for admin views
         if include_project_data and self.project:
-            project_design_data = self.project.design_data if isinstance(self.project.design_data, dict) else {}
             if project_preview_only:
-                preview_data = {}
-                if project_design_data.get("preview_url"):
-                    preview_data["preview_url"] = project_design_data.get("preview_url")
-                if project_design_data.get("dataUrl"):
-                    preview_data["dataUrl"] = project_design_data.get("dataUrl")
-                project_design_data = preview_data
+                # Listings link to a thumbnail instead of inlining the base64 preview.
+                project_design_data = {"preview_url": project_preview_url} if project_preview_url else {}
+            else:
+                project_design_data = self.project.display_design_data()
 
             out["project"] = {
                 "id": self.project.id,
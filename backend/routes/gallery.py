@@ -1,15 +1,25 @@
 """Photo gallery API routes."""
-import io
+import base64
 import os
 import uuid
+from datetime import datetime
 
 from flask import Blueprint, jsonify, request
-from PIL import Image as PilImage
+from sqlalchemy import select, tuple_
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
 from werkzeug.utils import secure_filename
 
-from ..auth import decode_token
+from ..auth import authenticate_request
 from ..models import db, GalleryPhoto, Template
+from ..services.catalog_cache_service import GALLERY_FACET_KEYS, cached_catalog, invalidate_catalog_cache
+from ..services.gallery_ingest_service import (
+    UploadTooLarge,
+    discard_spooled,
+    process_gallery_photos,
+    spool_upload,
+    write_gallery_variants,
+)
 
 gallery_bp = Blueprint("gallery", __name__)
 admin_gallery_bp = Blueprint("admin_gallery", __name__)
@@ -22,17 +32,10 @@ MAX_TOTAL_PHOTO_BYTES = 120 * 1024 * 1024
 
 
 def _extract_payload_from_request():
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
-        return None, "missing_token"
-    token = auth_header.split(" ", 1)[1].strip()
-    if not token:
-        return None, "missing_token"
-    try:
-        payload = decode_token(token)
-        return payload, None
-    except Exception:
+    payload, error = authenticate_request()
+    if error and error != "missing_token":
         return None, "invalid_token"
+    return payload, error
 
 
 def _require_signed_in():
@@ -80,9 +83,10 @@ def _get_public_base_url():
 
 def _with_absolute_image_url(item):
     output = dict(item)
-    image_url = output.get("image_url")
-    if image_url and isinstance(image_url, str) and image_url.startswith("/"):
-        output["image_url"] = f"{_get_public_base_url()}{image_url}"
+    for field in ("image_url", "medium_url", "thumbnail_url"):
+        image_url = output.get(field)
+        if image_url and isinstance(image_url, str) and image_url.startswith("/"):
+            output[field] = f"{_get_public_base_url()}{image_url}"
     return output
 
 
@@ -104,6 +108,8 @@ def _safe_gallery_photo_dict(item, include_admin_fields=False):
             "display_name": None if item.hide_submitter_name else item.display_name,
             "hide_submitter_name": item.hide_submitter_name,
             "image_url": item.image_url,
+            "medium_url": item.medium_url or item.image_url,
+            "thumbnail_url": item.thumbnail_url or item.medium_url or item.image_url,
             "template_id": item.template_id,
             "template_name": None,
             "show_description": item.show_description,
@@ -120,60 +126,143 @@ def _safe_gallery_photo_dict(item, include_admin_fields=False):
     return _with_absolute_image_url(payload)
 
 
-def _serialize_list(query, include_admin_fields=False, page=None, per_page=None):
-    ordered_query = query.order_by(GalleryPhoto.created_at.desc(), GalleryPhoto.id.desc())
+def _template_name_option():
+    # template_name in to_dict; joined here instead of one lazy load per photo.
+    return joinedload(GalleryPhoto.template).load_only(Template.id, Template.name)
+
+
+def _encode_gallery_cursor(latest_created_at, group_id):
+    raw = f"{latest_created_at.isoformat() if latest_created_at else ''}|{group_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_gallery_cursor(raw):
+    try:
+        created_at, group_id = base64.urlsafe_b64decode(raw.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), group_id
+    except (ValueError, UnicodeError):
+        return None
+
 
-    use_pagination = bool(page and per_page)
-    if use_pagination:
-        group_key = _group_key_expr()
-        grouped_query = query.with_entities(
-            group_key.label("group_id"),
-            db.func.max(GalleryPhoto.created_at).label("latest_created_at"),
-            db.func.max(GalleryPhoto.id).label("latest_id"),
-        ).group_by(group_key).order_by(
-            db.func.max(GalleryPhoto.created_at).desc(),
-            db.func.max(GalleryPhoto.id).desc(),
+def _page_groups(query, offset, limit, after=None):
+    """Photos of submission groups offset+1..offset+limit, newest group first, in one query.
+
+    Groups are ordered by (latest_created_at, group_id) descending; after is a
+    (latest_created_at, group_id) keyset bound. Rows are
+    (photo, group_id, latest_created_at, group_total), where group_total counts
+    the groups left after the keyset bound.
+    """
+    group_key = _group_key_expr()
+    photos = query.with_entities(
+        GalleryPhoto.id.label("photo_id"),
+        group_key.label("group_id"),
+        db.func.max(GalleryPhoto.created_at).over(partition_by=group_key).label("latest_created_at"),
+    ).subquery()
+    newest_first = [photos.c.latest_created_at.desc(), photos.c.group_id.desc()]
+    oldest_first = [photos.c.latest_created_at.asc(), photos.c.group_id.asc()]
+    ranked = select(
+        photos.c.photo_id,
+        photos.c.group_id,
+        photos.c.latest_created_at,
+        db.func.dense_rank().over(order_by=newest_first).label("group_rank"),
+        # Ranking from both ends gives the distinct group count without a second query.
+        (
+            db.func.dense_rank().over(order_by=newest_first)
+            + db.func.dense_rank().over(order_by=oldest_first)
+            - 1
+        ).label("group_total"),
+    )
+    if after is not None:
+        ranked = ranked.where(tuple_(photos.c.latest_created_at, photos.c.group_id) < tuple_(*after))
+    ranked = ranked.subquery()
+
+    return (
+        db.session.query(GalleryPhoto, ranked.c.group_id, ranked.c.latest_created_at, ranked.c.group_total)
+        .join(ranked, GalleryPhoto.id == ranked.c.photo_id)
+        .filter(ranked.c.group_rank > offset, ranked.c.group_rank <= offset + limit)
+        .options(_template_name_option())
+        .order_by(ranked.c.group_rank, GalleryPhoto.created_at.desc(), GalleryPhoto.id.desc())
+        .all()
+    )
+
+
+def _gallery_facets(cache_key, scope_query):
+    """Categories and linked templates across scope_query, cached until the gallery changes."""
+    def compute():
+        category_rows = (
+            scope_query.with_entities(GalleryPhoto.category)
+            .filter(GalleryPhoto.category.isnot(None))
+            .distinct()
+            .all()
+        )
+        linked_template_ids = (
+            scope_query.with_entities(GalleryPhoto.template_id)
+            .filter(GalleryPhoto.template_id.isnot(None))
+            .subquery()
         )
+        template_rows = (
+            db.session.query(Template.id, Template.name)
+            .filter(Template.id.in_(select(linked_template_ids.c.template_id)))
+            .all()
+        )
+        return {
+            "categories": sorted({row[0] for row in category_rows if row and row[0]}),
+            "templates": [
+                {"id": row.id, "name": row.name}
+                for row in sorted(template_rows, key=lambda row: (row.name or "").lower())
+            ],
+        }
 
-        total_items = grouped_query.count()
+    return cached_catalog(cache_key, compute)
+
+
+def _serialize_list(query, facets, include_admin_fields=False, page=None, per_page=None, after=None):
+    """Gallery listing payload.
+
+    facets is (cache_key, scope_query) for the filter lists. per_page pages
+    whole submission groups: by keyset from the after cursor (or from the
+    start) when page is absent, returning next_cursor; by page number when
+    page is given. Without per_page every matching photo is returned.
+
+    Page-number mode stays offset-based: it ranks every matching group so it
+    can report total_pages and jump to any page, which the numbered pagers on
+    the public gallery and in gallery management need. Callers that only walk
+    forward should send cursor instead.
+    """
+    next_cursor = None
+    use_keyset = bool(per_page) and (after is not None or not page)
+    use_pagination = bool(page and per_page) and not use_keyset
+    if use_keyset:
+        rows = _page_groups(query, 0, per_page, after=after)
+        if rows and rows[0].group_total > per_page:
+            next_cursor = _encode_gallery_cursor(rows[-1].latest_created_at, rows[-1].group_id)
+        items = [row[0] for row in rows]
+    elif use_pagination:
+        clamped_page = max(1, page)
+        rows = _page_groups(query, (clamped_page - 1) * per_page, per_page)
+        if not rows and clamped_page > 1:
+            # Past the end: find the last page and fetch that instead.
+            first = _page_groups(query, 0, 1)
+            last_page = max(1, (first[0].group_total + per_page - 1) // per_page) if first else 1
+            clamped_page = min(clamped_page, last_page)
+            rows = _page_groups(query, (clamped_page - 1) * per_page, per_page) if first else []
+        total_items = rows[0].group_total if rows else 0
         total_pages = max(1, (total_items + per_page - 1) // per_page)
-        clamped_page = min(max(1, page), total_pages)
-        group_rows = grouped_query.offset((clamped_page - 1) * per_page).limit(per_page).all()
-        selected_group_ids = [str(row.group_id) for row in group_rows if getattr(row, "group_id", None) is not None]
-        if selected_group_ids:
-            items = ordered_query.filter(group_key.in_(selected_group_ids)).all()
-            group_position = {group_id: index for index, group_id in enumerate(selected_group_ids)}
-            items.sort(
-                key=lambda item: (
-                    group_position.get(str(item.submission_group_id or item.id), len(selected_group_ids)),
-                    -(item.created_at.timestamp() if item.created_at else 0),
-                    -int(item.id or 0),
-                )
-            )
-        else:
-            items = []
+        items = [row[0] for row in rows]
     else:
-        total_items = ordered_query.count()
-        total_pages = 1
-        clamped_page = 1
-        items = ordered_query.all()
-
-    category_rows = query.with_entities(GalleryPhoto.category).filter(GalleryPhoto.category.isnot(None)).distinct().all()
-    categories = sorted({row[0] for row in category_rows if row and row[0]})
-
-    template_id_rows = query.with_entities(GalleryPhoto.template_id).filter(GalleryPhoto.template_id.isnot(None)).distinct().all()
-    template_ids = [row[0] for row in template_id_rows if row and row[0]]
-    templates = []
-    if template_ids:
-        templates = Template.query.filter(Template.id.in_(template_ids)).all()
-        templates = sorted(templates, key=lambda template: (template.name or "").lower())
+        items = (
+            query.options(_template_name_option())
+            .order_by(GalleryPhoto.created_at.desc(), GalleryPhoto.id.desc())
+            .all()
+        )
 
     response = {
         "items": [_safe_gallery_photo_dict(item, include_admin_fields=include_admin_fields) for item in items],
-        "categories": categories,
-        "templates": [{"id": template.id, "name": template.name} for template in templates],
+        **_gallery_facets(*facets),
     }
-    if use_pagination:
+    if use_keyset:
+        response.update({"per_page": per_page, "next_cursor": next_cursor})
+    elif use_pagination:
         response.update({
             "page": clamped_page,
             "per_page": per_page,
@@ -183,6 +272,14 @@ def _serialize_list(query, include_admin_fields=False, page=None, per_page=None)
     return response
 
 
+def _gallery_cursor_arg():
+    """Decoded ?cursor=, None when absent, or False when it is malformed."""
+    raw_cursor = (request.args.get("cursor") or "").strip()
+    if not raw_cursor:
+        return None
+    return _decode_gallery_cursor(raw_cursor) or False
+
+
 @gallery_bp.get("/gallery/photos")
 def list_gallery_photos():
     category = (request.args.get("category") or "").strip()
@@ -198,10 +295,15 @@ def list_gallery_photos():
     if per_page and per_page > 50:
         per_page = 50
 
-    query = GalleryPhoto.query.filter(
+    after = _gallery_cursor_arg()
+    if after is False:
+        return jsonify({"error": "validation_error", "detail": "Invalid cursor."}), 400
+
+    visible = GalleryPhoto.query.filter(
         GalleryPhoto.is_hidden.is_(False),
         GalleryPhoto.approval_status == "approved",
     )
+    query = visible
     if category:
         query = query.filter(GalleryPhoto.category.ilike(category))
     if template_id:
@@ -218,8 +320,16 @@ def list_gallery_photos():
     if photo_id:
         page = None
         per_page = None
+        after = None
 
-    return jsonify(_serialize_list(query, include_admin_fields=False, page=page, per_page=per_page))
+    return jsonify(_serialize_list(
+        query,
+        ("gallery_facets", visible),
+        include_admin_fields=False,
+        page=page,
+        per_page=per_page,
+        after=after,
+    ))
 
 
 @gallery_bp.post("/gallery/photos")
@@ -276,22 +386,24 @@ def create_gallery_photo():
     submission_group_id = uuid.uuid4().hex
     created_photos = []
     saved_paths = []
+    spooled = []
     total_bytes = 0
     try:
-        for index, file in enumerate(valid_files):
+        for file in valid_files:
             original_name = secure_filename(file.filename)
             ext = os.path.splitext(original_name)[1].lower()
             mime_type = (file.content_type or "").lower()
             if ext not in ALLOWED_EXTENSIONS or (mime_type and mime_type not in ALLOWED_MIME):
                 return jsonify({"error": "validation_error", "detail": f"Unsupported image type: {ext or 'unknown'}"}), 400
 
-            file_bytes = file.read()
-            file_size = len(file_bytes)
-            if file_size > MAX_SINGLE_PHOTO_BYTES:
+            try:
+                spooled_path, file_size = spool_upload(file, MAX_SINGLE_PHOTO_BYTES, suffix=ext)
+            except UploadTooLarge:
                 return jsonify({
                     "error": "validation_error",
                     "detail": f"{original_name or 'A photo'} is too large to upload. Please use a smaller file.",
                 }), 400
+            spooled.append((spooled_path, ext, mime_type))
             total_bytes += file_size
             if total_bytes > MAX_TOTAL_PHOTO_BYTES:
                 return jsonify({
@@ -299,30 +411,12 @@ def create_gallery_photo():
                     "detail": "This upload is too large to process. Please reduce the number of photos or file sizes.",
                 }), 400
 
-            # Compress and cap dimensions before storing
-            save_mime = mime_type
-            save_ext = ext
-            try:
-                img = PilImage.open(io.BytesIO(file_bytes))
-                img.thumbnail((2000, 2000), PilImage.LANCZOS)
-                buf = io.BytesIO()
-                fmt = "JPEG" if ext in {".jpg", ".jpeg"} else img.format or "PNG"
-                save_kwargs = {"optimize": True}
-                if fmt == "JPEG":
-                    save_kwargs["quality"] = 82
-                    img = img.convert("RGB")
-                    save_ext = ".jpg"
-                    save_mime = "image/jpeg"
-                img.save(buf, format=fmt, **save_kwargs)
-                file_bytes = buf.getvalue()
-            except Exception:
-                pass  # Keep original bytes if Pillow fails
-
-            unique_name = f"{uuid.uuid4().hex}{save_ext}"
-            saved_path = os.path.join(uploads_dir, unique_name)
-            with open(saved_path, "wb") as output:
-                output.write(file_bytes)
-            saved_paths.append(saved_path)
+        # Compress and cap dimensions before storing, all photos at once.
+        processed_photos = process_gallery_photos(spooled)
+
+        for index, processed in enumerate(processed_photos):
+            urls, paths = write_gallery_variants(uploads_dir, uuid.uuid4().hex, processed)
+            saved_paths.extend(paths)
 
             photo = GalleryPhoto(
                 panel_name=panel_name,
@@ -332,9 +426,11 @@ def create_gallery_photo():
                 is_cover=(index == 0),
                 display_name=display_name,
                 hide_submitter_name=hide_submitter_name,
-                image_url=f"/uploads/gallery/{unique_name}",
-                image_data=file_bytes,
-                image_mime=save_mime,
+                image_url=urls["full"],
+                image_data=processed["variants"]["full"],
+                image_mime=processed["mime"],
+                medium_url=urls.get("medium"),
+                thumbnail_url=urls.get("thumbnail"),
                 template_id=template_id,
                 show_description=True,
                 is_hidden=False,
@@ -343,10 +439,10 @@ def create_gallery_photo():
                 created_by_id=created_by,
             )
             db.session.add(photo)
-            db.session.flush()
             created_photos.append(photo)
 
         db.session.commit()
+        invalidate_catalog_cache(*GALLERY_FACET_KEYS)
     except SQLAlchemyError:
         db.session.rollback()
         for saved_path in saved_paths:
@@ -356,6 +452,9 @@ def create_gallery_photo():
             except OSError:
                 pass
         raise
+    finally:
+        for spooled_path, _ext, _mime in spooled:
+            discard_spooled(spooled_path)
 
     return jsonify({
         "submission_group_id": submission_group_id,
@@ -381,6 +480,9 @@ def admin_list_gallery_photos():
             per_page = 1
         if per_page and per_page > 50:
             per_page = 50
+        after = _gallery_cursor_arg()
+        if after is False:
+            return jsonify({"error": "validation_error", "detail": "Invalid cursor."}), 400
         query = GalleryPhoto.query
         if approval_status in {"pending", "approved", "rejected"}:
             query = query.filter(GalleryPhoto.approval_status == approval_status)
@@ -388,7 +490,14 @@ def admin_list_gallery_photos():
             query = query.filter(GalleryPhoto.category.ilike(category))
         if template_id:
             query = query.filter(GalleryPhoto.template_id == template_id)
-        return jsonify(_serialize_list(query, include_admin_fields=True, page=page, per_page=per_page))
+        return jsonify(_serialize_list(
+            query,
+            ("admin_gallery_facets", GalleryPhoto.query),
+            include_admin_fields=True,
+            page=page,
+            per_page=per_page,
+            after=after,
+        ))
     except Exception as exc:
         return jsonify({"error": "server_error", "detail": str(exc)}), 500
 
@@ -474,6 +583,7 @@ def admin_update_gallery_photo(photo_id):
         _ensure_group_has_cover(original_group_id)
 
     db.session.commit()
+    invalidate_catalog_cache(*GALLERY_FACET_KEYS)
     return jsonify(_with_absolute_image_url(photo.to_dict(include_admin_fields=True)))
 
 
@@ -490,8 +600,10 @@ def admin_delete_gallery_photo(photo_id):
     was_cover = bool(photo.is_cover)
     group_id = photo.submission_group_id or str(photo.id)
 
-    if photo.image_url:
-        disk_path = os.path.join(os.path.dirname(__file__), "..", photo.image_url.lstrip("/"))
+    for image_url in (photo.image_url, photo.medium_url, photo.thumbnail_url):
+        if not image_url:
+            continue
+        disk_path = os.path.join(os.path.dirname(__file__), "..", image_url.lstrip("/"))
         disk_path = os.path.abspath(disk_path)
         if os.path.isfile(disk_path):
             try:
@@ -501,6 +613,7 @@ def admin_delete_gallery_photo(photo_id):
 
     db.session.delete(photo)
     db.session.commit()
+    invalidate_catalog_cache(*GALLERY_FACET_KEYS)
 
     if was_cover:
         replacement = GalleryPhoto.query.filter(
@@ -8,7 +8,7 @@ from pathlib import Path
 from sqlalchemy import func
 
 from ..models import db, GlassType
-from ..auth import decode_token
+from ..auth import authenticate_request
 from ..services.glass_type_service import (
     validate_texture_image,
     save_texture_file,
@@ -23,17 +23,10 @@ admin_glass_types_bp = Blueprint("admin_glass_types", __name__)
 def _require_admin(handler):
     @wraps(handler)
     def wrapper(*args, **kwargs):
-        auth_header = (request.headers.get("Authorization") or "").strip()
-        if not auth_header.startswith("Bearer "):
+        payload, error = authenticate_request()
+        if error == "missing_token":
             return jsonify({"error": "missing_token"}), 401
-
-        token = auth_header.split(" ", 1)[1].strip()
-        if not token:
-            return jsonify({"error": "missing_token"}), 401
-
-        try:
-            payload = decode_token(token)
-        except Exception:
+        if error:
             return jsonify({"error": "invalid_token"}), 401
 
         if payload.get("role") == "customer":
@@ -1,6 +1,6 @@
 """Invoice management routes for admins and customers."""
 from flask import Blueprint, request, jsonify, g
-from backend.auth import decode_token
+from backend.auth import authenticate_request
 from backend.utils.email import send_email
 from datetime import datetime
 import secrets
@@ -18,7 +18,6 @@ from backend.db import (
     upsert_customer_cart_item,
 )
 from backend.models import WorkOrder
-import jwt
 
 invoices_bp = Blueprint('invoices', __name__)
 
@@ -53,38 +52,28 @@ def _generate_custom_invoice_number():
 def login_required(f):
     """Customer authentication decorator."""
     def wrapper(*args, **kwargs):
-        auth_header = request.headers.get("Authorization", "")
-        if not auth_header.startswith("Bearer "):
+        payload, error = authenticate_request()
+        if error == 'missing_token':
             return jsonify({'error': 'Authentication required'}), 401
-        token = auth_header.split(" ", 1)[1].strip()
-        try:
-            payload = decode_token(token)
-            if payload.get("role") == "customer":
-                g.auth_payload = payload
-                return f(*args, **kwargs)
-            else:
-                return jsonify({'error': 'Customer authentication required'}), 403
-        except jwt.PyJWTError:
+        if error:
             return jsonify({'error': 'Invalid or expired token'}), 401
+        if payload.get("role") != "customer":
+            return jsonify({'error': 'Customer authentication required'}), 403
+        return f(*args, **kwargs)
     wrapper.__name__ = f.__name__
     return wrapper
 
 def admin_required(f):
     """Admin authentication decorator."""
     def wrapper(*args, **kwargs):
-        auth_header = request.headers.get("Authorization", "")
-        if not auth_header.startswith("Bearer "):
+        payload, error = authenticate_request()
+        if error == 'missing_token':
             return jsonify({'error': 'Authentication required'}), 401
-        token = auth_header.split(" ", 1)[1].strip()
-        try:
-            payload = decode_token(token)
-            if payload.get("role") != "customer":
-                g.auth_payload = payload
-                return f(*args, **kwargs)
-            else:
-                return jsonify({'error': 'Admin authentication required'}), 403
-        except jwt.PyJWTError:
+        if error:
             return jsonify({'error': 'Invalid or expired token'}), 401
+        if payload.get("role") == "customer":
+            return jsonify({'error': 'Admin authentication required'}), 403
+        return f(*args, **kwargs)
     wrapper.__name__ = f.__name__
     return wrapper
 
@@ -481,13 +470,8 @@ def customer_get_invoice(invoice_id):
             if work_order:
                 invoice['work_order_number'] = work_order.work_order_number
 
-                preview_url = None
-                if getattr(work_order, 'project', None) and isinstance(work_order.project.design_data, dict):
-                    preview_url = (
-                        work_order.project.design_data.get('preview_url')
-                        or work_order.project.design_data.get('dataUrl')
-                    )
-                invoice['work_order_preview_url'] = preview_url
+                project = getattr(work_order, 'project', None)
+                invoice['work_order_preview_url'] = project.preview_link() if project else None
 
         return jsonify(invoice), 200
 
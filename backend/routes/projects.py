@@ -1,31 +1,33 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, Response, request, jsonify, g
 from sqlalchemy.exc import SQLAlchemyError
 from backend.services.project_service import (
-    save_project, get_user_projects, get_project_by_id, delete_project, calculate_completion_percentage
+    save_project, get_user_projects, get_project_by_id, delete_project, calculate_completion_percentage,
+    apply_region_delta
 )
 from backend.models import db
+from backend.models.project import UserProject
 from backend.models.work_order import WorkOrder
-from backend.auth import decode_token
+from backend.services.project_preview_service import (
+    PREVIEW_MIME_TYPES, THUMBNAIL_MIME, project_preview_links, verify_preview_request
+)
+from backend.auth import authenticate_request
 from datetime import datetime
-import jwt
 
 projects_bp = Blueprint('projects', __name__)
 
+PREVIEW_MAX_AGE_SECONDS = 365 * 86400
+
 # Authentication decorator that parses JWT and sets g.user_id
 def login_required(f):
     def wrapper(*args, **kwargs):
-        auth_header = request.headers.get("Authorization", "")
-        if not auth_header.startswith("Bearer "):
+        payload, error = authenticate_request()
+        if error == 'missing_token':
             return jsonify({'error': 'Authentication required'}), 401
-        token = auth_header.split(" ", 1)[1].strip()
-        try:
-            payload = decode_token(token)
-            # Set user_id from customer_id (for customers) or sub (for admin)
-            g.user_id = payload.get("customer_id") or payload.get("sub")
-            g.is_admin = payload.get("role") != "customer"
-            g.auth_payload = payload
-        except jwt.PyJWTError:
+        if error:
             return jsonify({'error': 'Invalid or expired token'}), 401
+        # Set user_id from customer_id (for customers) or sub (for admin)
+        g.user_id = payload.get("customer_id") or payload.get("sub")
+        g.is_admin = payload.get("role") != "customer"
         return f(*args, **kwargs)
     wrapper.__name__ = f.__name__
     return wrapper
@@ -41,6 +43,8 @@ def save_project_route():
     if err:
         if 'not owned' in err:
             return jsonify({'error': err}), 403
+        if err == 'version_conflict':
+            return jsonify({'error': err}), 409
         return jsonify({'error': err}), 400
     return jsonify({'project': project.to_dict()}), 200
 
@@ -49,11 +53,12 @@ def save_project_route():
 def list_projects_route():
     user_id = g.user_id
     filters = request.args.to_dict()
-    projects, err = get_user_projects(user_id, filters, db.session)
+    projects, err = get_user_projects(user_id, filters, db.session, summary=True)
     if err:
         return jsonify({'error': err}), 500
 
     project_ids = [p.id for p in projects if p and p.id is not None]
+    preview_links = project_preview_links({p.id: p.preview_hash for p in projects if p and p.id is not None})
     latest_order_by_project = {}
     if project_ids:
         rows = (
@@ -71,13 +76,12 @@ def list_projects_route():
 
     response_projects = []
     for project in projects:
-        design_data = project.design_data if isinstance(project.design_data, dict) else {}
         payload = {
             'id': project.id,
             'user_id': project.user_id,
             'template_id': project.template_id,
             'name': project.name,
-            'preview_url': design_data.get('preview_url') or design_data.get('dataUrl'),
+            'preview_url': preview_links.get(project.id),
             'created_at': project.created_at.isoformat() if project.created_at else None,
             'updated_at': project.updated_at.isoformat() if project.updated_at else None,
         }
@@ -97,6 +101,50 @@ def get_project_route(project_id):
         return jsonify({'error': err}), 404
     return jsonify({'project': project.to_dict()}), 200
 
+@projects_bp.route('/api/projects/<int:project_id>/regions', methods=['PATCH'])
+@login_required
+def patch_project_regions_route(project_id):
+    """Apply region-level edits: {"version": n, "set": {regionId: fill}, "clear": [regionId]}."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Missing JSON body'}), 400
+    result, err = apply_region_delta(project_id, g.user_id, data, db.session)
+    if err == 'version_conflict':
+        return jsonify({'error': err, 'version': result['version']}), 409
+    if err:
+        if 'not owned' in err:
+            return jsonify({'error': err}), 404
+        return jsonify({'error': err}), 400
+    return jsonify(result), 200
+
+def _preview_response(project_id, column, mime_column=None):
+    version = request.args.get('v', '')
+    if not verify_preview_request(project_id, version, request.args.get('sig')):
+        return jsonify({'error': 'Preview not found.'}), 404
+    columns = [UserProject.preview_hash, column] + ([mime_column] if mime_column is not None else [])
+    row = db.session.query(*columns).filter(UserProject.id == project_id).first()
+    if not row or row[0] != version or not row[1]:
+        return jsonify({'error': 'Preview not found.'}), 404
+    mimetype = row[2] if mime_column is not None else THUMBNAIL_MIME
+    if mimetype not in PREVIEW_MIME_TYPES.values():
+        return jsonify({'error': 'Preview not found.'}), 404
+    response = Response(bytes(row[1]), mimetype=mimetype)
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    # The URL names the content hash, so a cached copy never goes stale.
+    response.headers['Cache-Control'] = f'private, max-age={PREVIEW_MAX_AGE_SECONDS}, immutable'
+    response.set_etag(version)
+    return response.make_conditional(request)
+
+@projects_bp.route('/api/projects/<int:project_id>/preview.webp', methods=['GET'])
+def project_preview_thumbnail(project_id):
+    """Resized preview for listings; the signed URL comes from the listing endpoints."""
+    return _preview_response(project_id, UserProject.thumbnail_data)
+
+@projects_bp.route('/api/projects/<int:project_id>/preview', methods=['GET'])
+def project_preview_image(project_id):
+    """Full-size preview as saved by the designer."""
+    return _preview_response(project_id, UserProject.preview_data, UserProject.preview_mime)
+
 @projects_bp.route('/api/projects/<int:project_id>', methods=['DELETE'])
 @login_required
 def delete_project_route(project_id):
@@ -21,24 +21,34 @@ from urllib.parse import quote, urlencode, urljoin
 from urllib import request as urllib_request
 from urllib.error import HTTPError, URLError
 
-from flask import Blueprint, jsonify, request, g, current_app, Response
+from flask import Blueprint, jsonify, request, g, current_app, Response, has_request_context
 from sqlalchemy import func
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
 
-from ..auth import create_token, require_auth, require_customer
+from ..auth import cached_customer, create_token, invalidate_cached_customer, require_auth, require_customer
 from ..app import limiter
+from ..services.catalog_cache_service import cached_catalog, invalidate_catalog_cache
 from ..services.download_service import build_pattern_download_response
+from ..services.render_queue_service import get_render_job
 from ..services.pattern_render_service import render_numbered_pattern_raster
+from ..services.visit_stats_service import buffer_homepage_visit, get_homepage_visit_insights
+from ..services.email_outbox_service import email_outbox_metrics
+from ..services.webhook_inbox_service import notify_stripe_webhook_worker
+from ..services.review_cache_service import cached_product_reviews, invalidate_product_reviews
 from ..db import (
+    ADMIN_CUSTOMER_CATEGORIES,
     fetch_item,
     fetch_items,
-    init_db,
     upsert_item,
     create_manual_product,
     fetch_manual_products,
+    list_admin_customers,
+    MANUAL_PRODUCT_FIELDS,
     fetch_manual_products_catalog,
     fetch_manual_product,
+    fetch_manual_products_by_ids,
+    enqueue_stripe_webhook_event,
     update_manual_product,
     count_home_featured_manual_products,
     demote_oldest_home_featured_manual_product,
@@ -59,8 +69,6 @@ from ..db import (
     discount_email_has_paid_order,
     has_discount_redemption_for_email,
     record_discount_redemption,
-    record_homepage_visit,
-    get_homepage_visit_insights,
     list_customer_addresses,
     create_customer_address,
     upsert_customer_primary_address,
@@ -91,12 +99,11 @@ from ..db import (
     list_customer_order_events,
     list_customer_pattern_downloads,
     mark_pattern_downloads_emailed,
-    upsert_customer_pattern_download,
+    upsert_customer_pattern_downloads,
     get_customer_pattern_download_by_token,
     get_manual_product_download_metadata,
     has_verified_purchase,
     list_customer_review_options,
-    list_reviews_for_product,
     list_recent_reviews,
     list_customer_reviews,
     create_customer_review,
@@ -122,13 +129,6 @@ from ..utils.email import send_email, digital_download_email
 
 api = Blueprint("api", __name__)
 
-_CATALOG_CACHE_TTL_SECONDS = 300
-_catalog_cache = {
-    "items": {"value": None, "expires_at": 0},
-    "manual_products": {"value": None, "expires_at": 0},
-    "manual_products_summary": {"value": None, "expires_at": 0},
-}
-
 ALLOWED_REVIEW_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
 ALLOWED_REVIEW_IMAGE_MIME = {"image/jpeg", "image/png", "image/webp", "image/gif"}
 MAX_REVIEW_IMAGE_BYTES = 20 * 1024 * 1024
@@ -187,13 +187,11 @@ def _login_policy():
 
 
 def _check_login_lock(scope, email, ip):
-    init_db()
     policy = _login_policy()
     return get_login_lockout_remaining(scope, email=email, request_ip=ip)
 
 
 def _record_login_failure(scope, email, ip):
-    init_db()
     policy = _login_policy()
     return record_login_failure(
         scope,
@@ -206,7 +204,6 @@ def _record_login_failure(scope, email, ip):
 
 
 def _clear_login_failures(scope, email, ip):
-    init_db()
     clear_login_failures(scope, email=email, request_ip=ip)
 
 
@@ -254,99 +251,111 @@ def _resolve_stripe_tax_code(item):
     return candidate or None
 
 
-def _cache_get(key):
-    slot = _catalog_cache.get(key) or {}
-    if slot.get("value") is None:
-        return None
-    if time.time() >= float(slot.get("expires_at") or 0):
+def _as_money(value):
+    try:
+        return float(Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+    except Exception:
+        return 0.0
+
+
+def _template_cart_snapshot(template, product_id):
+    if not template or not bool(template.is_active) or not bool(template.is_digital_download):
         return None
-    return slot.get("value")
+    return {
+        "title": template.name or f"Pattern #{product_id}",
+        "price": _as_money(template.price_amount),
+        "currency": template.price_currency or "USD",
+        "image_url": template.thumbnail_url or template.image_url,
+        "product_type": "template",
+        "product_id": product_id,
+        "requires_shipping": False,
+        "is_digital": True,
+        "is_on_sale": False,
+    }
+
 
+def _manual_cart_snapshot(product, product_id):
+    if not product:
+        return None
+    if not bool(product.get("is_active", True)):
+        return None
+    is_digital = bool(product.get("is_digital_download"))
+    if not is_digital:
+        try:
+            available_quantity = int(product.get("quantity") or 0)
+        except (TypeError, ValueError):
+            available_quantity = 0
+        if available_quantity <= 0:
+            return None
 
-def _cache_set(key, value):
-    _catalog_cache[key] = {
-        "value": value,
-        "expires_at": time.time() + _CATALOG_CACHE_TTL_SECONDS,
+    image_url = None
+    images = product.get("images") if isinstance(product.get("images"), list) else []
+    if images:
+        image_url = images[0].get("image_url")
+    current_price = _as_money(product.get("price"))
+    old_price = _as_money(product.get("old_price"))
+    explicit_discount = _as_money(product.get("discount_percent"))
+    is_on_sale = bool((old_price > current_price and old_price > 0) or explicit_discount > 0)
+    return {
+        "title": product.get("name") or f"Manual product #{product_id}",
+        "price": current_price,
+        "currency": "USD",
+        "image_url": image_url,
+        "product_type": "manual",
+        "product_id": product_id,
+        "requires_shipping": not is_digital,
+        "is_digital": is_digital,
+        "is_on_sale": is_on_sale,
     }
 
 
-def _catalog_cache_invalidate(*keys):
-    targets = keys or ("items", "manual_products", "manual_products_summary")
-    for key in targets:
-        _catalog_cache[key] = {"value": None, "expires_at": 0}
+def _load_pattern_sources(template_ids, manual_ids):
+    """Templates and manual products by id: one query each, skipped when empty."""
+    templates = {}
+    if template_ids:
+        from ..models import Template as TemplateModel
 
+        rows = TemplateModel.query.filter(TemplateModel.id.in_(sorted(template_ids))).all()
+        templates = {template.id: template for template in rows}
+    manual_products = fetch_manual_products_by_ids(manual_ids) if manual_ids else {}
+    return templates, manual_products
 
-def _as_money(value):
-    try:
-        return float(Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-    except Exception:
-        return 0.0
+
+def _resolve_cart_product_snapshots(items):
+    """Snapshots for every cart line, in order; None where a line cannot be bought.
+
+    Templates and manual products for the whole cart are loaded up front, so
+    pricing a cart costs the same two queries whatever its size.
+    """
+    template_ids = set()
+    manual_ids = set()
+    for item in items:
+        product_type = str(item.get("product_type") or "").lower()
+        product_id = str(item.get("product_id") or "").strip()
+        if not product_id.isdigit():
+            continue
+        if product_type in {"template", "pattern"}:
+            template_ids.add(int(product_id))
+        elif product_type == "manual":
+            manual_ids.add(int(product_id))
+    templates, manual_products = _load_pattern_sources(template_ids, manual_ids)
+    return [_resolve_cart_product_snapshot(item, templates, manual_products) for item in items]
 
 
-def _resolve_cart_product_snapshot(item):
+def _resolve_cart_product_snapshot(item, templates=None, manual_products=None):
     product_type = str(item.get("product_type") or "").lower()
     product_id = str(item.get("product_id") or "").strip()
     if not product_id:
         return None
 
-    if product_type in {"template", "pattern"}:
+    if product_type in {"template", "pattern", "manual"}:
         if not product_id.isdigit():
             return None
-        from ..models import Template as TemplateModel
-
-        template = TemplateModel.query.filter(
-            TemplateModel.id == int(product_id),
-            TemplateModel.is_active.is_(True),
-        ).first()
-        if not template or not bool(template.is_digital_download):
-            return None
-
-        return {
-            "title": template.name or f"Pattern #{product_id}",
-            "price": _as_money(template.price_amount),
-            "currency": template.price_currency or "USD",
-            "image_url": template.thumbnail_url or template.image_url,
-            "product_type": "template",
-            "product_id": product_id,
-            "requires_shipping": False,
-            "is_digital": True,
-            "is_on_sale": False,
-        }
-
-    if product_type == "manual":
-        product = fetch_manual_product(int(product_id)) if product_id.isdigit() else None
-        if not product:
-            return None
-        if not bool(product.get("is_active", True)):
-            return None
-        is_digital = bool(product.get("is_digital_download"))
-        if not is_digital:
-            try:
-                available_quantity = int(product.get("quantity") or 0)
-            except (TypeError, ValueError):
-                available_quantity = 0
-            if available_quantity <= 0:
-                return None
-
-        image_url = None
-        images = product.get("images") if isinstance(product.get("images"), list) else []
-        if images:
-            image_url = images[0].get("image_url")
-        current_price = _as_money(product.get("price"))
-        old_price = _as_money(product.get("old_price"))
-        explicit_discount = _as_money(product.get("discount_percent"))
-        is_on_sale = bool((old_price > current_price and old_price > 0) or explicit_discount > 0)
-        return {
-            "title": product.get("name") or f"Manual product #{product_id}",
-            "price": current_price,
-            "currency": "USD",
-            "image_url": image_url,
-            "product_type": "manual",
-            "product_id": product_id,
-            "requires_shipping": not is_digital,
-            "is_digital": is_digital,
-            "is_on_sale": is_on_sale,
-        }
+        if templates is None or manual_products is None:
+            return _resolve_cart_product_snapshots([item])[0]
+        if product_type == "manual":
+            return _manual_cart_snapshot(manual_products.get(int(product_id)), product_id)
+        return _template_cart_snapshot(templates.get(int(product_id)), product_id)
 
     if product_type == "invoice":
         # Invoice cart items are stored as product_id like "inv-123".
@@ -690,9 +699,8 @@ def _build_checkout_pricing_preview(summary, customer_email, discount_code_raw=N
 def _build_checkout_summary(customer_id):
     cart_items = list_customer_cart_items(customer_id)
     detailed = []
-    for cart_item in cart_items:
+    for cart_item, snapshot in zip(cart_items, _resolve_cart_product_snapshots(cart_items)):
         quantity = max(1, int(cart_item.get("quantity", 1)))
-        snapshot = _resolve_cart_product_snapshot(cart_item)
         if not snapshot:
             continue
         unit_price = _as_money(snapshot.get("price"))
@@ -720,13 +728,12 @@ def _build_checkout_summary(customer_id):
 
 def _build_checkout_summary_from_items(items_payload):
     detailed = []
-    for raw_item in items_payload or []:
-        if not isinstance(raw_item, dict):
-            continue
-        snapshot = _resolve_cart_product_snapshot({
-            "product_type": raw_item.get("product_type"),
-            "product_id": raw_item.get("product_id"),
-        })
+    requested = [
+        {"product_type": raw_item.get("product_type"), "product_id": raw_item.get("product_id")}
+        for raw_item in items_payload or []
+        if isinstance(raw_item, dict)
+    ]
+    for snapshot in _resolve_cart_product_snapshots(requested):
         if not snapshot:
             continue
 
@@ -794,70 +801,52 @@ def _extract_checkout_customer_details(session):
 
 
 def _issue_pattern_downloads(customer_id, order_id, items, customer_email):
-    from ..models import Template as TemplateModel
-
-    downloads = []
-    seen_keys = set()
+    targets = []
     for item in items or []:
         normalized_product_type = str(item.get("product_type") or "").lower()
         product_id = str(item.get("product_id") or "").strip()
-        if not product_id.isdigit():
-            continue
-        if normalized_product_type == "template":
-            dedupe_key = f"template:{product_id}"
-        elif normalized_product_type == "manual":
-            dedupe_key = f"manual:{product_id}"
-        else:
-            continue
-        if dedupe_key in seen_keys:
+        if not product_id.isdigit() or normalized_product_type not in {"template", "manual"}:
             continue
+        target = (normalized_product_type, int(product_id))
+        if target not in targets:
+            targets.append(target)
 
-        if normalized_product_type == "template":
-            template = TemplateModel.query.filter(TemplateModel.id == int(product_id)).first()
-            if not template or not bool(template.is_digital_download):
-                continue
-            seen_keys.add(dedupe_key)
-            grant = upsert_customer_pattern_download(
-                customer_id,
-                "template",
-                int(product_id),
-                order_id=order_id,
-                customer_email=customer_email or None,
-            )
-            downloads.append({
-                "id": grant.get("id"),
-                "pattern_id": int(product_id),
-                "pattern_name": template.name,
-                "pattern_source_type": "template",
-                "download_token": grant.get("download_token"),
-                "download_url": _resolve_pattern_download_url(grant.get("download_token")),
-                "created": bool(grant.get("created")),
-            })
-            continue
-
-        product = fetch_manual_product(int(product_id))
-        if not product or not bool(product.get("is_digital_download")):
-            continue
-
-        seen_keys.add(dedupe_key)
-        grant = upsert_customer_pattern_download(
-            customer_id,
-            "manual",
-            int(product_id),
-            order_id=order_id,
-            customer_email=customer_email or None,
-        )
-        downloads.append({
+    templates, manual_products = _load_pattern_sources(
+        {product_id for product_type, product_id in targets if product_type == "template"},
+        {product_id for product_type, product_id in targets if product_type == "manual"},
+    )
+    names = {}
+    for product_type, product_id in targets:
+        if product_type == "template":
+            template = templates.get(product_id)
+            if template and bool(template.is_digital_download):
+                names[(product_type, product_id)] = template.name
+        else:
+            product = manual_products.get(product_id)
+            if product and bool(product.get("is_digital_download")):
+                names[(product_type, product_id)] = product.get("name") or f"Pattern #{product_id}"
+
+    grantable = [target for target in targets if target in names]
+    if not grantable:
+        return []
+    grants = upsert_customer_pattern_downloads(
+        customer_id,
+        grantable,
+        order_id=order_id,
+        customer_email=customer_email or None,
+    )
+    return [
+        {
             "id": grant.get("id"),
-            "pattern_id": int(product_id),
-            "pattern_name": product.get("name") or f"Pattern #{product_id}",
-            "pattern_source_type": "manual",
+            "pattern_id": product_id,
+            "pattern_name": names[(product_type, product_id)],
+            "pattern_source_type": product_type,
             "download_token": grant.get("download_token"),
             "download_url": _resolve_pattern_download_url(grant.get("download_token")),
             "created": bool(grant.get("created")),
-        })
-
-    return downloads
+        }
+        for (product_type, product_id), grant in zip(grantable, grants)
+    ]
 
 
 def _build_order_response(
@@ -1141,6 +1130,8 @@ def _finalize_paid_checkout_session(session, expected_customer_id=None, send_dow
     }
 
     order_id = create_customer_order_with_items(customer_id, order_payload, items)
+    # Physical stock was decremented; listings must not keep showing it as available.
+    invalidate_catalog_cache("manual_products", "manual_products_summary")
 
     discount_source = str(metadata.get("discount_source") or "").strip().lower()
     discount_percent_raw = str(metadata.get("discount_percent") or "").strip()
@@ -1248,7 +1239,13 @@ def _resolve_api_public_url():
             return configured
         return f"{configured}/api"
 
-    return f"{request.host_url.rstrip('/')}/api"
+    if has_request_context():
+        return f"{request.host_url.rstrip('/')}/api"
+    # Stripe webhook inbox worker: the URL the event was received on.
+    recorded = str(g.get("api_base_url") or "").strip().rstrip("/")
+    if recorded:
+        return recorded
+    raise RuntimeError("Set API_PUBLIC_URL to build API links outside a request.")
 
 
 def _build_manual_product_public_link(product_id):
@@ -1556,40 +1553,8 @@ def submit_contact_request():
     return jsonify({"success": True, "tag": request_tag}), 201
 
 
-@api.post("/stripe/webhook")
-def stripe_webhook():
-    init_db()
-    webhook_secret = (os.environ.get("STRIPE_WEBHOOK_SECRET") or "").strip()
-    app_env = (os.environ.get("APP_ENV") or os.environ.get("FLASK_ENV") or "").strip().lower()
-    is_debug = (os.environ.get("FLASK_DEBUG") or "").strip().lower() == "true"
-    if not webhook_secret and app_env not in {"development", "testing"} and not is_debug:
-        current_app.logger.error("stripe webhook rejected: STRIPE_WEBHOOK_SECRET is not configured")
-        return jsonify({"error": "webhook_not_configured"}), 503
-
-    payload = request.get_data(as_text=False)
-    signature = request.headers.get("Stripe-Signature")
-
-    try:
-        import stripe
-        stripe_secret = (
-            os.environ.get("STRIPE_SECRET_KEY")
-            or os.environ.get("STRIPE_API_SECRET")
-            or os.environ.get("STRIPE_SECRET")
-            or ""
-        ).strip()
-        if stripe_secret:
-            stripe.api_key = stripe_secret
-
-        if webhook_secret:
-            if not signature:
-                return jsonify({"error": "missing_signature"}), 400
-            event = stripe.Webhook.construct_event(payload, signature, webhook_secret)
-        else:
-            event = json.loads(payload.decode("utf-8")) if payload else {}
-    except Exception as exc:
-        current_app.logger.error("stripe webhook parse error: %s", exc)
-        return jsonify({"error": "invalid_webhook_payload"}), 400
-
+def handle_stripe_event(event):
+    """Apply one Stripe event; run by the webhook inbox worker, possibly more than once."""
     event_type = str(event.get("type") or "")
     data_object = (event.get("data") or {}).get("object") or {}
 
@@ -1616,11 +1581,8 @@ def stripe_webhook():
                             )
             except Exception as exc:
                 current_app.logger.warning("stripe session enrichment failed: %s", exc)
-            try:
-                finalized = _finalize_paid_checkout_session(session_payload)
-            except Exception as exc:
-                current_app.logger.error("stripe checkout finalization failed: %s", exc)
-                return jsonify({"error": "checkout_finalization_failed", "detail": str(exc)}), 500
+            # Failures propagate so the inbox retries; finalization is idempotent per payment intent.
+            finalized = _finalize_paid_checkout_session(session_payload)
             order_id = finalized.get("order", {}).get("id")
             updated = bool(order_id)
             if order_id:
@@ -1633,13 +1595,13 @@ def stripe_webhook():
                     )
                 except Exception as exc:
                     current_app.logger.warning("failed to append order event for %s: %s", pi_id, exc)
-            return jsonify({"received": True, "event_type": event_type, "payment_intent_id": pi_id, "updated": updated})
-        return jsonify({"received": True, "event_type": event_type, "ignored": True})
+            return {"event_type": event_type, "payment_intent_id": pi_id, "updated": updated}
+        return {"event_type": event_type, "ignored": True}
 
     # payment_intent.* events
     payment_intent_id = str(data_object.get("id") or "").strip()
     if not payment_intent_id:
-        return jsonify({"received": True})
+        return {"event_type": event_type, "ignored": True}
 
     payment_status = None
     if event_type == "payment_intent.succeeded":
@@ -1652,7 +1614,7 @@ def stripe_webhook():
         payment_status = "canceled"
 
     if not payment_status:
-        return jsonify({"received": True, "ignored": True})
+        return {"event_type": event_type, "ignored": True}
 
     order_status = _map_payment_to_order_status(payment_status)
     updated = update_customer_order_payment_by_reference(
@@ -1673,12 +1635,59 @@ def stripe_webhook():
         except Exception as exc:
             current_app.logger.warning("failed to append order event for %s: %s", payment_intent_id, exc)
 
-    return jsonify({
-        "received": True,
+    return {
         "event_type": event_type,
         "payment_intent_id": payment_intent_id,
         "updated": updated,
-    })
+    }
+
+
+@api.post("/stripe/webhook")
+def stripe_webhook():
+    webhook_secret = (os.environ.get("STRIPE_WEBHOOK_SECRET") or "").strip()
+    app_env = (os.environ.get("APP_ENV") or os.environ.get("FLASK_ENV") or "").strip().lower()
+    is_debug = (os.environ.get("FLASK_DEBUG") or "").strip().lower() == "true"
+    if not webhook_secret and app_env not in {"development", "testing"} and not is_debug:
+        current_app.logger.error("stripe webhook rejected: STRIPE_WEBHOOK_SECRET is not configured")
+        return jsonify({"error": "webhook_not_configured"}), 503
+
+    payload = request.get_data(as_text=False)
+    signature = request.headers.get("Stripe-Signature")
+
+    try:
+        import stripe
+        stripe_secret = (
+            os.environ.get("STRIPE_SECRET_KEY")
+            or os.environ.get("STRIPE_API_SECRET")
+            or os.environ.get("STRIPE_SECRET")
+            or ""
+        ).strip()
+        if stripe_secret:
+            stripe.api_key = stripe_secret
+
+        if webhook_secret:
+            if not signature:
+                return jsonify({"error": "missing_signature"}), 400
+            event = stripe.Webhook.construct_event(payload, signature, webhook_secret)
+        else:
+            event = json.loads(payload.decode("utf-8")) if payload else {}
+    except Exception as exc:
+        current_app.logger.error("stripe webhook parse error: %s", exc)
+        return jsonify({"error": "invalid_webhook_payload"}), 400
+
+    event_type = str(event.get("type") or "")
+    # Unsigned development payloads may lack an id; key them by content instead.
+    event_id = str(event.get("id") or "").strip() or f"payload-{hashlib.sha256(payload).hexdigest()}"
+    try:
+        queued = enqueue_stripe_webhook_event(
+            event_id, event_type, payload.decode("utf-8"), api_base_url=_resolve_api_public_url()
+        )
+    except Exception as exc:
+        current_app.logger.error("stripe webhook %s could not be stored: %s", event_id, exc)
+        return jsonify({"error": "webhook_enqueue_failed"}), 500
+
+    notify_stripe_webhook_worker()
+    return jsonify({"received": True, "event_id": event_id, "event_type": event_type, "duplicate": not queued})
 
 
 @api.get("/health")
@@ -1692,28 +1701,56 @@ def health():
         }
     }
 
-# List all customers (for admin dashboard)
-from ..db import list_all_customers
+# List customers (for admin dashboard)
+ADMIN_CUSTOMER_PAGE_DEFAULT = 50
+ADMIN_CUSTOMER_PAGE_MAX = 200
+
+
+def _encode_customer_cursor(customer):
+    raw = f"{customer.get('created_at') or ''}|{customer['id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
 
 
-def _derive_admin_customer_category(customer):
-    email = str((customer or {}).get("email") or "").strip().lower()
-    if email.startswith("admin-testimonial-") and email.endswith("@sgcg.local"):
-        return "admin-testimonial"
-    if email.startswith("guest-review-") and email.endswith("@sgcg.local"):
-        return "review-customer"
-    return "signed-up"
+def _decode_customer_cursor(raw):
+    try:
+        created_at, customer_id = base64.urlsafe_b64decode(raw.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return created_at, int(customer_id)
+    except (ValueError, UnicodeError):
+        return None
+
 
 @api.get("/customers")
 @require_auth
 def list_customers():
+    """Admin customer list. Passing limit, cursor, q or category returns one
+    keyset page as {items, next_cursor}; without them the full list is returned."""
     if g.auth_payload.get("role") == "customer":
         return jsonify({"error": "forbidden"}), 403
-    customers = list_all_customers()
-    for customer in customers:
-        customer.pop("password_hash", None)
-        customer["customer_category"] = _derive_admin_customer_category(customer)
-    return jsonify(customers), 200
+    raw_limit = request.args.get("limit")
+    raw_cursor = request.args.get("cursor")
+    search = (request.args.get("q") or "").strip() or None
+    category = (request.args.get("category") or "").strip().lower() or None
+    if category and category not in ADMIN_CUSTOMER_CATEGORIES:
+        return jsonify({"error": "invalid category"}), 400
+    if raw_limit is None and raw_cursor is None and search is None and category is None:
+        return jsonify(list_admin_customers()), 200
+
+    try:
+        limit = max(1, min(int(raw_limit or ADMIN_CUSTOMER_PAGE_DEFAULT), ADMIN_CUSTOMER_PAGE_MAX))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    after = None
+    if raw_cursor:
+        after = _decode_customer_cursor(raw_cursor)
+        if after is None:
+            return jsonify({"error": "invalid cursor"}), 400
+
+    customers = list_admin_customers(limit=limit + 1, after=after, search=search, category=category)
+    next_cursor = None
+    if len(customers) > limit:
+        customers = customers[:limit]
+        next_cursor = _encode_customer_cursor(customers[-1])
+    return jsonify({"items": customers, "next_cursor": next_cursor}), 200
 
 
 @api.put("/customers/<int:customer_id>")
@@ -1722,7 +1759,6 @@ def admin_update_customer(customer_id):
     if g.auth_payload.get("role") == "customer":
         return jsonify({"error": "forbidden"}), 403
 
-    init_db()
     payload = request.get_json(silent=True) or {}
     update_payload = {
         "email": (payload.get("email") or "").strip().lower(),
@@ -1739,6 +1775,7 @@ def admin_update_customer(customer_id):
 
     try:
         updated = update_customer_admin(customer_id, update_payload)
+        invalidate_cached_customer(customer_id)
         if updated and address_payload:
             upsert_customer_primary_address(customer_id, {
                 "label": (address_payload.get("label") or "Primary").strip() or "Primary",
@@ -1767,7 +1804,6 @@ def admin_get_customer_details(customer_id):
     if g.auth_payload.get("role") == "customer":
         return jsonify({"error": "forbidden"}), 403
 
-    init_db()
     customer = fetch_customer_by_id(customer_id)
     if not customer:
         return jsonify({"error": "not_found"}), 404
@@ -1786,7 +1822,6 @@ def admin_delete_customer(customer_id):
     if g.auth_payload.get("role") == "customer":
         return jsonify({"error": "forbidden"}), 403
 
-    init_db()
     target_customer = fetch_customer_by_id(customer_id)
     if not target_customer:
         return jsonify({"error": "not_found"}), 404
@@ -1800,6 +1835,7 @@ def admin_delete_customer(customer_id):
         return jsonify({"error": "cannot_delete_self"}), 400
 
     deleted = delete_customer_admin(customer_id)
+    invalidate_cached_customer(customer_id)
     if not deleted:
         return jsonify({"error": "not_found"}), 404
     return jsonify({"success": True}), 200
@@ -1834,7 +1870,6 @@ def login():
 
 @api.post("/customer/signup")
 def customer_signup():
-    init_db()
     payload = request.get_json(silent=True) or {}
     email = payload.get("email", "").strip().lower()
     password = payload.get("password", "")
@@ -1860,7 +1895,6 @@ def customer_signup():
 @api.post("/customer/login")
 @limiter.limit("10 per minute")
 def customer_login():
-    init_db()
     payload = request.get_json(silent=True) or {}
     email = payload.get("email", "").strip().lower()
     password = payload.get("password", "")
@@ -1922,7 +1956,6 @@ def _password_reset_email_body(reset_link):
 
 @api.post("/customer/password/forgot")
 def customer_forgot_password():
-    init_db()
     payload = request.get_json(silent=True) or {}
     email = (payload.get("email") or "").strip().lower()
 
@@ -1984,7 +2017,7 @@ def customer_forgot_password():
             # Keep response generic for security; log delivery failure for operators.
             current_app.logger.warning("Password reset email was not delivered for customer_id=%s", customer["id"])
         else:
-            current_app.logger.info("Password reset email accepted by SMTP for customer_id=%s", customer["id"])
+            current_app.logger.info("Password reset email queued for customer_id=%s", customer["id"])
     except Exception as exc:
         # Never leak account/reset internals to clients.
         current_app.logger.exception("Forgot-password flow failed for customer_id=%s: %s", customer.get("id"), exc)
@@ -1994,7 +2027,6 @@ def customer_forgot_password():
 
 @api.post("/customer/password/reset")
 def customer_reset_password():
-    init_db()
     payload = request.get_json(silent=True) or {}
     token = (payload.get("token") or "").strip()
     new_password = payload.get("new_password") or ""
@@ -2011,6 +2043,7 @@ def customer_reset_password():
         return jsonify({"error": "invalid_or_expired_token"}), 400
 
     updated = update_customer_password(customer_id, generate_password_hash(new_password))
+    invalidate_cached_customer(customer_id)
     if not updated:
         return jsonify({"error": "update_failed"}), 500
 
@@ -2021,9 +2054,8 @@ def customer_reset_password():
 @api.get("/customer/me")
 @require_customer
 def customer_me():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
-    customer = fetch_customer_by_id(customer_id)
+    customer = cached_customer(customer_id)
     if not customer:
         return jsonify({"error": "not_found"}), 404
     customer.pop("password_hash", None)
@@ -2034,7 +2066,6 @@ def customer_me():
 @api.put("/customer/me")
 @require_customer
 def customer_update_me():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     payload = request.get_json(silent=True) or {}
 
@@ -2045,6 +2076,7 @@ def customer_update_me():
     }
 
     updated = update_customer_profile_self(customer_id, update_payload)
+    invalidate_cached_customer(customer_id)
     if not updated:
         return jsonify({"error": "not_found"}), 404
     updated.pop("password_hash", None)
@@ -2055,7 +2087,6 @@ def customer_update_me():
 @api.get("/customer/addresses")
 @require_customer
 def customer_addresses():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     return jsonify(list_customer_addresses(customer_id))
 
@@ -2063,7 +2094,6 @@ def customer_addresses():
 @api.post("/customer/addresses")
 @require_customer
 def customer_add_address():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     payload = request.get_json(silent=True) or {}
     if not payload.get("line1"):
@@ -2075,7 +2105,6 @@ def customer_add_address():
 @api.put("/customer/addresses/primary")
 @require_customer
 def customer_update_primary_address():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     payload = request.get_json(silent=True) or {}
     if not payload.get("line1"):
@@ -2096,7 +2125,6 @@ def customer_update_primary_address():
 @api.put("/customer/password")
 @require_customer
 def customer_change_password():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     payload = request.get_json(silent=True) or {}
     old_password = payload.get("old_password") or ""
@@ -2114,6 +2142,7 @@ def customer_change_password():
         return jsonify({"error": "invalid_old_password"}), 400
 
     updated = update_customer_password(customer_id, generate_password_hash(new_password))
+    invalidate_cached_customer(customer_id)
     if not updated:
         return jsonify({"error": "update_failed"}), 500
     return jsonify({"success": True}), 200
@@ -2122,14 +2151,12 @@ def customer_change_password():
 @api.get("/customer/favorites")
 @require_customer
 def customer_favorites():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     return jsonify(list_customer_favorites(customer_id))
 
 
 @api.get("/favorites/summary")
 def favorites_summary():
-    init_db()
     return jsonify({"total": count_customer_favorites_total()})
 
 
@@ -2152,7 +2179,6 @@ def etsy_shop_summary():
 @api.post("/customer/favorites")
 @require_customer
 def customer_add_favorite():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     payload = request.get_json(silent=True) or {}
     product_type = payload.get("product_type")
@@ -2166,7 +2192,6 @@ def customer_add_favorite():
 @api.delete("/customer/favorites/<int:favorite_id>")
 @require_customer
 def customer_remove_favorite(favorite_id):
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     remove_customer_favorite(customer_id, favorite_id)
     return jsonify({"success": True})
@@ -2175,7 +2200,6 @@ def customer_remove_favorite(favorite_id):
 @api.get("/customer/cart")
 @require_customer
 def customer_cart():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     return jsonify(list_customer_cart_items(customer_id))
 
@@ -2183,7 +2207,6 @@ def customer_cart():
 @api.get("/customer/cart/summary")
 @require_customer
 def customer_cart_summary():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     summary = _build_checkout_summary(customer_id)
     return jsonify(summary)
@@ -2192,7 +2215,6 @@ def customer_cart_summary():
 @api.post("/customer/cart/items")
 @require_customer
 def customer_add_cart_item():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     payload = request.get_json(silent=True) or {}
     product_type = payload.get("product_type")
@@ -2233,7 +2255,6 @@ def customer_add_cart_item():
 @api.put("/customer/cart/items/<int:item_id>")
 @require_customer
 def customer_update_cart_item(item_id):
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     payload = request.get_json(silent=True) or {}
     try:
@@ -2254,7 +2275,6 @@ def customer_update_cart_item(item_id):
 @api.delete("/customer/cart/items/<int:item_id>")
 @require_customer
 def customer_remove_cart_item(item_id):
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     remove_customer_cart_item(customer_id, item_id)
     return jsonify({"success": True})
@@ -2263,10 +2283,9 @@ def customer_remove_cart_item(item_id):
 @api.post("/customer/checkout/preview")
 @require_customer
 def customer_checkout_preview():
-    init_db()
     payload = request.get_json(silent=True) or {}
     customer_id = g.auth_payload.get("customer_id")
-    customer = fetch_customer_by_id(customer_id) or {}
+    customer = cached_customer(customer_id) or {}
     customer_email = _normalize_checkout_email(customer.get("email"))
     summary = _build_checkout_summary(customer_id)
 
@@ -2283,7 +2302,6 @@ def customer_checkout_preview():
 
 @api.post("/checkout/preview")
 def guest_checkout_preview():
-    init_db()
     payload = request.get_json(silent=True) or {}
     customer_email = _normalize_checkout_email(payload.get("customer_email"))
     if not customer_email or "@" not in customer_email or "." not in customer_email.split("@")[-1]:
@@ -2307,10 +2325,9 @@ def guest_checkout_preview():
 @require_customer
 def customer_checkout_session():
     """Create a Stripe Checkout Session (hosted payment page) and return the redirect URL."""
-    init_db()
     payload = request.get_json(silent=True) or {}
     customer_id = g.auth_payload.get("customer_id")
-    customer = fetch_customer_by_id(customer_id) or {}
+    customer = cached_customer(customer_id) or {}
     summary = _build_checkout_summary(customer_id)
 
     if not summary.get("items"):
@@ -2441,7 +2458,6 @@ def customer_checkout_session():
 @limiter.limit("20 per hour")
 def guest_checkout_session():
     """Create a Stripe Checkout session for guests (no sign-in required)."""
-    init_db()
     payload = request.get_json(silent=True) or {}
     customer_email = _normalize_checkout_email(payload.get("customer_email"))
     if not customer_email or "@" not in customer_email or "." not in customer_email.split("@")[-1]:
@@ -2577,7 +2593,6 @@ def guest_checkout_session():
 @require_customer
 def customer_checkout_session_confirm():
     """After Stripe redirects back, verify the session and record the order in the DB."""
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     payload = request.get_json(silent=True) or {}
     session_id = str(payload.get("session_id") or "").strip()
@@ -2622,7 +2637,6 @@ def customer_checkout_session_confirm():
 @require_auth
 def admin_recover_checkout_session():
     """Admin-only recovery action to finalize a paid Stripe session by ID."""
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -2679,7 +2693,6 @@ def admin_recover_checkout_session():
 @require_auth
 def admin_list_digital_checkout_sessions():
     """List checkout sessions that include digital items for one-click recovery/email actions."""
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -2692,7 +2705,6 @@ def admin_list_digital_checkout_sessions():
 @require_auth
 def admin_resend_checkout_download_email():
     """Resend digital download unlock email for a paid checkout session."""
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -2754,7 +2766,6 @@ def admin_resend_checkout_download_email():
 @require_auth
 def admin_delete_digital_checkout_session(session_id):
     """Delete a saved digital checkout recovery row without affecting orders/downloads."""
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -2772,7 +2783,6 @@ def admin_delete_digital_checkout_session(session_id):
 @api.get("/admin/analytics/homepage-insights")
 @require_auth
 def admin_homepage_visit_insights():
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -2780,10 +2790,18 @@ def admin_homepage_visit_insights():
     return jsonify(insights), 200
 
 
+@api.get("/admin/email-outbox/metrics")
+@require_auth
+def admin_email_outbox_metrics():
+    if not _is_admin_request():
+        return jsonify({"error": "forbidden"}), 403
+
+    return jsonify(email_outbox_metrics()), 200
+
+
 @api.get("/admin/discount-codes")
 @require_auth
 def admin_list_discount_codes():
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -2815,7 +2833,6 @@ def admin_list_discount_codes():
 @api.post("/admin/discount-codes")
 @require_auth
 def admin_create_discount_code():
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -2877,7 +2894,6 @@ def admin_create_discount_code():
 @api.post("/analytics/home-visit")
 def track_homepage_visit():
     """Record an anonymous homepage visit keyed by hashed visitor IP."""
-    init_db()
 
     ip_hash = _hash_visitor_ip(_extract_request_ip())
     if not ip_hash:
@@ -2885,14 +2901,13 @@ def track_homepage_visit():
 
     user_agent = (request.headers.get("User-Agent") or "").strip()[:255] or None
     page_path = (request.get_json(silent=True) or {}).get("path") or "/"
-    record_homepage_visit(ip_hash, page_path=page_path, user_agent=user_agent)
+    buffer_homepage_visit(ip_hash, page_path=page_path, user_agent=user_agent)
     return jsonify({"success": True}), 201
 
 
 @api.get("/customer/orders")
 @require_customer
 def customer_orders():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     return jsonify(list_customer_orders(customer_id))
 
@@ -2900,7 +2915,6 @@ def customer_orders():
 @api.get("/customer/pattern-downloads")
 @require_customer
 def customer_pattern_downloads():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     downloads = list_customer_pattern_downloads(customer_id)
     return jsonify([
@@ -2915,7 +2929,6 @@ def customer_pattern_downloads():
 @api.get("/pattern-downloads/<download_token>")
 @limiter.limit("30 per hour")
 def download_pattern_asset(download_token):
-    init_db()
     record = get_customer_pattern_download_by_token(download_token)
     if not record:
         return jsonify({"error": "not_found"}), 404
@@ -2923,10 +2936,17 @@ def download_pattern_asset(download_token):
     return build_pattern_download_response(record, download_token=download_token)
 
 
+@api.get("/pattern-renders/<job_id>")
+def get_pattern_render_status(job_id):
+    job = get_render_job(job_id)
+    if not job:
+        return jsonify({"error": "not_found"}), 404
+    return jsonify(job.to_dict())
+
+
 @api.get("/admin/manual-products/<int:product_id>/pattern-download")
 @require_auth
 def admin_download_manual_product_pattern(product_id):
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -2953,7 +2973,6 @@ def admin_download_manual_product_pattern(product_id):
 @api.get("/customer/orders/<int:order_id>/items")
 @require_customer
 def customer_order_items(order_id):
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     return jsonify(list_customer_order_items(customer_id, order_id))
 
@@ -2961,7 +2980,6 @@ def customer_order_items(order_id):
 @api.get("/admin/orders/recent")
 @require_auth
 def admin_recent_orders():
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -2974,7 +2992,6 @@ def admin_recent_orders():
 @api.put("/admin/orders/<int:order_id>/seen")
 @require_auth
 def admin_mark_order_seen(order_id):
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -2987,7 +3004,6 @@ def admin_mark_order_seen(order_id):
 @api.get("/admin/orders/shipping")
 @require_auth
 def admin_shipping_orders():
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -2999,7 +3015,6 @@ def admin_shipping_orders():
 @api.get("/admin/orders/shipping/count")
 @require_auth
 def admin_shipping_orders_count():
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -3011,7 +3026,6 @@ def admin_shipping_orders_count():
 @api.get("/admin/orders/<int:order_id>/items")
 @require_auth
 def admin_order_items(order_id):
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -3057,7 +3071,6 @@ def admin_order_items(order_id):
 @api.put("/admin/orders/<int:order_id>/shipping-status")
 @require_auth
 def admin_update_order_shipping_status(order_id):
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -3089,7 +3102,6 @@ def admin_update_order_shipping_status(order_id):
 @api.get("/admin/orders/<int:order_id>/events")
 @require_auth
 def admin_get_order_events(order_id):
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -3101,7 +3113,6 @@ def admin_get_order_events(order_id):
 @api.get("/customer/reviews")
 @require_customer
 def customer_reviews():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     return jsonify(list_customer_reviews(customer_id))
 
@@ -3109,31 +3120,27 @@ def customer_reviews():
 @api.get("/customer/review-options")
 @require_customer
 def customer_review_options():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     return jsonify(list_customer_review_options(customer_id))
 
 
 @api.get("/reviews")
 def product_reviews():
-    init_db()
     product_type = request.args.get("product_type")
     product_id = request.args.get("product_id")
     if not product_type or not product_id:
         return jsonify({"error": "missing_product"}), 400
-    return jsonify(list_reviews_for_product(product_type, str(product_id)))
+    return jsonify(cached_product_reviews(product_type, str(product_id)))
 
 
 @api.get("/reviews/recent")
 def recent_reviews():
-    init_db()
     limit = request.args.get("limit", 10)
     return jsonify(list_recent_reviews(limit=limit))
 
 
 @api.post("/reviews/invite-codes/validate")
 def validate_review_invite_code():
-    init_db()
     payload = request.get_json(silent=True) or {}
     raw_code = str(payload.get("code") or "").strip().upper()
     if not raw_code:
@@ -3155,7 +3162,6 @@ def validate_review_invite_code():
 
 @api.post("/reviews/submit-with-code")
 def submit_review_with_invite_code():
-    init_db()
     raw_code = str(request.form.get("code") or "").strip().upper()
     reviewer_name = str(request.form.get("name") or "").strip()
     review_title = str(request.form.get("title") or "").strip()
@@ -3243,7 +3249,6 @@ def submit_public_review():
     Public endpoint for customers to submit reviews without a code or authentication.
     Useful for QR codes on thank you cards.
     """
-    init_db()
     reviewer_name = str(request.form.get("name") or "").strip()
     review_title = str(request.form.get("title") or "").strip()
     review_body = str(request.form.get("body") or "").strip()
@@ -3314,7 +3319,6 @@ def submit_public_review():
 @api.post("/customer/reviews")
 @require_customer
 def customer_create_review():
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     payload = request.get_json(silent=True) or {}
     product_type = str(payload.get("product_type") or "").strip().lower()
@@ -3339,13 +3343,13 @@ def customer_create_review():
         return jsonify({"error": "not_verified_buyer"}), 403
 
     review_id = create_customer_review(customer_id, payload, verified)
+    invalidate_product_reviews(product_type, str(product_id))
     return jsonify({"id": review_id}), 201
 
 
 @api.post("/admin/reviews")
 @require_auth
 def admin_create_review():
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -3417,13 +3421,13 @@ def admin_create_review():
         False,
         status,
     )
+    invalidate_product_reviews("testimonial", purchase_source)
     return jsonify({"id": review_id, "status": status}), 201
 
 
 @api.put("/customer/reviews/<int:review_id>")
 @require_customer
 def customer_update_review(review_id):
-    init_db()
     customer_id = g.auth_payload.get("customer_id")
     payload = request.get_json(silent=True) or {}
 
@@ -3448,13 +3452,13 @@ def customer_update_review(review_id):
     updated = update_customer_review(customer_id, review_id, normalized)
     if not updated:
         return jsonify({"error": "not_found_or_forbidden"}), 404
+    invalidate_product_reviews()
     return jsonify({"success": True, "status": "pending"}), 200
 
 
 @api.get("/admin/reviews")
 @require_auth
 def admin_reviews():
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -3466,7 +3470,6 @@ def admin_reviews():
 @api.get("/admin/review-invite-codes")
 @require_auth
 def admin_list_review_invite_codes():
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -3479,7 +3482,6 @@ def admin_list_review_invite_codes():
 @api.post("/admin/review-invite-codes")
 @require_auth
 def admin_create_review_invite_code():
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -3587,7 +3589,6 @@ def admin_create_review_invite_code():
 @api.delete("/admin/review-invite-codes/<int:invite_id>")
 @require_auth
 def admin_delete_review_invite_code(invite_id):
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -3600,7 +3601,6 @@ def admin_delete_review_invite_code(invite_id):
 @api.put("/admin/reviews/<int:review_id>")
 @require_auth
 def admin_update_review(review_id):
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
@@ -3641,39 +3641,31 @@ def admin_update_review(review_id):
     updated = update_admin_review(review_id, payload)
     if not updated:
         return jsonify({"error": "not_found_or_no_changes"}), 404
+    invalidate_product_reviews()
     return jsonify({"success": True}), 200
 
 
 @api.delete("/admin/reviews/<int:review_id>")
 @require_auth
 def admin_delete_review(review_id):
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
     deleted = delete_admin_review(review_id)
     if not deleted:
         return jsonify({"error": "not_found"}), 404
+    invalidate_product_reviews()
     return jsonify({"success": True}), 200
 
 
 @api.get("/items")
 def list_items():
-    init_db()
-    cached_items = _cache_get("items")
-    if cached_items is not None:
-        return jsonify(cached_items), 200
-
-    items = fetch_items()
-    if items is None:
-        items = []
-    _cache_set("items", items)
+    items = cached_catalog("items", lambda: fetch_items() or [])
     return jsonify(items), 200
 
 
 @api.get("/items/<int:item_id>")
 def get_item(item_id):
-    init_db()
     item = fetch_item(item_id)
     if not item:
         return jsonify({"error": "not_found"}), 404
@@ -3683,7 +3675,6 @@ def get_item(item_id):
 @api.post("/items")
 @require_auth
 def create_item():
-    init_db()
     payload = request.get_json(silent=True) or {}
     if not payload:
         payload = request.form.to_dict() or {}
@@ -3728,27 +3719,27 @@ def create_item():
 
     item_id = upsert_item(listing)
     item = fetch_item(item_id) or listing
-    _catalog_cache_invalidate("items")
+    invalidate_catalog_cache("items")
     return jsonify(item), 201
 
 
 @api.get("/manual-products")
 def list_manual_products():
+    raw_fields = str(request.args.get("fields") or "").strip()
+    fields = [field.strip() for field in raw_fields.split(",") if field.strip()] if raw_fields else None
+    if fields is not None:
+        unknown = [field for field in fields if field not in MANUAL_PRODUCT_FIELDS]
+        if unknown:
+            return jsonify({"error": "invalid_fields", "fields": unknown}), 400
     try:
-        init_db()
         summary_mode = str(request.args.get("summary") or "").strip().lower() in {"1", "true", "yes"}
-        cache_key = "manual_products_summary" if summary_mode else None
-
-        if cache_key is not None:
-            cached_products = _cache_get(cache_key)
-            if cached_products is not None:
-                return jsonify(cached_products), 200
-
-        products = fetch_manual_products_catalog() if summary_mode else fetch_manual_products()
-        if products is None:
-            products = []
-        if cache_key is not None:
-            _cache_set(cache_key, products)
+        if summary_mode:
+            products = cached_catalog("manual_products_summary", lambda: fetch_manual_products_catalog() or [])
+            if fields is not None:
+                keep = {"id", *fields}
+                products = [{key: value for key, value in product.items() if key in keep} for product in products]
+        else:
+            products = fetch_manual_products(fields=fields) or []
         return jsonify(products), 200
     except Exception as exc:
         return jsonify({"error": "server_error", "detail": str(exc)}), 500
@@ -3828,96 +3819,149 @@ def _resolve_google_feed_image_link(images, api_base_url, storefront_base_url):
     return ""
 
 
-def _build_google_merchant_feed_xml():
-    products = fetch_manual_products_catalog() or []
+def _render_google_feed_item(product, image_link, storefront_base_url):
+    """Return the <item> fragment for product, or "" when it does not belong in the feed."""
+    if not _to_google_feed_bool(product.get("is_active", True)):
+        return ""
+    if _to_google_feed_bool(product.get("is_digital_download")):
+        return ""
+
+    product_id = product.get("id")
+    if not product_id:
+        return ""
+
+    price_value = _to_google_feed_price(product.get("price"))
+    if price_value is None:
+        return ""
+    if not image_link:
+        return ""
+
+    quantity = _to_google_feed_quantity(product.get("quantity"))
+    availability = "in stock" if quantity > 0 else "out of stock"
+
+    title = str(product.get("name") or "Untitled Product").strip() or "Untitled Product"
+    description = str(product.get("description") or title).strip() or title
+    product_path = f"/#/product/m-{product_id}"
+    product_link = f"{storefront_base_url}{product_path}"
+
+    return "\n".join([
+        "    <item>",
+        f"      <g:id>{html.escape(str(product_id), quote=True)}</g:id>",
+        f"      <title>{html.escape(title, quote=True)}</title>",
+        f"      <description>{html.escape(description, quote=True)}</description>",
+        f"      <link>{html.escape(product_link, quote=True)}</link>",
+        f"      <g:image_link>{html.escape(image_link, quote=True)}</g:image_link>",
+        f"      <g:availability>{availability}</g:availability>",
+        "      <g:condition>new</g:condition>",
+        f"      <g:price>{price_value} USD</g:price>",
+        "      <g:identifier_exists>no</g:identifier_exists>",
+        "    </item>",
+    ]) + "\n"
+
+
+# product_id -> (fingerprint, fragment); a fragment is re-rendered only when the
+# product's updated_at (or its resolved image/base URLs) changes.
+_google_feed_fragments = {}
+_google_feed_state = {"etag": None, "changed_at": None}
+
+
+def _parse_feed_timestamp(value):
+    try:
+        parsed = datetime.fromisoformat(str(value or "").strip().replace("Z", ""))
+    except ValueError:
+        return None
+    return parsed.replace(microsecond=0)
+
+
+def _build_google_merchant_feed():
+    """Return (fragments, etag, last_modified) for the current catalog."""
+    products = cached_catalog("manual_products_summary", lambda: fetch_manual_products_catalog() or [])
     storefront_base_url = _resolve_google_merchant_storefront_base_url()
     api_base_url = _resolve_google_merchant_api_base_url()
 
-    item_rows = []
+    digest = hashlib.sha256(f"{storefront_base_url}|{api_base_url}".encode("utf-8"))
+    fragments = []
+    last_modified = None
+    seen_ids = set()
     for product in products:
-        if not _to_google_feed_bool(product.get("is_active", True)):
-            continue
-        if _to_google_feed_bool(product.get("is_digital_download")):
-            continue
-
         product_id = product.get("id")
-        if not product_id:
-            continue
-
-        price_value = _to_google_feed_price(product.get("price"))
-        if price_value is None:
-            continue
-
         image_link = _resolve_google_feed_image_link(
             product.get("images"),
             api_base_url=api_base_url,
             storefront_base_url=storefront_base_url,
         )
-        if not image_link:
+        updated_at = product.get("updated_at")
+        fingerprint = (str(updated_at), image_link, storefront_base_url, api_base_url)
+        cached = _google_feed_fragments.get(product_id)
+        if cached is None or cached[0] != fingerprint or not updated_at:
+            cached = (fingerprint, _render_google_feed_item(product, image_link, storefront_base_url))
+            if updated_at and product_id:
+                _google_feed_fragments[product_id] = cached
+        seen_ids.add(product_id)
+        if not cached[1]:
             continue
 
-        quantity = _to_google_feed_quantity(product.get("quantity"))
-        availability = "in stock" if quantity > 0 else "out of stock"
-
-        title = str(product.get("name") or "Untitled Product").strip() or "Untitled Product"
-        description = str(product.get("description") or title).strip() or title
-        product_path = f"/#/product/m-{product_id}"
-        product_link = f"{storefront_base_url}{product_path}"
-
-        item_rows.append(
-            "\n".join([
-                "    <item>",
-                f"      <g:id>{html.escape(str(product_id), quote=True)}</g:id>",
-                f"      <title>{html.escape(title, quote=True)}</title>",
-                f"      <description>{html.escape(description, quote=True)}</description>",
-                f"      <link>{html.escape(product_link, quote=True)}</link>",
-                f"      <g:image_link>{html.escape(image_link, quote=True)}</g:image_link>",
-                f"      <g:availability>{availability}</g:availability>",
-                "      <g:condition>new</g:condition>",
-                f"      <g:price>{price_value} USD</g:price>",
-                "      <g:identifier_exists>no</g:identifier_exists>",
-                "    </item>",
-            ])
-        )
-
-    generated_at = datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
-    xml_payload = "\n".join([
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">',
-        "  <channel>",
-        "    <title>SGCG Art Product Feed</title>",
-        f"    <link>{html.escape(storefront_base_url, quote=True)}</link>",
-        "    <description>Google Merchant Center product feed</description>",
-        f"    <lastBuildDate>{generated_at}</lastBuildDate>",
-        *item_rows,
-        "  </channel>",
-        "</rss>",
-        "",
-    ])
-    return xml_payload
+        fragments.append(cached[1])
+        digest.update(cached[1].encode("utf-8"))
+        modified = _parse_feed_timestamp(updated_at)
+        if modified and (last_modified is None or modified > last_modified):
+            last_modified = modified
+
+    for stale_id in set(_google_feed_fragments) - seen_ids:
+        _google_feed_fragments.pop(stale_id, None)
+
+    etag = digest.hexdigest()[:32]
+    # Deleting or hiding a product changes the feed without a newer updated_at, so
+    # If-Modified-Since clients also need the time this worker saw the feed change.
+    if _google_feed_state["etag"] not in (None, etag):
+        _google_feed_state["changed_at"] = datetime.utcnow().replace(microsecond=0)
+    _google_feed_state["etag"] = etag
+    changed_at = _google_feed_state["changed_at"]
+    if changed_at and (last_modified is None or changed_at > last_modified):
+        last_modified = changed_at
+    return fragments, etag, last_modified
+
+
+def _google_merchant_feed_response(cache_control):
+    fragments, etag, last_modified = _build_google_merchant_feed()
+    storefront_base_url = _resolve_google_merchant_storefront_base_url()
+    build_date = (last_modified or datetime(1970, 1, 1)).isoformat() + "Z"
+
+    def generate():
+        yield "\n".join([
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">',
+            "  <channel>",
+            "    <title>SGCG Art Product Feed</title>",
+            f"    <link>{html.escape(storefront_base_url, quote=True)}</link>",
+            "    <description>Google Merchant Center product feed</description>",
+            f"    <lastBuildDate>{build_date}</lastBuildDate>",
+            "",
+        ])
+        yield from fragments
+        yield "  </channel>\n</rss>\n"
+
+    response = Response(generate(), mimetype="application/xml")
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = cache_control
+    return response.make_conditional(request)
 
 
 @api.get("/google-merchant-feed.xml")
 def google_merchant_feed():
-    init_db()
-    xml_payload = _build_google_merchant_feed_xml()
-    response = Response(xml_payload, mimetype="application/xml")
-    response.headers["Cache-Control"] = "no-store, max-age=0"
-    return response
+    return _google_merchant_feed_response("public, max-age=900")
 
 
 @api.get("/google-merchant-live.xml")
 def google_merchant_live_feed():
-    init_db()
-    xml_payload = _build_google_merchant_feed_xml()
-    response = Response(xml_payload, mimetype="application/xml")
-    response.headers["Cache-Control"] = "no-store, max-age=0"
-    return response
+    # Always revalidated, but an unchanged catalog still answers 304.
+    return _google_merchant_feed_response("no-cache")
 
 
 @api.get("/manual-products/<int:product_id>")
 def get_manual_product(product_id):
-    init_db()
     product = fetch_manual_product(product_id)
     if not product:
         return jsonify({"error": "not_found"}), 404
@@ -4059,7 +4103,6 @@ def upload_product_image():
 @api.post("/manual-products")
 @require_auth
 def create_manual_product_endpoint():
-    init_db()
     payload = request.get_json(silent=True) or {}
     payload["is_home_featured"] = _coerce_bool_value(payload.get("is_home_featured", False))
     payload["is_active"] = _coerce_bool_value(payload.get("is_active", True))
@@ -4090,7 +4133,7 @@ def create_manual_product_endpoint():
     try:
         product_id = create_manual_product(payload)
         product = fetch_manual_product(product_id)
-        _catalog_cache_invalidate("manual_products", "manual_products_summary")
+        invalidate_catalog_cache("manual_products", "manual_products_summary")
         return jsonify(product), 201
     except Exception as exc:
         return jsonify({"error": "creation_failed", "detail": str(exc)}), 500
@@ -4099,7 +4142,6 @@ def create_manual_product_endpoint():
 @api.put("/manual-products/<int:product_id>")
 @require_auth
 def update_manual_product_endpoint(product_id):
-    init_db()
     product = fetch_manual_product(product_id)
     if not product:
         return jsonify({"error": "not_found"}), 404
@@ -4156,7 +4198,7 @@ def update_manual_product_endpoint(product_id):
     try:
         update_manual_product(product_id, merged_payload)
         updated_product = fetch_manual_product(product_id)
-        _catalog_cache_invalidate("manual_products", "manual_products_summary")
+        invalidate_catalog_cache("manual_products", "manual_products_summary")
         return jsonify(updated_product)
     except Exception as exc:
         return jsonify({"error": "update_failed", "detail": str(exc)}), 500
@@ -4165,13 +4207,12 @@ def update_manual_product_endpoint(product_id):
 @api.delete("/manual-products/<int:product_id>")
 @require_auth
 def delete_manual_product_endpoint(product_id):
-    init_db()
     product = fetch_manual_product(product_id)
     if not product:
         return jsonify({"error": "not_found"}), 404
     try:
         delete_manual_product(product_id)
-        _catalog_cache_invalidate("manual_products", "manual_products_summary")
+        invalidate_catalog_cache("manual_products", "manual_products_summary")
         return jsonify({"success": True, "message": "Product deleted"}), 200
     except Exception as exc:
         return jsonify({"error": "deletion_failed", "detail": str(exc)}), 500
@@ -4180,7 +4221,6 @@ def delete_manual_product_endpoint(product_id):
 @api.post("/admin/manual-products/<int:product_id>/facebook-post")
 @require_auth
 def publish_manual_product_to_facebook_page(product_id):
-    init_db()
     if not _is_admin_request():
         return jsonify({"error": "forbidden"}), 403
 
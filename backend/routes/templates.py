@@ -1,29 +1,32 @@
 """\nTemplate API: public list/get and admin CRUD (create, update, soft delete).\n"""
 import os
-import uuid
 from functools import wraps
 from flask import Blueprint, jsonify, request, current_app
 from sqlalchemy import func
+from sqlalchemy.orm import lazyload, selectinload
 from werkzeug.utils import secure_filename
 
 from ..models import db, GalleryPhoto, Template, TemplateRegion
-from ..auth import decode_token, require_customer
+from ..auth import authenticate_request, optional_auth_payload, require_customer
 from ..app import limiter
 from ..db import (
-    create_manual_product,
-    fetch_manual_product,
-    fetch_manual_products,
     get_customer_pattern_download_by_token,
     upsert_customer_pattern_download,
-    update_manual_product,
 )
-from ..services.download_service import build_pattern_download_response
+from ..services.catalog_cache_service import GALLERY_FACET_KEYS, invalidate_catalog_cache
+from ..services.download_service import build_pattern_download_response, prewarm_pattern_download
+from ..services.pattern_product_service import sync_pattern_product_for_template
 from ..services.template_service import (
     validate_template_data,
     parse_svg_regions,
     generate_thumbnail_png,
 )
-from ..services.pattern_render_service import render_numbered_pattern_raster
+from ..services.render_queue_service import JOB_DONE
+from ..services.template_ingest_service import (
+    apply_finished_template_upload,
+    ingest_template_upload,
+    read_template_upload,
+)
 
 # Public: GET /api/templates, GET /api/templates/<id>
 templates_bp = Blueprint("templates", __name__)
@@ -34,30 +37,15 @@ admin_templates_bp = Blueprint("admin_templates", __name__)
 DEFAULT_LIMIT = 12
 MAX_LIMIT = 50
 MAX_TEMPLATE_UPLOAD_BYTES = 50 * 1024 * 1024
-PATTERN_DEFAULT_QUANTITY = 999
-
-
-def _prepare_uploaded_template_image(file_bytes, extension, mime_type):
-    normalized_bytes = render_numbered_pattern_raster(file_bytes)
-    if normalized_bytes:
-        return normalized_bytes, ".png", "image/png"
-    return file_bytes, extension, mime_type
 
 
 def _require_admin(handler):
     @wraps(handler)
     def wrapper(*args, **kwargs):
-        auth_header = (request.headers.get("Authorization") or "").strip()
-        if not auth_header.startswith("Bearer "):
-            return jsonify({"error": "missing_token"}), 401
-
-        token = auth_header.split(" ", 1)[1].strip()
-        if not token:
+        payload, error = authenticate_request()
+        if error == "missing_token":
             return jsonify({"error": "missing_token"}), 401
-
-        try:
-            payload = decode_token(token)
-        except Exception:
+        if error:
             return jsonify({"error": "invalid_token"}), 401
 
         if payload.get("role") == "customer":
@@ -69,16 +57,7 @@ def _require_admin(handler):
 
 
 def _get_request_auth_payload():
-    auth_header = (request.headers.get("Authorization") or "").strip()
-    if not auth_header.startswith("Bearer "):
-        return None
-    token = auth_header.split(" ", 1)[1].strip()
-    if not token:
-        return None
-    try:
-        return decode_token(token)
-    except Exception:
-        return None
+    return optional_auth_payload()
 
 
 def _is_private_template(template: Template) -> bool:
@@ -117,94 +96,6 @@ def _free_download_rate_limit_key():
     return request.remote_addr or "anonymous"
 
 
-def _normalize_pattern_related_links(value):
-    if isinstance(value, dict):
-        return dict(value)
-    return {}
-
-
-def _resolve_existing_pattern_product(template: Template):
-    related_links = _normalize_pattern_related_links(template.related_links)
-    linked_pattern_id = _to_int(related_links.get("pattern_product_id"))
-    if linked_pattern_id:
-        linked_product = fetch_manual_product(linked_pattern_id)
-        if linked_product:
-            return linked_product
-
-    manual_products = fetch_manual_products_catalog() or []
-    for entry in manual_products:
-        entry_links = entry.get("related_links") if isinstance(entry, dict) else None
-        if not isinstance(entry_links, dict):
-            continue
-        template_id = _to_int(entry_links.get("template_id"))
-        if template_id and template_id == template.id:
-            return entry
-
-    return None
-
-
-def _build_pattern_product_payload(template: Template, existing_product=None):
-    existing_product = existing_product or {}
-    existing_images = existing_product.get("images") if isinstance(existing_product.get("images"), list) else []
-    template_image_url = (template.thumbnail_url or template.image_url or "").strip()
-
-    images = existing_images
-    if not images and template_image_url:
-        images = [{"url": template_image_url, "type": "image"}]
-
-    related_links = _normalize_pattern_related_links(existing_product.get("related_links"))
-    related_links.update({
-        "template_id": template.id,
-        "template_name": template.name,
-    })
-
-    return {
-        "name": (template.name or "").strip() or f"Pattern #{template.id}",
-        "description": (template.description or "").strip() or f"Digital pattern download for {template.name}",
-        "category": ["Pattern"],
-        "materials": existing_product.get("materials") if existing_product.get("materials") is not None else [],
-        "width": existing_product.get("width"),
-        "height": existing_product.get("height"),
-        "depth": existing_product.get("depth"),
-        "price": float(template.price_amount or 0),
-        "old_price": existing_product.get("old_price"),
-        "discount_percent": existing_product.get("discount_percent"),
-        "quantity": existing_product.get("quantity") if existing_product.get("quantity") is not None else PATTERN_DEFAULT_QUANTITY,
-        "is_featured": bool(existing_product.get("is_featured")),
-        "is_digital_download": True,
-        "related_links": related_links,
-        "images": images,
-    }
-
-
-def _sync_pattern_product_for_template(template: Template):
-    if not bool(template.is_digital_download):
-        return
-
-    existing_product = _resolve_existing_pattern_product(template)
-    payload = _build_pattern_product_payload(template, existing_product=existing_product)
-
-    if existing_product and existing_product.get("id"):
-        pattern_product_id = int(existing_product["id"])
-        update_manual_product(pattern_product_id, payload)
-        pattern_product = fetch_manual_product(pattern_product_id)
-    else:
-        pattern_product_id = create_manual_product(payload)
-        pattern_product = fetch_manual_product(pattern_product_id)
-
-    if not pattern_product:
-        raise RuntimeError("Failed to create or update linked pattern product")
-
-    next_links = _normalize_pattern_related_links(template.related_links)
-    next_links.update({
-        "template_id": template.id,
-        "template_name": template.name,
-        "pattern_product_id": pattern_product_id,
-        "pattern_product_name": pattern_product.get("name") or template.name,
-    })
-    template.related_links = next_links
-
-
 def _safe_session_rollback():
     try:
         db.session.rollback()
@@ -214,9 +105,10 @@ def _safe_session_rollback():
 
 def _sync_pattern_product_nonfatal(template: Template):
     try:
-        _sync_pattern_product_for_template(template)
+        sync_pattern_product_for_template(template)
         db.session.commit()
         db.session.refresh(template)
+        invalidate_catalog_cache("manual_products", "manual_products_summary")
         return None
     except Exception as sync_error:
         _safe_session_rollback()
@@ -228,6 +120,52 @@ def _sync_pattern_product_nonfatal(template: Template):
         return str(sync_error)
 
 
+def _prewarm_pattern_render_nonfatal(template: Template):
+    try:
+        prewarm_pattern_download({
+            "template_type": template.template_type,
+            "image_data": template.image_data,
+            "image_url": template.image_url,
+        })
+    except Exception as prewarm_error:
+        current_app.logger.warning(
+            "Template pattern pre-warm skipped for template_id=%s: %s",
+            getattr(template, "id", None),
+            prewarm_error,
+        )
+
+
+def _apply_finished_upload_nonfatal(template: Template):
+    try:
+        apply_finished_template_upload(template)
+    except Exception as apply_error:
+        _safe_session_rollback()
+        current_app.logger.warning(
+            "Finished template upload not applied for template_id=%s: %s",
+            getattr(template, "id", None),
+            apply_error,
+        )
+
+
+def _page_with_total(query, offset, limit):
+    """Return (templates, total) for one page, newest first, in a single query.
+
+    The total comes from a COUNT(*) OVER () column instead of a separate count
+    query. svg_content and image_data stay deferred.
+    """
+    rows = (
+        query.add_columns(func.count().over().label("total_count"))
+        .order_by(Template.updated_at.desc(), Template.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    if rows:
+        return [template for template, _total in rows], rows[0][1]
+    # Past the last page there is no row to carry the window total.
+    return [], query.order_by(None).count() if offset else 0
+
+
 @templates_bp.get("/templates")
 def list_templates():
     """
@@ -259,12 +197,17 @@ def list_templates():
             else:
                 q = q.filter(public_filter)
 
-        q = q.order_by(Template.updated_at.desc(), Template.id.desc())
-        total = q.count()
-        items = q.offset(offset).limit(limit).all()
+        q = q.options(selectinload(Template.regions).options(lazyload(TemplateRegion.template)))
+        items, total = _page_with_total(q, offset, limit)
+
+        payload = []
+        for template in items:
+            data = template.to_dict(include_regions=True, include_svg=False)
+            data["region_count"] = len(template.regions)
+            payload.append(data)
 
         return jsonify({
-            "items": [t.to_dict(include_regions=True, include_svg=False) for t in items],
+            "items": payload,
             "total": total,
             "limit": limit,
             "offset": offset,
@@ -350,9 +293,7 @@ def admin_list_templates():
         q = Template.query
         if search:
             q = q.filter(Template.name.ilike(f"%{search}%"))
-        q = q.order_by(Template.updated_at.desc(), Template.id.desc())
-        total = q.count()
-        items = q.offset(offset).limit(limit).all()
+        items, total = _page_with_total(q, max(0, offset), max(1, limit))
 
         return jsonify({
             "items": [t.to_dict(include_regions=False, include_svg=False) for t in items],
@@ -386,7 +327,9 @@ def upload_template_image():
     """
     POST /api/admin/templates/upload-image
     Accepts multipart file upload (JPEG, PNG — PDF is pre-rendered on frontend).
-    Returns { image_url: '/static/uploads/templates/<filename>' }
+    Returns { image_url, status, job_id? }. The original is stored immediately and
+    numbered in the background (poll /api/pattern-renders/<job_id>); templates
+    saved with image_url switch to the numbered PNG when it is ready.
     """
     try:
         f = request.files.get("file")
@@ -408,19 +351,8 @@ def upload_template_image():
                 "detail": "File is too large to upload. Please use a file smaller than 50 MB.",
             }), 400
         mime_type = f.content_type or f"image/{ext.lstrip('.')}"
-        file_bytes, ext, mime_type = _prepare_uploaded_template_image(file_bytes, ext, mime_type)
-
-        # Also save to disk as a cache
-        uploads_dir = os.path.join(current_app.root_path, "uploads", "templates")
-        os.makedirs(uploads_dir, exist_ok=True)
-        unique_name = f"{uuid.uuid4().hex}{ext}"
-        save_path = os.path.join(uploads_dir, unique_name)
-        with open(save_path, "wb") as fp:
-            fp.write(file_bytes)
-
-        image_url = f"/uploads/templates/{unique_name}"
-
-        return jsonify({"image_url": image_url}), 201
+        result = ingest_template_upload(file_bytes, ext, mime_type)
+        return jsonify(result), 202 if result.get("job_id") and result["status"] != JOB_DONE else 201
     except Exception as e:
         return jsonify({"error": "server_error", "detail": str(e)}), 500
 
@@ -456,19 +388,13 @@ def create_template():
         elif image_url:
             template_type = "image"
 
-        # Read image bytes back from disk when persisting the template record.
+        # Persist the uploaded bytes so the image survives Render's ephemeral disk.
         image_data = None
         image_mime = None
-        if image_url and not image_url.startswith('http'):
-            # Try reading from disk as fallback
+        if image_url:
             try:
-                disk_path = os.path.join(current_app.root_path, image_url.lstrip('/'))
-                if os.path.isfile(disk_path):
-                    with open(disk_path, 'rb') as fp:
-                        image_data = fp.read()
-                    ext = os.path.splitext(disk_path)[1].lower().lstrip('.')
-                    image_mime = f'image/{ext}' if ext else 'image/png'
-            except Exception:
+                image_data, image_mime = read_template_upload(image_url)
+            except OSError:
                 pass
 
         template = Template(
@@ -505,7 +431,9 @@ def create_template():
             ))
         db.session.commit()
         db.session.refresh(template)
+        _apply_finished_upload_nonfatal(template)
         sync_error = _sync_pattern_product_nonfatal(template)
+        _prewarm_pattern_render_nonfatal(template)
 
         response_payload = template.to_dict(include_regions=True, include_svg=True)
         if sync_error:
@@ -604,7 +532,12 @@ def update_template(template_id):
                 ))
         db.session.commit()
         db.session.refresh(template)
+        if "name" in payload:
+            # Gallery filter lists show template names.
+            invalidate_catalog_cache(*GALLERY_FACET_KEYS)
+        _apply_finished_upload_nonfatal(template)
         sync_error = _sync_pattern_product_nonfatal(template)
+        _prewarm_pattern_render_nonfatal(template)
 
         response_payload = template.to_dict(include_regions=True, include_svg=True)
         if sync_error:
@@ -638,6 +571,7 @@ def delete_template(template_id):
             )
             db.session.delete(template)
             db.session.commit()
+            invalidate_catalog_cache(*GALLERY_FACET_KEYS)
             return jsonify({"success": True, "message": "Template permanently deleted"}), 200
 
         template.is_active = False
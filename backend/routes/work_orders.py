@@ -7,9 +7,13 @@ from backend.models.revision import WorkOrderRevision
 from backend.models.project import UserProject
 from backend.models.template import Template
 from backend.utils.email import send_email
-from backend.auth import decode_token
+from backend.services.project_preview_service import project_preview_links
+from backend.auth import authenticate_request
 from datetime import datetime
-import jwt
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
+import base64
+import binascii
 import os
 from backend.db import (
     fetch_customer_by_id,
@@ -23,41 +27,36 @@ from backend.db import (
 work_orders_bp = Blueprint('work_orders', __name__)
 admin_work_orders_bp = Blueprint('admin_work_orders', __name__)
 
+LIST_PAGE_DEFAULT = 50
+LIST_PAGE_MAX = 200
+
 # Authentication decorator that parses JWT and sets g.user_id
 def login_required(f):
     def wrapper(*args, **kwargs):
-        auth_header = request.headers.get("Authorization", "")
-        if not auth_header.startswith("Bearer "):
+        payload, error = authenticate_request()
+        if error == 'missing_token':
             return jsonify({'error': 'Authentication required'}), 401
-        token = auth_header.split(" ", 1)[1].strip()
-        try:
-            payload = decode_token(token)
-            # Set user_id from customer_id or sub (email for admin)
-            g.user_id = payload.get("customer_id") or payload.get("sub")
-            g.is_admin = payload.get("role") != "customer"
-            g.auth_payload = payload
-        except jwt.PyJWTError:
+        if error:
             return jsonify({'error': 'Invalid or expired token'}), 401
+        # Set user_id from customer_id or sub (email for admin)
+        g.user_id = payload.get("customer_id") or payload.get("sub")
+        g.is_admin = payload.get("role") != "customer"
         return f(*args, **kwargs)
     wrapper.__name__ = f.__name__
     return wrapper
 
 def admin_required(f):
     def wrapper(*args, **kwargs):
-        auth_header = request.headers.get("Authorization", "")
-        if not auth_header.startswith("Bearer "):
+        payload, error = authenticate_request()
+        if error == 'missing_token':
             return jsonify({'error': 'Authentication required'}), 401
-        token = auth_header.split(" ", 1)[1].strip()
-        try:
-            payload = decode_token(token)
-            # Admin tokens don't have role=customer
-            if payload.get("role") == "customer":
-                return jsonify({'error': 'Admin authentication required'}), 403
-            g.user_id = payload.get("sub")
-            g.is_admin = True
-            g.auth_payload = payload
-        except jwt.PyJWTError:
+        if error:
             return jsonify({'error': 'Invalid or expired token'}), 401
+        # Admin tokens don't have role=customer
+        if payload.get("role") == "customer":
+            return jsonify({'error': 'Admin authentication required'}), 403
+        g.user_id = payload.get("sub")
+        g.is_admin = True
         return f(*args, **kwargs)
     wrapper.__name__ = f.__name__
     return wrapper
@@ -98,7 +97,7 @@ def submit_work_order_route():
             data['design_data'] = incoming_design
         elif project.design_data and isinstance(project.design_data, dict):
             # Ensure downstream validation gets design_data even if payload omitted it
-            data['design_data'] = project.design_data
+            data['design_data'] = project.display_design_data()
     
     template = {}  # Empty template to skip validation if no project
 
@@ -121,22 +120,70 @@ def submit_work_order_route():
         send_work_order_emails(work_order, customer_email, admin_email)
     return jsonify({'work_order': work_order.to_dict(), 'project_id': project_id}), 201
 
+def _encode_list_cursor(order):
+    created_at = order.created_at.isoformat() if order.created_at else ''
+    return base64.urlsafe_b64encode(f"{created_at}|{order.id}".encode('utf-8')).decode('ascii')
+
+def _decode_list_cursor(raw):
+    try:
+        created_raw, order_id = base64.urlsafe_b64decode(raw.encode('ascii')).decode('utf-8').rsplit('|', 1)
+        return datetime.fromisoformat(created_raw), int(order_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+
+def _work_order_listing(query, include_admin_notes=False):
+    """List work orders newest first with thumbnail links instead of inline previews.
+
+    Passing limit and/or cursor returns one keyset page plus next_cursor;
+    without them the full list is returned as before.
+    """
+    raw_limit = request.args.get('limit')
+    raw_cursor = request.args.get('cursor')
+    paginate = raw_limit is not None or raw_cursor is not None
+    limit = None
+    if paginate:
+        try:
+            limit = max(1, min(int(raw_limit or LIST_PAGE_DEFAULT), LIST_PAGE_MAX))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+
+    query = (query
+             .options(joinedload(WorkOrder.project).load_only(
+                 UserProject.id, UserProject.name, UserProject.template_id, UserProject.preview_hash))
+             .order_by(WorkOrder.created_at.desc(), WorkOrder.id.desc()))
+    if raw_cursor:
+        cursor = _decode_list_cursor(raw_cursor)
+        if cursor is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        created_at, last_id = cursor
+        query = query.filter(or_(
+            WorkOrder.created_at < created_at,
+            and_(WorkOrder.created_at == created_at, WorkOrder.id < last_id),
+        ))
+
+    orders = query.limit(limit + 1).all() if paginate else query.all()
+    next_cursor = None
+    if paginate and len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = _encode_list_cursor(orders[-1])
+
+    previews = project_preview_links({o.project.id: o.project.preview_hash for o in orders if o.project})
+    rows = []
+    for o in orders:
+        rows.append(o.to_dict(
+            include_admin_notes=include_admin_notes,
+            include_project_data=True,
+            project_preview_only=True,
+            project_preview_url=previews.get(o.project_id),
+            include_template_data=False,
+            include_revision_summary=False,
+        ))
+    return jsonify({'work_orders': rows, 'next_cursor': next_cursor}), 200
+
 @work_orders_bp.route('/api/work-orders', methods=['GET'])
 @login_required
 def list_user_work_orders():
-    user_id = g.user_id
-    orders = WorkOrder.query.filter_by(user_id=user_id).order_by(WorkOrder.created_at.desc()).all()
-    return jsonify({
-        'work_orders': [
-            o.to_dict(
-                include_project_data=True,
-                project_preview_only=True,
-                include_template_data=False,
-                include_revision_summary=False,
-            )
-            for o in orders
-        ]
-    }), 200
+    return _work_order_listing(WorkOrder.query.filter_by(user_id=g.user_id))
 
 @work_orders_bp.route('/api/work-orders/<int:order_id>', methods=['GET'])
 @login_required
@@ -264,23 +311,7 @@ def approve_work_order(order_id):
 @admin_work_orders_bp.route('/api/admin/work-orders', methods=['GET'])
 @admin_required
 def admin_list_work_orders():
-    from sqlalchemy.orm import joinedload
-    orders = (WorkOrder.query
-              .options(joinedload(WorkOrder.project))
-              .order_by(WorkOrder.created_at.desc())
-              .all())
-    return jsonify({
-        'work_orders': [
-            o.to_dict(
-                include_admin_notes=True,
-                include_project_data=True,
-                project_preview_only=True,
-                include_template_data=False,
-                include_revision_summary=False,
-            )
-            for o in orders
-        ]
-    }), 200
+    return _work_order_listing(WorkOrder.query, include_admin_notes=True)
 
 @admin_work_orders_bp.route('/api/admin/work-orders/count', methods=['GET'])
 @admin_required
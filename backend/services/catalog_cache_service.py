@@ -0,0 +1,259 @@
+"""
+Catalog response cache shared by every gunicorn worker.
+
+Entries are stamped with a per-key generation counter kept in the
+cache_generations table. Invalidating bumps the counter, so every worker sees
+the change on its next read, whichever worker handled the edit. Entries live
+in-process (CATALOG_CACHE_BACKEND=memory) or as JSON in a SQLite file on tmpfs
+shared by the workers on one host (sqlite). The file sits in a per-deployment
+directory that only the app's user can open. Misses are single-flighted so a burst of
+requests runs the catalog query once.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+
+from flask import current_app
+
+from ..config import _env_int
+
+
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_LEASE_SECONDS = 15
+LEASE_POLL_SECONDS = 0.05
+GALLERY_FACET_KEYS = ("gallery_facets", "admin_gallery_facets")
+CATALOG_CACHE_KEYS = ("items", "manual_products", "manual_products_summary") + GALLERY_FACET_KEYS
+
+
+class MemoryCacheBackend:
+    """Per-process entries; the generation check still keeps them fresh."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key, generation, expires_at, value):
+        with self._lock:
+            self._entries[key] = (generation, expires_at, value)
+
+    def acquire_lease(self, key, seconds):
+        # The per-key lock in CatalogCache already single-flights within a process.
+        return True
+
+    def release_lease(self, key):
+        pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """Entries and fill leases in one SQLite file, shared by workers on the host.
+
+    Values are stored as JSON, so anything the file holds is only ever data.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "pid", None) == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, generation INTEGER NOT NULL, expires_at REAL NOT NULL, payload TEXT NOT NULL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT generation, expires_at, payload FROM entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return row[0], row[1], json.loads(row[2])
+        except (TypeError, ValueError):
+            return None
+
+    def set(self, key, generation, expires_at, value):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO entries (key, generation, expires_at, payload) VALUES (?, ?, ?, ?)",
+            (key, generation, expires_at, json.dumps(value, separators=(",", ":"))),
+        )
+
+    def acquire_lease(self, key, seconds):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("DELETE FROM leases WHERE key = ? AND expires_at < ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO leases (key, expires_at) VALUES (?, ?)",
+            (key, now + seconds),
+        )
+        return cursor.rowcount == 1
+
+    def release_lease(self, key):
+        self._conn().execute("DELETE FROM leases WHERE key = ?", (key,))
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM leases")
+
+
+class CatalogCache:
+    def __init__(self, backend, ttl_seconds=DEFAULT_TTL_SECONDS, lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._key_locks_guard:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _fresh(self, key, generation):
+        try:
+            entry = self.backend.get(key)
+        except Exception:
+            current_app.logger.warning("catalog cache read failed for %s", key, exc_info=True)
+            return None
+        if entry is None or entry[0] != generation or entry[1] <= time.time():
+            return None
+        return entry
+
+    def _store(self, key, generation, value):
+        try:
+            self.backend.set(key, generation, time.time() + self.ttl_seconds, value)
+        except Exception:
+            current_app.logger.warning("catalog cache write failed for %s", key, exc_info=True)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, running compute() once per miss."""
+        from ..db import fetch_cache_generations
+
+        try:
+            generation = fetch_cache_generations([key])[key]
+        except Exception:
+            current_app.logger.warning("catalog cache generation lookup failed for %s", key, exc_info=True)
+            return compute()
+
+        entry = self._fresh(key, generation)
+        if entry is not None:
+            return entry[2]
+
+        with self._key_lock(key):
+            entry = self._fresh(key, generation)
+            if entry is not None:
+                return entry[2]
+
+            try:
+                leased = self.backend.acquire_lease(key, self.lease_seconds)
+            except Exception:
+                leased = True
+            if not leased:
+                # Another worker is filling this key; wait for it rather than piling on.
+                deadline = time.monotonic() + self.lease_seconds
+                while time.monotonic() < deadline:
+                    time.sleep(LEASE_POLL_SECONDS)
+                    entry = self._fresh(key, generation)
+                    if entry is not None:
+                        return entry[2]
+
+            try:
+                value = compute()
+                self._store(key, generation, value)
+                return value
+            finally:
+                if leased:
+                    try:
+                        self.backend.release_lease(key)
+                    except Exception:
+                        pass
+
+    def invalidate(self, *keys):
+        from ..db import bump_cache_generations
+
+        bump_cache_generations(keys or CATALOG_CACHE_KEYS)
+
+
+def private_cache_dir():
+    """This deployment's cache directory, created 0700 and checked to be ours alone.
+
+    It lives under CATALOG_CACHE_DIR (default /dev/shm, else the temp dir) and
+    is named after the user and the app's root path, so two deployments on one
+    host never share it. Raises OSError if someone else owns it or can open it.
+    """
+    parent = os.environ.get("CATALOG_CACHE_DIR") or ("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+    deployment = hashlib.sha256(os.path.abspath(current_app.root_path).encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(parent, f"sgcg-catalog-cache-{os.getuid()}-{deployment}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise OSError(f"{path} is not a directory private to this user")
+    return path
+
+
+def build_catalog_cache():
+    backend_name = str(os.environ.get("CATALOG_CACHE_BACKEND") or "sqlite").strip().lower()
+    backend = MemoryCacheBackend()
+    if backend_name == "sqlite":
+        try:
+            backend = SQLiteCacheBackend(os.path.join(private_cache_dir(), "catalog.sqlite3"))
+            backend._conn()
+        except (sqlite3.Error, OSError):
+            current_app.logger.warning("catalog cache file unavailable; using in-process cache", exc_info=True)
+            backend = MemoryCacheBackend()
+    return CatalogCache(
+        backend,
+        ttl_seconds=max(1, _env_int("CATALOG_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+        lease_seconds=max(1, _env_int("CATALOG_CACHE_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)),
+    )
+
+
+_catalog_cache = None
+_catalog_cache_lock = threading.Lock()
+
+
+def get_catalog_cache():
+    global _catalog_cache
+    if _catalog_cache is None:
+        with _catalog_cache_lock:
+            if _catalog_cache is None:
+                _catalog_cache = build_catalog_cache()
+    return _catalog_cache
+
+
+def cached_catalog(key, compute):
+    return get_catalog_cache().get_or_compute(key, compute)
+
+
+def invalidate_catalog_cache(*keys):
+    """Bump generations so every worker drops its copy on the next read."""
+    try:
+        get_catalog_cache().invalidate(*keys)
+    except Exception:
+        current_app.logger.exception("catalog cache invalidation failed for %s", keys or CATALOG_CACHE_KEYS)
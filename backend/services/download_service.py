@@ -7,10 +7,37 @@ import os
 from io import BytesIO
 from urllib.parse import unquote_to_bytes
 
-from flask import current_app, jsonify, send_file
+from flask import current_app, jsonify, render_template_string, request, send_file, url_for
 from werkzeug.utils import secure_filename
 
-from .pattern_render_service import render_numbered_pattern_raster
+from .pattern_cache_service import get_numbered_pattern, lookup_numbered_pattern
+from .render_queue_service import (
+    RenderQueueFull,
+    prewarm_render,
+    render_queue_enabled,
+    submit_render,
+    wait_for_render,
+)
+
+
+DEFAULT_RENDER_INLINE_WAIT_SECONDS = 5
+DEFAULT_RENDER_RETRY_AFTER_SECONDS = 3
+
+_RENDER_PENDING_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><meta http-equiv="refresh" content="{{ retry_after }}">
+<title>Preparing your pattern</title></head>
+<body><p>Preparing your pattern&hellip; the download will start automatically.</p></body></html>
+"""
+
+
+def _env_float(name, default):
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    try:
+        return float(str(raw).strip())
+    except (TypeError, ValueError):
+        return default
 
 
 def _resolve_pattern_image_bytes(record):
@@ -49,6 +76,36 @@ def _resolve_pattern_image_bytes(record):
     return None
 
 
+def prewarm_pattern_download(record):
+    """Queue the numbered render for an image pattern so its first download is a cache hit."""
+    if not record or str(record.get("template_type") or "").strip().lower() != "image":
+        return None
+    if not render_queue_enabled():
+        return None
+    return prewarm_render(_resolve_pattern_image_bytes(record))
+
+
+def _render_pending_response(job):
+    retry_after = max(1, int(_env_float("RENDER_RETRY_AFTER_SECONDS", DEFAULT_RENDER_RETRY_AFTER_SECONDS)))
+    headers = {"Retry-After": str(retry_after), "Cache-Control": "no-store"}
+    if request.accept_mimetypes.best_match(["application/json", "text/html"]) == "text/html":
+        # Opened straight from an email link: reload until the render is cached.
+        return render_template_string(_RENDER_PENDING_PAGE, retry_after=retry_after), 202, headers
+    return jsonify({
+        "status": "rendering",
+        "job_id": job.job_id,
+        "status_url": url_for("api.get_pattern_render_status", job_id=job.job_id),
+        "retry_after_seconds": retry_after,
+    }), 202, headers
+
+
+def _render_busy_response():
+    retry_after = max(1, int(_env_float("RENDER_RETRY_AFTER_SECONDS", DEFAULT_RENDER_RETRY_AFTER_SECONDS)))
+    return jsonify({"error": "render_queue_full", "retry_after_seconds": retry_after}), 503, {
+        "Retry-After": str(retry_after),
+    }
+
+
 def build_pattern_download_response(record, download_token=None):
     if not record:
         return jsonify({"error": "download_unavailable"}), 404
@@ -65,9 +122,29 @@ def build_pattern_download_response(record, download_token=None):
         )
 
     if str(record.get("template_type") or "").strip().lower() == "image":
-        numbered_bytes = render_numbered_pattern_raster(
-            _resolve_pattern_image_bytes({**record, "download_token": download_token})
-        )
+        source_bytes = _resolve_pattern_image_bytes({**record, "download_token": download_token})
+        numbered_path, numbered_bytes = lookup_numbered_pattern(source_bytes)
+        if source_bytes and not numbered_path and not numbered_bytes:
+            if not render_queue_enabled():
+                numbered_path, numbered_bytes = get_numbered_pattern(source_bytes)
+            else:
+                try:
+                    job = submit_render(source_bytes)
+                except RenderQueueFull:
+                    return _render_busy_response()
+                numbered_bytes = wait_for_render(
+                    job,
+                    _env_float("RENDER_INLINE_WAIT_SECONDS", DEFAULT_RENDER_INLINE_WAIT_SECONDS),
+                )
+                if numbered_bytes is None and job.pending:
+                    return _render_pending_response(job)
+        if numbered_path:
+            return send_file(
+                str(numbered_path),
+                mimetype="image/png",
+                as_attachment=True,
+                download_name=f"{safe_base}.png",
+            )
         if numbered_bytes:
             return send_file(
                 BytesIO(numbered_bytes),
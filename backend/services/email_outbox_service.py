@@ -0,0 +1,222 @@
+"""
+Outbound email queue.
+
+send_email stores each message in the email_outbox table and returns once the
+row is committed, so request handlers never wait on SMTP. A background thread
+per worker leases due messages and sends everything due over a single SMTP
+connection. Failed messages are retried with jittered exponential backoff. They
+are dead-lettered after EMAIL_OUTBOX_MAX_ATTEMPTS or on a permanent 5xx
+rejection. email_outbox_metrics() reports this process's counters alongside the
+table's per-status totals.
+"""
+import os
+import random
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from ..config import _env_int
+
+try:
+    from flask_mail import Message
+except Exception:  # optional dependency in some local envs
+    Message = None
+
+
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_POLL_SECONDS = 15
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_RETRY_BASE_SECONDS = 60
+MAX_RETRY_DELAY_SECONDS = 6 * 3600
+DEFAULT_RETENTION_DAYS = 30
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_state = {"app": None, "worker_pid": None, "last_prune": 0.0}
+_metrics = {"queued": 0, "sent": 0, "sent_inline": 0, "retried": 0, "dead_lettered": 0}
+
+
+def count_email_metric(name, amount=1):
+    with _lock:
+        _metrics[name] = _metrics.get(name, 0) + amount
+
+
+def email_outbox_metrics():
+    from ..db import count_outbound_emails_by_status
+
+    with _lock:
+        process_counts = dict(_metrics)
+    try:
+        outbox = count_outbound_emails_by_status()
+    except Exception:
+        current_app.logger.warning("email outbox status counts unavailable", exc_info=True)
+        outbox = None
+    return {"process": process_counts, "outbox": outbox}
+
+
+def email_outbox_enabled():
+    if current_app.testing:
+        return False
+    return str(os.environ.get("EMAIL_OUTBOX", "1")).strip().lower() not in {"0", "false", "no"}
+
+
+def retry_delay_seconds(attempts):
+    base = max(1, _env_int("EMAIL_OUTBOX_RETRY_BASE_SECONDS", DEFAULT_RETRY_BASE_SECONDS))
+    delay = min(MAX_RETRY_DELAY_SECONDS, base * 2 ** max(0, attempts - 1))
+    # Jitter spreads out the retries after an SMTP outage instead of sending them all at once.
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _is_permanent_failure(exc):
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return True
+    code = getattr(exc, "smtp_code", None)
+    return isinstance(code, int) and 500 <= code < 600
+
+
+def _connection_lost(exc):
+    # SMTPException subclasses OSError; only socket-level errors mean the connection is gone.
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+def _record_failure(row, exc, connection_error=False):
+    from ..db import fail_outbound_email
+
+    attempts = int(row.get("attempts") or 1)
+    max_attempts = max(1, _env_int("EMAIL_OUTBOX_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+    retry_at = None
+    # A 5xx during connect or login (bad credentials, say) is not the message's fault.
+    permanent = not connection_error and _is_permanent_failure(exc)
+    if attempts < max_attempts and not permanent:
+        retry_at = datetime.utcnow() + timedelta(seconds=retry_delay_seconds(attempts))
+        count_email_metric("retried")
+        current_app.logger.warning("email %s to %s failed on attempt %s: %s", row["id"], row["recipient"], attempts, exc)
+    else:
+        count_email_metric("dead_lettered")
+        current_app.logger.error("email %s to %s dead-lettered after %s attempt(s): %s", row["id"], row["recipient"], attempts, exc)
+    fail_outbound_email(row["id"], exc, retry_at=retry_at)
+
+
+def _build_message(row):
+    return Message(
+        row["subject"],
+        recipients=[row["recipient"]],
+        html=row["html_body"],
+        sender=row.get("sender"),
+        reply_to=row.get("reply_to"),
+    )
+
+
+def drain_email_outbox(mail, limit=None):
+    """Send every due message over one SMTP connection; returns how many were leased."""
+    from ..db import claim_outbound_emails, mark_outbound_emails_sent
+
+    batch_size = limit or max(1, _env_int("EMAIL_OUTBOX_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    lease_seconds = max(1, _env_int("EMAIL_OUTBOX_LEASE_SECONDS", DEFAULT_LEASE_SECONDS))
+    rows = claim_outbound_emails(limit=batch_size, lease_seconds=lease_seconds)
+    if not rows:
+        return 0
+
+    leased = 0
+    finished = set()
+    try:
+        with mail.connect() as connection:
+            while rows:
+                leased += len(rows)
+                sent_ids = []
+                try:
+                    for row in rows:
+                        try:
+                            connection.send(_build_message(row))
+                        except Exception as exc:
+                            if _connection_lost(exc):
+                                raise
+                            _record_failure(row, exc)
+                            finished.add(row["id"])
+                            continue
+                        sent_ids.append(row["id"])
+                finally:
+                    # Mark what went out even if the connection dropped, so it is not sent twice.
+                    if sent_ids:
+                        mark_outbound_emails_sent(sent_ids)
+                        finished.update(sent_ids)
+                        count_email_metric("sent", len(sent_ids))
+                if len(rows) < batch_size:
+                    break
+                rows = claim_outbound_emails(limit=batch_size, lease_seconds=lease_seconds)
+    except Exception as exc:
+        current_app.logger.warning("SMTP delivery interrupted: %s", exc)
+        for row in rows:
+            if row["id"] not in finished:
+                _record_failure(row, exc, connection_error=True)
+    return leased
+
+
+def _prune_if_due():
+    from ..db import prune_outbound_emails
+
+    now = time.monotonic()
+    if now - _state["last_prune"] < PRUNE_INTERVAL_SECONDS:
+        return
+    _state["last_prune"] = now
+    prune_outbound_emails(max(1, _env_int("EMAIL_OUTBOX_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)))
+
+
+def _worker_loop():
+    while True:
+        _wake.wait(max(1, _env_int("EMAIL_OUTBOX_POLL_SECONDS", DEFAULT_POLL_SECONDS)))
+        _wake.clear()
+        with _state["app"].app_context():
+            mail = current_app.extensions.get("mail")
+            if Message is None or not mail:
+                continue
+            try:
+                drain_email_outbox(mail)
+                _prune_if_due()
+            except Exception:
+                current_app.logger.exception("email outbox drain failed")
+
+
+def _ensure_worker_thread():
+    with _lock:
+        if _state["app"] is None or _state["worker_pid"] == os.getpid():
+            return
+        # A new pid means a forked worker, which does not inherit the parent's thread.
+        _state["worker_pid"] = os.getpid()
+        threading.Thread(target=_worker_loop, name="email-outbox", daemon=True).start()
+
+
+def start_email_outbox_worker(app):
+    """Enable the sender thread for this app; called once per serving process from start_background_workers (backend/app.py)."""
+    with _lock:
+        _state["app"] = app
+    _ensure_worker_thread()
+    _wake.set()
+
+
+def notify_email_outbox_worker():
+    """Wake the sender thread, restarting it in a forked worker. No-op when it was never started."""
+    _ensure_worker_thread()
+    _wake.set()
+
+
+def queue_email(to, subject, html_body, sender=None, reply_to=None):
+    """Store a message for the outbox worker; returns False if it could not be stored."""
+    from ..db import enqueue_outbound_email
+
+    try:
+        enqueue_outbound_email(to, subject, html_body, sender=sender, reply_to=reply_to)
+    except Exception as exc:
+        current_app.logger.warning("email outbox unavailable for %s: %s", to, exc)
+        return False
+    count_email_metric("queued")
+    notify_email_outbox_worker()
+    return True
@@ -0,0 +1,147 @@
+"""
+Upload processing for gallery photo submissions.
+
+Each upload is copied from the request stream to a temp file in chunks, so a
+ten-photo submission never holds every original in memory at once. The photos
+are then downscaled in a thread pool. Pillow releases the GIL while decoding
+and resampling, and JPEG draft mode decodes at a reduced scale to begin with.
+Every photo is written at three widths: full, medium and thumbnail. Only the
+full size is kept in the database; the smaller files are rendered again from it
+when the upload folder loses them.
+"""
+import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from ..config import _env_int
+
+
+SPOOL_CHUNK_BYTES = 1024 * 1024
+DEFAULT_WORKERS = 4
+JPEG_QUALITY = 82
+# (variant, longest edge). "full" is what image_url has always pointed at.
+GALLERY_SIZES = (("full", 2000), ("medium", 1000), ("thumbnail", 400))
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def spool_upload(file_storage, max_bytes, suffix=""):
+    """Copy an uploaded file to a temp file and return (path, size).
+
+    Raises UploadTooLarge once more than max_bytes have been read; the partial
+    temp file is removed first.
+    """
+    handle = tempfile.NamedTemporaryFile(prefix="gallery-", suffix=suffix, delete=False)
+    size = 0
+    try:
+        with handle:
+            while True:
+                chunk = file_storage.stream.read(SPOOL_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(size)
+                handle.write(chunk)
+    except BaseException:
+        discard_spooled(handle.name)
+        raise
+    return handle.name, size
+
+
+def discard_spooled(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _encode(image, fmt):
+    out = io.BytesIO()
+    save_kwargs = {"optimize": True}
+    if fmt == "JPEG":
+        save_kwargs["quality"] = JPEG_QUALITY
+    image.save(out, format=fmt, **save_kwargs)
+    return out.getvalue()
+
+
+def _load(source, fmt, edge):
+    if fmt == "JPEG":
+        source.draft("RGB", (edge, edge))
+        return source.convert("RGB")
+    source.load()
+    return source.copy()
+
+
+def process_gallery_photo(path, ext, mime_type):
+    """Downscale one spooled photo.
+
+    Returns {"ext", "mime", "variants": {name: bytes}}. If Pillow cannot read
+    the file, the original bytes are kept as "full" and the smaller sizes are
+    left out.
+    """
+    from PIL import Image
+
+    largest_edge = GALLERY_SIZES[0][1]
+    try:
+        with Image.open(path) as source:
+            fmt = "JPEG" if ext in {".jpg", ".jpeg"} else source.format or "PNG"
+            image = _load(source, fmt, largest_edge)
+        variants = {}
+        for name, edge in GALLERY_SIZES:
+            image.thumbnail((edge, edge), Image.LANCZOS)
+            variants[name] = _encode(image, fmt)
+    except Exception:
+        with open(path, "rb") as fp:
+            return {"ext": ext, "mime": mime_type, "variants": {"full": fp.read()}}
+
+    if fmt == "JPEG":
+        return {"ext": ".jpg", "mime": "image/jpeg", "variants": variants}
+    return {"ext": ext, "mime": mime_type, "variants": variants}
+
+
+def render_gallery_rendition(data, name):
+    """Render the named GALLERY_SIZES size from a stored full-size photo.
+
+    Returns None if Pillow cannot read the data.
+    """
+    from PIL import Image
+
+    edge = dict(GALLERY_SIZES)[name]
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            fmt = source.format or "PNG"
+            image = _load(source, fmt, edge)
+        image.thumbnail((edge, edge), Image.LANCZOS)
+        return _encode(image, fmt)
+    except Exception:
+        return None
+
+
+def process_gallery_photos(spooled):
+    """Run process_gallery_photo over [(path, ext, mime), ...] in parallel, keeping order."""
+    if not spooled:
+        return []
+    workers = max(1, min(len(spooled), _env_int("GALLERY_INGEST_WORKERS", DEFAULT_WORKERS)))
+    if workers == 1:
+        return [process_gallery_photo(*entry) for entry in spooled]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gallery-ingest") as pool:
+        return list(pool.map(lambda entry: process_gallery_photo(*entry), spooled))
+
+
+def write_gallery_variants(uploads_dir, stem, processed):
+    """Write each variant to uploads_dir and return ({variant: url}, [paths])."""
+    urls = {}
+    paths = []
+    for name, data in processed["variants"].items():
+        filename = f"{stem}{processed['ext']}" if name == "full" else f"{stem}-{name}{processed['ext']}"
+        path = os.path.join(uploads_dir, filename)
+        with open(path, "wb") as output:
+            output.write(data)
+        paths.append(path)
+        urls[name] = f"/uploads/gallery/{filename}"
+    return urls, paths
+
@@ -0,0 +1,241 @@
+"""
+Resized, re-encoded renditions of uploaded images.
+
+/uploads/<kind>/<file>?w=400&fmt=webp returns the image scaled down to fit
+400px, encoded as WebP. Without fmt, or with fmt=auto, the format comes from
+the Accept header: AVIF, then WebP, then the source format. Widths are rounded
+up to a fixed ladder so a handful of files cover every request. Variants are
+written to UPLOAD_FOLDER/variants/<kind> and evicted least-recently-used past
+IMAGE_VARIANT_CACHE_BYTES. Each worker keeps a running total of the bytes it
+has written, and only scans the directory when that total crosses the limit or
+is older than IMAGE_VARIANT_RESCAN_SECONDS. The source is read from disk, or
+restored from its database blob first after an ephemeral-disk restart.
+"""
+import io
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from flask import current_app, jsonify, request
+
+from ..config import _env_int
+from .media_service import content_etag, local_media_path, send_media_file, serve_media
+
+
+VARIANT_WIDTHS = (160, 320, 480, 640, 960, 1280, 1920)
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+DEFAULT_RESCAN_SECONDS = 300
+# A full eviction goes down to this share of the limit, so the next scan is many writes away.
+EVICT_TARGET_RATIO = 0.9
+CACHE_DIRNAME = "variants"
+# fmt -> (Pillow format, extension, mimetype, save options)
+FORMATS = {
+    "avif": ("AVIF", ".avif", "image/avif", {"quality": 55}),
+    "webp": ("WEBP", ".webp", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+    "png": ("PNG", ".png", "image/png", {"optimize": True}),
+}
+SOURCE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+class VariantRequestError(ValueError):
+    pass
+
+
+_usage_lock = threading.Lock()
+# cache root -> [approximate bytes on disk, monotonic time of the last scan]
+_usage = {}
+
+
+def _format_supported(fmt):
+    from PIL import features
+
+    return {"avif": features.check("avif"), "webp": features.check("webp")}.get(fmt, True)
+
+
+def requested_variant(args):
+    """Return (width, fmt) from ?w=&fmt=, or None when no variant was asked for.
+
+    fmt is None for "negotiate from Accept". Raises VariantRequestError on bad input.
+    """
+    raw_width = (args.get("w") or "").strip()
+    raw_format = (args.get("fmt") or "").strip().lower()
+    if not raw_width and not raw_format:
+        return None
+    width = None
+    if raw_width:
+        try:
+            width = int(raw_width)
+        except ValueError:
+            raise VariantRequestError("w must be an integer") from None
+        if width < 1:
+            raise VariantRequestError("w must be positive")
+        width = next((step for step in VARIANT_WIDTHS if step >= width), VARIANT_WIDTHS[-1])
+    if raw_format in ("", "auto"):
+        return width, None
+    if raw_format == "jpg":
+        raw_format = "jpeg"
+    if raw_format not in FORMATS:
+        raise VariantRequestError(f"unsupported fmt: {raw_format}")
+    return width, raw_format
+
+
+def negotiate_format(accept_header, source_ext):
+    accept = str(accept_header or "").lower()
+    for fmt in ("avif", "webp"):
+        if f"image/{fmt}" in accept and _format_supported(fmt):
+            return fmt
+    return "jpeg" if source_ext in {".jpg", ".jpeg"} else "png"
+
+
+def _cache_dir(kind):
+    upload_root = current_app.config.get("UPLOAD_FOLDER") or os.path.join(current_app.root_path, "uploads")
+    return Path(str(upload_root)) / CACHE_DIRNAME / kind
+
+
+def _evict(cache_root, limit_bytes):
+    """Scan cache_root, drop least-recently-used variants when over limit_bytes, return bytes kept."""
+    entries = []
+    total = 0
+    for entry in cache_root.rglob("*"):
+        if not entry.is_file() or entry.name.startswith("."):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+        total += stat.st_size
+    if total <= limit_bytes:
+        return total
+
+    target = int(limit_bytes * EVICT_TARGET_RATIO)
+    entries.sort()
+    for _mtime, size, entry in entries:
+        if total <= target:
+            break
+        try:
+            entry.unlink()
+            total -= size
+        except OSError:
+            continue
+    return total
+
+
+def _record_variant_write(cache_root, size, limit_bytes):
+    """Count a newly written variant, scanning and evicting only when the count says so.
+
+    Other workers write to the same directory, so the count is refreshed from disk
+    at least every IMAGE_VARIANT_RESCAN_SECONDS.
+    """
+    now = time.monotonic()
+    rescan_seconds = max(1, _env_int("IMAGE_VARIANT_RESCAN_SECONDS", DEFAULT_RESCAN_SECONDS))
+    key = str(cache_root)
+    with _usage_lock:
+        usage = _usage.get(key)
+        if usage is not None and usage[0] + size <= limit_bytes and now - usage[1] < rescan_seconds:
+            usage[0] += size
+            return
+        _usage[key] = [_evict(cache_root, limit_bytes), now]
+
+
+def render_variant(source_path, width, fmt):
+    """Encode source_path at most width pixels wide (None keeps the size) as fmt."""
+    from PIL import Image, ImageOps
+
+    pil_format, _ext, _mime, options = FORMATS[fmt]
+    with Image.open(source_path) as source:
+        if width and source.format == "JPEG":
+            source.draft("RGB", (width, width * 4))
+        image = ImageOps.exif_transpose(source)
+        if width and image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        if pil_format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+        out = io.BytesIO()
+        image.save(out, format=pil_format, **options)
+    return out.getvalue()
+
+
+def serve_upload(kind, filename, directories, default_mimetype="application/octet-stream"):
+    """serve_media for /uploads/* routes, honouring ?w= and ?fmt= on images.
+
+    Returns None when the file does not exist so callers can choose the 404 body.
+    """
+    try:
+        variant = requested_variant(request.args)
+        if variant is not None:
+            return serve_media_variant(
+                kind, filename, directories, variant, request.headers.get("Accept"), default_mimetype
+            )
+    except VariantRequestError as exc:
+        return jsonify({"error": "invalid_variant", "detail": str(exc)}), 400
+    return serve_media(kind, filename, directories, default_mimetype=default_mimetype)
+
+
+def serve_media_variant(kind, filename, directories, variant, accept_header=None,
+                        default_mimetype="application/octet-stream"):
+    """Serve a resized/re-encoded /uploads/<kind>/<filename>.
+
+    Returns None when the source does not exist. Sources that are not still
+    images (video, GIF) are served unchanged.
+    """
+    source_ext = os.path.splitext(filename)[1].lower()
+    if source_ext not in SOURCE_EXTENSIONS:
+        return serve_media(kind, filename, directories, default_mimetype=default_mimetype)
+
+    source_path = local_media_path(kind, filename, directories)
+    if source_path is None:
+        # Read-only upload folder: the original streamed from the database is still better than a 404.
+        return serve_media(kind, filename, directories, default_mimetype=default_mimetype)
+
+    width, fmt = variant
+    negotiated = fmt is None
+    if negotiated:
+        fmt = negotiate_format(accept_header, source_ext)
+    elif not _format_supported(fmt):
+        raise VariantRequestError(f"unsupported fmt: {fmt}")
+    _pil_format, ext, mimetype, _options = FORMATS[fmt]
+
+    cache_dir = _cache_dir(kind)
+    variant_path = cache_dir / f"{content_etag(source_path)}-{width or 'full'}{ext}"
+    if variant_path.is_file():
+        try:
+            # Touch so LRU eviction keeps the variants that are still requested.
+            os.utime(variant_path)
+        except OSError:
+            pass
+    else:
+        try:
+            data = render_variant(source_path, width, fmt)
+        except Exception:
+            current_app.logger.warning("image variant failed for %s/%s", kind, filename, exc_info=True)
+            return send_media_file(source_path)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = cache_dir / f".{variant_path.name}.{uuid.uuid4().hex}.tmp"
+            temp_path.write_bytes(data)
+            os.replace(temp_path, variant_path)
+            _record_variant_write(
+                cache_dir.parent, len(data), _env_int("IMAGE_VARIANT_CACHE_BYTES", DEFAULT_CACHE_BYTES)
+            )
+        except OSError:
+            current_app.logger.warning("failed to cache image variant %s", variant_path, exc_info=True)
+        if not variant_path.is_file():
+            response = current_app.response_class(data, mimetype=mimetype)
+            response.cache_control.public = True
+            response.cache_control.max_age = 86400
+            return _vary(response, negotiated)
+
+    return _vary(send_media_file(variant_path, mimetype), negotiated)
+
+
+def _vary(response, negotiated):
+    if negotiated:
+        response.vary.add("Accept")
+    return response
@@ -0,0 +1,197 @@
+"""
+Serving layer for /uploads/* media.
+
+Files are served from the local upload folders first. A miss restores the blob
+from the database in chunks into the first folder, so each file is read from
+the database once per instance. Smaller gallery sizes are not stored; they are
+rendered again from the full-size blob. Responses carry a content-hash ETag and
+Last-Modified and honour conditional and Range requests.
+"""
+import hashlib
+import mimetypes
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from flask import Response, current_app, send_file, stream_with_context
+from werkzeug.security import safe_join
+
+
+MEDIA_MAX_AGE_SECONDS = 86400
+HASH_CHUNK_BYTES = 1024 * 1024
+ETAG_CACHE_ENTRIES = 4096
+
+_etag_cache = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+def _remember_etag(path, stat, etag):
+    with _etag_lock:
+        _etag_cache[path] = (stat.st_mtime_ns, stat.st_size, etag)
+        _etag_cache.move_to_end(path)
+        while len(_etag_cache) > ETAG_CACHE_ENTRIES:
+            _etag_cache.popitem(last=False)
+
+
+def content_etag(path):
+    """Return the sha256-based ETag of a file, hashing it only when it changes."""
+    path = str(path)
+    stat = os.stat(path)
+    with _etag_lock:
+        cached = _etag_cache.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            _etag_cache.move_to_end(path)
+            return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    etag = digest.hexdigest()[:32]
+    _remember_etag(path, stat, etag)
+    return etag
+
+
+def send_media_file(path, mimetype=None):
+    return send_file(
+        str(path),
+        mimetype=mimetype,
+        conditional=True,
+        etag=content_etag(path),
+        max_age=MEDIA_MAX_AGE_SECONDS,
+    )
+
+
+def _resolve_mimetype(stored_mime, filename, default_mimetype):
+    stored_mime = str(stored_mime or "").strip().lower()
+    if "/" in stored_mime:
+        return stored_mime
+    guessed, _encoding = mimetypes.guess_type(filename)
+    return guessed or default_mimetype
+
+
+def _materialize(target_path, chunks):
+    """Write chunks to target_path atomically; returns False when the folder is not writable."""
+    target_path = Path(target_path)
+    digest = hashlib.sha256()
+    try:
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target_path.parent / f".{target_path.name}.{uuid.uuid4().hex}.tmp"
+        handle = open(temp_path, "wb")
+    except OSError:
+        return False
+
+    try:
+        with handle:
+            for chunk in chunks:
+                digest.update(chunk)
+                handle.write(chunk)
+        os.replace(temp_path, target_path)
+    except OSError:
+        temp_path.unlink(missing_ok=True)
+        return False
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    _remember_etag(str(target_path), target_path.stat(), digest.hexdigest()[:32])
+    return True
+
+
+def _blob_reader(kind, blob):
+    """Return (chunk iterator factory, byte size) for a find_media_blob row, or None.
+
+    Rendition rows are rendered from the full-size blob, which is read whole.
+    """
+    from ..db import iter_media_blob
+
+    rendition = blob.get("rendition")
+    if not rendition:
+        return (lambda: iter_media_blob(kind, blob["id"])), int(blob["byte_size"])
+
+    from .gallery_ingest_service import render_gallery_rendition
+
+    data = render_gallery_rendition(b"".join(iter_media_blob(kind, blob["id"])), rendition)
+    if not data:
+        return None
+    return (lambda: iter((data,))), len(data)
+
+
+def _serve_from_database(kind, filename, cache_dir, default_mimetype):
+    from ..db import find_media_blob
+
+    blob = find_media_blob(kind, filename)
+    if not blob or not blob.get("byte_size"):
+        return None
+    reader = _blob_reader(kind, blob)
+    if not reader:
+        return None
+    open_chunks, byte_size = reader
+
+    mimetype = _resolve_mimetype(blob.get("mime"), filename, default_mimetype)
+    target_path = safe_join(str(cache_dir), filename)
+    if target_path and _materialize(target_path, open_chunks()):
+        return send_media_file(target_path, mimetype)
+
+    # Read-only upload folder: stream straight from the database instead.
+    response = Response(stream_with_context(open_chunks()), mimetype=mimetype)
+    response.content_length = byte_size
+    response.cache_control.public = True
+    response.cache_control.max_age = MEDIA_MAX_AGE_SECONDS
+    return response
+
+
+def _unique_dirs(directories):
+    unique_dirs = []
+    for directory in directories:
+        resolved = Path(str(directory)).resolve()
+        if resolved not in unique_dirs:
+            unique_dirs.append(resolved)
+    return unique_dirs
+
+
+def local_media_path(kind, filename, directories):
+    """Local path of /uploads/<kind>/<filename>, restoring it from the database if needed.
+
+    Returns None when neither has the file or the folder is not writable.
+    """
+    from ..db import find_media_blob
+
+    unique_dirs = _unique_dirs(directories)
+    for directory in unique_dirs:
+        file_path = safe_join(str(directory), filename)
+        if file_path and os.path.isfile(file_path):
+            return file_path
+
+    try:
+        blob = find_media_blob(kind, filename)
+        if not blob or not blob.get("byte_size"):
+            return None
+        reader = _blob_reader(kind, blob)
+        target_path = safe_join(str(unique_dirs[0]), filename)
+        if reader and target_path and _materialize(target_path, reader[0]()):
+            return target_path
+    except Exception as exc:
+        current_app.logger.warning("Media DB fallback failed for %s/%s: %s", kind, filename, exc)
+    return None
+
+
+def serve_media(kind, filename, directories, default_mimetype="application/octet-stream"):
+    """Serve /uploads/<kind>/<filename> from disk, else from its database blob.
+
+    Returns None when neither has the file so callers can choose the 404 body.
+    """
+    unique_dirs = _unique_dirs(directories)
+
+    for directory in unique_dirs:
+        file_path = safe_join(str(directory), filename)
+        if file_path and os.path.isfile(file_path):
+            return send_media_file(file_path)
+
+    try:
+        return _serve_from_database(kind, filename, unique_dirs[0], default_mimetype)
+    except Exception as exc:
+        current_app.logger.warning("Media DB fallback failed for %s/%s: %s", kind, filename, exc)
+        return None
@@ -0,0 +1,188 @@
+"""
+Content-addressed cache for numbered pattern renders.
+
+Renders are keyed by sha256(source bytes) plus RENDERER_VERSION and kept in
+three tiers: a bounded in-process LRU, PNG files under UPLOAD_FOLDER/pattern-cache
+(LRU-evicted by size) and the pattern_render_cache table, which survives
+Render's ephemeral filesystem.
+"""
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from flask import current_app
+
+from ..config import _env_int
+from .pattern_render_service import RENDERER_VERSION, render_numbered_pattern_raster
+
+
+CACHE_DIRNAME = "pattern-cache"
+DEFAULT_DISK_LIMIT_BYTES = 512 * 1024 * 1024
+DEFAULT_MEMORY_LIMIT_BYTES = 64 * 1024 * 1024
+
+
+class _MemoryTier:
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data, limit_bytes):
+        if limit_bytes <= 0 or len(data) > limit_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > limit_bytes and self._entries:
+                _evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_memory_tier = _MemoryTier()
+
+
+def pattern_cache_key(image_bytes):
+    digest = hashlib.sha256()
+    digest.update(f"numbered-pattern:v{RENDERER_VERSION}:".encode("utf-8"))
+    digest.update(image_bytes)
+    return digest.hexdigest()
+
+
+def _cache_dir():
+    upload_root = current_app.config.get("UPLOAD_FOLDER") or os.path.join(current_app.root_path, "uploads")
+    return Path(str(upload_root)) / CACHE_DIRNAME
+
+
+def _disk_path(key):
+    return _cache_dir() / f"{key}.png"
+
+
+def _evict_disk(cache_dir, limit_bytes):
+    entries = []
+    total = 0
+    for entry in cache_dir.glob("*.png"):
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+        total += stat.st_size
+
+    entries.sort()
+    for _mtime, size, entry in entries:
+        if total <= limit_bytes:
+            break
+        try:
+            entry.unlink()
+            total -= size
+        except OSError:
+            continue
+
+
+def _write_disk(key, data):
+    cache_dir = _cache_dir()
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        final_path = cache_dir / f"{key}.png"
+        temp_path = cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        temp_path.write_bytes(data)
+        os.replace(temp_path, final_path)
+        _evict_disk(cache_dir, _env_int("PATTERN_CACHE_DISK_BYTES", DEFAULT_DISK_LIMIT_BYTES))
+        return final_path if final_path.is_file() else None
+    except OSError:
+        current_app.logger.warning("failed to write pattern cache file for %s", key, exc_info=True)
+        return None
+
+
+def _read_db(key):
+    from ..db import fetch_pattern_render_cache
+
+    try:
+        return fetch_pattern_render_cache(key)
+    except Exception:
+        current_app.logger.warning("pattern render cache lookup failed for %s", key, exc_info=True)
+        return None
+
+
+def _write_db(key, data):
+    from ..db import store_pattern_render_cache
+
+    try:
+        store_pattern_render_cache(key, RENDERER_VERSION, data)
+    except Exception:
+        current_app.logger.warning("pattern render cache store failed for %s", key, exc_info=True)
+
+
+def _remember(key, data):
+    _memory_tier.put(key, data, _env_int("PATTERN_CACHE_MEMORY_BYTES", DEFAULT_MEMORY_LIMIT_BYTES))
+
+
+def lookup_numbered_pattern(image_bytes):
+    """Return (file_path, png_bytes) for a cached render, or (None, None) on a miss."""
+    if not image_bytes:
+        return None, None
+
+    key = pattern_cache_key(image_bytes)
+    data = _memory_tier.get(key)
+    if data is not None:
+        return None, data
+
+    disk_path = _disk_path(key)
+    if disk_path.is_file():
+        try:
+            # Touch so LRU eviction keeps frequently downloaded patterns.
+            os.utime(disk_path)
+        except OSError:
+            pass
+        return disk_path, None
+
+    data = _read_db(key)
+    if data is None:
+        return None, None
+    _remember(key, data)
+    return _write_disk(key, data), data
+
+
+def store_numbered_pattern(key, data):
+    """Store a finished render in every tier and return its cache file path."""
+    _write_db(key, data)
+    _remember(key, data)
+    return _write_disk(key, data)
+
+
+def get_numbered_pattern(image_bytes):
+    """Return (file_path, png_bytes) for the numbered render of image_bytes.
+
+    Callers should prefer file_path (a plain file send) when it is set and fall
+    back to png_bytes. Both are None when the source cannot be rendered.
+    """
+    file_path, data = lookup_numbered_pattern(image_bytes)
+    if file_path or data:
+        return file_path, data
+
+    data = render_numbered_pattern_raster(image_bytes) if image_bytes else None
+    if not data:
+        return None, None
+    return store_numbered_pattern(pattern_cache_key(image_bytes), data), data
+
+
+def clear_memory_cache():
+    _memory_tier.clear()
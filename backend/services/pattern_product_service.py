@@ -0,0 +1,130 @@
+"""
+Digital-download shop products linked to pattern templates.
+
+A template with is_digital_download gets a manual product in the shop; its id
+is kept in template.related_links["pattern_product_id"].
+"""
+from ..db import (
+    create_manual_product,
+    fetch_manual_product,
+    fetch_manual_products_catalog,
+    update_manual_product,
+)
+from ..models import Template
+
+
+PATTERN_DEFAULT_QUANTITY = 999
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalize_pattern_related_links(value):
+    if isinstance(value, dict):
+        return dict(value)
+    return {}
+
+
+def _resolve_existing_pattern_product(template: Template):
+    related_links = _normalize_pattern_related_links(template.related_links)
+    linked_pattern_id = _to_int(related_links.get("pattern_product_id"))
+    if linked_pattern_id:
+        linked_product = fetch_manual_product(linked_pattern_id)
+        if linked_product:
+            return linked_product
+
+    manual_products = fetch_manual_products_catalog() or []
+    for entry in manual_products:
+        entry_links = entry.get("related_links") if isinstance(entry, dict) else None
+        if not isinstance(entry_links, dict):
+            continue
+        template_id = _to_int(entry_links.get("template_id"))
+        if template_id and template_id == template.id:
+            return entry
+
+    return None
+
+
+def _repoint_image(image, replaced_image_urls, url):
+    # Stored product images carry image_url; images built here carry url.
+    if not isinstance(image, dict) or (image.get("url") or image.get("image_url")) not in replaced_image_urls:
+        return image
+    image = {key: value for key, value in image.items() if key not in ("url", "image_url", "image_data")}
+    image["url"] = url
+    return image
+
+
+def _build_pattern_product_payload(template: Template, existing_product=None, replaced_image_urls=()):
+    existing_product = existing_product or {}
+    existing_images = existing_product.get("images") if isinstance(existing_product.get("images"), list) else []
+    template_image_url = (template.thumbnail_url or template.image_url or "").strip()
+
+    images = existing_images
+    if template_image_url and replaced_image_urls:
+        images = [_repoint_image(image, replaced_image_urls, template_image_url) for image in images]
+    if not images and template_image_url:
+        images = [{"url": template_image_url, "type": "image"}]
+
+    related_links = _normalize_pattern_related_links(existing_product.get("related_links"))
+    related_links.update({
+        "template_id": template.id,
+        "template_name": template.name,
+    })
+
+    return {
+        "name": (template.name or "").strip() or f"Pattern #{template.id}",
+        "description": (template.description or "").strip() or f"Digital pattern download for {template.name}",
+        "category": ["Pattern"],
+        "materials": existing_product.get("materials") if existing_product.get("materials") is not None else [],
+        "width": existing_product.get("width"),
+        "height": existing_product.get("height"),
+        "depth": existing_product.get("depth"),
+        "price": float(template.price_amount or 0),
+        "old_price": existing_product.get("old_price"),
+        "discount_percent": existing_product.get("discount_percent"),
+        "quantity": existing_product.get("quantity") if existing_product.get("quantity") is not None else PATTERN_DEFAULT_QUANTITY,
+        "is_featured": bool(existing_product.get("is_featured")),
+        "is_digital_download": True,
+        "related_links": related_links,
+        "images": images,
+    }
+
+
+def sync_pattern_product_for_template(template: Template, replaced_image_urls=()):
+    """Create or update the digital-download product linked to template.
+
+    Existing product images are kept, except those whose URL is in
+    replaced_image_urls, which are pointed at the template's current image.
+    The caller commits the template's updated related_links.
+    """
+    if not bool(template.is_digital_download):
+        return
+
+    existing_product = _resolve_existing_pattern_product(template)
+    payload = _build_pattern_product_payload(
+        template, existing_product=existing_product, replaced_image_urls=replaced_image_urls
+    )
+
+    if existing_product and existing_product.get("id"):
+        pattern_product_id = int(existing_product["id"])
+        update_manual_product(pattern_product_id, payload)
+        pattern_product = fetch_manual_product(pattern_product_id)
+    else:
+        pattern_product_id = create_manual_product(payload)
+        pattern_product = fetch_manual_product(pattern_product_id)
+
+    if not pattern_product:
+        raise RuntimeError("Failed to create or update linked pattern product")
+
+    next_links = _normalize_pattern_related_links(template.related_links)
+    next_links.update({
+        "template_id": template.id,
+        "template_name": template.name,
+        "pattern_product_id": pattern_product_id,
+        "pattern_product_name": pattern_product.get("name") or template.name,
+    })
+    template.related_links = next_links
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import os
 from collections import deque
 from io import BytesIO
 from math import cos, floor, hypot, pi, sin
 
 from PIL import Image, ImageDraw, ImageFont
 
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
 
 CANVAS_WIDTH = 1680
 CANVAS_HEIGHT = 1200
@@ -15,6 +21,13 @@ MIN_LINE_COMPONENT_PIXELS = 20
 MAX_EXISTING_LABEL_COMPONENT_PIXELS = 560
 MAX_EXISTING_LABEL_BOX_PX = 48
 
+# "numpy" uses the array-backed engine, "python" the per-pixel reference engine and
+# "auto" (default) picks numpy whenever it is installed. Both produce identical labels.
+RENDER_ENGINE_ENV = "PATTERN_RENDER_ENGINE"
+RENDER_ENGINES = ("auto", "numpy", "python")
+# Bump whenever rendered output changes so cached renders are not reused.
+RENDERER_VERSION = "1"
+
 
 def _get_fitted_section_label_font_px(section_number, width, height, clearance_px=None):
     digits = len(str(section_number or "")) or 1
@@ -97,22 +110,10 @@ def _get_best_interior_point(left, top, right, bottom, fallback_x, fallback_y, i
     return {"x": fallback_x, "y": fallback_y, "clearancePx": 0}
 
 
-def _get_anchor_from_region_pixels(pixels, region_id, region_map, canvas_width, canvas_height, preferred_x, preferred_y):
-    if not pixels or canvas_width <= 0:
+def _get_anchor_from_region_bounds(min_x, min_y, max_x, max_y, region_id, region_map, canvas_width, canvas_height, preferred_x, preferred_y):
+    if canvas_width <= 0:
         return {"x": preferred_x, "y": preferred_y, "clearancePx": 0}
 
-    min_x = canvas_width
-    min_y = canvas_height
-    max_x = 0
-    max_y = 0
-    for pixel_index in pixels:
-        x = pixel_index % canvas_width
-        y = pixel_index // canvas_width
-        min_x = min(min_x, x)
-        min_y = min(min_y, y)
-        max_x = max(max_x, x)
-        max_y = max(max_y, y)
-
     def is_inside(x, y):
         ix = round(x)
         iy = round(y)
@@ -398,9 +399,11 @@ def _build_region_map(mask, width, height):
     return region_map, region_pixels
 
 
-def _collect_numbered_regions(region_map, region_pixels, canvas_width, canvas_height):
-    border_regions = set()
+def _region_stats_from_pixels(region_pixels, canvas_width, canvas_height):
+    stats = []
     for region_id, pixels in region_pixels.items():
+        sum_x = 0.0
+        sum_y = 0.0
         min_x = canvas_width
         min_y = canvas_height
         max_x = 0
@@ -408,10 +411,39 @@ def _collect_numbered_regions(region_map, region_pixels, canvas_width, canvas_he
         for pixel_index in pixels:
             x = pixel_index % canvas_width
             y = pixel_index // canvas_width
+            sum_x += x
+            sum_y += y
             min_x = min(min_x, x)
             min_y = min(min_y, y)
             max_x = max(max_x, x)
             max_y = max(max_y, y)
+        stats.append(
+            {
+                "id": region_id,
+                "area": len(pixels),
+                "left": min_x,
+                "top": min_y,
+                "right": max_x,
+                "bottom": max_y,
+                "sumX": sum_x,
+                "sumY": sum_y,
+            }
+        )
+    return stats
+
+
+def _collect_numbered_regions(region_map, region_pixels, canvas_width, canvas_height):
+    region_stats = _region_stats_from_pixels(region_pixels, canvas_width, canvas_height)
+    return _collect_numbered_regions_from_stats(region_map, region_stats, canvas_width, canvas_height)
+
+
+def _collect_numbered_regions_from_stats(region_map, region_stats, canvas_width, canvas_height):
+    raw_regions = []
+    for region in region_stats:
+        min_x = region["left"]
+        min_y = region["top"]
+        max_x = region["right"]
+        max_y = region["bottom"]
         edges_touched = sum(
             (
                 min_x <= 2,
@@ -420,31 +452,14 @@ def _collect_numbered_regions(region_map, region_pixels, canvas_width, canvas_he
                 max_y >= canvas_height - 3,
             )
         )
-        if edges_touched >= 2:
-            border_regions.add(region_id)
-
-    raw_regions = []
-    for region_id, pixels in region_pixels.items():
-        if len(pixels) < 3 or region_id in border_regions:
+        if region["area"] < 3 or edges_touched >= 2:
             continue
-        sum_x = 0.0
-        sum_y = 0.0
-        min_x = canvas_width
-        min_y = canvas_height
-        max_x = 0
-        max_y = 0
-        for pixel_index in pixels:
-            x = pixel_index % canvas_width
-            y = pixel_index // canvas_width
-            sum_x += x
-            sum_y += y
-            min_x = min(min_x, x)
-            min_y = min(min_y, y)
-            max_x = max(max_x, x)
-            max_y = max(max_y, y)
-        center_x = sum_x / len(pixels)
-        center_y = sum_y / len(pixels)
-        anchor = _get_anchor_from_region_pixels(pixels, region_id, region_map, canvas_width, canvas_height, center_x, center_y)
+        region_id = region["id"]
+        center_x = region["sumX"] / region["area"]
+        center_y = region["sumY"] / region["area"]
+        anchor = _get_anchor_from_region_bounds(
+            min_x, min_y, max_x, max_y, region_id, region_map, canvas_width, canvas_height, center_x, center_y
+        )
         raw_regions.append(
             {
                 "id": region_id,
@@ -457,7 +472,7 @@ def _collect_numbered_regions(region_map, region_pixels, canvas_width, canvas_he
                 "top": min_y,
                 "right": max_x,
                 "bottom": max_y,
-                "area": len(pixels),
+                "area": region["area"],
                 "w": max_x - min_x,
                 "h": max_y - min_y,
                 "canvasW": canvas_width,
@@ -504,6 +519,186 @@ def _collect_numbered_regions(region_map, region_pixels, canvas_width, canvas_he
     return _spread_section_label_positions(labels)
 
 
+def _dark_line_mask_array(rgb):
+    red = rgb[..., 0].astype(np.float64)
+    green = rgb[..., 1].astype(np.float64)
+    blue = rgb[..., 2].astype(np.float64)
+    luminance = (0.299 * red) + (0.587 * green) + (0.114 * blue)
+    return luminance <= LINE_LUMINANCE_THRESHOLD
+
+
+def _label_components_array(mask, diagonal):
+    """Label connected pixels of a 2D boolean array using horizontal runs.
+
+    Component ids start at 1 and follow the raster order of each component's
+    first pixel, which is the order the flood-fill helpers above assign. The
+    returned stats are parallel arrays indexed by ``id - 1``.
+    """
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    run_rows, run_starts = np.nonzero(edges == 1)
+    _, run_ends = np.nonzero(edges == -1)
+
+    labels = np.zeros(height * width, dtype=np.int32)
+    if run_starts.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        stats = {key: empty for key in ("area", "left", "top", "right", "bottom", "sumX", "sumY")}
+        return labels.reshape(height, width), stats
+
+    # Runs on row y-1 that touch a run on row y form a contiguous slice; find it
+    # with searchsorted over row-offset keys (diagonal contact widens the span by 1).
+    stride = width + 2
+    reach = 1 if diagonal else 0
+    start_keys = (run_rows * stride) + run_starts
+    end_keys = (run_rows * stride) + run_ends
+    lower = np.nonzero(run_rows > 0)[0]
+    above_base = (run_rows[lower] - 1) * stride
+    first = np.searchsorted(end_keys, above_base + run_starts[lower] - reach, side="right")
+    stop = np.searchsorted(start_keys, above_base + run_ends[lower] + reach, side="left")
+    counts = np.maximum(stop - first, 0)
+    offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    upper = np.repeat(first, counts) + offsets
+    lower = np.repeat(lower, counts)
+
+    # Union the touching runs, always hooking a root onto the smaller root so the
+    # surviving root of every component is its first run in raster order.
+    parent = np.arange(run_starts.size)
+    while upper.size:
+        root_upper = parent[upper]
+        root_lower = parent[lower]
+        pending = root_upper != root_lower
+        if not pending.any():
+            break
+        upper = upper[pending]
+        lower = lower[pending]
+        root_upper = root_upper[pending]
+        root_lower = root_lower[pending]
+        np.minimum.at(parent, np.maximum(root_upper, root_lower), np.minimum(root_upper, root_lower))
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    _, run_labels = np.unique(parent, return_inverse=True)
+    run_labels = run_labels.astype(np.int64) + 1
+    run_lengths = (run_ends - run_starts).astype(np.int64)
+    labels[np.flatnonzero(mask)] = np.repeat(run_labels, run_lengths)
+
+    component_count = int(run_labels.max())
+    index = run_labels - 1
+    area = np.bincount(index, weights=run_lengths, minlength=component_count).astype(np.int64)
+    left = np.full(component_count, width, dtype=np.int64)
+    top = np.full(component_count, height, dtype=np.int64)
+    right = np.zeros(component_count, dtype=np.int64)
+    bottom = np.zeros(component_count, dtype=np.int64)
+    np.minimum.at(left, index, run_starts)
+    np.minimum.at(top, index, run_rows)
+    np.maximum.at(right, index, run_ends - 1)
+    np.maximum.at(bottom, index, run_rows)
+    run_sum_x = ((run_starts + run_ends - 1).astype(np.int64) * run_lengths) // 2
+    run_sum_y = run_rows.astype(np.int64) * run_lengths
+    sum_x = np.bincount(index, weights=run_sum_x, minlength=component_count).astype(np.int64)
+    sum_y = np.bincount(index, weights=run_sum_y, minlength=component_count).astype(np.int64)
+    stats = {
+        "area": area,
+        "left": left,
+        "top": top,
+        "right": right,
+        "bottom": bottom,
+        "sumX": sum_x,
+        "sumY": sum_y,
+    }
+    return labels.reshape(height, width), stats
+
+
+def _dilate_mask_array(mask):
+    grown = mask.copy()
+    grown[1:, :] |= mask[:-1, :]
+    grown[:-1, :] |= mask[1:, :]
+    expanded = grown.copy()
+    expanded[:, 1:] |= grown[:, :-1]
+    expanded[:, :-1] |= grown[:, 1:]
+    return expanded
+
+
+def _erase_existing_label_components_array(rgb):
+    height, width = rgb.shape[:2]
+    _labels, stats = _label_components_array(_dark_line_mask_array(rgb), diagonal=True)
+    small = (
+        (stats["area"] <= MAX_EXISTING_LABEL_COMPONENT_PIXELS)
+        & ((stats["right"] - stats["left"] + 1) <= MAX_EXISTING_LABEL_BOX_PX)
+        & ((stats["bottom"] - stats["top"] + 1) <= MAX_EXISTING_LABEL_BOX_PX)
+    )
+    pad = 2
+    for left, top, right, bottom in zip(
+        stats["left"][small].tolist(),
+        stats["top"][small].tolist(),
+        stats["right"][small].tolist(),
+        stats["bottom"][small].tolist(),
+    ):
+        rgb[max(0, top - pad):min(height - 1, bottom + pad) + 1, max(0, left - pad):min(width - 1, right + pad) + 1] = BACKGROUND_RGB
+    return rgb
+
+
+def _build_line_mask_array(dark_mask):
+    labels, stats = _label_components_array(dark_mask, diagonal=True)
+    keep = np.concatenate(([False], stats["area"] >= MIN_LINE_COMPONENT_PIXELS))
+    cleaned = keep[labels]
+    return _dilate_mask_array(_dilate_mask_array(cleaned))
+
+
+def _numbered_labels_numpy(base):
+    """Array-backed equivalent of the per-pixel pipeline in _numbered_labels_python."""
+    rgb = _erase_existing_label_components_array(np.array(base, dtype=np.uint8))
+    dark_mask = _dark_line_mask_array(rgb)
+    line_art = np.empty_like(rgb)
+    line_art[...] = BACKGROUND_RGB
+    line_art[dark_mask] = (17, 17, 17)
+    cleaned = Image.fromarray(line_art, "RGB")
+
+    height, width = dark_mask.shape
+    mask = _build_line_mask_array(dark_mask)
+    region_labels, stats = _label_components_array(~mask, diagonal=False)
+    columns = [stats[key].tolist() for key in ("area", "left", "top", "right", "bottom", "sumX", "sumY")]
+    region_stats = [
+        {
+            "id": region_id,
+            "area": area,
+            "left": left,
+            "top": top,
+            "right": right,
+            "bottom": bottom,
+            "sumX": sum_x,
+            "sumY": sum_y,
+        }
+        for region_id, (area, left, top, right, bottom, sum_x, sum_y) in enumerate(zip(*columns), start=1)
+    ]
+    region_map = region_labels.ravel().tolist()
+    return cleaned, _collect_numbered_regions_from_stats(region_map, region_stats, width, height)
+
+
+def _numbered_labels_python(base):
+    base = _erase_existing_label_components(base)
+    base = _render_clean_line_art(base)
+    pixel_access = base.load()
+    mask = _build_line_mask(pixel_access, CANVAS_WIDTH, CANVAS_HEIGHT)
+
+    region_map, region_pixels = _build_region_map(mask, CANVAS_WIDTH, CANVAS_HEIGHT)
+    return base, _collect_numbered_regions(region_map, region_pixels, CANVAS_WIDTH, CANVAS_HEIGHT)
+
+
+def resolve_render_engine(engine=None):
+    requested = str(engine or os.environ.get(RENDER_ENGINE_ENV) or "auto").strip().lower()
+    if requested not in RENDER_ENGINES:
+        raise ValueError(f"Unknown pattern render engine: {requested!r}")
+    if requested == "python" or np is None:
+        return "python"
+    return "numpy"
+
+
 def _load_font(size):
     rounded_size = max(4, int(round(size)))
     for font_name in ("DejaVuSans.ttf", "arial.ttf"):
@@ -535,9 +730,10 @@ def _fit_draw_font(draw, text, label):
     return font, stroke_width, bbox
 
 
-def render_numbered_pattern_raster(image_bytes):
+def render_numbered_pattern_raster(image_bytes, engine=None):
     if not image_bytes:
         return None
+    resolved_engine = resolve_render_engine(engine)
 
     try:
         with Image.open(BytesIO(image_bytes)) as source_image:
@@ -555,13 +751,10 @@ def render_numbered_pattern_raster(image_bytes):
     fitted = source.resize((draw_width, draw_height), Image.Resampling.LANCZOS)
     canvas.alpha_composite(fitted, (offset_x, offset_y))
     base = canvas.convert("RGB")
-    base = _erase_existing_label_components(base)
-    base = _render_clean_line_art(base)
-    pixel_access = base.load()
-    mask = _build_line_mask(pixel_access, CANVAS_WIDTH, CANVAS_HEIGHT)
-
-    region_map, region_pixels = _build_region_map(mask, CANVAS_WIDTH, CANVAS_HEIGHT)
-    labels = _collect_numbered_regions(region_map, region_pixels, CANVAS_WIDTH, CANVAS_HEIGHT)
+    if resolved_engine == "numpy":
+        base, labels = _numbered_labels_numpy(base)
+    else:
+        base, labels = _numbered_labels_python(base)
     if not labels:
         return None
 
@@ -0,0 +1,174 @@
+"""
+Preview images for saved designs.
+
+The designer posts its canvas snapshot as a base64 data URL inside design_data
+(preview_url and/or dataUrl), often several megabytes. When design_data is
+assigned, UserProject copies the image into preview_data with a sha256
+preview_hash and a WebP thumbnail. preview_url is then dropped from design_data;
+dataUrl is kept, because flood-fill designs restore their canvas from it. Listings
+read only preview_hash. They link to /api/projects/<id>/preview.webp; the URL
+carries the hash and an HMAC so it works from an <img> tag without a bearer
+token, and can be cached forever.
+
+The served mime type comes from the decoded image, never from the data URL
+header: only PNG, JPEG and WebP are stored as sent, other raster formats are
+re-encoded to PNG, and anything Pillow cannot read stays in design_data.
+"""
+import base64
+import binascii
+import hashlib
+import io
+
+from flask import has_request_context, request
+
+from ..auth import sign_value, verify_signed_value
+from ..config import _env_int
+
+
+PREVIEW_FIELDS = ("preview_url", "dataUrl")
+# Fields removed from design_data once their image is stored; dataUrl is canvas state.
+EXTRACTED_FIELDS = ("preview_url",)
+PREVIEW_MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+# Modes Pillow can write as PNG; anything else is converted before re-encoding.
+_PNG_MODES = {"1", "L", "LA", "P", "RGB", "RGBA", "I"}
+DEFAULT_THUMBNAIL_EDGE = 480
+WEBP_QUALITY = 80
+THUMBNAIL_MIME = "image/webp"
+
+
+def is_data_url(value):
+    return isinstance(value, str) and value.startswith("data:")
+
+
+def decode_data_url(value):
+    """Return (bytes, mime) for a base64 data URL, or (None, None)."""
+    header, _, encoded = str(value or "").partition(",")
+    if not encoded or ";base64" not in header:
+        return None, None
+    try:
+        data = base64.b64decode(encoded, validate=False)
+    except (binascii.Error, ValueError):
+        return None, None
+    mime = header[len("data:"):].split(";", 1)[0].strip().lower() or "application/octet-stream"
+    return data or None, mime
+
+
+def render_thumbnail(image_bytes, max_edge=None):
+    """Shrink image bytes to a WebP no larger than max_edge; None if unreadable."""
+    from PIL import Image
+
+    edge = max(16, max_edge or _env_int("PROJECT_THUMBNAIL_MAX_EDGE", DEFAULT_THUMBNAIL_EDGE))
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as source:
+            source.draft("RGB", (edge, edge))
+            image = source.convert("RGBA")
+    except Exception:
+        return None
+    image.thumbnail((edge, edge), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, format="WEBP", quality=WEBP_QUALITY, method=4)
+    return out.getvalue()
+
+
+def read_preview_image(value):
+    """Return (bytes, mime) for a data-URL image that is safe to serve, or (None, None).
+
+    The mime type is taken from the format Pillow detects, not from the header.
+    """
+    from PIL import Image
+
+    data, _ = decode_data_url(value)
+    if not data:
+        return None, None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            mime = PREVIEW_MIME_TYPES.get(image.format)
+            if mime:
+                image.verify()
+                return data, mime
+            image.load()
+            if image.mode not in _PNG_MODES:
+                image = image.convert("RGBA")
+            out = io.BytesIO()
+            image.save(out, format="PNG")
+            return out.getvalue(), "image/png"
+    except Exception:
+        return None, None
+
+
+def extract_design_preview(design_data):
+    """Return (design_data to store, preview bytes, mime) for a design.
+
+    The first readable data URL in PREVIEW_FIELDS is the preview. Only
+    EXTRACTED_FIELDS are removed, and only once their image has been read;
+    otherwise design_data is returned unchanged with (None, None).
+    """
+    if not isinstance(design_data, dict):
+        return design_data, None, None
+    for field in PREVIEW_FIELDS:
+        if not is_data_url(design_data.get(field)):
+            continue
+        image_bytes, mime = read_preview_image(design_data[field])
+        if image_bytes is None:
+            continue
+        if field in EXTRACTED_FIELDS:
+            design_data = {key: value for key, value in design_data.items() if key != field}
+        return design_data, image_bytes, mime
+    return design_data, None, None
+
+
+def preview_data_url(image_bytes, mime):
+    return f"data:{mime};base64,{base64.b64encode(bytes(image_bytes)).decode('ascii')}"
+
+
+def preview_hash(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def _base_url():
+    return request.url_root.rstrip("/") if has_request_context() else ""
+
+
+def _signature_payload(project_id, version):
+    return f"project-preview:{int(project_id)}:{version}"
+
+
+def project_preview_url(project_id, version, variant="thumbnail"):
+    signature = sign_value(_signature_payload(project_id, version))
+    suffix = "preview.webp" if variant == "thumbnail" else "preview"
+    return f"{_base_url()}/api/projects/{int(project_id)}/{suffix}?v={version}&sig={signature}"
+
+
+def verify_preview_request(project_id, version, signature):
+    if not version or not signature:
+        return False
+    return verify_signed_value(_signature_payload(project_id, version), signature)
+
+
+def project_preview_links(preview_hashes):
+    """Map project id -> preview link for listings, given {project_id: preview_hash}.
+
+    Read-only. Projects without a stored preview get a link only when design_data
+    names an external preview_url; inline images are moved out by the version 8
+    schema backfill (backend/db.py backfill_project_previews), not here.
+    """
+    from sqlalchemy import case
+
+    from ..models import db
+    from ..models.project import UserProject
+
+    links = {pid: project_preview_url(pid, digest) for pid, digest in preview_hashes.items() if digest}
+    legacy_ids = [pid for pid, digest in preview_hashes.items() if pid is not None and not digest]
+    if not legacy_ids:
+        return links
+
+    preview = UserProject.design_data["preview_url"].as_string()
+    rows = (
+        db.session.query(UserProject.id, case((preview.like("data:%"), None), else_=preview))
+        .filter(UserProject.id.in_(legacy_ids))
+        .all()
+    )
+    for project_id, external_url in rows:
+        if external_url:
+            links[project_id] = external_url
+    return links
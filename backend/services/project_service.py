@@ -1,7 +1,9 @@
 from datetime import datetime
+from sqlalchemy import func as db_func
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
-from backend.models.project import UserProject
+from sqlalchemy.orm import Session, load_only
+from backend.models.project import UserProject, UserProjectRegion
+from backend.models.template import TemplateRegion
 
 
 def save_project(user_id, data, db: Session):
@@ -17,6 +19,16 @@ def save_project(user_id, data, db: Session):
             project = db.query(UserProject).filter_by(id=project_id, user_id=user_id).first()
             if not project:
                 return None, 'Project not found or not owned by user.'
+            expected_version = data.get('version')
+            if expected_version is not None:
+                # Check the version in the UPDATE itself; the row stays locked until commit,
+                # so a concurrent save or region PATCH cannot slip in between.
+                claimed = (db.query(UserProject)
+                           .filter_by(id=project.id, version=expected_version)
+                           .update({UserProject.updated_at: now}, synchronize_session=False))
+                if not claimed:
+                    db.rollback()
+                    return None, 'version_conflict'
             project.template_id = data['template_id']
             project.name = project_name
             project.design_data = data['design_data']
@@ -38,15 +50,120 @@ def save_project(user_id, data, db: Session):
         db.rollback()
         return None, str(e)
 
-def get_user_projects(user_id, filters, db: Session):
+def get_user_projects(user_id, filters, db: Session, summary=False):
     try:
         q = db.query(UserProject).filter_by(user_id=user_id)
+        if summary:
+            # Listings never need the design itself; skip the JSON and preview blobs.
+            q = q.options(load_only(
+                UserProject.id, UserProject.user_id, UserProject.template_id, UserProject.name,
+                UserProject.preview_hash, UserProject.created_at, UserProject.updated_at,
+            ))
         # Add filter logic here if needed
         projects = q.order_by(UserProject.updated_at.desc()).all()
         return projects, None
     except SQLAlchemyError as e:
         return None, str(e)
 
+def _validate_region_delta(data):
+    version = data.get('version')
+    fills = data.get('set') or {}
+    cleared = data.get('clear') or []
+    if not isinstance(version, int) or isinstance(version, bool):
+        return None, 'version must be an integer.'
+    if not isinstance(fills, dict) or not all(isinstance(v, dict) for v in fills.values()):
+        return None, 'set must map region ids to fill objects.'
+    if not isinstance(cleared, list):
+        return None, 'clear must be a list of region ids.'
+    fills = {str(k).strip(): v for k, v in fills.items() if str(k).strip()}
+    cleared = {str(k).strip() for k in cleared if str(k).strip()} - set(fills)
+    if not fills and not cleared:
+        return None, 'No region changes.'
+    if any(len(region_id) > 100 for region_id in list(fills) + list(cleared)):
+        return None, 'Region ids must be at most 100 characters.'
+    return (version, fills, cleared), None
+
+def apply_region_delta(project_id, user_id, data, db: Session):
+    """Apply {version, set: {regionId: fill}, clear: [regionId]} to a project's region fills.
+
+    Only the named regions are written and filled_region_count moves by the
+    difference, so an edit costs the same however large the design is. Returns
+    (result, error); on 'version_conflict' result carries the current version.
+    """
+    delta, err = _validate_region_delta(data)
+    if err:
+        return None, err
+    expected_version, fills, cleared = delta
+    try:
+        project = (db.query(UserProject)
+                   .options(load_only(UserProject.id, UserProject.template_id, UserProject.version,
+                                      UserProject.filled_region_count))
+                   .filter_by(id=project_id, user_id=user_id)
+                   .first())
+        if not project:
+            return None, 'Project not found or not owned by user.'
+
+        # The version check and bump is one conditional UPDATE, so concurrent PATCHes serialize here.
+        bumped = (db.query(UserProject)
+                  .filter_by(id=project_id, version=expected_version)
+                  .update({UserProject.version: UserProject.version + 1, UserProject.updated_at: datetime.utcnow()},
+                          synchronize_session=False))
+        if not bumped:
+            db.rollback()
+            current = db.query(UserProject.version).filter_by(id=project_id).scalar()
+            return {'version': current}, 'version_conflict'
+        if project.filled_region_count is None:
+            # Older saves still keep sections inside design_data; move them out once.
+            # Re-assigning bumps the version again, and the response reports the final one.
+            project.design_data = dict(project.design_data or {})
+            db.flush()
+
+        rows = {
+            row.region_id: row
+            for row in db.query(UserProjectRegion).filter(
+                UserProjectRegion.project_id == project_id,
+                UserProjectRegion.region_id.in_(set(fills) | cleared),
+            )
+        }
+        filled_change = 0
+        for region_id in cleared:
+            row = rows.get(region_id)
+            if row is not None:
+                filled_change -= int(row.filled)
+                db.delete(row)
+        for region_id, fill in fills.items():
+            row = rows.get(region_id)
+            if row is None:
+                row = UserProjectRegion(project_id=project_id, region_id=region_id, filled=False)
+                db.add(row)
+            was_filled = bool(row.filled)
+            row.set_fill(fill)
+            filled_change += int(row.filled) - int(was_filled)
+
+        if filled_change:
+            (db.query(UserProject)
+             .filter_by(id=project_id)
+             .update({UserProject.filled_region_count: UserProject.filled_region_count + filled_change},
+                     synchronize_session=False))
+        db.commit()
+
+        filled_count, version = (db.query(UserProject.filled_region_count, UserProject.version)
+                                 .filter_by(id=project_id).one())
+        region_total = 0
+        if project.template_id:
+            region_total = (db.query(db_func.count(TemplateRegion.id))
+                            .filter(TemplateRegion.template_id == project.template_id)
+                            .scalar()) or 0
+        return {
+            'version': version,
+            'filled_region_count': filled_count,
+            'region_total': region_total or None,
+            'completion_percentage': min(100, int(filled_count * 100 / region_total)) if region_total else None,
+        }, None
+    except SQLAlchemyError as e:
+        db.rollback()
+        return None, str(e)
+
 def get_project_by_id(project_id, user_id, db: Session):
     try:
         project = db.query(UserProject).filter_by(id=project_id, user_id=user_id).first()
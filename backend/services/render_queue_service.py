@@ -0,0 +1,283 @@
+"""
+Background process pool for numbered pattern renders.
+
+Renders run in worker processes so a slow pattern never ties up a gunicorn
+request thread. Jobs are deduplicated by pattern cache key, the pending queue is
+bounded, and a job that outlives its deadline gets its worker pool recycled.
+Finished renders are written to the pattern cache, so a completed job is just a
+cache hit on the next download. Caching and job callbacks run on a short-lived
+thread of their own, never on the executor's result-collecting thread.
+"""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from flask import current_app
+
+from ..config import _env_int
+from .pattern_cache_service import lookup_numbered_pattern, pattern_cache_key, store_numbered_pattern
+from .pattern_render_service import render_numbered_pattern_raster
+
+
+JOB_PENDING = "pending"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_TIMEOUT = "timeout"
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 16
+DEFAULT_JOB_TIMEOUT_SECONDS = 120
+DEFAULT_JOB_RETENTION_SECONDS = 600
+
+
+class RenderQueueFull(RuntimeError):
+    pass
+
+
+class RenderJob:
+    def __init__(self, key, image_bytes, app):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.status = JOB_PENDING
+        self.error = None
+        self.submitted_at = time.monotonic()
+        self.finished_at = None
+        self.future = None
+        self.callbacks = []
+        # Set once the job has finished and its callbacks have run.
+        self.settled = threading.Event()
+        self._image_bytes = image_bytes
+        self._app = app
+
+    @property
+    def finished(self):
+        return self.status != JOB_PENDING
+
+    @property
+    def pending(self):
+        return not self.finished and not (self.future is not None and self.future.done())
+
+    def to_dict(self):
+        payload = {"job_id": self.job_id, "status": self.status}
+        if self.error:
+            payload["error"] = self.error
+        return payload
+
+
+# Re-entrant: a future that is already done runs its callback inside _start.
+_lock = threading.RLock()
+_executor = None
+_executor_pid = None
+_jobs = {}
+_jobs_by_key = {}
+
+
+def render_queue_enabled():
+    """RENDER_WORKERS=0 keeps renders inline, e.g. for single-process local runs."""
+    return _env_int("RENDER_WORKERS", DEFAULT_WORKERS) > 0
+
+
+def _render_job(image_bytes):
+    return render_numbered_pattern_raster(image_bytes)
+
+
+def _build_executor():
+    workers = max(1, _env_int("RENDER_WORKERS", DEFAULT_WORKERS))
+    # spawn, not fork: the parent is a threaded gunicorn worker holding DB sockets.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    # A worker killed from outside (OOM, SIGKILL) leaves the pool permanently broken.
+    broken = bool(getattr(_executor, "_broken", False))
+    if _executor is None or broken or _executor_pid != os.getpid():
+        if broken:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = _build_executor()
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _discard_executor():
+    global _executor
+    executor, _executor = _executor, None
+    if executor is None:
+        return
+    # A hung render cannot be cancelled, only killed with its process.
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        try:
+            process.terminate()
+        except Exception:
+            pass
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _start(job):
+    job.future = _get_executor().submit(_render_job, job._image_bytes)
+    future = job.future
+    future.add_done_callback(lambda done: _on_done(job, done))
+
+
+def _finish(job, status, error=None):
+    job.status = status
+    job.error = error
+    job.finished_at = time.monotonic()
+    job._image_bytes = None
+    job.callbacks = []
+
+
+def _on_done(job, future):
+    with _lock:
+        if job.future is not future or job.finished:
+            return
+    if future.cancelled():
+        return
+
+    try:
+        data = future.result()
+    except Exception as exc:
+        with _lock:
+            _finish(job, JOB_FAILED, type(exc).__name__)
+        job.settled.set()
+        return
+
+    # This runs on the executor's result thread, which also collects every other
+    # render; the cache write and callbacks (DB writes, thumbnails) go elsewhere.
+    threading.Thread(
+        target=_complete, args=(job, data), name=f"render-complete-{job.job_id[:8]}", daemon=True
+    ).start()
+
+
+def _complete(job, data):
+    if data:
+        with job._app.app_context():
+            try:
+                store_numbered_pattern(job.key, data)
+            except Exception:
+                current_app.logger.exception("failed to cache pattern render %s", job.key)
+    with _lock:
+        callbacks = job.callbacks
+        _finish(job, JOB_DONE if data else JOB_FAILED, None if data else "render_failed")
+    try:
+        if data and callbacks:
+            with job._app.app_context():
+                for callback in callbacks:
+                    try:
+                        callback(data)
+                    except Exception:
+                        current_app.logger.exception("pattern render callback failed for %s", job.key)
+    finally:
+        job.settled.set()
+
+
+def _reap_locked():
+    now = time.monotonic()
+    timeout = max(1, _env_int("RENDER_JOB_TIMEOUT_SECONDS", DEFAULT_JOB_TIMEOUT_SECONDS))
+    retention = max(0, _env_int("RENDER_JOB_RETENTION_SECONDS", DEFAULT_JOB_RETENTION_SECONDS))
+
+    expired = [
+        job for job in _jobs.values()
+        if not job.finished and now - job.submitted_at > timeout
+    ]
+    if expired:
+        for job in expired:
+            _finish(job, JOB_TIMEOUT, "render_timeout")
+            job.settled.set()
+        _discard_executor()
+        # Everything else in the discarded pool goes to a fresh one, with a new deadline.
+        for job in _jobs.values():
+            if not job.finished:
+                job.submitted_at = now
+                _start(job)
+
+    for job_id, job in list(_jobs.items()):
+        if job.finished and now - job.finished_at > retention:
+            _jobs.pop(job_id, None)
+            if _jobs_by_key.get(job.key) == job_id:
+                _jobs_by_key.pop(job.key, None)
+
+
+def submit_render(image_bytes):
+    """Queue a numbered render of image_bytes and return its RenderJob.
+
+    A render already queued for the same source is shared rather than repeated,
+    and a recent failure is returned as-is so clients stop retrying a source that
+    cannot be rendered. Raises RenderQueueFull when the pending queue is full.
+    """
+    key = pattern_cache_key(image_bytes)
+    app = current_app._get_current_object()
+    with _lock:
+        _reap_locked()
+        existing = _jobs.get(_jobs_by_key.get(key))
+        if existing is not None and existing.status != JOB_DONE:
+            return existing
+
+        pending = sum(1 for job in _jobs.values() if not job.finished)
+        if pending >= max(1, _env_int("RENDER_QUEUE_MAX_PENDING", DEFAULT_MAX_PENDING)):
+            raise RenderQueueFull("pattern render queue is full")
+
+        job = RenderJob(key, image_bytes, app)
+        _jobs[job.job_id] = job
+        _jobs_by_key[key] = job.job_id
+        _start(job)
+        return job
+
+
+def on_render_done(job, callback):
+    """Call callback(png_bytes) in an app context once job renders successfully.
+
+    Returns False if the job has already finished; the caller should then read
+    the result from the pattern cache instead.
+    """
+    with _lock:
+        if job.finished:
+            return False
+        job.callbacks.append(callback)
+        return True
+
+
+def get_render_job(job_id):
+    with _lock:
+        _reap_locked()
+        return _jobs.get(str(job_id or ""))
+
+
+def wait_for_render(job, timeout):
+    """Wait up to timeout seconds and return the rendered bytes, or None if not ready."""
+    future = job.future
+    if future is None or timeout <= 0:
+        return None
+    done, _pending = wait([future], timeout=timeout)
+    if not done or future.cancelled() or future.exception() is not None:
+        return None
+    return future.result() or None
+
+
+def prewarm_render(image_bytes):
+    """Best-effort background render, used when a template is created or updated."""
+    if not image_bytes:
+        return None
+    try:
+        cached_path, cached_bytes = lookup_numbered_pattern(image_bytes)
+        if cached_path or cached_bytes:
+            return None
+        return submit_render(image_bytes)
+    except RenderQueueFull:
+        current_app.logger.info("render queue full; skipping pattern pre-warm")
+    except Exception:
+        current_app.logger.exception("failed to queue pattern pre-warm")
+    return None
+
+
+def shutdown_render_queue():
+    with _lock:
+        for job in _jobs.values():
+            if not job.finished:
+                _finish(job, JOB_FAILED, "shutdown")
+        _discard_executor()
+        _jobs.clear()
+        _jobs_by_key.clear()
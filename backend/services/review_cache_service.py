@@ -0,0 +1,60 @@
+"""
+Short-lived cache of approved reviews per product.
+
+Product pages fetch a product's reviews on every view. The rows are kept
+in-process for REVIEWS_CACHE_TTL_SECONDS, up to REVIEWS_CACHE_MAX_ENTRIES
+products, dropping the least recently read. Review writes clear this worker's
+entries straight away. Other workers catch up when their entries expire, so the
+TTL is kept small.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from ..config import _env_int
+
+
+DEFAULT_TTL_SECONDS = 60
+DEFAULT_MAX_ENTRIES = 512
+
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+
+
+def _cache_key(product_type, product_id):
+    return str(product_type or "").strip().lower(), str(product_id or "").strip()
+
+
+def cached_product_reviews(product_type, product_id):
+    """Return approved reviews for a product, reading the database at most once per TTL."""
+    from ..db import list_reviews_for_product
+
+    ttl = _env_int("REVIEWS_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+    if ttl <= 0:
+        return list_reviews_for_product(product_type, product_id)
+
+    key = _cache_key(product_type, product_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] > now:
+            _entries.move_to_end(key)
+            return entry[1]
+
+    reviews = list_reviews_for_product(product_type, product_id)
+    with _lock:
+        _entries[key] = (now + ttl, reviews)
+        _entries.move_to_end(key)
+        while len(_entries) > max(1, _env_int("REVIEWS_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)):
+            _entries.popitem(last=False)
+    return reviews
+
+
+def invalidate_product_reviews(product_type=None, product_id=None):
+    """Drop one product's cached reviews, or every product's when none is given."""
+    with _lock:
+        if product_type is None:
+            _entries.clear()
+        else:
+            _entries.pop(_cache_key(product_type, product_id), None)
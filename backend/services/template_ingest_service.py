@@ -0,0 +1,161 @@
+"""
+Background normalization of admin template image uploads.
+
+Scanned patterns can be tens of megabytes, too slow to number inside the
+upload request. The original is written to uploads/templates as
+<name>-original<ext> straight away, and its numbered render goes to the
+render queue. When the render finishes, every template that still points at
+the original gets the numbered PNG, a WebP thumbnail and the image_data blob, and its linked
+pattern product stops showing the original. Templates saved after that read
+the finished render from the pattern cache.
+An upload whose render is already in the pattern cache skips the queue and
+gets its numbered PNG and thumbnail straight away.
+With RENDER_WORKERS=0 the upload is normalized inline, as before.
+"""
+import os
+import uuid
+
+from flask import current_app
+
+from .catalog_cache_service import invalidate_catalog_cache
+from .pattern_cache_service import lookup_numbered_pattern
+from .pattern_product_service import sync_pattern_product_for_template
+from .pattern_render_service import render_numbered_pattern_raster
+from .project_preview_service import render_thumbnail
+from .render_queue_service import (
+    JOB_DONE,
+    RenderQueueFull,
+    on_render_done,
+    render_queue_enabled,
+    submit_render,
+)
+
+
+UPLOAD_URL_PREFIX = "/uploads/templates/"
+ORIGINAL_SUFFIX = "-original"
+NUMBERED_SUFFIX = "-numbered.png"
+THUMBNAIL_SUFFIX = "-thumb.webp"
+
+
+def _uploads_dir():
+    return os.path.join(current_app.root_path, "uploads", "templates")
+
+
+def _write_upload(filename, data):
+    uploads_dir = _uploads_dir()
+    os.makedirs(uploads_dir, exist_ok=True)
+    with open(os.path.join(uploads_dir, filename), "wb") as fp:
+        fp.write(data)
+    return UPLOAD_URL_PREFIX + filename
+
+
+def _original_stem(image_url):
+    """The upload stem when image_url is an un-normalized original, else None."""
+    if not isinstance(image_url, str) or not image_url.startswith(UPLOAD_URL_PREFIX):
+        return None
+    stem = os.path.splitext(image_url[len(UPLOAD_URL_PREFIX):])[0]
+    if not stem.endswith(ORIGINAL_SUFFIX) or "/" in stem:
+        return None
+    return stem[: -len(ORIGINAL_SUFFIX)]
+
+
+def read_template_upload(image_url):
+    """Bytes and mime of a file previously uploaded to uploads/templates, or (None, None)."""
+    if not isinstance(image_url, str) or image_url.startswith("http"):
+        return None, None
+    disk_path = os.path.join(current_app.root_path, image_url.lstrip("/"))
+    if not os.path.isfile(disk_path):
+        return None, None
+    with open(disk_path, "rb") as fp:
+        data = fp.read()
+    ext = os.path.splitext(disk_path)[1].lower().lstrip(".")
+    return data, (f"image/{ext}" if ext else "image/png")
+
+
+def ingest_template_upload(file_bytes, extension, mime_type):
+    """Store an uploaded template image and start its normalization.
+
+    Returns {"image_url", "status"} plus "job_id" while the render is queued.
+    image_url is usable right away; templates saved with it are upgraded to
+    the numbered PNG when the job finishes.
+    """
+    stem = uuid.uuid4().hex
+    if not render_queue_enabled():
+        normalized = render_numbered_pattern_raster(file_bytes)
+        if normalized:
+            return {"image_url": _write_upload(f"{stem}.png", normalized), "status": JOB_DONE}
+        return {"image_url": _write_upload(f"{stem}{extension}", file_bytes), "status": JOB_DONE}
+
+    cached_path, cached = lookup_numbered_pattern(file_bytes)
+    cached = cached or _read_path(cached_path)
+    if cached:
+        numbered_url, _thumbnail_url = _store_normalized(stem, cached)
+        return {"image_url": numbered_url, "status": JOB_DONE}
+
+    original_url = _write_upload(f"{stem}{ORIGINAL_SUFFIX}{extension}", file_bytes)
+    try:
+        job = submit_render(file_bytes)
+    except RenderQueueFull:
+        current_app.logger.info("render queue full; template upload %s kept as uploaded", original_url)
+        return {"image_url": original_url, "status": "queue_full"}
+
+    if not on_render_done(job, lambda data: finish_template_upload(original_url, data)):
+        if job.status == JOB_DONE:
+            _cached_path, data = lookup_numbered_pattern(file_bytes)
+            finish_template_upload(original_url, data or _read_path(_cached_path))
+    return {"image_url": original_url, **job.to_dict()}
+
+
+def _read_path(path):
+    if not path:
+        return None
+    with open(path, "rb") as fp:
+        return fp.read()
+
+
+def _store_normalized(stem, data):
+    numbered_url = _write_upload(f"{stem}{NUMBERED_SUFFIX}", data)
+    thumbnail = render_thumbnail(data)
+    thumbnail_url = _write_upload(f"{stem}{THUMBNAIL_SUFFIX}", thumbnail) if thumbnail else None
+    return numbered_url, thumbnail_url
+
+
+def finish_template_upload(original_url, data):
+    """Point every template still using original_url at its numbered render."""
+    from ..models import db
+    from ..models.template import Template
+
+    if not data or _original_stem(original_url) is None:
+        return 0
+    numbered_url, thumbnail_url = _store_normalized(_original_stem(original_url), data)
+    templates = Template.query.filter(Template.image_url == original_url).all()
+    for template in templates:
+        template.image_url = numbered_url
+        template.image_data = data
+        template.image_mime = "image/png"
+        if thumbnail_url and not template.thumbnail_url:
+            template.thumbnail_url = thumbnail_url
+    if templates:
+        db.session.commit()
+        for template in templates:
+            # Pattern products synced while the render was queued still show the original upload.
+            try:
+                sync_pattern_product_for_template(template, replaced_image_urls={original_url})
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception("pattern product sync failed for template %s", template.id)
+        invalidate_catalog_cache("manual_products", "manual_products_summary")
+    return len(templates)
+
+
+def apply_finished_template_upload(template):
+    """Upgrade a just-saved template whose upload finished rendering before it was saved."""
+    if _original_stem(template.image_url) is None:
+        return False
+    source, _mime = read_template_upload(template.image_url)
+    cached_path, data = lookup_numbered_pattern(source)
+    data = data or _read_path(cached_path)
+    if not data:
+        return False
+    return finish_template_upload(template.image_url, data) > 0
@@ -0,0 +1,131 @@
+"""
+Buffered homepage visit tracking.
+
+The visit endpoint appends to an in-process buffer instead of writing a row per
+page view. A background thread flushes the buffer in one transaction every
+HOMEPAGE_VISIT_FLUSH_SECONDS, or sooner once HOMEPAGE_VISIT_BUFFER_SIZE visits
+are waiting, and again at interpreter exit. Each flush also updates the daily,
+monthly and all-time rollups the admin insights read, and about once an hour
+prunes raw rows older than HOMEPAGE_VISIT_RETENTION_DAYS.
+"""
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from ..config import _env_int
+
+
+DEFAULT_BUFFER_SIZE = 200
+DEFAULT_MAX_BUFFERED = 5000
+DEFAULT_FLUSH_SECONDS = 10
+DEFAULT_RETENTION_DAYS = 90
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_buffer = []
+_wake = threading.Event()
+_state = {"app": None, "flusher_pid": None, "last_prune": 0.0}
+
+
+def _flush_seconds():
+    return max(1, _env_int("HOMEPAGE_VISIT_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS))
+
+
+def _flusher_loop():
+    while True:
+        _wake.wait(_flush_seconds())
+        _wake.clear()
+        app = _state["app"]
+        if app is None:
+            continue
+        with app.app_context():
+            flush_homepage_visits()
+
+
+def _ensure_flusher():
+    # Runs under _lock. The pid check restarts the thread in forked workers.
+    if _state["flusher_pid"] == os.getpid():
+        return
+    _state["flusher_pid"] = os.getpid()
+    threading.Thread(target=_flusher_loop, name="homepage-visit-flusher", daemon=True).start()
+
+
+def buffer_homepage_visit(ip_hash, page_path="/", user_agent=None):
+    """Queue a visit for the next flush; returns False when ip_hash is empty."""
+    if not str(ip_hash or "").strip():
+        return False
+    visit = {
+        "ip_hash": ip_hash,
+        "page_path": page_path,
+        "user_agent": user_agent,
+        "visited_at": datetime.utcnow(),
+    }
+    with _lock:
+        _state["app"] = current_app._get_current_object()
+        _buffer.append(visit)
+        pending = len(_buffer)
+        _ensure_flusher()
+    if pending >= max(1, _env_int("HOMEPAGE_VISIT_BUFFER_SIZE", DEFAULT_BUFFER_SIZE)):
+        _wake.set()
+    return True
+
+
+def pending_homepage_visits():
+    with _lock:
+        return len(_buffer)
+
+
+def flush_homepage_visits():
+    """Write buffered visits to the database; returns how many were written."""
+    from ..db import prune_homepage_visits, record_homepage_visits
+
+    with _flush_lock:
+        with _lock:
+            batch = list(_buffer)
+            del _buffer[:]
+        if batch:
+            try:
+                record_homepage_visits(batch)
+            except Exception:
+                current_app.logger.exception("homepage visit flush failed; keeping %s visits for retry", len(batch))
+                with _lock:
+                    # Keep the newest visits if the database stays down long enough to overflow.
+                    _buffer[:0] = batch
+                    overflow = len(_buffer) - max(1, _env_int("HOMEPAGE_VISIT_MAX_BUFFERED", DEFAULT_MAX_BUFFERED))
+                    if overflow > 0:
+                        del _buffer[:overflow]
+                return 0
+
+        now = time.monotonic()
+        if now - _state["last_prune"] >= PRUNE_INTERVAL_SECONDS:
+            _state["last_prune"] = now
+            try:
+                prune_homepage_visits(_env_int("HOMEPAGE_VISIT_RETENTION_DAYS", DEFAULT_RETENTION_DAYS))
+            except Exception:
+                current_app.logger.exception("homepage visit pruning failed")
+        return len(batch)
+
+
+def get_homepage_visit_insights():
+    """Flush this worker's buffer, then read the rollups."""
+    from ..db import get_homepage_visit_insights as read_insights
+
+    flush_homepage_visits()
+    return read_insights()
+
+
+def _flush_at_exit():
+    app = _state["app"]
+    if app is None or not _buffer:
+        return
+    with app.app_context():
+        flush_homepage_visits()
+
+
+atexit.register(_flush_at_exit)
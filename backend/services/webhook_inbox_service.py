@@ -0,0 +1,127 @@
+"""
+Durable inbox for Stripe webhooks.
+
+The webhook endpoint only verifies the signature and stores the event under
+Stripe's event id. It answers in milliseconds, and a redelivered event becomes
+a no-op insert. A background thread in each worker drains the inbox. Events are
+leased with SKIP LOCKED and handled. A failed event is retried with exponential
+backoff; after STRIPE_WEBHOOK_MAX_ATTEMPTS it is parked as 'failed'. Handlers
+must be idempotent: if a worker dies mid-event, the lease expires and the event
+runs again. Handlers run without a request; the API URL the webhook was
+received on is available to them as g.api_base_url.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, g
+
+from ..config import _env_int
+
+
+DEFAULT_BATCH_SIZE = 10
+DEFAULT_POLL_SECONDS = 30
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_RETRY_BASE_SECONDS = 30
+MAX_RETRY_DELAY_SECONDS = 3600
+DEFAULT_RETENTION_DAYS = 30
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_state = {"app": None, "handler": None, "worker_pid": None, "last_prune": 0.0}
+
+
+def retry_delay_seconds(attempts):
+    base = max(1, _env_int("STRIPE_WEBHOOK_RETRY_BASE_SECONDS", DEFAULT_RETRY_BASE_SECONDS))
+    return min(MAX_RETRY_DELAY_SECONDS, base * 2 ** max(0, attempts - 1))
+
+
+def drain_stripe_webhook_inbox(handler, limit=None):
+    """Lease one batch of due events and run handler(event) on each.
+
+    Returns how many events were leased, so callers can keep draining while
+    full batches come back.
+    """
+    from ..db import claim_stripe_webhook_events, complete_stripe_webhook_event, fail_stripe_webhook_event
+
+    batch_size = limit or max(1, _env_int("STRIPE_WEBHOOK_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    max_attempts = max(1, _env_int("STRIPE_WEBHOOK_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+    rows = claim_stripe_webhook_events(
+        limit=batch_size,
+        lease_seconds=max(1, _env_int("STRIPE_WEBHOOK_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)),
+    )
+    for row in rows:
+        attempts = int(row.get("attempts") or 1)
+        g.api_base_url = row.get("api_base_url")
+        try:
+            handler(json.loads(row["payload"]))
+        except Exception as exc:
+            retry_at = None
+            if attempts < max_attempts:
+                retry_at = datetime.utcnow() + timedelta(seconds=retry_delay_seconds(attempts))
+            current_app.logger.warning(
+                "stripe webhook %s failed on attempt %s%s",
+                row["event_id"],
+                attempts,
+                "" if retry_at else "; giving up",
+                exc_info=True,
+            )
+            fail_stripe_webhook_event(row["event_id"], exc, retry_at=retry_at)
+            continue
+        complete_stripe_webhook_event(row["event_id"])
+    return len(rows)
+
+
+def _prune_if_due():
+    from ..db import prune_stripe_webhook_events
+
+    now = time.monotonic()
+    if now - _state["last_prune"] < PRUNE_INTERVAL_SECONDS:
+        return
+    _state["last_prune"] = now
+    prune_stripe_webhook_events(max(1, _env_int("STRIPE_WEBHOOK_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)))
+
+
+def _worker_loop():
+    batch_size = max(1, _env_int("STRIPE_WEBHOOK_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    while True:
+        _wake.wait(max(1, _env_int("STRIPE_WEBHOOK_POLL_SECONDS", DEFAULT_POLL_SECONDS)))
+        _wake.clear()
+        app, handler = _state["app"], _state["handler"]
+        with app.app_context():
+            try:
+                while drain_stripe_webhook_inbox(handler, limit=batch_size) >= batch_size:
+                    pass
+                _prune_if_due()
+            except Exception:
+                current_app.logger.exception("stripe webhook inbox drain failed")
+
+
+def _ensure_worker_thread():
+    with _lock:
+        if _state["app"] is None or _state["worker_pid"] == os.getpid():
+            return
+        # A new pid means a forked worker, which does not inherit the parent's thread.
+        _state["worker_pid"] = os.getpid()
+        threading.Thread(target=_worker_loop, name="stripe-webhook-inbox", daemon=True).start()
+
+
+def start_stripe_webhook_worker(app, handler):
+    """Enable the drain thread for this app; called once per serving process from start_background_workers (backend/app.py)."""
+    with _lock:
+        _state["app"] = app
+        _state["handler"] = handler
+    _ensure_worker_thread()
+    # Drain anything left over from before this process started.
+    _wake.set()
+
+
+def notify_stripe_webhook_worker():
+    """Wake the drain thread, restarting it in a forked worker. No-op when it was never started."""
+    _ensure_worker_thread()
+    _wake.set()
@@ -0,0 +1,92 @@
+import pytest
+from flask import Flask
+
+import backend.db as db_module
+import backend.routes.shop as shop_module
+from backend.auth import create_token
+
+
+class _RecordingCursor:
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+
+class _RecordingConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+def test_customer_query_filters_and_pages_in_sql(monkeypatch):
+    cursor = _RecordingCursor(rows=[{"id": 4, "email": "a@example.com", "customer_category": "signed-up"}])
+    monkeypatch.setattr(db_module, "get_db", lambda: _RecordingConnection(cursor))
+
+    rows = db_module.list_admin_customers(
+        limit=11, after=("2026-03-01T10:00:00", 9), search="Ann_", category="review-customer"
+    )
+
+    sql, params = cursor.executed[0]
+    assert "SELECT *" not in sql
+    assert "password_hash" not in sql
+    assert "AS customer_category" in sql
+    assert "ORDER BY COALESCE(created_at, '') DESC, id DESC" in sql
+    assert params == ("%ann\\_%",) * 4 + ("review-customer", "2026-03-01T10:00:00", 9, 11)
+    assert rows == [{"id": 4, "email": "a@example.com", "customer_category": "signed-up"}]
+
+
+@pytest.fixture
+def customer_pages(monkeypatch):
+    monkeypatch.setenv("APP_ENV", "testing")
+    customers = [
+        {"id": 30 - index, "email": f"c{index}@example.com", "created_at": f"2026-01-{20 - index:02d}"}
+        for index in range(5)
+    ]
+    calls = []
+
+    def fake_list(limit=None, after=None, search=None, category=None):
+        calls.append({"limit": limit, "after": after, "search": search, "category": category})
+        rows = [c for c in customers if after is None or (c["created_at"], c["id"]) < after]
+        return rows[:limit] if limit else rows
+
+    monkeypatch.setattr(shop_module, "list_admin_customers", fake_list)
+    app = Flask(__name__)
+    app.config.update(TESTING=True)
+    app.register_blueprint(shop_module.api, url_prefix="/api")
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {create_token('admin@example.com', role='admin')}"
+    return client, calls
+
+
+def test_customer_endpoint_pages_with_cursor(customer_pages):
+    client, calls = customer_pages
+
+    first = client.get("/api/customers?limit=2&q=example").get_json()
+    assert [c["id"] for c in first["items"]] == [30, 29]
+    assert calls[0] == {"limit": 3, "after": None, "search": "example", "category": None}
+
+    rest = client.get(f"/api/customers?limit=5&cursor={first['next_cursor']}").get_json()
+    assert [c["id"] for c in rest["items"]] == [28, 27, 26]
+    assert rest["next_cursor"] is None
+    assert calls[1]["after"] == ("2026-01-19", 29)
+
+
+def test_customer_endpoint_keeps_full_list_and_validates_params(customer_pages):
+    client, calls = customer_pages
+
+    assert len(client.get("/api/customers").get_json()) == 5
+    assert calls[0]["limit"] is None
+    assert client.get("/api/customers?category=vip").status_code == 400
+    assert client.get("/api/customers?cursor=@@").status_code == 400
+    assert client.get("/api/customers?limit=ten").status_code == 400
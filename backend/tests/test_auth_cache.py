@@ -0,0 +1,99 @@
+import jwt as pyjwt
+import pytest
+from flask import Flask, g, jsonify
+
+import backend.auth as auth
+import backend.db as db_module
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setenv("APP_ENV", "testing")
+    auth.clear_token_cache()
+    auth.invalidate_cached_customer()
+    yield
+    auth.clear_token_cache()
+    auth.invalidate_cached_customer()
+
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    calls = []
+    real_decode = pyjwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    return calls
+
+
+def test_verified_payloads_are_reused_until_the_secret_changes(decode_calls, monkeypatch):
+    token = auth.create_token("7", role="customer", customer_id=7)
+
+    first = auth.decode_token(token)
+    first["role"] = "admin"
+    assert auth.decode_token(token)["role"] == "customer"
+    assert len(decode_calls) == 1
+
+    monkeypatch.setenv("JWT_SECRET", "rotated-secret")
+    with pytest.raises(pyjwt.InvalidSignatureError):
+        auth.decode_token(token)
+
+
+def test_expired_entries_are_verified_again(decode_calls, monkeypatch):
+    token = auth.create_token("7", role="customer", customer_id=7)
+    payload = auth.decode_token(token)
+
+    monkeypatch.setattr(auth.time, "time", lambda: payload["exp"] + 1)
+    auth.decode_token(token)
+    auth.decode_token(token)
+    assert len(decode_calls) == 3
+
+
+def test_decorators_share_one_verification_per_request(decode_calls):
+    app = Flask(__name__)
+
+    @app.get("/twice")
+    @auth.require_auth
+    @auth.require_customer
+    def twice():
+        return jsonify({"customer_id": g.auth_payload["customer_id"], "optional": auth.optional_auth_payload()["sub"]})
+
+    @app.get("/admin")
+    @auth.require_admin
+    def admin_only():
+        return jsonify({"ok": True})
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {auth.create_token('7', role='customer', customer_id=7)}"}
+    assert client.get("/twice", headers=headers).get_json() == {"customer_id": 7, "optional": "7"}
+    assert client.get("/twice", headers=headers).status_code == 200
+    assert len(decode_calls) == 1
+
+    assert client.get("/admin", headers=headers).status_code == 403
+    assert client.get("/admin").get_json() == {"error": "missing_token"}
+    assert client.get("/admin", headers={"Authorization": "Bearer nope"}).get_json() == {"error": "malformed_token"}
+
+
+def test_customer_lookups_are_cached_briefly(monkeypatch):
+    reads = []
+
+    def fake_fetch(customer_id):
+        reads.append(customer_id)
+        return {"id": customer_id, "email": f"c{len(reads)}@example.com"}
+
+    monkeypatch.setattr(db_module, "fetch_customer_by_id", fake_fetch)
+
+    first = auth.cached_customer(7)
+    first.pop("email")
+    assert auth.cached_customer(7)["email"] == "c1@example.com"
+    assert reads == [7]
+
+    auth.invalidate_cached_customer(7)
+    assert auth.cached_customer(7)["email"] == "c2@example.com"
+
+    monkeypatch.setenv("AUTH_CUSTOMER_CACHE_TTL_SECONDS", "0")
+    auth.cached_customer(7)
+    assert reads == [7, 7, 7]
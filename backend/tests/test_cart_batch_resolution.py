@@ -0,0 +1,148 @@
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+import backend.db as db_module
+import backend.routes.shop as shop_module
+
+
+def _template(template_id, digital=True, active=True):
+    return SimpleNamespace(
+        id=template_id,
+        name=f"Pattern {template_id}",
+        price_amount=12,
+        price_currency="USD",
+        thumbnail_url=None,
+        image_url=f"/uploads/templates/{template_id}.png",
+        is_active=active,
+        is_digital_download=digital,
+    )
+
+
+def _manual(product_id, digital=False, quantity=1):
+    return {
+        "id": product_id,
+        "name": f"Panel {product_id}",
+        "price": 80,
+        "old_price": None,
+        "discount_percent": None,
+        "quantity": quantity,
+        "is_active": True,
+        "is_digital_download": digital,
+        "images": [],
+    }
+
+
+@pytest.fixture
+def pattern_sources(monkeypatch):
+    calls = []
+    templates = {1: _template(1), 2: _template(2, digital=False), 3: _template(3, active=False)}
+    manual_products = {10: _manual(10), 11: _manual(11, quantity=0), 12: _manual(12, digital=True)}
+
+    def fake_load(template_ids, manual_ids):
+        calls.append((set(template_ids), set(manual_ids)))
+        return (
+            {key: value for key, value in templates.items() if key in template_ids},
+            {key: value for key, value in manual_products.items() if key in manual_ids},
+        )
+
+    monkeypatch.setattr(shop_module, "_load_pattern_sources", fake_load)
+    return calls
+
+
+def test_checkout_summary_loads_all_products_in_one_batch(pattern_sources):
+    items = [{"product_type": "template", "product_id": str(template_id)} for template_id in (1, 2, 3)]
+    items += [{"product_type": "manual", "product_id": str(product_id)} for product_id in (10, 11, 12, 99)]
+
+    summary = shop_module._build_checkout_summary_from_items(items)
+
+    assert pattern_sources == [({1, 2, 3}, {10, 11, 12, 99})]
+    assert [(item["product_type"], item["product_id"]) for item in summary["items"]] == [
+        ("template", "1"),
+        ("manual", "10"),
+        ("manual", "12"),
+    ]
+    assert summary["items"][1]["requires_shipping"] is True
+    assert summary["items"][2]["is_digital"] is True
+
+
+def test_download_grants_are_upserted_in_one_call(pattern_sources, monkeypatch):
+    upserts = []
+
+    def fake_upsert(customer_id, products, order_id=None, customer_email=None):
+        upserts.append(list(products))
+        return [
+            {"id": index, "download_token": f"token-{index}", "created": True}
+            for index, _ in enumerate(products, start=1)
+        ]
+
+    monkeypatch.setattr(shop_module, "upsert_customer_pattern_downloads", fake_upsert)
+    items = [
+        {"product_type": "template", "product_id": "1"},
+        {"product_type": "template", "product_id": "1"},
+        {"product_type": "template", "product_id": "2"},
+        {"product_type": "manual", "product_id": "12"},
+        {"product_type": "manual", "product_id": "10"},
+    ]
+
+    with Flask(__name__).test_request_context():
+        downloads = shop_module._issue_pattern_downloads(7, 55, items, "buyer@example.com")
+
+    assert len(pattern_sources) == 1
+    assert upserts == [[("template", 1), ("manual", 12)]]
+    assert [(entry["pattern_source_type"], entry["pattern_id"]) for entry in downloads] == [
+        ("template", 1),
+        ("manual", 12),
+    ]
+    assert downloads[1]["download_token"] == "token-2"
+
+
+class _FakeCursor:
+    def __init__(self, statements, existing):
+        self.statements = statements
+        self.existing = existing
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        normalized = " ".join(sql.split())
+        self.statements.append(normalized)
+        if normalized.startswith("SELECT id, product_type"):
+            self.rows = self.existing
+        elif normalized.startswith("INSERT INTO customer_pattern_downloads"):
+            tokens = params[6::10]
+            self.rows = [{"id": 100 + index, "download_token": token} for index, token in enumerate(tokens)]
+        else:
+            self.rows = []
+
+    def fetchall(self):
+        return self.rows
+
+
+class _FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_bulk_grant_upsert_uses_a_fixed_number_of_statements(monkeypatch):
+    statements = []
+    existing = [{"id": 5, "product_type": "template", "template_id": 1, "manual_product_id": None, "download_token": "kept"}]
+    monkeypatch.setattr(db_module, "get_db", lambda: _FakeConnection(_FakeCursor(statements, existing)))
+
+    products = [("template", 1)] + [("manual", product_id) for product_id in range(20, 40)]
+    grants = db_module.upsert_customer_pattern_downloads(7, products, order_id=55)
+
+    assert len(statements) == 4
+    assert grants[0]["download_token"] == "kept"
+    assert grants[0]["created"] is False
+    assert all(grant["created"] for grant in grants[1:])
+    assert [grant["manual_product_id"] for grant in grants[1:]] == list(range(20, 40))
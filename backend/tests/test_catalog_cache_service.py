@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import stat
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+import backend.db as db_module
+from backend.services.catalog_cache_service import (
+    CatalogCache,
+    MemoryCacheBackend,
+    SQLiteCacheBackend,
+    private_cache_dir,
+)
+
+
+@pytest.fixture
+def generations(monkeypatch):
+    counters = {}
+
+    def fake_fetch(namespaces):
+        return {namespace: counters.get(namespace, 0) for namespace in namespaces}
+
+    def fake_bump(namespaces):
+        for namespace in namespaces:
+            counters[namespace] = counters.get(namespace, 0) + 1
+
+    monkeypatch.setattr(db_module, "fetch_cache_generations", fake_fetch)
+    monkeypatch.setattr(db_module, "bump_cache_generations", fake_bump)
+    with Flask(__name__).app_context():
+        yield counters
+
+
+def test_invalidation_from_one_worker_is_seen_by_another(generations, tmp_path):
+    path = tmp_path / "catalog.sqlite3"
+    worker_a = CatalogCache(SQLiteCacheBackend(path))
+    worker_b = CatalogCache(SQLiteCacheBackend(path))
+
+    assert worker_a.get_or_compute("items", lambda: ["old price"]) == ["old price"]
+    assert worker_b.get_or_compute("items", lambda: ["unexpected"]) == ["old price"]
+
+    worker_a.invalidate("items")
+
+    assert worker_b.get_or_compute("items", lambda: ["new price"]) == ["new price"]
+    assert worker_a.get_or_compute("items", lambda: ["unexpected"]) == ["new price"]
+
+
+def test_concurrent_misses_compute_once(generations):
+    cache = CatalogCache(MemoryCacheBackend())
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return ["catalog"]
+
+    def read():
+        results.append(cache.get_or_compute("manual_products_summary", compute))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [["catalog"]] * 8
+
+
+def test_waits_for_the_worker_holding_the_fill_lease(generations, tmp_path):
+    path = tmp_path / "catalog.sqlite3"
+    leader = SQLiteCacheBackend(path)
+    follower = CatalogCache(SQLiteCacheBackend(path))
+    assert leader.acquire_lease("items", 5)
+
+    def finish_fill():
+        time.sleep(0.2)
+        leader.set("items", 0, time.time() + 60, ["filled by leader"])
+        leader.release_lease("items")
+
+    filler = threading.Thread(target=finish_fill)
+    filler.start()
+    value = follower.get_or_compute("items", lambda: ["duplicate query"])
+    filler.join()
+
+    assert value == ["filled by leader"]
+
+
+def test_entries_are_stored_as_json_and_foreign_payloads_are_misses(tmp_path):
+    path = tmp_path / "catalog.sqlite3"
+    backend = SQLiteCacheBackend(path)
+    backend.set("items", 3, 99.0, [{"id": 1, "price": 12.5}])
+    assert backend.get("items") == (3, 99.0, [{"id": 1, "price": 12.5}])
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT payload FROM entries").fetchone()[0] == '[{"id":1,"price":12.5}]'
+        conn.execute("UPDATE entries SET payload = ?", (b"\x80\x04not json",))
+    assert backend.get("items") is None
+
+
+def test_cache_dir_is_private_to_the_deployment(generations, tmp_path, monkeypatch):
+    monkeypatch.setenv("CATALOG_CACHE_DIR", str(tmp_path))
+
+    path = private_cache_dir()
+
+    assert os.path.dirname(path) == str(tmp_path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+    assert private_cache_dir() == path
+
+    os.chmod(path, 0o777)
+    with pytest.raises(OSError):
+        private_cache_dir()
@@ -0,0 +1,118 @@
+import smtplib
+from contextlib import contextmanager
+
+import pytest
+from flask import Flask
+from flask_mail import Mail
+
+import backend.db as db_module
+from backend.services import email_outbox_service
+from backend.utils.email import send_email
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    state = {"queued": [], "rows": [], "sent": [], "failed": {}}
+
+    def fake_enqueue(recipient, subject, html_body, sender=None, reply_to=None):
+        state["queued"].append((recipient, subject))
+        return len(state["queued"])
+
+    def fake_claim(limit, lease_seconds):
+        batch, state["rows"] = state["rows"][:limit], state["rows"][limit:]
+        return batch
+
+    monkeypatch.setattr(db_module, "enqueue_outbound_email", fake_enqueue)
+    monkeypatch.setattr(db_module, "claim_outbound_emails", fake_claim)
+    monkeypatch.setattr(db_module, "mark_outbound_emails_sent", lambda ids: state["sent"].extend(ids))
+    monkeypatch.setattr(
+        db_module,
+        "fail_outbound_email",
+        lambda email_id, error, retry_at=None: state["failed"].__setitem__(email_id, retry_at),
+    )
+    monkeypatch.setattr(email_outbox_service, "notify_email_outbox_worker", lambda: None)
+    monkeypatch.setenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "3")
+    app = Flask(__name__)
+    app.config.update(MAIL_DEFAULT_SENDER="shop@example.com", MAIL_SUPPRESS_SEND=True)
+    Mail(app)
+    with app.app_context():
+        yield state
+
+
+def _row(email_id, attempts=1):
+    return {
+        "id": email_id,
+        "recipient": f"customer{email_id}@example.com",
+        "subject": "Order",
+        "html_body": "<p>Thanks</p>",
+        "sender": None,
+        "reply_to": None,
+        "attempts": attempts,
+    }
+
+
+class _FakeMail:
+    def __init__(self, failures):
+        self.failures = failures
+        self.connections = 0
+        self.delivered = []
+
+    @contextmanager
+    def connect(self):
+        self.connections += 1
+        yield self
+
+    def send(self, message):
+        failure = self.failures.get(message.recipients[0])
+        if failure:
+            raise failure
+        self.delivered.append(message.recipients[0])
+
+
+def test_send_email_only_queues_the_message(outbox):
+    assert send_email("buyer@example.com", "Your pattern", "<p>Ready</p>") is True
+    assert outbox["queued"] == [("buyer@example.com", "Your pattern")]
+
+
+def test_batch_reuses_one_connection_and_sorts_failures(outbox):
+    outbox["rows"] = [_row(1), _row(2), _row(3), _row(4, attempts=3)]
+    mail = _FakeMail({
+        "customer2@example.com": smtplib.SMTPRecipientsRefused({"customer2@example.com": (550, b"no such user")}),
+        "customer3@example.com": smtplib.SMTPDataError(451, b"try again later"),
+        "customer4@example.com": smtplib.SMTPDataError(451, b"try again later"),
+    })
+
+    assert email_outbox_service.drain_email_outbox(mail, limit=2) == 4
+
+    assert mail.connections == 1
+    assert outbox["sent"] == [1]
+    assert outbox["failed"][2] is None
+    assert outbox["failed"][3] is not None
+    assert outbox["failed"][4] is None
+
+
+def test_dropped_connection_retries_only_unsent_messages(outbox):
+    outbox["rows"] = [_row(1), _row(2), _row(3)]
+    mail = _FakeMail({"customer2@example.com": smtplib.SMTPServerDisconnected("gone")})
+
+    assert email_outbox_service.drain_email_outbox(mail, limit=5) == 3
+
+    assert outbox["sent"] == [1]
+    assert set(outbox["failed"]) == {2, 3}
+    assert all(retry_at is not None for retry_at in outbox["failed"].values())
+
+
+def test_retry_delay_has_jitter_within_bounds():
+    delays = {round(email_outbox_service.retry_delay_seconds(2), 3) for _ in range(20)}
+    assert len(delays) > 1
+    assert all(60 <= delay <= 120 for delay in delays)
+
+
+def test_queueing_never_starts_a_worker_that_was_never_started(monkeypatch):
+    started = []
+    monkeypatch.setitem(email_outbox_service._state, "app", None)
+    monkeypatch.setattr(email_outbox_service.threading, "Thread", lambda **kwargs: started.append(kwargs))
+
+    email_outbox_service.notify_email_outbox_worker()
+
+    assert started == []
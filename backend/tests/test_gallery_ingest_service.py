@@ -0,0 +1,121 @@
+import io
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+import backend.db as db_module
+from backend.services import gallery_ingest_service as ingest
+
+
+def _jpeg(width=3000, height=1500):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (180, 90, 30)).save(out, format="JPEG")
+    return out.getvalue()
+
+
+def _upload(data, name="photo.jpg"):
+    return FileStorage(stream=io.BytesIO(data), filename=name, content_type="image/jpeg")
+
+
+def test_spooled_photos_are_downscaled_to_every_size_in_parallel(monkeypatch, tmp_path):
+    monkeypatch.setenv("GALLERY_INGEST_WORKERS", "3")
+    spooled = [ingest.spool_upload(_upload(_jpeg()), 5 * 1024 * 1024, suffix=".jpeg")[0] for _ in range(3)]
+
+    processed = ingest.process_gallery_photos([(path, ".jpeg", "image/jpeg") for path in spooled])
+
+    assert len(processed) == 3
+    for result in processed:
+        assert result["ext"] == ".jpg"
+        sizes = {}
+        for name, data in result["variants"].items():
+            with Image.open(io.BytesIO(data)) as image:
+                sizes[name] = max(image.size)
+        assert sizes == {"full": 2000, "medium": 1000, "thumbnail": 400}
+
+    urls, paths = ingest.write_gallery_variants(str(tmp_path), "abc", processed[0])
+    assert urls == {
+        "full": "/uploads/gallery/abc.jpg",
+        "medium": "/uploads/gallery/abc-medium.jpg",
+        "thumbnail": "/uploads/gallery/abc-thumbnail.jpg",
+    }
+    assert all((tmp_path / p.rsplit("/", 1)[1]).is_file() for p in paths)
+    for path in spooled:
+        ingest.discard_spooled(path)
+
+
+def test_oversized_upload_is_rejected_without_leaving_a_temp_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(ingest.tempfile, "tempdir", str(tmp_path))
+
+    with pytest.raises(ingest.UploadTooLarge):
+        ingest.spool_upload(_upload(b"x" * (3 * ingest.SPOOL_CHUNK_BYTES)), 2 * ingest.SPOOL_CHUNK_BYTES)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unreadable_photo_keeps_original_bytes(tmp_path):
+    path = tmp_path / "broken.png"
+    path.write_bytes(b"not-an-image")
+
+    result = ingest.process_gallery_photo(str(path), ".png", "image/png")
+
+    assert result == {"ext": ".png", "mime": "image/png", "variants": {"full": b"not-an-image"}}
+
+
+class _SequenceCursor:
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+
+    def fetchone(self):
+        return self.rows.pop(0)
+
+
+class _Connection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+def test_gallery_media_lookup_renders_smaller_sizes_from_the_full_blob(monkeypatch):
+    cursor = _SequenceCursor([None, None, {"id": 4, "mime": "image/jpeg", "byte_size": 90000}])
+    monkeypatch.setattr(db_module, "get_db", lambda: _Connection(cursor))
+
+    blob = db_module.find_media_blob("gallery", "abc-thumbnail.jpg")
+
+    assert blob == {"id": 4, "mime": "image/jpeg", "byte_size": 90000, "rendition": "thumbnail"}
+    assert "medium_url" in cursor.executed[1]
+    assert "thumbnail_url" in cursor.executed[2]
+    assert all("octet_length(image_data)" in sql for sql in cursor.executed)
+
+
+def test_missing_thumbnail_is_rendered_from_the_full_blob_and_written_to_disk(monkeypatch, tmp_path):
+    from flask import Flask
+
+    from backend.services.media_service import serve_media
+
+    full = _jpeg(2000, 1000)
+    monkeypatch.setattr(
+        db_module,
+        "find_media_blob",
+        lambda kind, filename: {"id": 4, "mime": "image/jpeg", "byte_size": len(full), "rendition": "thumbnail"},
+    )
+    monkeypatch.setattr(db_module, "iter_media_blob", lambda kind, row_id: iter([full[:500], full[500:]]))
+
+    with Flask(__name__).test_request_context():
+        response = serve_media("gallery", "abc-thumbnail.jpg", [tmp_path])
+        response.direct_passthrough = False
+        body = response.get_data()
+
+    assert (tmp_path / "abc-thumbnail.jpg").read_bytes() == body
+    with Image.open(io.BytesIO(body)) as image:
+        assert image.size == (400, 200)
+    assert ingest.render_gallery_rendition(b"not-an-image", "medium") is None
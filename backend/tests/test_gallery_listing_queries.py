@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+import backend.db as db_module
+from backend.models import GalleryPhoto, Template, db
+from backend.routes.gallery import gallery_bp
+from backend.services import catalog_cache_service
+from backend.services.catalog_cache_service import (
+    GALLERY_FACET_KEYS,
+    CatalogCache,
+    MemoryCacheBackend,
+    invalidate_catalog_cache,
+)
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def gallery_app(monkeypatch):
+    monkeypatch.setenv("APP_ENV", "testing")
+    generations = {}
+    monkeypatch.setattr(
+        db_module, "fetch_cache_generations", lambda keys: {key: generations.get(key, 0) for key in keys}
+    )
+    monkeypatch.setattr(
+        db_module,
+        "bump_cache_generations",
+        lambda keys: generations.update({key: generations.get(key, 0) + 1 for key in keys}),
+    )
+    monkeypatch.setattr(catalog_cache_service, "_catalog_cache", CatalogCache(MemoryCacheBackend()))
+
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite:///:memory:")
+    db.init_app(app)
+    app.register_blueprint(gallery_bp, url_prefix="/api")
+    with app.app_context():
+        db.create_all()
+        rose = Template(name="Rose", svg_content="<svg/>")
+        aster = Template(name="aster", svg_content="<svg/>")
+        db.session.add_all([rose, aster])
+        db.session.flush()
+
+        def photo(minutes, group=None, **fields):
+            fields.setdefault("approval_status", "approved")
+            db.session.add(GalleryPhoto(
+                panel_name=f"Panel {minutes}",
+                image_url=f"/uploads/gallery/{minutes}.jpg",
+                submission_group_id=group,
+                created_at=START + timedelta(minutes=minutes),
+                **fields,
+            ))
+
+        photo(1, "g-a", category="Windows", template_id=rose.id)
+        photo(5, "g-a", category="Windows", template_id=rose.id)
+        photo(2)
+        photo(3, "g-b", category="Lamps", template_id=aster.id)
+        photo(4, "g-c")
+        photo(6, "g-d", category="Secret", is_hidden=True)
+        photo(7, "g-e", category="Pending", approval_status="pending")
+        db.session.commit()
+        db.session.remove()
+        yield app
+
+
+@pytest.fixture
+def statements(gallery_app):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    with gallery_app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _panels(body):
+    return [item["panel_name"] for item in body["items"]]
+
+
+def test_page_is_one_query_once_facets_are_cached(gallery_app, statements):
+    client = gallery_app.test_client()
+    client.get("/api/gallery/photos?page=1&per_page=2")
+    statements.clear()
+
+    body = client.get("/api/gallery/photos?page=1&per_page=2").get_json()
+
+    assert len(statements) == 1
+    assert _panels(body) == ["Panel 5", "Panel 1", "Panel 4"]
+    assert body["items"][0]["template_name"] == "Rose"
+    assert (body["total_items"], body["total_pages"], body["page"]) == (4, 2, 1)
+    assert body["categories"] == ["Lamps", "Windows"]
+    assert body["templates"] == [{"id": 2, "name": "aster"}, {"id": 1, "name": "Rose"}]
+
+
+def test_page_past_the_end_is_clamped(gallery_app):
+    body = gallery_app.test_client().get("/api/gallery/photos?page=9&per_page=3").get_json()
+
+    assert body["page"] == 2
+    assert _panels(body) == ["Panel 2"]
+    assert body["total_items"] == 4
+
+
+def test_cursor_walks_every_group_once(gallery_app):
+    client = gallery_app.test_client()
+    body = client.get("/api/gallery/photos?per_page=2").get_json()
+    seen = _panels(body)
+    while body["next_cursor"]:
+        body = client.get(f"/api/gallery/photos?per_page=2&cursor={body['next_cursor']}").get_json()
+        seen.extend(_panels(body))
+
+    assert seen == ["Panel 5", "Panel 1", "Panel 4", "Panel 3", "Panel 2"]
+    assert "total_pages" not in body
+    assert client.get("/api/gallery/photos?per_page=1&cursor=nope").status_code == 400
+
+
+def test_facets_ignore_filters_and_refresh_on_invalidation(gallery_app):
+    client = gallery_app.test_client()
+    body = client.get("/api/gallery/photos?category=lamps").get_json()
+    assert _panels(body) == ["Panel 3"]
+    assert body["categories"] == ["Lamps", "Windows"]
+
+    with gallery_app.app_context():
+        db.session.get(GalleryPhoto, 3).category = "Doors"
+        db.session.commit()
+    assert client.get("/api/gallery/photos").get_json()["categories"] == ["Lamps", "Windows"]
+
+    with gallery_app.app_context():
+        invalidate_catalog_cache(*GALLERY_FACET_KEYS)
+    assert client.get("/api/gallery/photos").get_json()["categories"] == ["Doors", "Lamps", "Windows"]
@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+import pytest
+
+import backend.routes.shop as shop_module
+from backend.app import create_app
+
+
+def _product(product_id, updated_at, price=25):
+    return {
+        "id": product_id,
+        "name": f"Panel {product_id}",
+        "description": "Stained glass panel",
+        "price": price,
+        "quantity": 2,
+        "is_active": True,
+        "is_digital_download": False,
+        "updated_at": updated_at,
+        "images": [{"image_url": f"/uploads/products/{product_id}.jpg", "media_type": "image"}],
+    }
+
+
+@pytest.fixture
+def feed_client(monkeypatch):
+    shop_module._google_feed_fragments.clear()
+    monkeypatch.setitem(shop_module._google_feed_state, "etag", None)
+    monkeypatch.setitem(shop_module._google_feed_state, "changed_at", None)
+    app = create_app()
+    app.config["TESTING"] = True
+    catalog = [_product(1, "2026-01-01T10:00:00"), _product(2, "2026-01-02T10:00:00")]
+    rendered = []
+    original_render = shop_module._render_google_feed_item
+
+    def counting_render(product, image_link, storefront_base_url):
+        rendered.append(product["id"])
+        return original_render(product, image_link, storefront_base_url)
+
+    with patch.object(shop_module, "cached_catalog", lambda _key, _compute: catalog), patch.object(
+        shop_module, "_render_google_feed_item", counting_render
+    ):
+        with app.test_client() as client:
+            yield {"client": client, "catalog": catalog, "rendered": rendered}
+    shop_module._google_feed_fragments.clear()
+
+
+def test_feed_is_revalidated_with_etag(feed_client):
+    client = feed_client["client"]
+
+    first = client.get("/api/google-merchant-feed.xml")
+    assert first.status_code == 200
+    assert b"<g:id>1</g:id>" in first.data
+    assert b"<g:id>2</g:id>" in first.data
+    assert first.headers["Last-Modified"] == "Fri, 02 Jan 2026 10:00:00 GMT"
+
+    repeat = client.get("/api/google-merchant-feed.xml", headers={"If-None-Match": first.headers["ETag"]})
+    assert repeat.status_code == 304
+
+
+def test_only_changed_products_are_re_rendered(feed_client):
+    client = feed_client["client"]
+    first = client.get("/api/google-merchant-feed.xml")
+    feed_client["rendered"].clear()
+
+    feed_client["catalog"][0] = _product(1, "2026-01-03T09:00:00", price=30)
+    second = client.get("/api/google-merchant-feed.xml", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert b"<g:price>30.00 USD</g:price>" in second.data
+    assert feed_client["rendered"] == [1]
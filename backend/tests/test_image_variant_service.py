@@ -0,0 +1,113 @@
+import io
+import os
+
+import pytest
+from flask import Flask
+from PIL import Image, features
+
+import backend.db as db_module
+import backend.services.image_variant_service as variants
+from backend.services.image_variant_service import serve_upload
+
+
+def _jpeg(width=1200, height=600):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (30, 120, 200)).save(out, format="JPEG")
+    return out.getvalue()
+
+
+@pytest.fixture
+def variant_app(tmp_path):
+    app = Flask(__name__, root_path=str(tmp_path))
+    app.config.update(TESTING=True, UPLOAD_FOLDER=str(tmp_path / "uploads"))
+    products_dir = tmp_path / "uploads" / "products"
+    products_dir.mkdir(parents=True)
+    (products_dir / "vase.jpg").write_bytes(_jpeg())
+
+    @app.route("/uploads/products/<path:filename>")
+    def send_product_image(filename):
+        resp = serve_upload("products", filename, [products_dir], default_mimetype="image/jpeg")
+        if resp is None:
+            return {"error": "Image not found"}, 404
+        return resp
+
+    return app
+
+
+def _size(response):
+    with Image.open(io.BytesIO(response.get_data())) as image:
+        return image.format, image.size
+
+
+@pytest.mark.skipif(not features.check("webp"), reason="Pillow built without WebP")
+def test_width_is_snapped_and_format_negotiated(variant_app, tmp_path):
+    client = variant_app.test_client()
+
+    response = client.get("/uploads/products/vase.jpg?w=400", headers={"Accept": "image/webp,image/*"})
+
+    assert response.status_code == 200
+    assert response.mimetype == "image/webp"
+    assert "Accept" in response.headers.get("Vary", "")
+    assert _size(response) == ("WEBP", (480, 240))
+    cached = list((tmp_path / "uploads" / "variants" / "products").iterdir())
+    assert [path.name.rsplit("-", 1)[1] for path in cached] == ["480.webp"]
+
+    again = client.get("/uploads/products/vase.jpg?w=400", headers={"Accept": "image/webp"})
+    assert again.get_data() == response.get_data()
+
+
+def test_explicit_format_and_plain_requests(variant_app, tmp_path):
+    client = variant_app.test_client()
+
+    response = client.get("/uploads/products/vase.jpg?w=160&fmt=png", headers={"Accept": "image/webp"})
+    assert response.mimetype == "image/png"
+    assert "Accept" not in response.headers.get("Vary", "")
+    assert _size(response) == ("PNG", (160, 80))
+
+    plain = client.get("/uploads/products/vase.jpg")
+    assert _size(plain) == ("JPEG", (1200, 600))
+    assert client.get("/uploads/products/vase.jpg?w=big").status_code == 400
+    assert client.get("/uploads/products/vase.jpg?fmt=tiff").status_code == 400
+    assert client.get("/uploads/products/missing.jpg?w=320").status_code == 404
+
+
+def test_source_is_restored_from_database_before_resizing(variant_app, tmp_path, monkeypatch):
+    data = _jpeg(800, 800)
+    monkeypatch.setattr(
+        db_module,
+        "find_media_blob",
+        lambda kind, filename: {"id": 7, "mime": "image/jpeg", "byte_size": len(data), "kind": kind},
+    )
+    monkeypatch.setattr(db_module, "iter_media_blob", lambda kind, row_id: iter([data]))
+
+    response = variant_app.test_client().get("/uploads/products/restored.jpg?w=320", headers={"Accept": "image/jpeg"})
+
+    assert _size(response) == ("JPEG", (320, 320))
+    assert (tmp_path / "uploads" / "products" / "restored.jpg").read_bytes() == data
+
+
+def test_cache_size_is_tracked_without_rescanning_every_write(tmp_path, monkeypatch):
+    cache_root = tmp_path / "variants"
+    (cache_root / "products").mkdir(parents=True)
+    scans = []
+    evict = variants._evict
+    monkeypatch.setattr(variants, "_usage", {})
+    monkeypatch.setattr(variants, "_evict", lambda root, limit: scans.append(root) or evict(root, limit))
+
+    def write(name, size):
+        path = cache_root / "products" / name
+        path.write_bytes(b"x" * size)
+        stamp = 1_700_000_000 + len(list(path.parent.iterdir()))
+        os.utime(path, (stamp, stamp))
+        variants._record_variant_write(cache_root, size, 1000)
+        return path
+
+    first = write("a.webp", 400)
+    write("b.webp", 300)
+    write("c.webp", 200)
+    assert len(scans) == 1
+
+    write("d.webp", 400)
+    assert len(scans) == 2
+    assert not first.exists()
+    assert sorted(p.name for p in (cache_root / "products").iterdir()) == ["b.webp", "c.webp", "d.webp"]
@@ -0,0 +1,75 @@
+import pytest
+
+import backend.db as db_module
+
+
+class _FakeCursor:
+    def __init__(self, results, statements):
+        self.results = results
+        self.statements = statements
+        self.pending = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(" ".join(sql.split()))
+        self.pending = self.results.pop(0)
+
+    def fetchall(self):
+        return self.pending
+
+
+class _FakeConnection:
+    def __init__(self, results, statements):
+        self._cursor = _FakeCursor(results, statements)
+
+    def cursor(self):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    state = {"results": [], "statements": []}
+    monkeypatch.setattr(db_module, "get_db", lambda: _FakeConnection(state["results"], state["statements"]))
+    return state
+
+
+def test_images_for_every_product_load_in_one_query_without_blobs(fake_db):
+    fake_db["results"] = [
+        [
+            {"id": 2, "name": "Rose", "category": '["Panels"]', "is_active": 1, "related_links": None},
+            {"id": 1, "name": "Iris", "category": None, "is_active": 0, "related_links": None},
+        ],
+        [
+            {"product_id": 1, "image_url": "/uploads/products/iris.jpg", "media_type": None},
+            {"product_id": 2, "image_url": "/uploads/products/rose-1.jpg", "media_type": "image"},
+            {"product_id": 2, "image_url": "/uploads/products/rose-2.mp4", "media_type": "video"},
+        ],
+    ]
+
+    products = db_module.fetch_manual_products(fields=["name", "category", "is_active", "images"])
+
+    assert len(fake_db["statements"]) == 2
+    assert all("image_data" not in statement for statement in fake_db["statements"])
+    assert fake_db["statements"][0].startswith("SELECT p.id, p.name, p.category, p.is_active FROM manual_products")
+    assert products[0]["category"] == ["Panels"]
+    assert products[0]["is_active"] is True
+    assert [image["image_url"] for image in products[0]["images"]] == [
+        "/uploads/products/rose-1.jpg",
+        "/uploads/products/rose-2.mp4",
+    ]
+    assert products[1]["images"] == [{"image_url": "/uploads/products/iris.jpg", "media_type": "image"}]
+
+
+def test_projection_without_images_skips_the_image_query(fake_db):
+    fake_db["results"] = [[{"id": 1, "price": 40.0}]]
+
+    assert db_module.fetch_manual_products(fields=["price"]) == [{"id": 1, "price": 40.0}]
+    assert len(fake_db["statements"]) == 1
+
+
+def test_unknown_fields_are_rejected(fake_db):
+    with pytest.raises(ValueError):
+        db_module.fetch_manual_products(fields=["name", "image_data"])
+    assert fake_db["statements"] == []
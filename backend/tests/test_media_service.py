@@ -0,0 +1,77 @@
+import pytest
+from flask import Flask, jsonify
+
+import backend.db as db_module
+from backend.services.media_service import serve_media
+
+
+VIDEO_BYTES = bytes(range(256)) * 64
+
+
+@pytest.fixture
+def media_client(tmp_path, monkeypatch):
+    lookups = []
+
+    def fake_find(kind, filename):
+        lookups.append((kind, filename))
+        if filename != "clip.mp4":
+            return None
+        return {"id": 7, "mime": "video", "byte_size": len(VIDEO_BYTES)}
+
+    def fake_iter(_kind, _row_id, chunk_size=1000):
+        for offset in range(0, len(VIDEO_BYTES), chunk_size):
+            yield VIDEO_BYTES[offset:offset + chunk_size]
+
+    monkeypatch.setattr(db_module, "find_media_blob", fake_find)
+    monkeypatch.setattr(db_module, "iter_media_blob", fake_iter)
+
+    app = Flask(__name__)
+
+    @app.get("/uploads/products/<path:filename>")
+    def send_product(filename):
+        resp = serve_media("products", filename, [tmp_path / "products"], default_mimetype="image/jpeg")
+        if resp is None:
+            return jsonify({"error": "Image not found"}), 404
+        return resp
+
+    with app.test_client() as client:
+        yield {"client": client, "lookups": lookups, "root": tmp_path}
+
+
+def test_database_blob_is_restored_to_disk_and_revalidated_by_etag(media_client):
+    client = media_client["client"]
+
+    first = client.get("/uploads/products/clip.mp4")
+    assert first.status_code == 200
+    assert first.mimetype == "video/mp4"
+    assert first.data == VIDEO_BYTES
+    assert first.headers["ETag"]
+    assert (media_client["root"] / "products" / "clip.mp4").read_bytes() == VIDEO_BYTES
+
+    repeat = client.get("/uploads/products/clip.mp4", headers={"If-None-Match": first.headers["ETag"]})
+    assert repeat.status_code == 304
+    assert media_client["lookups"] == [("products", "clip.mp4")]
+
+
+def test_range_requests_return_partial_content(media_client):
+    client = media_client["client"]
+    client.get("/uploads/products/clip.mp4")
+
+    response = client.get("/uploads/products/clip.mp4", headers={"Range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 100-199/{len(VIDEO_BYTES)}"
+    assert response.data == VIDEO_BYTES[100:200]
+
+
+def test_local_files_are_served_without_a_database_lookup(media_client):
+    products_dir = media_client["root"] / "products"
+    products_dir.mkdir()
+    (products_dir / "local.jpg").write_bytes(b"jpeg-bytes")
+
+    response = media_client["client"].get("/uploads/products/local.jpg")
+
+    assert response.status_code == 200
+    assert response.data == b"jpeg-bytes"
+    assert media_client["lookups"] == []
+    assert media_client["client"].get("/uploads/products/missing.jpg").status_code == 404
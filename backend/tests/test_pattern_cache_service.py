@@ -0,0 +1,69 @@
+import shutil
+
+import pytest
+from flask import Flask
+
+import backend.db as db_module
+from backend.services import pattern_cache_service
+from backend.services.pattern_cache_service import get_numbered_pattern, pattern_cache_key
+
+
+@pytest.fixture
+def cache_app(tmp_path, monkeypatch):
+    stored = {}
+    renders = []
+
+    def fake_render(image_bytes):
+        renders.append(image_bytes)
+        return b"PNG:" + image_bytes
+
+    monkeypatch.setattr(pattern_cache_service, "render_numbered_pattern_raster", fake_render)
+    monkeypatch.setattr(db_module, "fetch_pattern_render_cache", lambda key: stored.get(key))
+    monkeypatch.setattr(
+        db_module,
+        "store_pattern_render_cache",
+        lambda key, _version, data: stored.__setitem__(key, data),
+    )
+    pattern_cache_service.clear_memory_cache()
+
+    app = Flask(__name__)
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    with app.app_context():
+        yield {"stored": stored, "renders": renders, "root": tmp_path}
+    pattern_cache_service.clear_memory_cache()
+
+
+def test_repeat_downloads_are_served_from_disk_without_rerendering(cache_app):
+    first_path, first_bytes = get_numbered_pattern(b"source")
+    pattern_cache_service.clear_memory_cache()
+    second_path, second_bytes = get_numbered_pattern(b"source")
+
+    assert first_bytes == b"PNG:source"
+    assert second_bytes is None
+    assert second_path == first_path
+    assert second_path.read_bytes() == b"PNG:source"
+    assert cache_app["renders"] == [b"source"]
+    assert cache_app["stored"] == {pattern_cache_key(b"source"): b"PNG:source"}
+
+
+def test_database_tier_restores_renders_after_filesystem_reset(cache_app):
+    get_numbered_pattern(b"source")
+    shutil.rmtree(cache_app["root"] / pattern_cache_service.CACHE_DIRNAME)
+    pattern_cache_service.clear_memory_cache()
+
+    path, data = get_numbered_pattern(b"source")
+
+    assert data == b"PNG:source"
+    assert path.is_file()
+    assert cache_app["renders"] == [b"source"]
+
+
+def test_disk_tier_evicts_least_recently_used_renders(cache_app, monkeypatch):
+    monkeypatch.setenv("PATTERN_CACHE_DISK_BYTES", "25")
+    monkeypatch.setenv("PATTERN_CACHE_MEMORY_BYTES", "0")
+
+    old_path, _ = get_numbered_pattern(b"first-source")
+    new_path, _ = get_numbered_pattern(b"second-source")
+
+    assert not old_path.exists()
+    assert new_path.is_file()
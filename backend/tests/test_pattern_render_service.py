@@ -1,7 +1,9 @@
 from io import BytesIO
 
+import pytest
 from PIL import Image, ImageDraw
 
+from backend.services import pattern_render_service
 from backend.services.pattern_render_service import _build_line_mask, _get_fitted_section_label_font_px, render_numbered_pattern_raster
 
 
@@ -102,4 +104,53 @@ def test_render_numbered_pattern_raster_replaces_existing_labels_instead_of_doub
         first_dark = count_dark_pixels(first_rgb)
         second_dark = count_dark_pixels(second_rgb)
 
-    assert second_dark <= int(first_dark * 1.12)
\ No newline at end of file
+    assert second_dark <= int(first_dark * 1.12)
+
+
+def _crowded_pattern_bytes():
+    image = Image.new("RGB", (240, 160), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((10, 10, 230, 150), outline="black", width=3)
+    draw.line((10, 80, 230, 80), fill="black", width=2)
+    draw.line((90, 10, 90, 150), fill="black", width=2)
+    draw.line((160, 10, 40, 150), fill="black", width=1)
+    draw.ellipse((120, 30, 200, 130), outline="black", width=2)
+    draw.text((40, 35), "12", fill="black")
+    for point in ((60, 120), (61, 121), (200, 20)):
+        image.putpixel(point, (20, 20, 20))
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_numpy_line_mask_matches_python_engine():
+    np = pytest.importorskip("numpy")
+    image = Image.new("RGB", (48, 40), (248, 244, 239))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((5, 5, 30, 30), outline=(12, 12, 12), width=2)
+    draw.line((0, 39, 47, 0), fill=(40, 40, 40), width=1)
+    for point in ((40, 3), (41, 4), (3, 36)):
+        image.putpixel(point, (70, 68, 66))
+
+    python_mask = _build_line_mask(image.load(), image.width, image.height)
+    dark_mask = pattern_render_service._dark_line_mask_array(np.array(image))
+    numpy_mask = pattern_render_service._build_line_mask_array(dark_mask)
+
+    assert numpy_mask.ravel().astype(int).tolist() == python_mask
+
+
+def test_numpy_engine_produces_same_labels_and_png_as_python_engine():
+    pytest.importorskip("numpy")
+    source = _crowded_pattern_bytes()
+
+    numpy_render = render_numbered_pattern_raster(source, engine="numpy")
+    python_render = render_numbered_pattern_raster(source, engine="python")
+
+    assert numpy_render is not None
+    assert numpy_render == python_render
+
+
+def test_render_engine_flag_rejects_unknown_engines():
+    with pytest.raises(ValueError):
+        pattern_render_service.resolve_render_engine("gpu")
+    assert pattern_render_service.resolve_render_engine("python") == "python"
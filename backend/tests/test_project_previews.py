@@ -0,0 +1,230 @@
+import base64
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from PIL import Image
+
+from backend.auth import create_token
+from backend.models import UserProject, WorkOrder, db
+from backend.routes.projects import projects_bp
+from backend.routes.work_orders import admin_work_orders_bp, work_orders_bp
+import backend.db as db_module
+from backend.services.project_preview_service import render_thumbnail
+
+
+def _data_url(width=1200, height=800, color=(200, 40, 40, 255), format="PNG", mime="image/png"):
+    out = io.BytesIO()
+    image = Image.new("RGBA", (width, height), color)
+    (image.convert("RGB") if format in {"GIF", "JPEG"} else image).save(out, format=format)
+    return f"data:{mime};base64," + base64.b64encode(out.getvalue()).decode("ascii")
+
+
+@pytest.fixture
+def preview_app(monkeypatch):
+    monkeypatch.setenv("APP_ENV", "testing")
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite:///:memory:")
+    db.init_app(app)
+    app.register_blueprint(projects_bp)
+    app.register_blueprint(work_orders_bp)
+    app.register_blueprint(admin_work_orders_bp)
+    with app.app_context():
+        db.create_all()
+        base = datetime(2026, 1, 1, 12, 0, 0)
+        for index in range(3):
+            project = UserProject(
+                user_id=7,
+                name=f"Design {index}",
+                design_data={"dataUrl": _data_url(), "r1": {"color": "#ff0000"}},
+                updated_at=base + timedelta(minutes=index),
+            )
+            db.session.add(project)
+            db.session.flush()
+            db.session.add(
+                WorkOrder(
+                    work_order_number=f"WO-2026-000{index + 1}",
+                    project_id=project.id,
+                    user_id=7,
+                    created_at=base + timedelta(minutes=index),
+                )
+            )
+        db.session.commit()
+        yield app
+
+
+@pytest.fixture
+def headers():
+    return {"Authorization": f"Bearer {create_token('7', role='customer', customer_id=7)}"}
+
+
+def _path(url):
+    return url.replace("http://localhost", "")
+
+
+def test_render_thumbnail_downscales_to_webp():
+    raw = base64.b64decode(_data_url().split(",", 1)[1])
+    data = render_thumbnail(raw, max_edge=100)
+
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.format == "WEBP"
+        assert max(image.size) == 100
+    assert render_thumbnail(b"not-an-image") is None
+
+
+def test_saving_a_design_stores_the_preview_and_keeps_canvas_data(preview_app):
+    project = UserProject.query.first()
+
+    # dataUrl is the flood-fill canvas the designer reopens from, so it stays.
+    assert set(project.design_data) == {"dataUrl", "r1"}
+    assert len(project.preview_hash) == 64
+    assert project.preview_mime == "image/png"
+    assert project.thumbnail_data
+
+    first_hash = project.preview_hash
+    project.design_data = {"r1": {"color": "#00ff00"}, "preview_url": _data_url(color=(0, 0, 255, 255))}
+    assert project.preview_hash != first_hash
+    assert project.design_data == {"r1": {"color": "#00ff00"}}
+    assert project.display_design_data()["preview_url"].startswith("/api/projects/")
+
+
+def test_preview_mime_comes_from_the_image_not_the_client(preview_app, headers):
+    project = UserProject(user_id=7, name="Unsafe", design_data={})
+    db.session.add(project)
+
+    html = "data:text/html;base64," + base64.b64encode(b"<script>alert(1)</script>").decode("ascii")
+    project.design_data = {"preview_url": html}
+    assert project.design_data == {"preview_url": html}
+    assert project.preview_hash is None
+
+    project.design_data = {"preview_url": _data_url(format="GIF", mime="text/html")}
+    assert project.design_data == {}
+    assert project.preview_mime == "image/png"
+    db.session.commit()
+
+    client = preview_app.test_client()
+    response = client.get(_path(project.preview_link()))
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    with Image.open(io.BytesIO(response.data)) as image:
+        assert image.format == "PNG"
+
+
+def test_project_listing_links_thumbnails(preview_app, headers):
+    client = preview_app.test_client()
+    projects = client.get("/api/projects", headers=headers).get_json()["projects"]
+
+    assert [p["name"] for p in projects] == ["Design 2", "Design 1", "Design 0"]
+    thumbnail = client.get(_path(projects[0]["preview_url"]))
+    assert thumbnail.status_code == 200
+    assert thumbnail.mimetype == "image/webp"
+    assert "immutable" in thumbnail.headers["Cache-Control"]
+
+    forged = projects[0]["preview_url"].replace("sig=", "sig=x")
+    assert client.get(_path(forged)).status_code == 404
+
+
+def test_listing_does_not_rewrite_legacy_projects(preview_app, headers):
+    legacy_design = {"preview_url": _data_url()}
+    db.session.execute(UserProject.__table__.insert().values(user_id=7, name="Legacy", design_data=legacy_design))
+    db.session.commit()
+
+    client = preview_app.test_client()
+    projects = client.get("/api/projects", headers=headers).get_json()["projects"]
+
+    assert next(p for p in projects if p["name"] == "Legacy")["preview_url"] is None
+    stored = UserProject.query.filter_by(name="Legacy").one()
+    assert stored.design_data == legacy_design
+    assert stored.preview_hash is None
+
+
+class _BackfillCursor:
+    def __init__(self, rows):
+        self.batches = [rows, []]
+        self.updates = []
+        self.result = None
+
+    def execute(self, sql, params=None):
+        if "to_regclass" in sql:
+            self.result = [{"present": True}]
+        elif sql.lstrip().startswith("UPDATE"):
+            self.updates.append((sql, params))
+        else:
+            self.result = self.batches.pop(0)
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+
+class _BackfillConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_backfill_moves_inline_previews_and_restores_flood_fill_canvas(monkeypatch):
+    inline = _data_url()
+    raw = base64.b64decode(inline.split(",", 1)[1])
+    script = b"<svg><script>alert(1)</script></svg>"
+    rows = [
+        {"id": 1, "design_data": {"preview_url": inline, "dataUrl": inline},
+         "preview_hash": None, "preview_mime": None, "preview_data": None},
+        {"id": 2, "design_data": {"floodFill": True, "preview_url": "ignored-link"},
+         "preview_hash": "a" * 64, "preview_mime": "image/png", "preview_data": raw},
+        {"id": 3, "design_data": {"r1": {"color": "#ff0000"}},
+         "preview_hash": "b" * 64, "preview_mime": "image/svg+xml", "preview_data": script},
+    ]
+    cursor = _BackfillCursor(rows)
+    monkeypatch.setattr(db_module, "get_db", lambda: _BackfillConnection(cursor))
+
+    assert db_module.backfill_project_previews() == 3
+
+    updates = {params[-1]: (sql, params) for sql, params in cursor.updates}
+    sql, params = updates[1]
+    assert json.loads(params[0]) == {"dataUrl": inline}
+    assert params[2] == "image/png"
+    assert params[3] == raw
+    sql, params = updates[2]
+    assert sql.startswith("UPDATE user_projects SET design_data = ")
+    assert json.loads(params[0]) == {"floodFill": True, "preview_url": "ignored-link", "dataUrl": inline}
+    sql, params = updates[3]
+    assert "preview_data = " in sql
+    assert params[:4] == (None, None, None, None)
+    restored = json.loads(params[4])["preview_url"]
+    assert base64.b64decode(restored.split(",", 1)[1]) == script
+
+
+def test_work_order_listing_pages_with_keyset_cursor(preview_app, headers):
+    client = preview_app.test_client()
+
+    first = client.get("/api/work-orders?limit=2", headers=headers).get_json()
+    assert [o["work_order_number"] for o in first["work_orders"]] == ["WO-2026-0003", "WO-2026-0002"]
+    assert first["next_cursor"]
+    design_data = first["work_orders"][0]["project"]["design_data"]
+    assert list(design_data) == ["preview_url"]
+    assert "/preview.webp?" in design_data["preview_url"]
+
+    second = client.get(f"/api/work-orders?limit=2&cursor={first['next_cursor']}", headers=headers).get_json()
+    assert [o["work_order_number"] for o in second["work_orders"]] == ["WO-2026-0001"]
+    assert second["next_cursor"] is None
+
+    thumbnail = client.get(_path(design_data["preview_url"]))
+    assert thumbnail.status_code == 200
+    assert thumbnail.mimetype == "image/webp"
+    assert "immutable" in thumbnail.headers["Cache-Control"]
+    forged = design_data["preview_url"].replace("sig=", "sig=x")
+    assert client.get(_path(forged)).status_code == 404
@@ -0,0 +1,111 @@
+import pytest
+from flask import Flask
+
+from backend.auth import create_token
+from backend.models import Template, TemplateRegion, UserProject, UserProjectRegion, db
+from backend.routes.projects import projects_bp
+
+
+@pytest.fixture
+def region_app(monkeypatch):
+    monkeypatch.setenv("APP_ENV", "testing")
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite:///:memory:")
+    db.init_app(app)
+    app.register_blueprint(projects_bp)
+    with app.app_context():
+        db.create_all()
+        template = Template(name="Rose", svg_content="<svg/>")
+        template.regions = [TemplateRegion(region_id=f"r{i}", display_order=i) for i in range(4)]
+        db.session.add(template)
+        db.session.flush()
+        project = UserProject(
+            user_id=7,
+            template_id=template.id,
+            name="Rose window",
+            design_data={"objects": [], "sections": {"r0": {"color": "#ff0000", "glassTypeId": 2}}},
+        )
+        db.session.add(project)
+        db.session.commit()
+        yield app, project.id
+
+
+@pytest.fixture
+def client(region_app):
+    app, _project_id = region_app
+    client = app.test_client()
+    token = create_token("7", role="customer", customer_id=7)
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
+
+
+def test_saved_sections_become_region_rows(region_app):
+    _app, project_id = region_app
+    project = db.session.get(UserProject, project_id)
+
+    assert "sections" not in project.design_data
+    assert project.filled_region_count == 1
+    assert project.display_design_data()["sections"] == {"r0": {"color": "#ff0000", "glassTypeId": 2}}
+
+
+def test_patch_applies_region_deltas_and_counts_incrementally(region_app, client):
+    _app, project_id = region_app
+
+    resp = client.patch(
+        f"/api/projects/{project_id}/regions",
+        json={"version": 1, "set": {"r1": {"color": "#00ff00"}, "r2": {"glassTypeId": 3}}, "clear": ["r0"]},
+    )
+
+    assert resp.status_code == 200
+    assert resp.get_json() == {
+        "version": 2,
+        "filled_region_count": 1,
+        "region_total": 4,
+        "completion_percentage": 25,
+    }
+    fills = {row.region_id: row.fill for row in UserProjectRegion.query.filter_by(project_id=project_id)}
+    assert fills == {"r1": {"color": "#00ff00"}, "r2": {"glassTypeId": 3}}
+
+
+def test_stale_version_is_rejected(region_app, client):
+    _app, project_id = region_app
+    client.patch(f"/api/projects/{project_id}/regions", json={"version": 1, "set": {"r1": {"color": "#fff"}}})
+
+    stale = client.patch(f"/api/projects/{project_id}/regions", json={"version": 1, "set": {"r2": {"color": "#000"}}})
+
+    assert stale.status_code == 409
+    assert stale.get_json() == {"error": "version_conflict", "version": 2}
+    assert UserProjectRegion.query.filter_by(project_id=project_id, region_id="r2").first() is None
+
+
+def test_patch_validates_body(region_app, client):
+    _app, project_id = region_app
+    assert client.patch(f"/api/projects/{project_id}/regions", json={"set": {"r1": {}}}).status_code == 400
+    assert client.patch(f"/api/projects/{project_id}/regions", json={"version": 1}).status_code == 400
+    assert client.patch("/api/projects/999/regions", json={"version": 1, "clear": ["r0"]}).status_code == 404
+
+
+def test_full_save_checks_and_bumps_the_version(region_app, client):
+    _app, project_id = region_app
+    template_id = db.session.get(UserProject, project_id).template_id
+    body = {"project_id": project_id, "template_id": template_id, "design_data": {"objects": [], "sections": {}}}
+
+    saved = client.post("/api/projects/save", json={**body, "version": 1})
+    assert saved.status_code == 200
+    assert saved.get_json()["project"]["version"] == 2
+
+    stale = client.post("/api/projects/save", json={**body, "version": 1})
+    assert stale.status_code == 409
+    patched = client.patch(f"/api/projects/{project_id}/regions", json={"version": 2, "set": {"r3": {"color": "#000"}}})
+    assert patched.get_json()["version"] == 3
+
+
+def test_assigning_design_data_bumps_the_version(region_app):
+    _app, project_id = region_app
+    project = db.session.get(UserProject, project_id)
+
+    project.design_data = {"objects": [], "sections": {"r1": {"color": "#00ff00"}}}
+    db.session.commit()
+
+    assert project.version == 2
+    assert project.filled_region_count == 1
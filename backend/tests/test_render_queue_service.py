@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask
+
+from backend.services import render_queue_service
+from backend.services.render_queue_service import (
+    JOB_DONE,
+    JOB_PENDING,
+    JOB_TIMEOUT,
+    RenderQueueFull,
+    get_render_job,
+    submit_render,
+    wait_for_render,
+)
+
+
+@pytest.fixture
+def render_queue(monkeypatch):
+    release = threading.Event()
+    stored = {}
+    renders = []
+
+    def fake_render(image_bytes):
+        renders.append(image_bytes)
+        release.wait(5)
+        return b"PNG:" + image_bytes
+
+    monkeypatch.setattr(render_queue_service, "_render_job", fake_render)
+    monkeypatch.setattr(render_queue_service, "_build_executor", lambda: ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(render_queue_service, "store_numbered_pattern", stored.__setitem__)
+    render_queue_service.shutdown_render_queue()
+
+    app = Flask(__name__)
+    with app.app_context():
+        yield {"release": release, "stored": stored, "renders": renders}
+    render_queue_service.shutdown_render_queue()
+    release.set()
+
+
+def test_jobs_for_the_same_source_are_shared_and_cached_on_completion(render_queue):
+    first = submit_render(b"source")
+    second = submit_render(b"source")
+
+    assert second is first
+    assert first.status == JOB_PENDING
+    assert wait_for_render(first, 0.05) is None
+
+    render_queue["release"].set()
+
+    assert wait_for_render(first, 5) == b"PNG:source"
+    assert first.settled.wait(5)
+    assert get_render_job(first.job_id).status == JOB_DONE
+    assert list(render_queue["stored"].values()) == [b"PNG:source"]
+    assert render_queue["renders"] == [b"source"]
+
+
+def test_pending_queue_is_bounded(render_queue, monkeypatch):
+    monkeypatch.setenv("RENDER_QUEUE_MAX_PENDING", "2")
+    submit_render(b"one")
+    submit_render(b"two")
+
+    with pytest.raises(RenderQueueFull):
+        submit_render(b"three")
+
+
+def test_expired_jobs_time_out_and_the_rest_are_resubmitted(render_queue, monkeypatch):
+    monkeypatch.setenv("RENDER_JOB_TIMEOUT_SECONDS", "30")
+    stuck = submit_render(b"stuck")
+    queued = submit_render(b"queued")
+    stuck.submitted_at -= 60
+
+    assert get_render_job(stuck.job_id).status == JOB_TIMEOUT
+    assert queued.status == JOB_PENDING
+    # A timed-out source is not re-queued on the next download.
+    assert submit_render(b"stuck") is stuck
+
+    render_queue["release"].set()
+    assert wait_for_render(queued, 5) == b"PNG:queued"
@@ -0,0 +1,101 @@
+import pytest
+
+import backend.db as db_module
+import backend.services.review_cache_service as review_cache
+
+
+class _RecordingCursor:
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+
+class _RecordingConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def review_reads(monkeypatch):
+    review_cache.invalidate_product_reviews()
+    calls = []
+
+    def fake_list(product_type, product_id):
+        calls.append((product_type, product_id))
+        return [{"product_type": product_type, "product_id": product_id, "read": len(calls)}]
+
+    monkeypatch.setattr(db_module, "list_reviews_for_product", fake_list)
+    yield calls
+    review_cache.invalidate_product_reviews()
+
+
+def test_reviews_are_cached_per_product_until_invalidated(review_reads):
+    first = review_cache.cached_product_reviews("manual", "12")
+    assert review_cache.cached_product_reviews("manual", "12") == first
+    review_cache.cached_product_reviews("template", "12")
+    assert review_reads == [("manual", "12"), ("template", "12")]
+
+    review_cache.invalidate_product_reviews("manual", "12")
+    assert review_cache.cached_product_reviews("manual", "12")[0]["read"] == 3
+    assert review_cache.cached_product_reviews("template", "12")[0]["read"] == 2
+
+
+def test_cache_is_bypassed_when_ttl_is_zero(review_reads, monkeypatch):
+    monkeypatch.setenv("REVIEWS_CACHE_TTL_SECONDS", "0")
+    review_cache.cached_product_reviews("manual", "12")
+    review_cache.cached_product_reviews("manual", "12")
+    assert len(review_reads) == 2
+
+
+def test_product_listing_reads_stored_snapshot_without_image_bytes(monkeypatch):
+    cursor = _RecordingCursor(
+        rows=[
+            {
+                "id": 1,
+                "review_image_url": None,
+                "product_image_url": "https://cdn.example.com/panel.jpg",
+                "fallback_product_image_url": "https://cdn.example.com/panel.jpg",
+                "product_title": "Rose Panel",
+                "has_review_image_data": False,
+            }
+        ]
+    )
+    monkeypatch.setattr(db_module, "get_db", lambda: _RecordingConnection(cursor))
+
+    rows = db_module.list_reviews_for_product("manual", "12")
+
+    sql, params = cursor.executed[0]
+    assert "customer_order_items" not in sql
+    assert "r.*" not in sql
+    assert params == ("manual", "12")
+    assert rows[0]["product_title"] == "Rose Panel"
+    assert rows[0]["product_image_url"] == "https://cdn.example.com/panel.jpg"
+    assert "has_review_image_data" not in rows[0]
+
+
+def test_admin_moderation_refreshes_the_product_snapshot(monkeypatch):
+    cursor = _RecordingCursor()
+    cursor.rowcount = 1
+    monkeypatch.setattr(db_module, "get_db", lambda: _RecordingConnection(cursor))
+
+    assert db_module.update_admin_review(7, {"status": "approved"}) is True
+
+    refresh_sql, refresh_params = cursor.executed[-1]
+    assert "SET product_title" in refresh_sql
+    assert "fallback_product_image_url" in refresh_sql
+    assert refresh_params == ([7],)
@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+import backend.db as db_module
+from backend.db import SCHEMA_VERSION, run_migrations
+
+
+class _FakeCursor:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+
+class _FakeConnection:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def cursor(self):
+        return _FakeCursor(self.statements)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def migration_state(monkeypatch):
+    state = {"version": 0, "ddl_runs": 0, "backfills": 0, "review_backfills": 0, "preview_backfills": 0, "statements": []}
+
+    def fake_init_db(force=False):
+        state["ddl_runs"] += 1
+
+    monkeypatch.setattr(db_module, "_schema_initialized", False)
+    monkeypatch.setattr(db_module, "get_db", lambda: _FakeConnection(state["statements"]))
+    monkeypatch.setattr(db_module, "get_schema_version", lambda: state["version"])
+    monkeypatch.setattr(db_module, "init_db", fake_init_db)
+    monkeypatch.setattr(
+        db_module, "backfill_homepage_visit_rollups", lambda: state.update(backfills=state["backfills"] + 1)
+    )
+    monkeypatch.setattr(
+        db_module,
+        "backfill_review_product_snapshots",
+        lambda: state.update(review_backfills=state["review_backfills"] + 1),
+    )
+    monkeypatch.setattr(
+        db_module,
+        "backfill_project_previews",
+        lambda: state.update(preview_backfills=state["preview_backfills"] + 1),
+    )
+    monkeypatch.setattr(db_module, "_record_schema_version", lambda version: state.update(version=version))
+    return state
+
+
+def test_run_migrations_applies_ddl_once_under_an_advisory_lock(migration_state):
+    assert run_migrations() is True
+    assert run_migrations() is False
+
+    assert migration_state["ddl_runs"] == 1
+    assert migration_state["backfills"] == 1
+    assert migration_state["review_backfills"] == 1
+    assert migration_state["preview_backfills"] == 1
+    assert migration_state["version"] == SCHEMA_VERSION
+    assert migration_state["statements"] == [
+        "SELECT pg_advisory_lock(%s)",
+        "SELECT pg_advisory_unlock(%s)",
+    ]
+
+
+def test_run_migrations_skips_ddl_when_schema_is_current(migration_state):
+    migration_state["version"] = SCHEMA_VERSION
+
+    assert run_migrations() is False
+    assert migration_state["ddl_runs"] == 0
+    assert migration_state["statements"] == []
+    assert db_module._schema_initialized is True
+
+
+def test_run_migrations_runs_the_real_init_db_without_deadlocking(monkeypatch):
+    statements = []
+    monkeypatch.setattr(db_module, "_schema_initialized", False)
+    monkeypatch.setattr(db_module, "get_db", lambda: _FakeConnection(statements))
+    monkeypatch.setattr(db_module, "get_schema_version", lambda: 0)
+    monkeypatch.setattr(db_module, "_record_schema_version", lambda version: None)
+    for backfill in ("backfill_homepage_visit_rollups", "backfill_review_product_snapshots", "backfill_project_previews"):
+        monkeypatch.setattr(db_module, backfill, lambda: None)
+    result = {}
+
+    worker = threading.Thread(target=lambda: result.update(applied=run_migrations()), daemon=True)
+    worker.start()
+    worker.join(10)
+
+    assert not worker.is_alive(), "run_migrations deadlocked on the schema lock"
+    assert result == {"applied": True}
+    assert any("CREATE TABLE IF NOT EXISTS" in sql for sql in statements)
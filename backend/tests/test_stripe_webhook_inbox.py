@@ -0,0 +1,140 @@
+import json
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+import backend.db as db_module
+import backend.routes.shop as shop_module
+import backend.app as app_module
+from backend.app import create_app
+from backend.services import email_outbox_service, webhook_inbox_service
+
+
+@pytest.fixture
+def webhook_client(monkeypatch):
+    stored = {}
+    notified = []
+
+    def fake_enqueue(event_id, event_type, payload, api_base_url=None):
+        if event_id in stored:
+            return False
+        stored[event_id] = (event_type, payload, api_base_url)
+        return True
+
+    monkeypatch.delenv("STRIPE_WEBHOOK_SECRET", raising=False)
+    for name in ("API_PUBLIC_URL", "BACKEND_PUBLIC_URL", "BACKEND_BASE_URL"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("APP_ENV", "testing")
+    monkeypatch.setattr(shop_module, "enqueue_stripe_webhook_event", fake_enqueue)
+    monkeypatch.setattr(shop_module, "notify_stripe_webhook_worker", lambda: notified.append(1))
+    monkeypatch.setattr(shop_module, "handle_stripe_event", lambda event: pytest.fail("handled inline"))
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield {"client": client, "stored": stored, "notified": notified}
+
+
+def test_webhook_is_stored_and_acknowledged_without_processing(webhook_client):
+    body = json.dumps({"id": "evt_1", "type": "payment_intent.succeeded", "data": {"object": {"id": "pi_1"}}})
+
+    first = webhook_client["client"].post("/api/stripe/webhook", data=body, content_type="application/json")
+    retry = webhook_client["client"].post("/api/stripe/webhook", data=body, content_type="application/json")
+
+    assert first.status_code == 200
+    assert first.get_json()["duplicate"] is False
+    assert retry.status_code == 200
+    assert retry.get_json()["duplicate"] is True
+    assert list(webhook_client["stored"]) == ["evt_1"]
+    assert webhook_client["stored"]["evt_1"] == ("payment_intent.succeeded", body, "http://localhost/api")
+    assert len(webhook_client["notified"]) == 2
+
+
+@pytest.fixture
+def inbox(monkeypatch):
+    state = {"rows": [], "done": [], "failed": []}
+    monkeypatch.setattr(db_module, "claim_stripe_webhook_events", lambda limit, lease_seconds: state["rows"][:limit])
+    monkeypatch.setattr(db_module, "complete_stripe_webhook_event", lambda event_id: state["done"].append(event_id))
+    monkeypatch.setattr(
+        db_module,
+        "fail_stripe_webhook_event",
+        lambda event_id, error, retry_at=None: state["failed"].append((event_id, retry_at)),
+    )
+    monkeypatch.setenv("STRIPE_WEBHOOK_MAX_ATTEMPTS", "3")
+    monkeypatch.setenv("STRIPE_WEBHOOK_RETRY_BASE_SECONDS", "30")
+    with Flask(__name__).app_context():
+        yield state
+
+
+def _row(event_id, attempts=1):
+    return {"event_id": event_id, "attempts": attempts, "payload": json.dumps({"id": event_id})}
+
+
+def test_failed_events_are_retried_with_backoff_then_parked(inbox):
+    inbox["rows"] = [_row("evt_ok"), _row("evt_retry", attempts=2), _row("evt_dead", attempts=3)]
+
+    def handler(event):
+        if event["id"] != "evt_ok":
+            raise RuntimeError("smtp down")
+
+    before = datetime.utcnow()
+    assert webhook_inbox_service.drain_stripe_webhook_inbox(handler) == 3
+
+    assert inbox["done"] == ["evt_ok"]
+    (retry_id, retry_at), (dead_id, dead_retry_at) = inbox["failed"]
+    assert retry_id == "evt_retry"
+    assert 59 <= (retry_at - before).total_seconds() <= 65
+    assert dead_id == "evt_dead"
+    assert dead_retry_at is None
+
+
+def test_retry_delay_is_capped():
+    assert webhook_inbox_service.retry_delay_seconds(1) == 30
+    assert webhook_inbox_service.retry_delay_seconds(20) == webhook_inbox_service.MAX_RETRY_DELAY_SECONDS
+
+
+def test_handlers_build_links_from_the_recorded_api_url(inbox, monkeypatch):
+    for name in ("API_PUBLIC_URL", "BACKEND_PUBLIC_URL", "BACKEND_BASE_URL"):
+        monkeypatch.delenv(name, raising=False)
+    inbox["rows"] = [dict(_row("evt_paid"), api_base_url="https://shop.example/api")]
+    links = []
+
+    webhook_inbox_service.drain_stripe_webhook_inbox(
+        lambda event: links.append(shop_module._resolve_pattern_download_url("tok"))
+    )
+
+    assert links == ["https://shop.example/api/pattern-downloads/tok"]
+    inbox["rows"] = [_row("evt_legacy")]
+    webhook_inbox_service.drain_stripe_webhook_inbox(lambda event: shop_module._resolve_api_public_url())
+    assert inbox["failed"][0][0] == "evt_legacy"
+
+
+def test_notify_does_not_start_a_worker_that_was_never_enabled(monkeypatch):
+    started = []
+    monkeypatch.setitem(webhook_inbox_service._state, "app", None)
+    monkeypatch.setattr(webhook_inbox_service.threading, "Thread", lambda **kwargs: started.append(kwargs))
+
+    webhook_inbox_service.notify_stripe_webhook_worker()
+
+    assert started == []
+
+
+def test_importing_the_app_starts_no_background_workers(monkeypatch):
+    # backend.app builds its module-level app at import; only wsgi.py starts the workers.
+    assert app_module.app is not None
+    assert webhook_inbox_service._state["app"] is None
+    assert email_outbox_service._state["app"] is None
+
+    started = []
+    monkeypatch.setattr(email_outbox_service, "start_email_outbox_worker", lambda app: started.append("email"))
+    monkeypatch.setattr(
+        webhook_inbox_service, "start_stripe_webhook_worker", lambda app, handler: started.append("webhook")
+    )
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app_module.start_background_workers(app)
+    assert started == []
+
+    app.config["TESTING"] = False
+    app_module.start_background_workers(app)
+    assert started == ["email", "webhook"]
@@ -0,0 +1,60 @@
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from backend.models import Template, TemplateRegion, db
+from backend.routes.templates import templates_bp
+
+
+@pytest.fixture
+def catalog_app(monkeypatch):
+    monkeypatch.setenv("APP_ENV", "testing")
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite:///:memory:")
+    db.init_app(app)
+    app.register_blueprint(templates_bp, url_prefix="/api")
+    with app.app_context():
+        db.create_all()
+        for index in range(6):
+            template = Template(name=f"Panel {index}", svg_content="<svg>" + "x" * 4096 + "</svg>", image_data=b"\0" * 4096)
+            template.regions = [TemplateRegion(region_id=f"p{index}-{n}", display_order=n) for n in range(index + 1)]
+            db.session.add(template)
+        db.session.commit()
+        db.session.remove()
+        yield app
+
+
+@pytest.fixture
+def statements(catalog_app):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    with catalog_app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_catalog_page_uses_constant_queries_without_blob_columns(catalog_app, statements):
+    client = catalog_app.test_client()
+
+    body = client.get("/api/templates?limit=4").get_json()
+
+    assert body["total"] == 6
+    assert len(body["items"]) == 4
+    assert all(item["region_count"] == len(item["regions"]) for item in body["items"])
+    assert "svg_content" not in body["items"][0]
+    assert len(statements) == 2
+    assert not any("svg_content" in sql or "image_data" in sql for sql in statements)
+
+
+def test_total_is_reported_past_the_last_page(catalog_app):
+    client = catalog_app.test_client()
+
+    body = client.get("/api/templates?limit=4&offset=8").get_json()
+
+    assert body["items"] == []
+    assert body["total"] == 6
@@ -21,7 +21,9 @@ def _template_image_bytes():
     return buffer.getvalue()
 
 
-def test_upload_template_image_normalizes_raster_template_to_png():
+def test_upload_template_image_normalizes_raster_template_to_png(monkeypatch):
+    # Inline mode; the queued path is covered in test_template_ingest_service.
+    monkeypatch.setenv("RENDER_WORKERS", "0")
     app = create_app()
     app.config["TESTING"] = True
 
@@ -0,0 +1,136 @@
+import io
+from concurrent.futures import Future
+
+import pytest
+from flask import Flask
+from PIL import Image
+
+import backend.services.pattern_product_service as pattern_products
+import backend.services.render_queue_service as render_queue
+import backend.services.template_ingest_service as ingest
+from backend.models import Template, db
+
+
+def _png(color):
+    out = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(out, format="PNG")
+    return out.getvalue()
+
+
+@pytest.fixture
+def ingest_app(monkeypatch, tmp_path):
+    monkeypatch.setenv("RENDER_WORKERS", "2")
+    app = Flask(__name__, root_path=str(tmp_path))
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite:///:memory:")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+@pytest.fixture
+def queued_jobs(monkeypatch, ingest_app):
+    jobs = []
+
+    def fake_submit(image_bytes):
+        job = render_queue.RenderJob("key", image_bytes, ingest_app)
+        jobs.append(job)
+        return job
+
+    monkeypatch.setattr(ingest, "submit_render", fake_submit)
+    monkeypatch.setattr(ingest, "lookup_numbered_pattern", lambda source: (None, None))
+    monkeypatch.setattr(render_queue, "store_numbered_pattern", lambda key, data: None)
+    return jobs
+
+
+def test_upload_returns_original_and_job_then_upgrades_saved_template(ingest_app, queued_jobs):
+    original = _png("white")
+    result = ingest.ingest_template_upload(original, ".jpg", "image/jpeg")
+
+    assert result["status"] == "pending"
+    assert result["job_id"] == queued_jobs[0].job_id
+    assert result["image_url"].endswith("-original.jpg")
+    data, _mime = ingest.read_template_upload(result["image_url"])
+    assert data == original
+
+    template = Template(name="Scan", svg_content="", image_url=result["image_url"], image_data=original, template_type="image")
+    db.session.add(template)
+    db.session.commit()
+
+    numbered = _png("black")
+    future = Future()
+    queued_jobs[0].future = future
+    future.set_result(numbered)
+    render_queue._on_done(queued_jobs[0], future)
+    assert queued_jobs[0].settled.wait(5)
+
+    db.session.refresh(template)
+    assert queued_jobs[0].status == render_queue.JOB_DONE
+    assert template.image_url.endswith("-numbered.png")
+    assert template.image_data == numbered
+    assert template.image_mime == "image/png"
+    assert template.thumbnail_url.endswith("-thumb.webp")
+    assert ingest.read_template_upload(template.image_url)[0] == numbered
+
+
+def test_template_saved_after_render_reads_pattern_cache(ingest_app, queued_jobs, monkeypatch):
+    result = ingest.ingest_template_upload(_png("white"), ".png", "image/png")
+    template = Template(name="Late", svg_content="", image_url=result["image_url"], thumbnail_url="/custom.png")
+    db.session.add(template)
+    db.session.commit()
+
+    monkeypatch.setattr(ingest, "lookup_numbered_pattern", lambda source: (None, b"numbered-png"))
+    assert ingest.apply_finished_template_upload(template) is True
+
+    assert template.image_data == b"numbered-png"
+    assert template.thumbnail_url == "/custom.png"
+    assert ingest.apply_finished_template_upload(template) is False
+
+
+def test_finished_upload_repoints_the_linked_pattern_product(ingest_app, queued_jobs, monkeypatch):
+    result = ingest.ingest_template_upload(_png("white"), ".png", "image/png")
+    original_url = result["image_url"]
+    product = {"id": 5, "name": "Scan", "images": [{"image_url": original_url, "media_type": "image"}]}
+    updates = []
+    invalidated = []
+    monkeypatch.setattr(pattern_products, "fetch_manual_product", lambda product_id: product)
+    monkeypatch.setattr(pattern_products, "update_manual_product", lambda product_id, payload: updates.append(payload))
+    monkeypatch.setattr(ingest, "invalidate_catalog_cache", lambda *keys: invalidated.append(keys))
+    template = Template(
+        name="Scan", svg_content="", image_url=original_url, is_digital_download=True,
+        related_links={"pattern_product_id": 5},
+    )
+    db.session.add(template)
+    db.session.commit()
+
+    assert ingest.finish_template_upload(original_url, _png("black")) == 1
+
+    assert updates[0]["images"] == [{"url": template.thumbnail_url, "media_type": "image"}]
+    assert template.thumbnail_url.endswith("-thumb.webp")
+    assert invalidated == [("manual_products", "manual_products_summary")]
+
+
+def test_cached_render_skips_the_queue(ingest_app, queued_jobs, monkeypatch, tmp_path):
+    cached = tmp_path / "cached.png"
+    cached.write_bytes(_png("black"))
+    monkeypatch.setattr(ingest, "lookup_numbered_pattern", lambda source: (str(cached), None))
+
+    result = ingest.ingest_template_upload(_png("white"), ".jpg", "image/jpeg")
+
+    assert result == {"image_url": result["image_url"], "status": "done"}
+    assert result["image_url"].endswith("-numbered.png")
+    assert ingest.read_template_upload(result["image_url"])[0] == cached.read_bytes()
+    stem = result["image_url"][len(ingest.UPLOAD_URL_PREFIX):-len(ingest.NUMBERED_SUFFIX)]
+    assert (tmp_path / "uploads" / "templates" / f"{stem}{ingest.THUMBNAIL_SUFFIX}").is_file()
+    assert queued_jobs == []
+
+
+def test_inline_mode_normalizes_during_the_request(ingest_app, monkeypatch):
+    monkeypatch.setenv("RENDER_WORKERS", "0")
+    monkeypatch.setattr(ingest, "render_numbered_pattern_raster", lambda data: b"numbered-png")
+
+    result = ingest.ingest_template_upload(_png("white"), ".jpg", "image/jpeg")
+
+    assert result == {"image_url": result["image_url"], "status": "done"}
+    assert result["image_url"].endswith(".png")
+    assert "-original" not in result["image_url"]
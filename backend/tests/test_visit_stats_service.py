@@ -0,0 +1,48 @@
+import pytest
+from flask import Flask
+
+import backend.db as db_module
+import backend.services.visit_stats_service as visit_stats
+from backend.utils.hyperloglog import HyperLogLog
+
+
+@pytest.fixture
+def visit_buffer(monkeypatch):
+    written = []
+    monkeypatch.setattr(visit_stats, "_buffer", [])
+    monkeypatch.setattr(visit_stats, "_ensure_flusher", lambda: None)
+    monkeypatch.setitem(visit_stats._state, "last_prune", float("inf"))
+    monkeypatch.setattr(db_module, "record_homepage_visits", lambda visits: written.append(list(visits)))
+    with Flask(__name__).app_context():
+        yield written
+
+
+def test_visits_are_written_in_one_batch_per_flush(visit_buffer):
+    for index in range(3):
+        assert visit_stats.buffer_homepage_visit(f"hash-{index}", page_path="/")
+    assert visit_stats.buffer_homepage_visit("") is False
+
+    assert visit_stats.pending_homepage_visits() == 3
+    assert visit_stats.flush_homepage_visits() == 3
+    assert visit_stats.pending_homepage_visits() == 0
+    assert [[visit["ip_hash"] for visit in batch] for batch in visit_buffer] == [["hash-0", "hash-1", "hash-2"]]
+
+
+def test_failed_flush_keeps_visits_for_the_next_attempt(visit_buffer, monkeypatch):
+    def failing_write(visits):
+        raise RuntimeError("database unavailable")
+
+    visit_stats.buffer_homepage_visit("hash-a")
+    monkeypatch.setattr(db_module, "record_homepage_visits", failing_write)
+
+    assert visit_stats.flush_homepage_visits() == 0
+    assert visit_stats.pending_homepage_visits() == 1
+
+
+def test_sketch_estimate_is_close_and_survives_serialization():
+    sketch = HyperLogLog().update(f"visitor-{index}" for index in range(20000))
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    restored.update(f"visitor-{index}" for index in range(5000))
+
+    assert abs(restored.estimate() - 20000) / 20000 < 0.05
+    assert HyperLogLog().update(["a", "b", "a"]).estimate() == 2
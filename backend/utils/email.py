@@ -16,6 +16,11 @@ def _admin_work_order_url(work_order_id):
 
 
 def send_email(to, subject, html_body, sender=None, reply_to=None):
+    """Queue an email for the outbox worker and return without waiting on SMTP.
+
+    Returns True once the message is stored. If the outbox is disabled or the
+    database is unreachable, the message is sent inline instead.
+    """
     if Message is None:
         current_app.logger.warning('Flask-Mail not installed; skipping email send to %s', to)
         return False
@@ -23,6 +28,21 @@ def send_email(to, subject, html_body, sender=None, reply_to=None):
     if not mail:
         current_app.logger.warning('Flask-Mail not configured; skipping email send to %s', to)
         return False
+
+    from ..services.email_outbox_service import email_outbox_enabled, queue_email
+
+    if email_outbox_enabled() and queue_email(to, subject, html_body, sender=sender, reply_to=reply_to):
+        return True
+    return send_email_now(to, subject, html_body, sender=sender, reply_to=reply_to)
+
+
+def send_email_now(to, subject, html_body, sender=None, reply_to=None):
+    """Send one email synchronously over its own SMTP connection."""
+    from ..services.email_outbox_service import count_email_metric
+
+    mail = current_app.extensions.get('mail')
+    if Message is None or not mail:
+        return False
     try:
         msg = Message(
             subject,
@@ -32,6 +52,7 @@ def send_email(to, subject, html_body, sender=None, reply_to=None):
             reply_to=reply_to,
         )
         mail.send(msg)
+        count_email_metric('sent_inline')
         return True
     except Exception as exc:
         current_app.logger.error('Email send failed for %s: %s', to, exc)
@@ -1,4 +1,7 @@
-from backend.app import app
+from backend.app import app, start_background_workers
+
+
+start_background_workers(app)
 
 
 __all__ = ["app"]
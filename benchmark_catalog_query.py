@@ -0,0 +1,163 @@
+"""
+Catalog Query Benchmark
+=======================
+Compares the legacy manual-product catalog query (three correlated subqueries,
+one of which returns the first image blob) with MANUAL_PRODUCTS_CATALOG_SQL
+(a single lateral join that never reads image_data).
+
+Fixture data is written to a throwaway schema, so live tables are never read or
+modified, and the schema is dropped afterwards.
+
+Usage
+-----
+  python benchmark_catalog_query.py
+  python benchmark_catalog_query.py --products 5000 --images 4 --blob-kb 200 --runs 5
+
+Environment variables required (same as the main app):
+  DATABASE_URL  or  POSTGRES_URL  — PostgreSQL connection string
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from backend.db import MANUAL_PRODUCTS_CATALOG_SQL, _connect_raw
+
+
+SCHEMA = "sgcg_catalog_benchmark"
+
+LEGACY_CATALOG_SQL = """
+    SELECT
+        p.id, p.name, p.description, p.category, p.materials, p.width, p.height, p.depth,
+        p.price, p.old_price, p.discount_percent, p.quantity, p.is_featured, p.is_home_featured,
+        p.is_active, p.is_digital_download, p.related_links, p.created_at, p.updated_at,
+        (
+            SELECT pi.image_url FROM product_images pi
+            WHERE pi.product_id = p.id ORDER BY pi.display_order LIMIT 1
+        ) AS preview_image_url,
+        (
+            SELECT pi.image_data FROM product_images pi
+            WHERE pi.product_id = p.id ORDER BY pi.display_order LIMIT 1
+        ) AS preview_image_data,
+        (
+            SELECT pi.media_type FROM product_images pi
+            WHERE pi.product_id = p.id ORDER BY pi.display_order LIMIT 1
+        ) AS preview_media_type
+    FROM manual_products p
+    ORDER BY p.created_at DESC
+"""
+
+
+def _seed(cursor, products, images, blob_kb):
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"SET search_path TO {SCHEMA}")
+    cursor.execute(
+        """
+        CREATE TABLE manual_products (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(255), description TEXT, category TEXT, materials TEXT,
+            width REAL, height REAL, depth REAL, price REAL, old_price REAL,
+            discount_percent REAL, quantity INTEGER, is_featured BOOLEAN,
+            is_home_featured BOOLEAN, is_active BOOLEAN, is_digital_download BOOLEAN,
+            related_links TEXT, created_at VARCHAR(50), updated_at VARCHAR(50)
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE product_images (
+            id SERIAL PRIMARY KEY,
+            product_id INTEGER NOT NULL REFERENCES manual_products(id) ON DELETE CASCADE,
+            image_url TEXT NOT NULL,
+            image_data BYTEA,
+            media_type VARCHAR(50) DEFAULT 'image',
+            display_order INTEGER DEFAULT 0
+        )
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO manual_products (name, description, category, materials, price, quantity,
+            is_featured, is_home_featured, is_active, is_digital_download, created_at, updated_at)
+        SELECT 'Panel ' || n, 'Stained glass panel ' || n, '["Panels"]', '["Glass"]', 100 + n % 50,
+            n % 7, n % 10 = 0, n % 25 = 0, TRUE, FALSE,
+            to_char(now() - n * interval '1 minute', 'YYYY-MM-DD"T"HH24:MI:SS'),
+            to_char(now(), 'YYYY-MM-DD"T"HH24:MI:SS')
+        FROM generate_series(1, %s) AS n
+        """,
+        (products,),
+    )
+    # Random bytes so TOAST compression cannot shrink the blobs below real image sizes.
+    cursor.execute(
+        """
+        INSERT INTO product_images (product_id, image_url, image_data, media_type, display_order)
+        SELECT p.id, '/uploads/products/' || p.id || '-' || i || '.jpg',
+            (SELECT string_agg(decode(md5(random()::text || g), 'hex'), ''::bytea)
+             FROM generate_series(1, %s) AS g),
+            'image', i
+        FROM manual_products p CROSS JOIN generate_series(0, %s) AS i
+        """,
+        (max(1, blob_kb * 1024 // 16), max(0, images - 1)),
+    )
+    cursor.execute("CREATE INDEX idx_product_images_product_order ON product_images(product_id, display_order)")
+    cursor.execute("ANALYZE manual_products")
+    cursor.execute("ANALYZE product_images")
+
+
+def _row_bytes(rows):
+    total = 0
+    for row in rows:
+        for value in row.values():
+            if isinstance(value, (bytes, bytearray, memoryview, str)):
+                total += len(value)
+    return total
+
+
+def _time_query(cursor, sql, runs):
+    timings = []
+    transferred = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+        timings.append(time.perf_counter() - started)
+        transferred = _row_bytes(rows)
+    return timings, transferred, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the manual-product catalog query.")
+    parser.add_argument("--products", type=int, default=3000)
+    parser.add_argument("--images", type=int, default=3, help="images per product")
+    parser.add_argument("--blob-kb", type=int, default=150, help="size of each image blob")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if not (os.environ.get("DATABASE_URL") or os.environ.get("POSTGRES_URL")):
+        raise SystemExit("Set DATABASE_URL or POSTGRES_URL to a PostgreSQL connection string.")
+
+    conn = _connect_raw()
+    cursor = conn.cursor()
+    try:
+        print(f"Seeding {args.products} products x {args.images} images ({args.blob_kb} KB each)...")
+        _seed(cursor, args.products, args.images, args.blob_kb)
+        conn.commit()
+
+        for label, sql in (("legacy", LEGACY_CATALOG_SQL), ("lateral", MANUAL_PRODUCTS_CATALOG_SQL)):
+            _time_query(cursor, sql, 1)  # warm the buffer cache
+            timings, transferred, row_count = _time_query(cursor, sql, args.runs)
+            print(
+                f"{label:>8}: {row_count} rows, median {statistics.median(timings) * 1000:.1f} ms, "
+                f"best {min(timings) * 1000:.1f} ms, {transferred / (1024 * 1024):.1f} MiB fetched"
+            )
+    finally:
+        conn.rollback()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef, useCallback, useMemo } from 'react';
 import { Point } from 'fabric';
-import api, { addCustomerCartItem, fetchManualProductsCached, getTemplatesCached, saveProject, submitWorkOrder, getProject, getTemplate,
+import api, { addCustomerCartItem, fetchManualProductsCached, getTemplatesCached, saveProject, patchProjectRegions, submitWorkOrder, getProject, getTemplate,
   getWorkOrder, getAdminWorkOrder, createCustomerRevision, createAdminRevision,
   approveWorkOrder as apiApproveWorkOrder, getWorkOrderRevisions, getAdminWorkOrderRevisions,
   getPublicGlassTypesCached
@@ -121,6 +121,8 @@ const CANVAS_BASE_W = 840;
 const CANVAS_BASE_H = 600;
 const CANVAS_W = CANVAS_BASE_W;
 const CANVAS_H = CANVAS_BASE_H;
+// Quiet period after the last fill before region edits are autosaved.
+const REGION_AUTOSAVE_DELAY_MS = 1500;
 const ADMIN_FAVORITE_COLOR_SLOTS = 4;
 const ADMIN_FAVORITE_COLORS_STORAGE_KEY = 'sgcg_admin_favorite_colors_v1';
 
@@ -513,7 +515,7 @@ export default function DesignerPage() {
   // Track per-section fills: { [regionId]: { color, glassType, glassTypeId } }
   const sectionFillsRef = useRef({});
   // Counter to force re-render when sections are filled (hides labels)
-  const [, setFillVersion] = useState(0);
+  const [fillVersion, setFillVersion] = useState(0);
 
   // Section label positions for numbered overlays: [{ id, num, cx, cy }]
   const [sectionLabels, setSectionLabels] = useState([]);
@@ -534,6 +536,9 @@ export default function DesignerPage() {
 
   // Save / submit
   const [projectId, setProjectId] = useState(null);
+  // Server version and section fills as last saved; autosave PATCHes the difference.
+  const projectVersionRef = useRef(null);
+  const savedSectionsRef = useRef({});
   const [saving, setSaving] = useState(false);
   const [submitModal, setSubmitModal] = useState(false);
   const [submitForm, setSubmitForm] = useState({
@@ -644,6 +649,8 @@ export default function DesignerPage() {
     activeGlassTypeRef.current = null;
     setCanvasZoom(1);
     setProjectId(null);
+    projectVersionRef.current = null;
+    savedSectionsRef.current = {};
     woDesignDataRef.current = null;
   }, []);
 
@@ -703,6 +710,12 @@ export default function DesignerPage() {
         
         // Set project ID
         setProjectId(project.id);
+        // Region autosave needs the current "sections" shape; older designs wait for a full save.
+        const loadedSections = project.design_data?.sections;
+        if (loadedSections && typeof loadedSections === 'object' && !Array.isArray(loadedSections)) {
+          projectVersionRef.current = project.version ?? null;
+          savedSectionsRef.current = extractSectionsFromDesignData(project.design_data);
+        }
         
         // Auto-detect existing work order → switch to revision mode
         if (project.work_order_id) {
@@ -2802,6 +2815,8 @@ export default function DesignerPage() {
       });
       const newId = res?.project?.id || res?.id;
       if (newId) setProjectId(newId);
+      projectVersionRef.current = res?.project?.version ?? null;
+      savedSectionsRef.current = JSON.parse(JSON.stringify(canvasData.sections));
       alert('Project saved!');
     } catch {
       alert('Save failed. Please try again.');
@@ -2810,6 +2825,33 @@ export default function DesignerPage() {
     }
   }, [projectId, selectedTemplate]);
 
+  // ── Autosave region edits ─────────────────────────────────────
+  // Saved Fabric designs PATCH only the regions changed since the last save.
+  // Flood-fill designs reopen from their dataUrl snapshot, so they keep using full saves.
+  useEffect(() => {
+    if (!projectId || workOrderMode || isFloodFillMode.current || projectVersionRef.current == null) return undefined;
+    const timer = setTimeout(async () => {
+      const saved = savedSectionsRef.current || {};
+      const current = JSON.parse(JSON.stringify(sectionFillsRef.current || {}));
+      const set = {};
+      Object.entries(current).forEach(([sectionId, fill]) => {
+        if (JSON.stringify(fill) !== JSON.stringify(saved[sectionId])) set[sectionId] = fill;
+      });
+      const clear = Object.keys(saved).filter((sectionId) => !(sectionId in current));
+      if (Object.keys(set).length === 0 && clear.length === 0) return;
+      try {
+        const res = await patchProjectRegions(projectId, projectVersionRef.current, { set, clear });
+        projectVersionRef.current = res?.version ?? null;
+        savedSectionsRef.current = current;
+      } catch (err) {
+        // Changed elsewhere (409) or unreachable: stop autosaving until the next full save.
+        projectVersionRef.current = null;
+        console.error('[DesignerPage] Region autosave failed:', err);
+      }
+    }, REGION_AUTOSAVE_DELAY_MS);
+    return () => clearTimeout(timer);
+  }, [fillVersion, projectId, workOrderMode]);
+
   // ── Submit work order ─────────────────────────────────────────
   const handleSubmit = useCallback(async () => {
     setSubmitting(true);
@@ -661,8 +661,9 @@ export default function PhotoGalleryPage() {
                   {group.photos.slice(0, 3).map((photo, index) => (
                     <img
                       key={photo.id}
-                      src={resolveGalleryImageUrl(photo.image_url)}
+                      src={resolveGalleryImageUrl(photo.medium_url || photo.image_url)}
                       alt={group.panel_name}
+                      loading="lazy"
                       className={styles.cardImage}
                       style={{ zIndex: 10 - index, transform: `translate(${index * 8}px, ${index * 6}px)` }}
                     />
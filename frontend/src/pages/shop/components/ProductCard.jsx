@@ -2,6 +2,7 @@ import { useEffect, useMemo, useState } from 'react'
 import './ProductCard.css'
 import { getProductDimensionsLabel } from '../../../utils/productDimensions'
 import { getProductItemNumber } from '../../../utils/itemNumber'
+import { imageSrcSet, withImageWidth } from '../../../utils/imageVariants'
 
 const templateImageCache = new Map()
 const manualCardImageCache = new Map()
@@ -448,7 +449,9 @@ export default function ProductCard({ product, itemNumber: itemNumberProp }) {
           {hasLinkedPattern && <span className="pattern-corner-badge">Pattern available</span>}
           {activeImageUrl ? (
             <img
-              src={activeImageUrl}
+              src={withImageWidth(activeImageUrl, 640)}
+              srcSet={imageSrcSet(activeImageUrl)}
+              sizes="(max-width: 600px) 50vw, 320px"
               alt={product.title || 'Glass art'}
               loading="lazy"
               decoding="async"
@@ -111,6 +111,10 @@ const fetchWithPublicCache = async ({
 };
 
 export const fetchCustomers = async () => toArrayResponse(await api.get('/customers'));
+export const fetchCustomersPage = async (params = {}) => {
+  const { data } = await api.get('/customers', { params: { limit: 50, ...params } })
+  return { items: Array.isArray(data?.items) ? data.items : [], nextCursor: data?.next_cursor || null }
+}
 export const updateCustomer = (id, payload) => api.put(`/customers/${id}`, payload);
 export const deleteCustomer = (id) => api.delete(`/customers/${id}`);
 export const getCustomerDetails = (id) => api.get(`/customers/${id}/details`);
@@ -133,11 +137,31 @@ export const fetchManualProducts = async (params = {}, options = {}) => {
   return toArrayResponse(await api.get('/manual-products', { params }))
 };
 export const fetchManualProduct = (id) => api.get(`/manual-products/${id}`);
+const PATTERN_RENDER_POLL_LIMIT = 60;
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Pattern downloads answer 202 while the numbered render is queued; poll the job, then fetch once more.
+const downloadRenderedPattern = async (path) => {
+  const blob = await api.get(path, { responseType: 'blob' });
+  if (!blob?.type?.includes('application/json')) return blob;
+
+  const pending = JSON.parse(await blob.text());
+  if (pending?.status !== 'rendering' || !pending?.job_id) return blob;
+
+  const delayMs = Math.max(1, Number(pending.retry_after_seconds) || 3) * 1000;
+  for (let attempt = 0; attempt < PATTERN_RENDER_POLL_LIMIT; attempt += 1) {
+    await sleep(delayMs);
+    const job = await api.get(`/pattern-renders/${pending.job_id}`);
+    if (job?.status !== 'pending') break;
+  }
+  return api.get(path, { responseType: 'blob' });
+};
+
 export const fetchItems = async () => toArrayResponse(await api.get('/items'));
 export const deleteManualProduct = (id) => api.delete(`/manual-products/${id}`);
 export const createManualProduct = (product) => api.post('/manual-products', product);
 export const downloadAdminManualProductPattern = (id) =>
-  api.get(`/admin/manual-products/${id}/pattern-download`, { responseType: 'blob' });
+  downloadRenderedPattern(`/admin/manual-products/${id}/pattern-download`);
 export const publishManualProductToFacebook = (id) => api.post(`/admin/manual-products/${id}/facebook-post`);
 export const createItem = (item) => api.post('/items', item);
 // Customer profile/address/favorites/cart/orders/reviews APIs
@@ -486,7 +510,7 @@ api.interceptors.response.use(
 export const getTemplates = (filters) => api.get('/templates', { params: filters });
 export const getTemplate = (id) => api.get(`/templates/${id}`);
 export const downloadFreeTemplatePattern = (id) =>
-  api.get(`/templates/${id}/free-download`, { responseType: 'blob' });
+  downloadRenderedPattern(`/templates/${id}/free-download`);
 export const getTemplatesCached = (filters = {}, options = {}) =>
   fetchWithPublicCache({
     path: '/templates',
@@ -506,6 +530,7 @@ export const getTemplateCached = (id, options = {}) =>
   });
 export const saveProject = (data) => api.post('/projects/save', data);
 export const getProject = (id) => api.get(`/projects/${id}`);
+export const patchProjectRegions = (id, version, changes) => api.patch(`/projects/${id}/regions`, { version, ...changes });
 export const deleteProject = (id) => api.delete(`/projects/${id}`);
 export const submitWorkOrder = (data) => api.post('/work-orders/submit', data);
 export const getMyProjects = () => api.get('/projects');
@@ -0,0 +1,22 @@
+// Resized copies of uploaded images, served by the backend's /uploads/* routes
+// (?w=<px>, format negotiated from the Accept header). Anything else — data URLs,
+// external CDNs, videos, SVG — is returned untouched.
+const VARIANT_PATH = /\/uploads\/(products|gallery|templates)\/[^?#]+\.(jpe?g|png|webp)$/i
+
+const isVariantCapable = (url) => {
+  const value = String(url || '').trim()
+  if (!value || value.startsWith('data:') || value.startsWith('blob:')) return false
+  const path = value.split(/[?#]/, 1)[0]
+  return VARIANT_PATH.test(path)
+}
+
+export const withImageWidth = (url, width) => {
+  if (!isVariantCapable(url) || !width) return url
+  const separator = String(url).includes('?') ? '&' : '?'
+  return `${url}${separator}w=${Math.round(width)}`
+}
+
+export const imageSrcSet = (url, widths = [320, 640, 960]) => {
+  if (!isVariantCapable(url)) return undefined
+  return widths.map((width) => `${withImageWidth(url, width)} ${width}w`).join(', ')
+}